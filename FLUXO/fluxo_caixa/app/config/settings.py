@@ -31,6 +31,12 @@ else:
     ASSETS_DIR = PROJECT_ROOT / "assets"
 
 DATABASE_PATH = DATA_DIR / "fluxo_caixa.db"
+LOGS_DIR = DATA_DIR / "logs"
+CEP_DB_PATH = DATA_DIR / "ceps.db"
+# Dump opcional de CEPs (.csv ou .db), nao distribuido com a aplicacao: se existir
+# e carregado com a base vazia (ou a qualquer momento por scripts/importar_ceps.py).
+# Sem ele ceps.db e so o cache persistido das consultas ao ViaCEP.
+CEP_DUMP_PATH = ASSETS_DIR / "ceps.csv"
 
 for folder in (DATA_DIR, OUTPUT_DIR, ASSETS_DIR):
     folder.mkdir(parents=True, exist_ok=True)
@@ -45,10 +51,19 @@ class Settings:
     THEME = "cosmo"
 
     DB_PATH = DATABASE_PATH
+    CEP_DB_PATH = CEP_DB_PATH
+    CEP_DUMP_PATH = CEP_DUMP_PATH
     DATA_DIR = DATA_DIR
     OUTPUT_DIR = OUTPUT_DIR
     ASSETS_DIR = ASSETS_DIR
 
+    # Consultas SQL acima do limite vao para o log com o EXPLAIN QUERY PLAN
+    LIMITE_CONSULTA_LENTA_MS = 250.0
+    LOG_CONSULTAS_LENTAS = LOGS_DIR / "consultas_lentas.log"
+
+    # Processos que renderizam as partes de PDFs grandes (um nucleo fica para a interface)
+    PROCESSOS_PDF = max(1, (os.cpu_count() or 1) - 1)
+
     @classmethod
     def get_database_path(cls) -> str:
         """Retorna caminho do banco de dados."""
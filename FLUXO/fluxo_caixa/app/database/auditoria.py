@@ -0,0 +1,262 @@
+"""
+Auditoria - Gravacao assincrona e em lote dos eventos de auditoria
+Eventos ficam em fila na memoria e sao gravados com executemany
+"""
+import atexit
+import json
+import sqlite3
+import threading
+import weakref
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+INSERIR_AUDITORIA_SQL = """
+    INSERT INTO auditoria (
+        tabela, operacao, registro_id, dados_anteriores, dados_novos, usuario, data_operacao
+    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+Evento = Tuple[str, str, Optional[int], Optional[Dict], Optional[Dict], Optional[str], str]
+
+
+def _agora_utc() -> str:
+    """Mesmo formato e fuso do CURRENT_TIMESTAMP do SQLite"""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _json(dados: Optional[Dict]) -> Optional[str]:
+    return json.dumps(dados, ensure_ascii=False, default=str) if dados else None
+
+
+def _mesmo_valor(antigo, novo) -> bool:
+    """Compara na forma em que os valores vao para o JSON (datetime vira texto)"""
+    if isinstance(antigo, (int, float)) and isinstance(novo, (int, float)):
+        # 10 e 10.0 (coluna REAL lida do banco) sao o mesmo valor
+        return antigo == novo
+    return json.dumps(antigo, ensure_ascii=False, default=str) == json.dumps(novo, ensure_ascii=False, default=str)
+
+
+def calcular_diferencas(anteriores: Dict, novos: Dict) -> Tuple[Dict, Dict]:
+    """Mantem apenas os campos alterados entre os dois snapshots.
+
+    So os campos de `novos` sao comparados: campo ausente do snapshot novo
+    nao foi alterado. A comparacao usa a forma serializada, entao um
+    datetime e o mesmo horario em texto nao contam como alteracao.
+    'id' e ignorado: ja fica em registro_id.
+    """
+    antes, depois = {}, {}
+    for campo, valor_novo in novos.items():
+        if campo == "id":
+            continue
+        valor_antigo = anteriores.get(campo)
+        if not _mesmo_valor(valor_antigo, valor_novo):
+            antes[campo] = valor_antigo
+            depois[campo] = valor_novo
+    return antes, depois
+
+
+def criar_evento(
+    tabela: str,
+    operacao: str,
+    registro_id: Optional[int] = None,
+    dados_anteriores: Optional[Dict] = None,
+    dados_novos: Optional[Dict] = None,
+    usuario: Optional[str] = None,
+) -> Evento:
+    """Monta evento registrando o horario da operacao (nao o do flush)"""
+    return (
+        tabela,
+        operacao,
+        registro_id,
+        dict(dados_anteriores) if dados_anteriores else None,
+        dict(dados_novos) if dados_novos else None,
+        usuario,
+        _agora_utc(),
+    )
+
+
+def parametros_evento(evento: Evento) -> tuple:
+    """Converte evento em parametros do INSERT.
+
+    UPDATE grava so o diff por campo; INSERT e DELETE mantem o snapshot.
+    """
+    tabela, operacao, registro_id, anteriores, novos, usuario, data = evento
+    if anteriores and novos:
+        anteriores, novos = calcular_diferencas(anteriores, novos)
+    return (tabela, operacao, registro_id, _json(anteriores), _json(novos), usuario, data)
+
+
+def gravar_eventos(conn: sqlite3.Connection, eventos: List[Evento]) -> None:
+    """Grava eventos na conexao informada, sem commit"""
+    conn.executemany(INSERIR_AUDITORIA_SQL, [parametros_evento(e) for e in eventos])
+
+
+class GravadorAuditoria:
+    """Fila de auditoria descarregada em lote por tempo ou por tamanho.
+
+    O descarregamento roda numa thread de fundo com conexao propria. Ao
+    encerrar (fechar() ou atexit) os eventos pendentes sao gravados.
+    Lote que falha e regravado evento a evento: o evento que nao entra e
+    descartado com aviso, sem travar os demais. A fila guarda no maximo
+    `limite_fila` eventos; acima disso os mais antigos sao descartados.
+    """
+
+    def __init__(
+        self, db_path, intervalo: float = 1.0, limite_lote: int = 200, limite_fila: int = 50_000
+    ):
+        self.db_path = Path(db_path)
+        self.intervalo = intervalo
+        self.limite_lote = limite_lote
+        self.limite_fila = limite_fila
+        self.descartados = 0
+        self._fila: List[Evento] = []
+        self._cond = threading.Condition()
+        self._lock_escrita = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._encerrando = False
+        _gravadores.add(self)
+        # Gravador coletado com eventos na fila: grava o resto (a lista nao e
+        # trocada, so esvaziada, para o finalizador enxergar a mesma)
+        finalizador = weakref.finalize(self, _gravar_restantes, self.db_path, self._fila)
+        finalizador.atexit = False  # na saida quem grava e fechar()
+
+    def registrar(self, evento: Evento) -> None:
+        """Enfileira evento; acorda a thread ao atingir o limite do lote"""
+        with self._cond:
+            self._fila.append(evento)
+            self._limitar_fila()
+            encerrado = self._encerrando
+            if not encerrado:
+                if self._thread is None:
+                    # A thread so guarda referencia fraca: nao prende o gravador
+                    self._thread = threading.Thread(
+                        target=GravadorAuditoria._executar, args=(weakref.ref(self),),
+                        name="auditoria", daemon=True,
+                    )
+                    self._thread.start()
+                if len(self._fila) >= self.limite_lote:
+                    self._cond.notify()
+        if encerrado:
+            # Depois de fechar() a gravacao volta a ser sincrona
+            self.descarregar()
+
+    def pendentes(self) -> int:
+        """Quantidade de eventos aguardando gravacao"""
+        with self._cond:
+            return len(self._fila)
+
+    def _limitar_fila(self) -> None:
+        """Descarta os eventos mais antigos acima de limite_fila (chamar com _cond)"""
+        excesso = len(self._fila) - self.limite_fila
+        if excesso > 0:
+            del self._fila[:excesso]
+            antes, self.descartados = self.descartados, self.descartados + excesso
+            # Um aviso a cada 1000 descartes, nao um por evento
+            if antes == 0 or antes // 1000 != self.descartados // 1000:
+                print(f"[AVISO] Fila de auditoria cheia: {self.descartados} evento(s) antigo(s) descartado(s)")
+
+    def _reenfileirar(self, eventos: List[Evento]) -> None:
+        with self._cond:
+            self._fila[:0] = eventos
+            self._limitar_fila()
+
+    def descarregar(self) -> int:
+        """Grava imediatamente os eventos pendentes e retorna quantos"""
+        with self._lock_escrita:
+            with self._cond:
+                eventos = self._fila[:]
+                self._fila.clear()
+            if not eventos:
+                return 0
+            conn = sqlite3.connect(self.db_path)
+            try:
+                try:
+                    gravar_eventos(conn, eventos)
+                    conn.commit()
+                    return len(eventos)
+                except sqlite3.OperationalError:
+                    # Banco ocupado/travado: transitorio, o lote volta inteiro
+                    conn.rollback()
+                    self._reenfileirar(eventos)
+                    raise
+                except Exception:
+                    conn.rollback()
+                return self._gravar_um_a_um(conn, eventos)
+            finally:
+                conn.close()
+
+    def _gravar_um_a_um(self, conn: sqlite3.Connection, eventos: List[Evento]) -> int:
+        """Regrava um lote que falhou; descarta (com aviso) so os eventos invalidos"""
+        gravados = 0
+        for i, evento in enumerate(eventos):
+            try:
+                gravar_eventos(conn, [evento])
+                conn.commit()
+                gravados += 1
+            except sqlite3.OperationalError:
+                conn.rollback()
+                self._reenfileirar(eventos[i:])
+                raise
+            except Exception as e:
+                conn.rollback()
+                self.descartados += 1
+                tabela, operacao, registro_id = evento[:3]
+                print(f"[AVISO] Evento de auditoria descartado ({operacao} {tabela} {registro_id}): {e}")
+        return gravados
+
+    @staticmethod
+    def _executar(referencia: "weakref.ref[GravadorAuditoria]") -> None:
+        aguardar = False
+        while True:
+            gravador = referencia()
+            if gravador is None:
+                return
+            with gravador._cond:
+                if not gravador._encerrando and (aguardar or len(gravador._fila) < gravador.limite_lote):
+                    gravador._cond.wait(gravador.intervalo)
+                if gravador._encerrando:
+                    return
+            try:
+                gravador.descarregar()
+                aguardar = False
+            except sqlite3.Error as e:
+                print(f"[AVISO] Falha ao gravar auditoria, nova tentativa em {gravador.intervalo}s: {e}")
+                aguardar = True
+            del gravador
+
+    def fechar(self) -> None:
+        """Para a thread de fundo e grava o que estiver pendente"""
+        with self._cond:
+            self._encerrando = True
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        self.descarregar()
+
+
+def _gravar_restantes(db_path: Path, fila: List[Evento]) -> None:
+    """Finalizador de GravadorAuditoria: grava o que ficou na fila"""
+    if not fila:
+        return
+    try:
+        conn = sqlite3.connect(db_path)
+        try:
+            gravar_eventos(conn, fila)
+            conn.commit()
+        finally:
+            conn.close()
+        fila.clear()
+    except Exception as e:
+        print(f"[AVISO] {len(fila)} evento(s) de auditoria perdido(s): {e}")
+
+
+# Um unico hook de atexit para todos os gravadores; o WeakSet nao os mantem vivos
+_gravadores: "weakref.WeakSet[GravadorAuditoria]" = weakref.WeakSet()
+
+
+@atexit.register
+def _fechar_gravadores() -> None:
+    for gravador in list(_gravadores):
+        gravador.fechar()
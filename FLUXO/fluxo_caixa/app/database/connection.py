@@ -1,11 +1,9 @@
 from app.database.database import Database
-from app.database.schema_unificado import CRIAR_TABELAS_SQL
 
 
-def init_db(db_path=None):
-    db = Database(db_path=db_path)
-    db.executar_script(CRIAR_TABELAS_SQL)
-    return db
+def init_db(db_path=None):
+    # Database() ja aplica as migracoes pendentes do schema
+    return Database(db_path=db_path)
 
     
 
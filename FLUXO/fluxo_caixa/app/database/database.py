@@ -2,12 +2,16 @@
 Database - Gerencia conexão e operações com SQLite
 Schema completo com categorias, subcategorias e relacionamentos
 """
-import json
 import sqlite3
+import threading
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
 
 from app.config.settings import Settings
+from app.database.auditoria import GravadorAuditoria, criar_evento, gravar_eventos
+from app.database.instrumentacao import Instrumentacao, conectar, instrumentacao_padrao
+from app.database.linhas import TAMANHO_LOTE, FabricaModelos, Montador, como_dict, ler_em_lotes
+from app.database.particoes import ParticoesLancamentos
 
 DATABASE_PATH = Path(Settings.get_database_path())
 
@@ -15,34 +19,46 @@ DATABASE_PATH = Path(Settings.get_database_path())
 class Database:
     """Gerencia conexão e operações com SQLite"""
 
-    def __init__(self, db_path=None):
+    def __init__(
+        self,
+        db_path=None,
+        auditoria_estrita: bool = False,
+        instrumentacao: Optional[Instrumentacao] = None,
+    ):
         if db_path is None:
             db_path = DATABASE_PATH
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Estrita: auditoria gravada na mesma transacao da alteracao
+        self.auditoria_estrita = auditoria_estrita
+        # Tempo/linhas/origem de cada instrucao e log de lentas (ver instrumentacao.py)
+        self.instrumentacao = instrumentacao or instrumentacao_padrao()
+        self.auditoria = GravadorAuditoria(self.db_path)
+        # Anos fechados de lancamentos ficam em bancos anuais anexados sob demanda
+        self.particoes = ParticoesLancamentos(self)
+        # Conexao so de leitura do PRAGMA data_version (ver versao_dados)
+        self._conn_versao: Optional[sqlite3.Connection] = None
+        self._lock_versao = threading.Lock()
         self.init_db()
 
     def init_db(self):
-        """Cria tabelas usando schema unificado"""
-        from app.database.schema_unificado import CRIAR_TABELAS_SQL
-
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        """Aplica migracoes pendentes do schema (uma consulta se atualizado)"""
+        from app.database.migracoes import aplicar_migracoes
 
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
         try:
-            # Executa o schema unificado completo
-            cursor.executescript(CRIAR_TABELAS_SQL)
-            conn.commit()
-            print(f"[OK] Base de dados inicializada com schema unificado em: {self.db_path}")
+            aplicadas = aplicar_migracoes(conn)
+            if aplicadas:
+                versoes = ", ".join(str(m.versao) for m in aplicadas)
+                print(f"[OK] Migracoes aplicadas ({versoes}) em: {self.db_path}")
         except sqlite3.Error as e:
-            conn.rollback()
             raise Exception(f"Erro ao inicializar banco de dados: {e}")
         finally:
             conn.close()
 
     def get_connection(self):
         """Retorna conexão com banco"""
-        conn = sqlite3.connect(self.db_path)
+        conn = conectar(self.db_path, self.instrumentacao)
         conn.row_factory = sqlite3.Row
         conn.execute("PRAGMA foreign_keys = ON")
         return conn
@@ -69,30 +85,69 @@ class Database:
         dados_novos: Optional[Dict] = None,
         usuario: Optional[str] = None,
     ) -> None:
-        """Registra operacao de auditoria"""
-        query = """
-            INSERT INTO auditoria (tabela, operacao, registro_id, dados_anteriores, dados_novos, usuario)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """
-        params = (
-            tabela,
-            operacao,
-            registro_id,
-            json.dumps(dados_anteriores, ensure_ascii=False) if dados_anteriores else None,
-            json.dumps(dados_novos, ensure_ascii=False) if dados_novos else None,
-            usuario,
+        """Enfileira operacao de auditoria (gravada em lote em segundo plano)"""
+        self.auditoria.registrar(
+            criar_evento(tabela, operacao, registro_id, dados_anteriores, dados_novos, usuario)
         )
+
+    def executar_com_auditoria(
+        self,
+        query: str,
+        params: tuple,
+        tabela: str,
+        operacao: str,
+        registro_id: Optional[int] = None,
+        dados_anteriores: Optional[Dict] = None,
+        dados_novos: Optional[Dict] = None,
+        usuario: Optional[str] = None,
+    ) -> int:
+        """Executa alteracao e registra auditoria com um unico commit.
+
+        Retorna o ID inserido (INSERT) ou o numero de linhas afetadas.
+        No modo estrito a auditoria entra na mesma transacao; caso contrario
+        vai para a fila do gravador em lote.
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
         try:
             cursor.execute(query, params)
+            resultado = cursor.lastrowid if operacao == 'INSERT' else cursor.rowcount
+            if registro_id is None:
+                registro_id = cursor.lastrowid
+            evento = criar_evento(tabela, operacao, registro_id, dados_anteriores, dados_novos, usuario)
+            if self.auditoria_estrita:
+                gravar_eventos(conn, [evento])
             conn.commit()
         except sqlite3.Error as e:
             conn.rollback()
-            raise Exception(f"Erro ao registrar auditoria: {e}")
+            raise Exception(f"Erro ao executar alteracao auditada: {e}")
         finally:
             conn.close()
 
+        if not self.auditoria_estrita:
+            self.auditoria.registrar(evento)
+        return resultado
+
+    def versao_dados(self) -> int:
+        """Numero que muda a cada escrita confirmada no banco.
+
+        PRAGMA data_version numa conexao de longa duracao que nunca escreve:
+        o valor muda quando qualquer outra conexao (deste ou de outro
+        processo) faz commit. Serve para invalidar caches de leitura.
+        """
+        with self._lock_versao:
+            if self._conn_versao is None:
+                self._conn_versao = sqlite3.connect(self.db_path, check_same_thread=False)
+            return self._conn_versao.execute("PRAGMA data_version").fetchone()[0]
+
+    def fechar(self) -> None:
+        """Grava a auditoria pendente (chamar ao encerrar a aplicacao)"""
+        self.auditoria.fechar()
+        with self._lock_versao:
+            if self._conn_versao is not None:
+                self._conn_versao.close()
+                self._conn_versao = None
+
     def backup(self, caminho_destino) -> Path:
         """Cria backup do banco de dados"""
         destino = Path(caminho_destino)
@@ -151,6 +206,40 @@ class Database:
         finally:
             conn.close()
 
+    def obter_modelos(self, query: str, montar: Montador, params: tuple = ()) -> List[Any]:
+        """Executa query e retorna modelos montados direto das tuplas (ver linhas.py)"""
+        conn = self.get_connection()
+        conn.row_factory = FabricaModelos(montar)
+        try:
+            return conn.execute(query, params).fetchall()
+        except sqlite3.Error as e:
+            raise Exception(f"Erro ao obter dados: {e}")
+        finally:
+            conn.close()
+
+    def iterar(
+        self,
+        query: str,
+        params: tuple = (),
+        batch_size: int = TAMANHO_LOTE,
+        em_lotes: bool = False,
+        montar: Montador = como_dict,
+    ) -> Iterator:
+        """Le o resultado aos poucos (fetchmany) em vez de montar a lista inteira.
+
+        Gera uma linha por vez ou, com em_lotes, listas de ate batch_size
+        linhas. A memoria fica limitada ao lote; a conexao continua aberta
+        ate o gerador se esgotar ou ser descartado.
+        """
+        conn = self.get_connection()
+        conn.row_factory = FabricaModelos(montar)
+        try:
+            yield from ler_em_lotes(conn.execute(query, params), batch_size, em_lotes)
+        except sqlite3.Error as e:
+            raise Exception(f"Erro ao obter dados: {e}")
+        finally:
+            conn.close()
+
     def inserir(self, query: str, params: tuple = ()) -> int:
         """Insere dados e retorna o ID da linha"""
         conn = self.get_connection()
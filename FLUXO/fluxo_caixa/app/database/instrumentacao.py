@@ -0,0 +1,482 @@
+"""
+Instrumentacao - Tempo, linhas e origem de cada instrucao SQL
+Conexao/cursor instrumentados, estatisticas em memoria e log de consultas lentas
+"""
+import json
+import logging
+import math
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from types import CodeType
+from typing import Callable, Deque, Dict, List, Optional
+
+# Modulos cujos frames nao contam como origem da consulta
+MODULOS_INTERNOS = ("app.database", "app.utils", "sqlite3")
+PROFUNDIDADE_ORIGEM = 25
+AMOSTRAS_POR_CONSULTA = 1024
+MAX_CONSULTAS_LENTAS = 200
+
+_LITERAL_TEXTO = re.compile(r"'(?:[^']|'')*'")
+_LITERAL_NUMERO = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_LISTA_IN = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_COMENTARIO = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_ESPACOS = re.compile(r"\s+")
+_EXPLICAVEIS = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+@lru_cache(maxsize=2048)
+def normalizar_sql(sql: str) -> str:
+    """SQL sem literais, comentarios e espacos extras: agrupa a mesma consulta
+
+    Listas IN de tamanhos diferentes viram uma so (`IN (...)`).
+    """
+    sql = _COMENTARIO.sub(" ", sql)
+    sql = _LITERAL_TEXTO.sub("?", sql)
+    sql = _LITERAL_NUMERO.sub("?", sql)
+    sql = _LISTA_IN.sub("IN (...)", sql)
+    return _ESPACOS.sub(" ", sql).strip()
+
+
+_origem_interna: Dict[CodeType, bool] = {}
+
+
+def _interno(frame) -> bool:
+    codigo = frame.f_code
+    interno = _origem_interna.get(codigo)
+    if interno is None:
+        modulo = frame.f_globals.get("__name__", "")
+        interno = modulo.startswith(MODULOS_INTERNOS)
+        _origem_interna[codigo] = interno
+    return interno
+
+
+def _nome(frame) -> str:
+    codigo = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}.{getattr(codigo, 'co_qualname', codigo.co_name)}"
+
+
+def _origem() -> str:
+    """Metodo que disparou a consulta: primeiro frame publico fora da camada de banco
+
+    Helpers privados (`_obter_todos`), lambdas e comprehensions sao pulados
+    para que a origem seja o metodo do servico (ex.: ServicoLancamento.buscar).
+    """
+    frame = sys._getframe(1)
+    primeiro = None
+    for _ in range(PROFUNDIDADE_ORIGEM):
+        if frame is None:
+            break
+        if not _interno(frame):
+            nome = frame.f_code.co_name
+            if primeiro is None:
+                primeiro = frame
+            if not nome.startswith(("_", "<")) or nome.startswith("__"):
+                return _nome(frame)
+        frame = frame.f_back
+    return _nome(primeiro) if primeiro is not None else "?"
+
+
+def _percentil(ordenados: List[float], fracao: float) -> float:
+    """Percentil por posicao mais proxima (amostra ja ordenada)"""
+    if not ordenados:
+        return 0.0
+    posicao = max(0, min(len(ordenados), math.ceil(fracao * len(ordenados))) - 1)
+    return ordenados[posicao]
+
+
+@dataclass
+class RegistroConsulta:
+    """Uma instrucao executada"""
+
+    sql: str  # normalizado
+    parametros: int
+    duracao: float  # segundos: execucao + leitura das linhas
+    linhas: int
+    origem: str
+    momento: float = field(default_factory=time.time)
+    plano: Optional[str] = None
+
+
+class _Acumulado:
+    __slots__ = ("chamadas", "total", "maximo", "linhas", "lentas", "amostras", "origens")
+
+    def __init__(self):
+        self.chamadas = 0
+        self.total = 0.0
+        self.maximo = 0.0
+        self.linhas = 0
+        self.lentas = 0
+        self.amostras: Deque[float] = deque(maxlen=AMOSTRAS_POR_CONSULTA)
+        self.origens: Counter = Counter()
+
+
+class EstatisticasConsultas:
+    """Contadores e percentis por consulta normalizada, no processo.
+
+    Percentis usam as ultimas AMOSTRAS_POR_CONSULTA execucoes de cada
+    consulta; contagens e totais valem desde o inicio (ou desde limpar).
+    """
+
+    def __init__(self):
+        self._por_sql: Dict[str, _Acumulado] = {}
+        self._lentas: Deque[RegistroConsulta] = deque(maxlen=MAX_CONSULTAS_LENTAS)
+        self._lock = threading.Lock()
+
+    def registrar(self, registro: RegistroConsulta, lenta: bool = False) -> None:
+        with self._lock:
+            acumulado = self._por_sql.get(registro.sql)
+            if acumulado is None:
+                acumulado = self._por_sql[registro.sql] = _Acumulado()
+            acumulado.chamadas += 1
+            acumulado.total += registro.duracao
+            acumulado.maximo = max(acumulado.maximo, registro.duracao)
+            acumulado.linhas += registro.linhas
+            acumulado.amostras.append(registro.duracao)
+            acumulado.origens[registro.origem] += 1
+            if lenta:
+                acumulado.lentas += 1
+                self._lentas.append(registro)
+
+    def resumo(self) -> List[Dict]:
+        """Uma linha por consulta, da que mais consumiu tempo para a que menos (ms)"""
+        with self._lock:
+            itens = [
+                (sql, a.chamadas, a.total, a.maximo, a.linhas, a.lentas, sorted(a.amostras),
+                 a.origens.most_common())
+                for sql, a in self._por_sql.items()
+            ]
+        linhas = []
+        for sql, chamadas, total, maximo, n_linhas, lentas, amostras, origens in itens:
+            linhas.append({
+                "sql": sql,
+                "chamadas": chamadas,
+                "total_ms": total * 1000,
+                "media_ms": total * 1000 / chamadas,
+                "p50_ms": _percentil(amostras, 0.50) * 1000,
+                "p95_ms": _percentil(amostras, 0.95) * 1000,
+                "p99_ms": _percentil(amostras, 0.99) * 1000,
+                "max_ms": maximo * 1000,
+                "linhas": n_linhas,
+                "lentas": lentas,
+                "origens": dict(origens),
+            })
+        linhas.sort(key=lambda l: l["total_ms"], reverse=True)
+        return linhas
+
+    def lentas(self) -> List[RegistroConsulta]:
+        """Ultimas consultas acima do limite, da mais recente para a mais antiga"""
+        with self._lock:
+            return list(reversed(self._lentas))
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._por_sql.clear()
+            self._lentas.clear()
+
+    def despejar(self, caminho) -> Path:
+        """Grava resumo e consultas lentas em JSON"""
+        destino = Path(caminho)
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        dados = {
+            "gerado_em": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "consultas": self.resumo(),
+            "lentas": [asdict(r) for r in self.lentas()],
+        }
+        destino.write_text(json.dumps(dados, indent=2, ensure_ascii=False), encoding="utf-8")
+        return destino
+
+
+class Instrumentacao:
+    """Recebe cada instrucao concluida: estatisticas, log de lentas e ouvintes.
+
+    Instrucoes com duracao >= limite_lenta_ms tem o EXPLAIN QUERY PLAN
+    gravado no log (arquivo_log) e guardado no registro. Ouvintes recebem
+    todo RegistroConsulta (ex.: para medir uma tela especifica).
+    Com explicar_sempre, todo registro leva o plano (verificacao de planos).
+    """
+
+    def __init__(
+        self,
+        limite_lenta_ms: float = 250.0,
+        arquivo_log: Optional[Path] = None,
+        ativa: bool = True,
+        explicar_sempre: bool = False,
+    ):
+        self.ativa = ativa
+        self.explicar_sempre = explicar_sempre
+        self.limite_lenta_ms = limite_lenta_ms
+        self.arquivo_log = Path(arquivo_log) if arquivo_log else None
+        self.estatisticas = EstatisticasConsultas()
+        self._ouvintes: List[Callable[[RegistroConsulta], None]] = []
+        self._log: Optional[logging.Logger] = None
+
+    def adicionar_ouvinte(self, ouvinte: Callable[[RegistroConsulta], None]) -> None:
+        self._ouvintes.append(ouvinte)
+
+    def remover_ouvinte(self, ouvinte: Callable[[RegistroConsulta], None]) -> None:
+        if ouvinte in self._ouvintes:
+            self._ouvintes.remove(ouvinte)
+
+    def concluir(self, conn: sqlite3.Connection, pendente: "_Pendente") -> None:
+        """Registra a instrucao; chamada pelo cursor quando termina de ler as linhas"""
+        registro = RegistroConsulta(
+            normalizar_sql(pendente.sql), pendente.parametros, pendente.duracao,
+            pendente.linhas, pendente.origem,
+        )
+        lenta = registro.duracao * 1000 >= self.limite_lenta_ms
+        if pendente.explicavel and (lenta or self.explicar_sempre):
+            registro.plano = explicar(conn, pendente.sql, pendente.valores)
+        if lenta:
+            self._registrar_lenta(registro)
+        self.estatisticas.registrar(registro, lenta)
+        for ouvinte in list(self._ouvintes):
+            try:
+                ouvinte(registro)
+            except Exception:
+                # Diagnostico nunca derruba a consulta
+                pass
+
+    def _registrar_lenta(self, registro: RegistroConsulta) -> None:
+        if self.arquivo_log is None:
+            return
+        if self._log is None:
+            self.arquivo_log.parent.mkdir(parents=True, exist_ok=True)
+            log = logging.getLogger(f"{__name__}.lentas.{self.arquivo_log}")
+            log.propagate = False
+            log.setLevel(logging.WARNING)
+            if not log.handlers:
+                handler = logging.FileHandler(self.arquivo_log, encoding="utf-8", delay=True)
+                handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+                log.addHandler(handler)
+            self._log = log
+        mensagem = (
+            f"{registro.duracao * 1000:.1f} ms | {registro.linhas} linhas | "
+            f"{registro.parametros} parametros | {registro.origem}\n    {registro.sql}"
+        )
+        if registro.plano:
+            mensagem += "\n    plano:\n" + "\n".join(f"      {l}" for l in registro.plano.splitlines())
+        self._log.warning(mensagem)
+
+
+def explicar(conn: sqlite3.Connection, sql: str, parametros=()) -> str:
+    """EXPLAIN QUERY PLAN como arvore indentada (na mesma conexao: ve as particoes anexadas)"""
+    try:
+        cursor = sqlite3.Connection.cursor(conn, sqlite3.Cursor)
+        cursor.row_factory = None  # tuplas, qualquer que seja o row_factory da conexao
+        rows = cursor.execute(f"EXPLAIN QUERY PLAN {sql}", parametros).fetchall()
+    except (sqlite3.Error, sqlite3.ProgrammingError) as e:
+        return f"(plano indisponivel: {e})"
+    profundidade = {0: -1}
+    linhas = []
+    for id_, pai, _, detalhe in rows:
+        profundidade[id_] = profundidade.get(pai, -1) + 1
+        linhas.append(f"{'  ' * profundidade[id_]}{detalhe}")
+    return "\n".join(linhas)
+
+
+class _Pendente:
+    """Instrucao executada cujas linhas ainda podem estar sendo lidas"""
+
+    __slots__ = ("instrumentacao", "sql", "valores", "parametros", "origem",
+                 "duracao", "linhas", "explicavel")
+
+    def __init__(self, instrumentacao, sql, valores, parametros, origem, duracao, explicavel=True):
+        self.instrumentacao = instrumentacao
+        self.sql = sql
+        self.valores = valores
+        self.parametros = parametros
+        self.origem = origem
+        self.duracao = duracao
+        self.linhas = 0
+        self.explicavel = explicavel and sql.lstrip().upper().startswith(_EXPLICAVEIS)
+
+
+class CursorInstrumentado(sqlite3.Cursor):
+    """Cursor que mede execucao e leitura e registra ao terminar de ler.
+
+    Consultas com linhas so sao registradas quando o resultado se esgota,
+    quando o cursor executa outra instrucao, fecha ou a conexao fecha,
+    para que o tempo de leitura e a quantidade de linhas entrem no registro.
+    """
+
+    _pendente: Optional[_Pendente] = None
+
+    def _instrumentacao(self) -> Optional[Instrumentacao]:
+        instrumentacao = getattr(self.connection, "instrumentacao", None)
+        return instrumentacao if instrumentacao is not None and instrumentacao.ativa else None
+
+    def _iniciar(self, pendente: _Pendente) -> None:
+        if self.description is None:
+            # DML/DDL: nada para ler, registra ja
+            pendente.linhas = max(self.rowcount, 0)
+            pendente.instrumentacao.concluir(self.connection, pendente)
+        else:
+            self._pendente = pendente
+            self.connection._abertos.add(self)
+
+    def _concluir(self) -> None:
+        pendente = self._pendente
+        if pendente is not None:
+            self._pendente = None
+            self.connection._abertos.discard(self)
+            pendente.instrumentacao.concluir(self.connection, pendente)
+
+    def execute(self, sql, parameters=()):
+        self._concluir()
+        instrumentacao = self._instrumentacao()
+        if instrumentacao is None:
+            return super().execute(sql, parameters)
+        origem = _origem()
+        inicio = time.perf_counter()
+        super().execute(sql, parameters)
+        self._iniciar(_Pendente(
+            instrumentacao, sql, parameters, len(parameters), origem, time.perf_counter() - inicio
+        ))
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._concluir()
+        instrumentacao = self._instrumentacao()
+        if instrumentacao is None:
+            return super().executemany(sql, seq_of_parameters)
+        origem = _origem()
+        # Conta os parametros sem materializar geradores; guarda o 1o para o EXPLAIN
+        contagem = [0, ()]
+
+        def contar():
+            for valores in seq_of_parameters:
+                if not contagem[0]:
+                    contagem[1] = valores
+                contagem[0] += len(valores)
+                yield valores
+
+        inicio = time.perf_counter()
+        super().executemany(sql, contar())
+        self._iniciar(_Pendente(
+            instrumentacao, sql, contagem[1], contagem[0], origem, time.perf_counter() - inicio
+        ))
+        return self
+
+    def executescript(self, sql_script):
+        self._concluir()
+        instrumentacao = self._instrumentacao()
+        if instrumentacao is None:
+            return super().executescript(sql_script)
+        origem = _origem()
+        inicio = time.perf_counter()
+        super().executescript(sql_script)
+        instrumentacao.concluir(self.connection, _Pendente(
+            instrumentacao, sql_script, (), 0, origem, time.perf_counter() - inicio, explicavel=False
+        ))
+        return self
+
+    def fetchone(self):
+        pendente = self._pendente
+        if pendente is None:
+            return super().fetchone()
+        inicio = time.perf_counter()
+        linha = super().fetchone()
+        pendente.duracao += time.perf_counter() - inicio
+        if linha is None:
+            self._concluir()
+        else:
+            pendente.linhas += 1
+        return linha
+
+    def fetchmany(self, size=None):
+        pendente = self._pendente
+        tamanho = self.arraysize if size is None else size
+        if pendente is None:
+            return super().fetchmany(tamanho)
+        inicio = time.perf_counter()
+        linhas = super().fetchmany(tamanho)
+        pendente.duracao += time.perf_counter() - inicio
+        pendente.linhas += len(linhas)
+        if len(linhas) < tamanho:
+            self._concluir()
+        return linhas
+
+    def fetchall(self):
+        pendente = self._pendente
+        if pendente is None:
+            return super().fetchall()
+        inicio = time.perf_counter()
+        linhas = super().fetchall()
+        pendente.duracao += time.perf_counter() - inicio
+        pendente.linhas += len(linhas)
+        self._concluir()
+        return linhas
+
+    def __next__(self):
+        pendente = self._pendente
+        if pendente is None:
+            return super().__next__()
+        inicio = time.perf_counter()
+        try:
+            linha = super().__next__()
+        except StopIteration:
+            pendente.duracao += time.perf_counter() - inicio
+            self._concluir()
+            raise
+        pendente.duracao += time.perf_counter() - inicio
+        pendente.linhas += 1
+        return linha
+
+    def close(self):
+        self._concluir()
+        super().close()
+
+
+class ConexaoInstrumentada(sqlite3.Connection):
+    """Conexao cujos cursores (inclusive os de execute) sao instrumentados"""
+
+    instrumentacao: Optional[Instrumentacao] = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Cursores com leitura em andamento, registrados ao fechar a conexao
+        self._abertos = set()
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or CursorInstrumentado)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, parameters):
+        return self.cursor().executemany(sql, parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+    def close(self):
+        for cursor in list(self._abertos):
+            cursor._concluir()
+        super().close()
+
+
+def conectar(caminho, instrumentacao: Optional[Instrumentacao], **kwargs) -> sqlite3.Connection:
+    """sqlite3.connect com conexao instrumentada"""
+    conn = sqlite3.connect(caminho, factory=ConexaoInstrumentada, **kwargs)
+    conn.instrumentacao = instrumentacao
+    return conn
+
+
+_padrao: Optional[Instrumentacao] = None
+
+
+def instrumentacao_padrao() -> Instrumentacao:
+    """Instancia do processo (limite e arquivo de log das Settings)"""
+    global _padrao
+    if _padrao is None:
+        from app.config.settings import Settings
+
+        _padrao = Instrumentacao(Settings.LIMITE_CONSULTA_LENTA_MS, Settings.LOG_CONSULTAS_LENTAS)
+    return _padrao
@@ -0,0 +1,52 @@
+"""
+Linhas - Modelos montados direto das tuplas do cursor
+row_factory sem sqlite3.Row nem dict intermediario por linha e leitura em lotes
+"""
+import sqlite3
+from typing import Any, Callable, Iterator, Sequence
+
+# montar(colunas) -> funcao tupla -> modelo (ex.: Lancamento.conversor)
+Montador = Callable[[Sequence[str]], Callable[[tuple], Any]]
+
+# Linhas por fetchmany nas leituras em streaming (Database.iterar)
+TAMANHO_LOTE = 1_000
+
+
+def como_dict(colunas: Sequence[str]) -> Callable[[tuple], dict]:
+    """Montador padrao: dict coluna -> valor, como Database.obter_todos"""
+    colunas = tuple(colunas)
+    return lambda linha: dict(zip(colunas, linha))
+
+
+def ler_em_lotes(cursor: sqlite3.Cursor, batch_size: int, em_lotes: bool = False) -> Iterator:
+    """Linhas (ou listas de ate batch_size linhas) do cursor, via fetchmany"""
+    while True:
+        lote = cursor.fetchmany(batch_size)
+        if not lote:
+            return
+        if em_lotes:
+            yield lote
+        else:
+            yield from lote
+
+
+class FabricaModelos:
+    """row_factory que converte cada tupla com o conversor da instrucao.
+
+    `montar` recebe os nomes das colunas e so e chamado quando a instrucao
+    muda (cursor.description e o mesmo objeto enquanto se le o resultado).
+    """
+
+    __slots__ = ("montar", "_descricao", "_converter")
+
+    def __init__(self, montar: Montador):
+        self.montar = montar
+        self._descricao = None
+        self._converter = None
+
+    def __call__(self, cursor: sqlite3.Cursor, linha: tuple) -> Any:
+        descricao = cursor.description
+        if descricao is not self._descricao:
+            self._converter = self.montar([coluna[0] for coluna in descricao])
+            self._descricao = descricao
+        return self._converter(linha)
@@ -0,0 +1,161 @@
+"""
+Migracao em lotes - Backfill retomavel para bancos grandes
+Atualiza dados em lotes limitados, com checkpoint por lote e snapshot online
+"""
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+CRIAR_CHECKPOINT_SQL = """
+    CREATE TABLE IF NOT EXISTS migracao_checkpoint (
+        nome TEXT PRIMARY KEY,
+        ultimo_id INTEGER NOT NULL DEFAULT 0,
+        linhas INTEGER NOT NULL DEFAULT 0,
+        concluido INTEGER NOT NULL DEFAULT 0,
+        atualizado_em TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+TAMANHO_LOTE_PADRAO = 5000
+PAGINAS_SNAPSHOT_PADRAO = 1024
+
+
+@dataclass(frozen=True)
+class Backfill:
+    """Atualizacao de dados executada em lotes por faixa de id.
+
+    O SQL recebe dois parametros (id_inicio exclusivo, id_fim inclusivo),
+    ex.: "UPDATE lancamentos SET x = ... WHERE id > ? AND id <= ?".
+    """
+
+    nome: str
+    tabela: str
+    sql: str
+    coluna_id: str = "id"
+
+
+@dataclass
+class ProgressoMigracao:
+    """Estado reportado ao callback de progresso"""
+
+    etapa: str
+    processados: int
+    total: int
+    linhas_por_segundo: float
+
+
+Progresso = Callable[[ProgressoMigracao], None]
+
+
+def _taxa(processados: int, inicio: float) -> float:
+    decorrido = time.perf_counter() - inicio
+    return processados / decorrido if decorrido > 0 else 0.0
+
+
+def criar_snapshot(
+    conn: sqlite3.Connection,
+    destino,
+    paginas: int = PAGINAS_SNAPSHOT_PADRAO,
+    progresso: Optional[Progresso] = None,
+) -> Path:
+    """Copia o banco com a API online de backup do SQLite.
+
+    Copia `paginas` por passo, liberando o banco entre passos para que
+    outras conexoes continuem lendo e escrevendo durante o snapshot.
+    """
+    destino = Path(destino)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    inicio = time.perf_counter()
+
+    def _reportar(status, restantes, total):
+        if progresso:
+            copiadas = total - restantes
+            progresso(ProgressoMigracao("snapshot", copiadas, total, _taxa(copiadas, inicio)))
+
+    alvo = sqlite3.connect(destino)
+    try:
+        conn.backup(alvo, pages=paginas, progress=_reportar)
+    finally:
+        alvo.close()
+    return destino
+
+
+def _ler_checkpoint(conn: sqlite3.Connection, nome: str):
+    row = conn.execute(
+        "SELECT ultimo_id, linhas, concluido FROM migracao_checkpoint WHERE nome = ?",
+        (nome,),
+    ).fetchone()
+    return row if row else (0, 0, 0)
+
+
+def executar_backfill(
+    conn: sqlite3.Connection,
+    backfill: Backfill,
+    tamanho_lote: int = TAMANHO_LOTE_PADRAO,
+    progresso: Optional[Progresso] = None,
+) -> int:
+    """Executa backfill em lotes retomaveis e retorna linhas processadas.
+
+    Cada lote roda em transacao curta propria e grava o ultimo id no
+    checkpoint, entao um crash retoma do ultimo lote confirmado e outros
+    escritores nao ficam bloqueados durante toda a migracao.
+    A conexao deve estar em modo autocommit (isolation_level=None).
+    """
+    conn.execute(CRIAR_CHECKPOINT_SQL)
+    ultimo_id, linhas, concluido = _ler_checkpoint(conn, backfill.nome)
+    if concluido:
+        return 0
+
+    tabela, coluna = backfill.tabela, backfill.coluna_id
+    total = conn.execute(
+        f"SELECT COUNT(*) FROM {tabela} WHERE {coluna} > ?", (ultimo_id,)
+    ).fetchone()[0]
+    inicio = time.perf_counter()
+    processados = 0
+
+    while True:
+        row = conn.execute(
+            f"SELECT {coluna} FROM {tabela} WHERE {coluna} > ? "
+            f"ORDER BY {coluna} LIMIT 1 OFFSET ?",
+            (ultimo_id, tamanho_lote - 1),
+        ).fetchone()
+        if row is None:
+            row = conn.execute(
+                f"SELECT MAX({coluna}) FROM {tabela} WHERE {coluna} > ?", (ultimo_id,)
+            ).fetchone()
+        fim = row[0] if row else None
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if fim is not None:
+                conn.execute(backfill.sql, (ultimo_id, fim))
+                lote = conn.execute(
+                    f"SELECT COUNT(*) FROM {tabela} WHERE {coluna} > ? AND {coluna} <= ?",
+                    (ultimo_id, fim),
+                ).fetchone()[0]
+                ultimo_id = fim
+                linhas += lote
+                processados += lote
+            conn.execute(
+                """
+                INSERT INTO migracao_checkpoint (nome, ultimo_id, linhas, concluido, atualizado_em)
+                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(nome) DO UPDATE SET
+                    ultimo_id = excluded.ultimo_id,
+                    linhas = excluded.linhas,
+                    concluido = excluded.concluido,
+                    atualizado_em = excluded.atualizado_em
+                """,
+                (backfill.nome, ultimo_id, linhas, 1 if fim is None else 0),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        if progresso:
+            progresso(ProgressoMigracao(backfill.nome, processados, total, _taxa(processados, inicio)))
+        if fim is None:
+            return processados
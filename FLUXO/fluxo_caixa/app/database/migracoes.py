@@ -0,0 +1,666 @@
+"""
+Migracoes - Controle de versao do schema do banco
+Aplica apenas as migracoes numeradas pendentes, registradas em schema_version
+"""
+import sqlite3
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+from app.database.migracao_lotes import TAMANHO_LOTE_PADRAO, Backfill, Progresso, executar_backfill
+from app.database.schema_unificado import CRIAR_TABELAS_SQL
+from app.utils.assinatura import registrar_funcao_sql
+from app.utils.datas import DIA_SQL
+from app.utils.documentos import limpar_documento
+
+CRIAR_SCHEMA_VERSION_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        versao INTEGER PRIMARY KEY,
+        descricao TEXT NOT NULL,
+        aplicado_em TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# Colunas adicionadas ao lancamentos legado (antigo scripts/migrar_banco.py)
+COLUNAS_LANCAMENTOS_LEGADO = [
+    ("categoria_id", "INTEGER"),
+    ("subcategoria_id", "INTEGER"),
+    ("fornecedor_id", "INTEGER"),
+    ("funcionario_id", "INTEGER"),
+    ("comprovante", "TEXT"),
+    ("nota_fiscal", "TEXT"),
+    ("banco", "TEXT"),
+    ("atualizado_em", "TIMESTAMP"),
+]
+
+# Documentos dos cadastros gravados so com digitos (comparacao e indice unico)
+COLUNAS_DOCUMENTO = [
+    ("fornecedores", "cpf_cnpj"),
+    ("clientes", "documento"),
+    ("funcionarios", "cpf"),
+]
+
+
+@dataclass(frozen=True)
+class Migracao:
+    """Migracao numerada do schema.
+
+    Migracoes com backfills precisam de `aplicar` idempotente: se o processo
+    cair durante o backfill, a versao nao foi registrada e a migracao roda
+    de novo, retomando os lotes a partir do checkpoint.
+    """
+
+    versao: int
+    descricao: str
+    aplicar: Callable[[sqlite3.Connection], None]
+    backfills: Tuple[Backfill, ...] = ()
+
+
+def executar_instrucoes(conn: sqlite3.Connection, script: str) -> None:
+    """Executa script com varias instrucoes dentro da transacao corrente.
+
+    Diferente de executescript, nao emite COMMIT implicito.
+    """
+    instrucao = ""
+    for linha in script.splitlines(keepends=True):
+        if linha.strip().startswith("--"):
+            continue
+        instrucao += linha
+        if sqlite3.complete_statement(instrucao):
+            conn.execute(instrucao)
+            instrucao = ""
+    if instrucao.strip():
+        conn.execute(instrucao)
+
+
+def colunas_da_tabela(conn: sqlite3.Connection, tabela: str) -> List[str]:
+    """Retorna nomes das colunas de uma tabela (vazio se nao existir)"""
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({tabela})")]
+
+
+def _migracao_001_lancamentos_legado(conn: sqlite3.Connection) -> None:
+    """Adiciona colunas novas ao lancamentos de bancos antigos"""
+    colunas = colunas_da_tabela(conn, "lancamentos")
+    if not colunas:
+        return
+    for nome, tipo in COLUNAS_LANCAMENTOS_LEGADO:
+        if nome not in colunas:
+            conn.execute(f"ALTER TABLE lancamentos ADD COLUMN {nome} {tipo}")
+
+
+def _migracao_002_schema_unificado(conn: sqlite3.Connection) -> None:
+    """Cria tabelas e indices do schema unificado"""
+    executar_instrucoes(conn, CRIAR_TABELAS_SQL)
+
+
+def _migracao_003_categorias_padrao(conn: sqlite3.Connection) -> None:
+    """Insere categorias e subcategorias padrao em banco vazio"""
+    from app.models.categoria import CATEGORIAS_PADRAO
+
+    total = conn.execute("SELECT COUNT(*) FROM categorias").fetchone()[0]
+    if total > 0:
+        return
+
+    for cat_data in CATEGORIAS_PADRAO:
+        cursor = conn.execute(
+            "INSERT INTO categorias (nome, tipo, descricao, ativo) VALUES (?, ?, ?, 1)",
+            (cat_data["nome"], cat_data["tipo"].value, cat_data["descricao"]),
+        )
+        cat_id = cursor.lastrowid
+        conn.executemany(
+            "INSERT INTO subcategorias (nome, categoria_id, descricao, ativo) VALUES (?, ?, ?, 1)",
+            [(sub["nome"], cat_id, sub["descricao"]) for sub in cat_data["subcategorias"]],
+        )
+
+
+def _migracao_004_particoes_lancamentos(conn: sqlite3.Connection) -> None:
+    """Registro de anos fechados e agregados pre-calculados (app/database/particoes.py)"""
+    executar_instrucoes(conn, """
+        CREATE TABLE IF NOT EXISTS particoes_lancamentos (
+            ano INTEGER PRIMARY KEY,
+            arquivo TEXT NOT NULL,
+            linhas INTEGER NOT NULL DEFAULT 0,
+            fechado_em TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE IF NOT EXISTS agregados_lancamentos_ano (
+            ano INTEGER NOT NULL,
+            mes INTEGER NOT NULL,
+            tipo TEXT NOT NULL,
+            categoria_id INTEGER,
+            subcategoria_id INTEGER,
+            quantidade INTEGER NOT NULL,
+            total REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_agregados_ano_tipo ON agregados_lancamentos_ano(ano, tipo);
+    """)
+
+
+def _migracao_005_conciliacao_bancaria(conn: sqlite3.Connection) -> None:
+    """Extratos importados e estado da conciliacao (app/services/conciliacao.py)"""
+    executar_instrucoes(conn, """
+        CREATE TABLE IF NOT EXISTS extratos_bancarios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            banco TEXT NOT NULL,
+            arquivo TEXT,
+            linhas INTEGER NOT NULL DEFAULT 0,
+            importado_em TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE IF NOT EXISTS extrato_linhas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            extrato_id INTEGER NOT NULL,
+            banco TEXT NOT NULL,
+            data DATE NOT NULL,
+            centavos INTEGER NOT NULL,
+            descricao TEXT NOT NULL DEFAULT '',
+            documento TEXT,
+            lancamento_id INTEGER,
+            pontuacao REAL,
+            conciliado_em TIMESTAMP,
+            FOREIGN KEY (extrato_id) REFERENCES extratos_bancarios(id) ON DELETE CASCADE
+        );
+        CREATE INDEX IF NOT EXISTS idx_extrato_linhas_pendentes
+            ON extrato_linhas(banco, data) WHERE lancamento_id IS NULL;
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_extrato_linhas_lancamento
+            ON extrato_linhas(lancamento_id) WHERE lancamento_id IS NOT NULL;
+        CREATE INDEX IF NOT EXISTS idx_extrato_linhas_extrato ON extrato_linhas(extrato_id);
+    """)
+
+
+def _migracao_006_assinatura_lancamentos(conn: sqlite3.Connection) -> None:
+    """Coluna de assinatura (app/utils/assinatura.py) com indice unico parcial"""
+    # Roda de novo ao retomar o backfill: a funcao precisa existir nesta conexao
+    registrar_funcao_sql(conn)
+    if "assinatura" not in colunas_da_tabela(conn, "lancamentos"):
+        conn.execute("ALTER TABLE lancamentos ADD COLUMN assinatura TEXT")
+    conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_lancamentos_assinatura "
+        "ON lancamentos(assinatura) WHERE assinatura IS NOT NULL"
+    )
+
+
+# Duplicados ja existentes ficam com assinatura NULL (OR IGNORE) e aparecem na
+# varredura de app/services/duplicados.py
+BACKFILL_ASSINATURA = Backfill(
+    nome="lancamentos_assinatura",
+    tabela="lancamentos",
+    sql="""
+        UPDATE OR IGNORE lancamentos
+        SET assinatura = assinatura_lancamento(
+            data, tipo, valor, descricao, cliente_id, fornecedor_id, funcionario_id
+        )
+        WHERE id > ? AND id <= ? AND assinatura IS NULL
+    """,
+)
+
+
+
+# Resumo mensal mantido por triggers. Valores em centavos (soma exata).
+# O DELETE ignora anos ja registrados em particoes_lancamentos: fechar um
+# ano move as linhas para a particao sem apagar o resumo.
+_CHAVE_RESUMO = """
+    ano_mes = substr({r}.data, 1, 7) AND tipo = {r}.tipo
+    AND categoria_id = COALESCE({r}.categoria_id, 0)
+    AND subcategoria_id = COALESCE({r}.subcategoria_id, 0)
+"""
+
+_SOMAR_RESUMO = """
+    INSERT INTO resumo_mensal_lancamentos (
+        ano_mes, tipo, categoria_id, subcategoria_id, quantidade, total_centavos, minimo, maximo
+    )
+    VALUES (
+        substr(NEW.data, 1, 7), NEW.tipo, COALESCE(NEW.categoria_id, 0),
+        COALESCE(NEW.subcategoria_id, 0), 1, CAST(ROUND(NEW.valor * 100) AS INTEGER),
+        NEW.valor, NEW.valor
+    )
+    ON CONFLICT(ano_mes, tipo, categoria_id, subcategoria_id) DO UPDATE SET
+        quantidade = quantidade + 1,
+        total_centavos = total_centavos + excluded.total_centavos,
+        minimo = MIN(COALESCE(minimo, excluded.minimo), excluded.minimo),
+        maximo = MAX(COALESCE(maximo, excluded.maximo), excluded.maximo);
+"""
+
+# Minimo/maximo nao se desfazem por subtracao: se a linha removida era um
+# extremo, recalcula so aquele mes/categoria (faixa de data indexada)
+_SUBTRAIR_RESUMO = f"""
+    UPDATE resumo_mensal_lancamentos
+    SET quantidade = quantidade - 1,
+        total_centavos = total_centavos - CAST(ROUND(OLD.valor * 100) AS INTEGER)
+    WHERE {_CHAVE_RESUMO.format(r="OLD")};
+    UPDATE resumo_mensal_lancamentos
+    SET minimo = (
+            SELECT MIN(valor) FROM lancamentos
+            WHERE data >= ano_mes || '-' AND data < ano_mes || '.'
+              AND tipo = OLD.tipo AND categoria_id = OLD.categoria_id
+              AND subcategoria_id = OLD.subcategoria_id
+        ),
+        maximo = (
+            SELECT MAX(valor) FROM lancamentos
+            WHERE data >= ano_mes || '-' AND data < ano_mes || '.'
+              AND tipo = OLD.tipo AND categoria_id = OLD.categoria_id
+              AND subcategoria_id = OLD.subcategoria_id
+        )
+    WHERE {_CHAVE_RESUMO.format(r="OLD")}
+      AND (OLD.valor <= minimo OR OLD.valor >= maximo);
+    DELETE FROM resumo_mensal_lancamentos
+    WHERE {_CHAVE_RESUMO.format(r="OLD")} AND quantidade <= 0;
+"""
+
+
+def _criar_resumo_mensal(conn: sqlite3.Connection) -> None:
+    """Tabela, triggers e carga do resumo mensal (migracao 7 e recalcular_resumos)"""
+    executar_instrucoes(conn, f"""
+        CREATE TABLE IF NOT EXISTS resumo_mensal_lancamentos (
+            ano_mes TEXT NOT NULL,
+            tipo TEXT NOT NULL,
+            categoria_id INTEGER NOT NULL,
+            subcategoria_id INTEGER NOT NULL,
+            quantidade INTEGER NOT NULL,
+            total_centavos INTEGER NOT NULL,
+            minimo REAL,
+            maximo REAL,
+            PRIMARY KEY (ano_mes, tipo, categoria_id, subcategoria_id)
+        ) WITHOUT ROWID;
+
+        DROP TRIGGER IF EXISTS trg_resumo_mensal_insert;
+        DROP TRIGGER IF EXISTS trg_resumo_mensal_delete;
+        DROP TRIGGER IF EXISTS trg_resumo_mensal_update;
+
+        CREATE TRIGGER trg_resumo_mensal_insert AFTER INSERT ON lancamentos
+        BEGIN
+            {_SOMAR_RESUMO}
+        END;
+
+        CREATE TRIGGER trg_resumo_mensal_delete AFTER DELETE ON lancamentos
+        WHEN NOT EXISTS (
+            SELECT 1 FROM particoes_lancamentos WHERE ano = CAST(substr(OLD.data, 1, 4) AS INTEGER)
+        )
+        BEGIN
+            {_SUBTRAIR_RESUMO}
+        END;
+
+        CREATE TRIGGER trg_resumo_mensal_update
+        AFTER UPDATE OF data, tipo, valor, categoria_id, subcategoria_id ON lancamentos
+        BEGIN
+            {_SUBTRAIR_RESUMO}
+            {_SOMAR_RESUMO}
+        END;
+    """)
+
+    # Carga inicial: banco principal + anos fechados (dos agregados, sem min/max)
+    conn.execute("DELETE FROM resumo_mensal_lancamentos")
+    conn.execute("""
+        INSERT INTO resumo_mensal_lancamentos (
+            ano_mes, tipo, categoria_id, subcategoria_id, quantidade, total_centavos, minimo, maximo
+        )
+        SELECT substr(data, 1, 7), tipo, COALESCE(categoria_id, 0), COALESCE(subcategoria_id, 0),
+               COUNT(*), SUM(CAST(ROUND(valor * 100) AS INTEGER)), MIN(valor), MAX(valor)
+        FROM lancamentos
+        GROUP BY 1, 2, 3, 4
+    """)
+    conn.execute("""
+        INSERT OR IGNORE INTO resumo_mensal_lancamentos (
+            ano_mes, tipo, categoria_id, subcategoria_id, quantidade, total_centavos
+        )
+        SELECT printf('%04d-%02d', ano, mes), tipo, COALESCE(categoria_id, 0),
+               COALESCE(subcategoria_id, 0), SUM(quantidade), CAST(ROUND(SUM(total) * 100) AS INTEGER)
+        FROM agregados_lancamentos_ano
+        GROUP BY 1, 2, 3, 4
+    """)
+
+
+def _migracao_007_resumo_mensal(conn: sqlite3.Connection) -> None:
+    """Resumo mensal por tipo/categoria/subcategoria mantido por triggers"""
+    _criar_resumo_mensal(conn)
+
+    # Apagar/alterar o lancamento que era o minimo ou o maximo do mes faz o
+    # trigger buscar o novo extremo. Sem este indice o SQLite escolhia
+    # idx_lancamentos_categoria e percorria a categoria inteira a cada linha
+    # (~0,4s por DELETE com 1M de lancamentos); com ele a busca fica restrita
+    # as linhas da subcategoria no mes, lidas so do indice.
+    # Fica fora de _criar_resumo_mensal: a migracao 9 o troca por
+    # idx_lancamentos_subcategoria_tipo_data e recalcular_resumos nao o recria.
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_lancamentos_subcategoria_data
+        ON lancamentos(subcategoria_id, data, tipo, categoria_id, valor)
+    """)
+
+
+# Agregados base do cubo (app/services/cubo.py): menor granularidade das
+# dimensoes de analise, so com medidas aditivas para permitir roll-up
+COLUNAS_CUBO = (
+    "ano_mes", "tipo", "categoria_id", "subcategoria_id", "cliente_id", "fornecedor_id", "banco",
+)
+_EXPRESSOES_CUBO = (
+    "substr({r}.data, 1, 7)", "{r}.tipo", "COALESCE({r}.categoria_id, 0)",
+    "COALESCE({r}.subcategoria_id, 0)", "COALESCE({r}.cliente_id, 0)",
+    "COALESCE({r}.fornecedor_id, 0)", "COALESCE(TRIM({r}.banco), '')",
+)
+_CHAVE_CUBO = ", ".join(COLUNAS_CUBO)
+
+
+def _dimensoes_cubo(r: str) -> str:
+    return ", ".join(expressao.format(r=r) for expressao in _EXPRESSOES_CUBO)
+
+
+_SOMAR_CUBO = f"""
+    INSERT INTO cubo_lancamentos ({_CHAVE_CUBO}, quantidade, total_centavos)
+    VALUES ({_dimensoes_cubo("NEW")}, 1, CAST(ROUND(NEW.valor * 100) AS INTEGER))
+    ON CONFLICT({_CHAVE_CUBO}) DO UPDATE SET
+        quantidade = quantidade + 1,
+        total_centavos = total_centavos + excluded.total_centavos;
+"""
+
+_SUBTRAIR_CUBO = f"""
+    UPDATE cubo_lancamentos
+    SET quantidade = quantidade - 1,
+        total_centavos = total_centavos - CAST(ROUND(OLD.valor * 100) AS INTEGER)
+    WHERE ({_CHAVE_CUBO}) = ({_dimensoes_cubo("OLD")});
+    DELETE FROM cubo_lancamentos
+    WHERE ({_CHAVE_CUBO}) = ({_dimensoes_cubo("OLD")}) AND quantidade <= 0;
+"""
+
+# Linhas do cubo calculadas de lancamentos; {where} filtra o periodo
+SELECIONAR_CUBO_SQL = (
+    "SELECT "
+    + ", ".join(
+        f"{expressao.format(r='lancamentos')} AS {coluna}"
+        for expressao, coluna in zip(_EXPRESSOES_CUBO, COLUNAS_CUBO)
+    )
+    + """,
+           COUNT(*) AS quantidade, SUM(CAST(ROUND(valor * 100) AS INTEGER)) AS total_centavos
+    FROM lancamentos
+    {where}
+    GROUP BY 1, 2, 3, 4, 5, 6, 7
+"""
+)
+
+
+def _migracao_008_cubo_lancamentos(conn: sqlite3.Connection) -> None:
+    """Agregados base do cubo de analise mantidos por triggers"""
+    executar_instrucoes(conn, f"""
+        CREATE TABLE IF NOT EXISTS cubo_lancamentos (
+            ano_mes TEXT NOT NULL,
+            tipo TEXT NOT NULL,
+            categoria_id INTEGER NOT NULL,
+            subcategoria_id INTEGER NOT NULL,
+            cliente_id INTEGER NOT NULL,
+            fornecedor_id INTEGER NOT NULL,
+            banco TEXT NOT NULL,
+            quantidade INTEGER NOT NULL,
+            total_centavos INTEGER NOT NULL,
+            PRIMARY KEY ({_CHAVE_CUBO})
+        ) WITHOUT ROWID;
+
+        DROP TRIGGER IF EXISTS trg_cubo_insert;
+        DROP TRIGGER IF EXISTS trg_cubo_delete;
+        DROP TRIGGER IF EXISTS trg_cubo_update;
+
+        CREATE TRIGGER trg_cubo_insert AFTER INSERT ON lancamentos
+        BEGIN
+            {_SOMAR_CUBO}
+        END;
+
+        CREATE TRIGGER trg_cubo_delete AFTER DELETE ON lancamentos
+        WHEN NOT EXISTS (
+            SELECT 1 FROM particoes_lancamentos WHERE ano = CAST(substr(OLD.data, 1, 4) AS INTEGER)
+        )
+        BEGIN
+            {_SUBTRAIR_CUBO}
+        END;
+
+        CREATE TRIGGER trg_cubo_update
+        AFTER UPDATE OF data, tipo, valor, categoria_id, subcategoria_id, cliente_id,
+                        fornecedor_id, banco ON lancamentos
+        BEGIN
+            {_SUBTRAIR_CUBO}
+            {_SOMAR_CUBO}
+        END;
+    """)
+
+    # Anos fechados entram pelos agregados anuais, sem cliente/fornecedor/banco;
+    # CuboLancamentos.reconstruir() le as particoes e recupera esse detalhe
+    conn.execute("DELETE FROM cubo_lancamentos")
+    conn.execute(
+        f"INSERT INTO cubo_lancamentos ({_CHAVE_CUBO}, quantidade, total_centavos) "
+        + SELECIONAR_CUBO_SQL.format(where="")
+    )
+    conn.execute(f"""
+        INSERT OR IGNORE INTO cubo_lancamentos ({_CHAVE_CUBO}, quantidade, total_centavos)
+        SELECT printf('%04d-%02d', ano, mes), tipo, COALESCE(categoria_id, 0),
+               COALESCE(subcategoria_id, 0), 0, 0, '', SUM(quantidade),
+               CAST(ROUND(SUM(total) * 100) AS INTEGER)
+        FROM agregados_lancamentos_ano
+        GROUP BY 1, 2, 3, 4
+    """)
+
+
+def _migracao_009_indices_consultas(conn: sqlite3.Connection) -> None:
+    """Indices de lancamentos desenhados pelas consultas reais dos servicos
+
+    Os indices de coluna unica (tipo, data, categoria...) obrigavam o SQLite a
+    ler a linha da tabela para somar valor e a ordenar as listagens numa B-tree
+    temporaria. Agora tipo+periodo e periodo sozinho tem indices de cobertura
+    com valor, categoria e subcategoria; as listagens por entidade ja saem na
+    ordem de data; e cliente/fornecedor/funcionario, NULL na maior parte das
+    linhas, ficam em indices parciais. Os antigos eram prefixos dos novos
+    (as FKs continuam cobertas) e sao removidos para nao pesar na insercao.
+
+    Com idx_lancamentos_tipo_data o recalculo de minimo/maximo dos triggers
+    passaria a ler o mes inteiro do tipo; o indice da migracao 7 ganha tipo e
+    categoria antes da data para continuar mais seletivo (igualdade nas tres).
+
+    Nos cadastros, status sozinho quase nao filtra (a maioria e ativo) e a
+    listagem ainda ordenava tudo: clientes e funcionarios passam a (status,
+    data_cadastro), ja que o status chega como parametro; fornecedores so e
+    consultado com status = 'ativo' literal e fica com indices parciais.
+    """
+    executar_instrucoes(conn, """
+        DROP INDEX IF EXISTS idx_lancamentos_data;
+        DROP INDEX IF EXISTS idx_lancamentos_tipo;
+        DROP INDEX IF EXISTS idx_lancamentos_categoria;
+        DROP INDEX IF EXISTS idx_lancamentos_cliente;
+        DROP INDEX IF EXISTS idx_lancamentos_fornecedor;
+        DROP INDEX IF EXISTS idx_lancamentos_funcionario;
+        DROP INDEX IF EXISTS idx_lancamentos_data_categoria;
+        CREATE INDEX IF NOT EXISTS idx_lancamentos_tipo_data
+            ON lancamentos(tipo, data, valor, categoria_id, subcategoria_id);
+        CREATE INDEX IF NOT EXISTS idx_lancamentos_data_tipo
+            ON lancamentos(data, tipo, valor, categoria_id, subcategoria_id);
+        CREATE INDEX IF NOT EXISTS idx_lancamentos_categoria_data ON lancamentos(categoria_id, data);
+        CREATE INDEX IF NOT EXISTS idx_lancamentos_cliente_tipo_data
+            ON lancamentos(cliente_id, tipo, data) WHERE cliente_id IS NOT NULL;
+        CREATE INDEX IF NOT EXISTS idx_lancamentos_fornecedor_tipo_data
+            ON lancamentos(fornecedor_id, tipo, data) WHERE fornecedor_id IS NOT NULL;
+        CREATE INDEX IF NOT EXISTS idx_lancamentos_funcionario_data
+            ON lancamentos(funcionario_id, data) WHERE funcionario_id IS NOT NULL;
+        DROP INDEX IF EXISTS idx_lancamentos_subcategoria_data;
+        CREATE INDEX IF NOT EXISTS idx_lancamentos_subcategoria_tipo_data
+            ON lancamentos(subcategoria_id, tipo, categoria_id, data, valor);
+        DROP INDEX IF EXISTS idx_clientes_status;
+        DROP INDEX IF EXISTS idx_funcionarios_status;
+        DROP INDEX IF EXISTS idx_fornecedor_status;
+        CREATE INDEX IF NOT EXISTS idx_clientes_status_data_cadastro ON clientes(status, data_cadastro);
+        CREATE INDEX IF NOT EXISTS idx_funcionarios_status_data_cadastro ON funcionarios(status, data_cadastro);
+        CREATE INDEX IF NOT EXISTS idx_funcionarios_data_cadastro ON funcionarios(data_cadastro);
+        CREATE INDEX IF NOT EXISTS idx_fornecedores_ativos_nome ON fornecedores(nome) WHERE status = 'ativo';
+        CREATE INDEX IF NOT EXISTS idx_fornecedores_ativos_tipo_nome
+            ON fornecedores(tipo, nome) WHERE status = 'ativo';
+    """)
+
+
+def _migracao_010_dia_lancamentos(conn: sqlite3.Connection) -> None:
+    """Ordinal do dia (date.toordinal) como chave de data indexada de lancamentos
+
+    Filtros de periodo comparavam texto e agrupar por dia exigia DATE(data),
+    que nao usa indice. `dia` e uma coluna gerada VIRTUAL a partir de `data`:
+    nao ocupa espaco na linha, todos os que gravam `data` continuam iguais
+    (servicos, importacao, particoes ja fechadas) e os indices de consulta
+    passam a guardar o inteiro (menor que o texto) no lugar da data.
+    O indice do recalculo de minimo/maximo dos triggers continua em `data`,
+    que e o que o trigger compara.
+    """
+    geradas = {row[1] for row in conn.execute("PRAGMA table_xinfo(lancamentos)")}
+    if "dia" not in geradas:
+        conn.execute(f"ALTER TABLE lancamentos ADD COLUMN dia INTEGER GENERATED ALWAYS AS ({DIA_SQL}) VIRTUAL")
+    executar_instrucoes(conn, """
+        DROP INDEX IF EXISTS idx_lancamentos_tipo_data;
+        DROP INDEX IF EXISTS idx_lancamentos_data_tipo;
+        DROP INDEX IF EXISTS idx_lancamentos_categoria_data;
+        DROP INDEX IF EXISTS idx_lancamentos_cliente_tipo_data;
+        DROP INDEX IF EXISTS idx_lancamentos_fornecedor_tipo_data;
+        DROP INDEX IF EXISTS idx_lancamentos_funcionario_data;
+        CREATE INDEX IF NOT EXISTS idx_lancamentos_tipo_dia
+            ON lancamentos(tipo, dia, valor, categoria_id, subcategoria_id);
+        CREATE INDEX IF NOT EXISTS idx_lancamentos_dia_tipo
+            ON lancamentos(dia, tipo, valor, categoria_id, subcategoria_id);
+        CREATE INDEX IF NOT EXISTS idx_lancamentos_categoria_dia ON lancamentos(categoria_id, dia);
+        CREATE INDEX IF NOT EXISTS idx_lancamentos_cliente_tipo_dia
+            ON lancamentos(cliente_id, tipo, dia) WHERE cliente_id IS NOT NULL;
+        CREATE INDEX IF NOT EXISTS idx_lancamentos_fornecedor_tipo_dia
+            ON lancamentos(fornecedor_id, tipo, dia) WHERE fornecedor_id IS NOT NULL;
+        CREATE INDEX IF NOT EXISTS idx_lancamentos_funcionario_dia
+            ON lancamentos(funcionario_id, dia) WHERE funcionario_id IS NOT NULL;
+    """)
+
+
+def _migracao_011_remover_indice_subcategoria_data(conn: sqlite3.Connection) -> None:
+    """Remove idx_lancamentos_subcategoria_data recriado por recalcular_resumos
+
+    recalcular_resumos rodava a migracao 7 inteira e trazia de volta o indice
+    que a migracao 9 substituiu; bancos recalculados (inclusive os gerados por
+    scripts/gerar_dados.py) ficavam com os dois.
+    """
+    conn.execute("DROP INDEX IF EXISTS idx_lancamentos_subcategoria_data")
+
+
+def _migracao_012_normalizar_documentos(conn: sqlite3.Connection) -> None:
+    """Grava CPF/CNPJ dos cadastros antigos so com digitos
+
+    Os modelos passaram a normalizar o documento antes de gravar, mas linhas
+    antigas continuavam com mascara ("12.345.678/0001-90"): a busca por
+    documento e o indice unico nao as reconheciam e o mesmo CNPJ podia ser
+    cadastrado de novo. Se a versao limpa ja existir em outra linha (duplicata
+    antiga), a linha fica como esta e e listada no aviso para revisao manual.
+    """
+    for tabela, coluna in COLUNAS_DOCUMENTO:
+        if coluna not in colunas_da_tabela(conn, tabela):
+            continue
+        existentes = {row[0] for row in conn.execute(f"SELECT {coluna} FROM {tabela}")}
+        mascarados = conn.execute(
+            f"SELECT id, {coluna} FROM {tabela} WHERE {coluna} GLOB '*[^0-9]*'"
+        ).fetchall()
+        conflitos = []
+        for registro_id, documento in mascarados:
+            limpo = limpar_documento(documento)
+            if not limpo or limpo in existentes:
+                conflitos.append(registro_id)
+                continue
+            conn.execute(f"UPDATE {tabela} SET {coluna} = ? WHERE id = ?", (limpo, registro_id))
+            existentes.add(limpo)
+        if conflitos:
+            print(f"[AVISO] {tabela}.{coluna}: {len(conflitos)} documento(s) duplicado(s) "
+                  f"ou vazio(s) mantido(s) com mascara (ids {conflitos})")
+
+
+# Triggers de INSERT dos resumos; carga em massa pode remove-los e chamar
+# recalcular_resumos no fim (um GROUP BY em vez de um UPSERT por linha)
+TRIGGERS_INSERT_RESUMOS = ("trg_resumo_mensal_insert", "trg_cubo_insert")
+
+
+def recalcular_resumos(conn: sqlite3.Connection) -> None:
+    """Recria os triggers e recarrega resumo mensal e cubo a partir de lancamentos
+
+    So tabelas, triggers e dados: os indices de lancamentos ficam como as
+    migracoes os deixaram.
+    """
+    _criar_resumo_mensal(conn)
+    _migracao_008_cubo_lancamentos(conn)
+
+
+MIGRACOES: List[Migracao] = [
+    Migracao(1, "Colunas novas em lancamentos legado", _migracao_001_lancamentos_legado),
+    Migracao(2, "Schema unificado", _migracao_002_schema_unificado),
+    Migracao(3, "Categorias padrao", _migracao_003_categorias_padrao),
+    Migracao(4, "Particoes anuais de lancamentos", _migracao_004_particoes_lancamentos),
+    Migracao(5, "Conciliacao bancaria", _migracao_005_conciliacao_bancaria),
+    Migracao(
+        6,
+        "Assinatura de lancamentos",
+        _migracao_006_assinatura_lancamentos,
+        backfills=(BACKFILL_ASSINATURA,),
+    ),
+    Migracao(7, "Resumo mensal de lancamentos", _migracao_007_resumo_mensal),
+    Migracao(8, "Cubo de analise de lancamentos", _migracao_008_cubo_lancamentos),
+    Migracao(9, "Indices de cobertura e parciais das consultas", _migracao_009_indices_consultas),
+    Migracao(10, "Ordinal do dia em lancamentos", _migracao_010_dia_lancamentos),
+    Migracao(
+        11,
+        "Remove indice duplicado de subcategoria",
+        _migracao_011_remover_indice_subcategoria_data,
+    ),
+    Migracao(12, "Documentos dos cadastros so com digitos", _migracao_012_normalizar_documentos),
+]
+
+VERSAO_SCHEMA = MIGRACOES[-1].versao
+
+
+def obter_versao(conn: sqlite3.Connection) -> int:
+    """Retorna versao do schema (0 se nunca migrado)"""
+    try:
+        row = conn.execute("SELECT MAX(versao) FROM schema_version").fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return row[0] or 0
+
+
+def _registrar_versao(conn: sqlite3.Connection, migracao: Migracao) -> None:
+    conn.execute(
+        "INSERT INTO schema_version (versao, descricao) VALUES (?, ?)",
+        (migracao.versao, migracao.descricao),
+    )
+
+
+def aplicar_migracoes(
+    conn: sqlite3.Connection,
+    tamanho_lote: int = TAMANHO_LOTE_PADRAO,
+    progresso: Optional[Progresso] = None,
+) -> List[Migracao]:
+    """Aplica migracoes pendentes e retorna as que foram aplicadas.
+
+    Em schema atualizado custa uma unica consulta de versao. Cada migracao
+    roda em transacao propria (BEGIN IMMEDIATE), rechecando a versao para
+    que dois processos abrindo o mesmo banco nao apliquem a mesma migracao.
+    Backfills rodam depois do DDL, em lotes retomaveis (migracao_lotes).
+    A conexao deve estar em modo autocommit (isolation_level=None).
+    """
+    if obter_versao(conn) >= VERSAO_SCHEMA:
+        return []
+
+    conn.execute(CRIAR_SCHEMA_VERSION_SQL)
+    aplicadas = []
+    for migracao in MIGRACOES:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if obter_versao(conn) >= migracao.versao:
+                conn.execute("ROLLBACK")
+                continue
+            migracao.aplicar(conn)
+            if not migracao.backfills:
+                _registrar_versao(conn, migracao)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        if migracao.backfills:
+            for backfill in migracao.backfills:
+                executar_backfill(conn, backfill, tamanho_lote, progresso)
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if obter_versao(conn) < migracao.versao:
+                    _registrar_versao(conn, migracao)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        aplicadas.append(migracao)
+    return aplicadas
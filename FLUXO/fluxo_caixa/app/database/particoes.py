@@ -0,0 +1,359 @@
+"""
+Particoes - Lancamentos particionados por ano em bancos separados
+O ano corrente fica no banco principal; anos fechados viram arquivos somente leitura
+"""
+import os
+import sqlite3
+import stat
+from datetime import date
+from pathlib import Path
+from typing import Any, Collection, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.database.instrumentacao import conectar
+from app.database.linhas import TAMANHO_LOTE, FabricaModelos, Montador, como_dict, ler_em_lotes
+from app.utils.datas import DIA_SQL, para_dia
+
+INDICES_PARTICAO_SQL = """
+    CREATE INDEX IF NOT EXISTS {alias}.idx_lancamentos_tipo_dia
+        ON lancamentos(tipo, dia, valor, categoria_id, subcategoria_id);
+    CREATE INDEX IF NOT EXISTS {alias}.idx_lancamentos_dia_tipo
+        ON lancamentos(dia, tipo, valor, categoria_id, subcategoria_id);
+    CREATE INDEX IF NOT EXISTS {alias}.idx_lancamentos_categoria_dia ON lancamentos(categoria_id, dia);
+    CREATE INDEX IF NOT EXISTS {alias}.idx_lancamentos_cliente_tipo_dia
+        ON lancamentos(cliente_id, tipo, dia) WHERE cliente_id IS NOT NULL;
+    CREATE INDEX IF NOT EXISTS {alias}.idx_lancamentos_fornecedor_tipo_dia
+        ON lancamentos(fornecedor_id, tipo, dia) WHERE fornecedor_id IS NOT NULL;
+    CREATE INDEX IF NOT EXISTS {alias}.idx_lancamentos_funcionario_dia
+        ON lancamentos(funcionario_id, dia) WHERE funcionario_id IS NOT NULL
+"""
+
+
+def _ddl_particao(conn: sqlite3.Connection) -> str:
+    """Mesmas colunas de main.lancamentos, sem FKs (nao valem entre bancos anexados)"""
+    colunas = []
+    for _, nome, tipo, notnull, padrao, pk in conn.execute("PRAGMA main.table_info(lancamentos)"):
+        definicao = f"{nome} {tipo}".strip()
+        if pk:
+            definicao += " PRIMARY KEY"
+        elif notnull:
+            definicao += " NOT NULL"
+        if padrao is not None:
+            definicao += f" DEFAULT {padrao}"
+        colunas.append(definicao)
+    # table_info nao lista colunas geradas
+    colunas.append(f"dia INTEGER GENERATED ALWAYS AS ({DIA_SQL}) VIRTUAL")
+    return f"CREATE TABLE IF NOT EXISTS particao.lancamentos ({', '.join(colunas)})"
+
+
+def _ano(data: Optional[str]) -> Optional[int]:
+    return int(str(data)[:4]) if data else None
+
+
+class ParticoesLancamentos:
+    """Consulta transparente sobre o banco principal e as particoes anuais.
+
+    As consultas continuam escritas contra `lancamentos`: na conexao da
+    consulta e criada uma view TEMP com esse nome (temp tem precedencia
+    sobre main) unindo main.lancamentos as particoes anexadas. So as
+    particoes que cruzam o filtro de datas sao anexadas.
+    Sem anos fechados, tudo cai direto na conexao normal do Database.
+    """
+
+    def __init__(self, db, pasta: Optional[Path] = None):
+        self.db = db
+        self.pasta = Path(pasta or Path(db.db_path).parent / "particoes")
+
+    def caminho(self, ano: int) -> Path:
+        """Arquivo da particao do ano"""
+        return self.pasta / f"lancamentos_{ano}.db"
+
+    def anos_fechados(self) -> List[int]:
+        """Anos ja movidos para particoes"""
+        rows = self.db.obter_todos("SELECT ano FROM particoes_lancamentos ORDER BY ano")
+        return [row["ano"] for row in rows]
+
+    def ano_fechado(self, data: Optional[str], anos_fechados: Optional[Collection[int]] = None) -> bool:
+        """Indica se a data pertence a um ano fechado (somente leitura)
+
+        Quem confere muitas datas passa anos_fechados lido uma vez; sem ele
+        cada chamada consulta particoes_lancamentos.
+        """
+        ano = _ano(data)
+        if ano is None:
+            return False
+        return ano in (self.anos_fechados() if anos_fechados is None else anos_fechados)
+
+    def planejar(
+        self, data_inicio: Optional[str] = None, data_fim: Optional[str] = None
+    ) -> Tuple[List[int], List[int]]:
+        """Separa os anos fechados do periodo em (completos, parciais).
+
+        Anos completos podem ser respondidos pelos agregados pre-calculados;
+        parciais precisam anexar a particao.
+        """
+        inicio, fim = _ano(data_inicio), _ano(data_fim)
+        completos, parciais = [], []
+        for ano in self.anos_fechados():
+            if (inicio is not None and ano < inicio) or (fim is not None and ano > fim):
+                continue
+            cobre_inicio = not data_inicio or str(data_inicio)[:10] <= f"{ano}-01-01"
+            cobre_fim = not data_fim or str(data_fim)[:10] >= f"{ano}-12-31"
+            (completos if cobre_inicio and cobre_fim else parciais).append(ano)
+        return completos, parciais
+
+    def _conectar(self, anos: Iterable[int]) -> sqlite3.Connection:
+        """Conexao com as particoes anexadas (somente leitura) e a view temp"""
+        anos = list(anos)
+        conn = conectar(
+            Path(self.db.db_path).resolve().as_uri(), getattr(self.db, "instrumentacao", None), uri=True
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        if not anos:
+            return conn
+
+        limite = conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+        if len(anos) > limite:
+            conn.close()
+            raise Exception(
+                f"Erro: periodo abrange {len(anos)} anos fechados; o SQLite anexa no maximo {limite}"
+            )
+
+        colunas = [row[1] for row in conn.execute("PRAGMA main.table_info(lancamentos)")]
+        selects = [f"SELECT {', '.join(colunas)}, dia FROM main.lancamentos"]
+        for ano in anos:
+            alias = f"p{ano}"
+            uri = self.caminho(ano).resolve().as_uri() + "?mode=ro"
+            conn.execute(f"ATTACH DATABASE ? AS {alias}", (uri,))
+            existentes = {row[1] for row in conn.execute(f"PRAGMA {alias}.table_xinfo(lancamentos)")}
+            campos = [c if c in existentes else f"NULL AS {c}" for c in colunas]
+            # Particoes fechadas antes da coluna dia: calculada na leitura, sem indice
+            campos.append("dia" if "dia" in existentes else f"{DIA_SQL} AS dia")
+            selects.append(f"SELECT {', '.join(campos)} FROM {alias}.lancamentos")
+        conn.execute(f"CREATE TEMP VIEW lancamentos AS {' UNION ALL '.join(selects)}")
+        return conn
+
+    def obter_todos(
+        self,
+        query: str,
+        params: tuple = (),
+        data_inicio: Optional[str] = None,
+        data_fim: Optional[str] = None,
+        anexar: Optional[List[int]] = None,
+    ) -> List[Dict]:
+        """Executa consulta sobre lancamentos de todas as particoes do periodo.
+
+        `anexar` informa explicitamente os anos a anexar (ex.: so os parciais
+        quando os completos vem dos agregados).
+        """
+        if anexar is None:
+            completos, parciais = self.planejar(data_inicio, data_fim)
+            anexar = completos + parciais
+        if not anexar:
+            return self.db.obter_todos(query, params)
+
+        conn = self._conectar(sorted(anexar))
+        try:
+            return [dict(row) for row in conn.execute(query, params)]
+        except sqlite3.Error as e:
+            raise Exception(f"Erro ao obter dados: {e}")
+        finally:
+            conn.close()
+
+    def obter_modelos(
+        self,
+        query: str,
+        montar: Montador,
+        params: tuple = (),
+        data_inicio: Optional[str] = None,
+        data_fim: Optional[str] = None,
+    ) -> List[Any]:
+        """Como obter_todos, com modelos montados direto das tuplas (ver linhas.py)"""
+        completos, parciais = self.planejar(data_inicio, data_fim)
+        anexar = completos + parciais
+        if not anexar:
+            return self.db.obter_modelos(query, montar, params)
+
+        conn = self._conectar(sorted(anexar))
+        conn.row_factory = FabricaModelos(montar)
+        try:
+            return conn.execute(query, params).fetchall()
+        except sqlite3.Error as e:
+            raise Exception(f"Erro ao obter dados: {e}")
+        finally:
+            conn.close()
+
+    def iterar(
+        self,
+        query: str,
+        params: tuple = (),
+        data_inicio: Optional[str] = None,
+        data_fim: Optional[str] = None,
+        batch_size: int = TAMANHO_LOTE,
+        em_lotes: bool = False,
+        montar: Montador = como_dict,
+    ) -> Iterator:
+        """Como obter_todos, lendo aos poucos (ver Database.iterar)"""
+        completos, parciais = self.planejar(data_inicio, data_fim)
+        anexar = completos + parciais
+        if not anexar:
+            yield from self.db.iterar(query, params, batch_size, em_lotes, montar)
+            return
+
+        conn = self._conectar(sorted(anexar))
+        conn.row_factory = FabricaModelos(montar)
+        try:
+            yield from ler_em_lotes(conn.execute(query, params), batch_size, em_lotes)
+        except sqlite3.Error as e:
+            raise Exception(f"Erro ao obter dados: {e}")
+        finally:
+            conn.close()
+
+    def obter_um(
+        self,
+        query: str,
+        params: tuple = (),
+        data_inicio: Optional[str] = None,
+        data_fim: Optional[str] = None,
+        anexar: Optional[List[int]] = None,
+    ) -> Optional[Dict]:
+        """Como obter_todos, retornando so o primeiro resultado"""
+        resultados = self.obter_todos(query, params, data_inicio, data_fim, anexar)
+        return resultados[0] if resultados else None
+
+    def somar_agregados(self, anos: List[int], tipo: str, categoria_id: Optional[int] = None) -> float:
+        """Soma valores pre-calculados dos anos fechados informados"""
+        if not anos:
+            return 0.0
+        marcadores = ", ".join("?" for _ in anos)
+        query = f"""
+            SELECT COALESCE(SUM(total), 0) AS total
+            FROM agregados_lancamentos_ano
+            WHERE ano IN ({marcadores}) AND tipo = ?
+        """
+        params: List = [*anos, tipo]
+        if categoria_id:
+            query += " AND categoria_id = ?"
+            params.append(categoria_id)
+        resultado = self.db.obter_um(query, tuple(params))
+        return float(resultado["total"]) if resultado else 0.0
+
+    def fechar_ano(self, ano: int) -> int:
+        """Move os lancamentos do ano para a particao e pre-calcula agregados.
+
+        A copia, os agregados e a remocao do banco principal acontecem numa
+        unica transacao. Depois a particao fica somente leitura, entao os
+        backups do banco principal deixam de carregar os anos antigos.
+
+        Returns:
+            Quantidade de lancamentos movidos
+        """
+        if ano >= date.today().year:
+            raise Exception(f"Erro: o ano {ano} ainda esta aberto")
+        if ano in self.anos_fechados():
+            raise Exception(f"Erro: o ano {ano} ja esta fechado")
+
+        destino = self.caminho(ano)
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        inicio, fim = para_dia(date(ano, 1, 1)), para_dia(date(ano + 1, 1, 1))
+
+        conn = sqlite3.connect(self.db.db_path, isolation_level=None)
+        try:
+            conn.execute("ATTACH DATABASE ? AS particao", (str(destino),))
+            conn.execute(_ddl_particao(conn))
+            colunas = ", ".join(row[1] for row in conn.execute("PRAGMA main.table_info(lancamentos)"))
+            for instrucao in INDICES_PARTICAO_SQL.format(alias="particao").split(";"):
+                conn.execute(instrucao)
+
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                linhas = conn.execute(
+                    f"INSERT INTO particao.lancamentos ({colunas}) SELECT {colunas} FROM main.lancamentos "
+                    "WHERE dia >= ? AND dia < ?",
+                    (inicio, fim),
+                ).rowcount
+                conn.execute(
+                    """
+                    INSERT INTO main.agregados_lancamentos_ano (
+                        ano, mes, tipo, categoria_id, subcategoria_id, quantidade, total
+                    )
+                    SELECT ?, CAST(substr(data, 6, 2) AS INTEGER), tipo,
+                           categoria_id, subcategoria_id, COUNT(*), SUM(valor)
+                    FROM particao.lancamentos
+                    GROUP BY 2, tipo, categoria_id, subcategoria_id
+                    """,
+                    (ano,),
+                )
+                # Registrar antes de apagar: o trigger do resumo mensal ignora
+                # DELETE de anos fechados, entao o resumo continua valendo
+                conn.execute(
+                    "INSERT INTO main.particoes_lancamentos (ano, arquivo, linhas) VALUES (?, ?, ?)",
+                    (ano, destino.name, linhas),
+                )
+                conn.execute(
+                    "DELETE FROM main.lancamentos WHERE dia >= ? AND dia < ?", (inicio, fim)
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("DETACH DATABASE particao")
+        except sqlite3.Error as e:
+            raise Exception(f"Erro ao fechar ano {ano}: {e}")
+        finally:
+            conn.close()
+
+        os.chmod(destino, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        return linhas
+
+    def completar_indices(self) -> List[int]:
+        """Cria nas particoes ja fechadas os indices de INDICES_PARTICAO_SQL que faltam.
+
+        Particoes sao somente leitura: a permissao de escrita e devolvida so
+        durante o CREATE INDEX. Particoes fechadas antes da coluna dia ficam
+        como estao (dia e calculado na leitura). Retorna os anos alterados.
+        """
+        instrucoes = [i for i in INDICES_PARTICAO_SQL.format(alias="particao").split(";") if i.strip()]
+        alterados = []
+        for ano in self.anos_fechados():
+            destino = self.caminho(ano)
+            if not destino.exists():
+                continue
+            leitura = sqlite3.connect(destino.resolve().as_uri() + "?mode=ro", uri=True)
+            try:
+                colunas = {row[1] for row in leitura.execute("PRAGMA table_xinfo(lancamentos)")}
+                indices = {row[1] for row in leitura.execute("PRAGMA index_list(lancamentos)")}
+            finally:
+                leitura.close()
+            faltando = [i for i in instrucoes if i.split(".", 1)[1].split()[0] not in indices]
+            if "dia" not in colunas or not faltando:
+                continue
+
+            modo = destino.stat().st_mode
+            os.chmod(destino, modo | stat.S_IWUSR)
+            try:
+                conn = sqlite3.connect(self.db.db_path)
+                try:
+                    conn.execute("ATTACH DATABASE ? AS particao", (str(destino),))
+                    for instrucao in faltando:
+                        conn.execute(instrucao)
+                    conn.commit()
+                    conn.execute("DETACH DATABASE particao")
+                except sqlite3.Error as e:
+                    raise Exception(f"Erro ao indexar particao de {ano}: {e}")
+                finally:
+                    conn.close()
+            finally:
+                os.chmod(destino, modo)
+            alterados.append(ano)
+        return alterados
+
+    def fechar_anos_anteriores(self) -> Dict[int, int]:
+        """Fecha todos os anos anteriores ao corrente ainda no banco principal"""
+        rows = self.db.obter_todos(
+            "SELECT DISTINCT CAST(substr(data, 1, 4) AS INTEGER) AS ano FROM lancamentos "
+            "WHERE dia < ? ORDER BY ano",
+            (para_dia(date(date.today().year, 1, 1)),),
+        )
+        fechados = set(self.anos_fechados())
+        return {row["ano"]: self.fechar_ano(row["ano"]) for row in rows if row["ano"] not in fechados}
@@ -60,7 +60,7 @@ CREATE TABLE IF NOT EXISTS clientes (
 -- Índices para performance
 CREATE UNIQUE INDEX IF NOT EXISTS idx_clientes_documento ON clientes(documento);
 CREATE INDEX IF NOT EXISTS idx_clientes_email ON clientes(email);
-CREATE INDEX IF NOT EXISTS idx_clientes_status ON clientes(status);
+CREATE INDEX IF NOT EXISTS idx_clientes_status_data_cadastro ON clientes(status, data_cadastro);
 CREATE INDEX IF NOT EXISTS idx_clientes_data_cadastro ON clientes(data_cadastro);
 
 -- ============================================
@@ -91,7 +91,8 @@ CREATE TABLE IF NOT EXISTS funcionarios (
 -- Índices para performance
 CREATE UNIQUE INDEX IF NOT EXISTS idx_funcionarios_cpf ON funcionarios(cpf);
 CREATE INDEX IF NOT EXISTS idx_funcionarios_email ON funcionarios(email);
-CREATE INDEX IF NOT EXISTS idx_funcionarios_status ON funcionarios(status);
+CREATE INDEX IF NOT EXISTS idx_funcionarios_status_data_cadastro ON funcionarios(status, data_cadastro);
+CREATE INDEX IF NOT EXISTS idx_funcionarios_data_cadastro ON funcionarios(data_cadastro);
 
 -- ============================================
 -- TABELA: FORNECEDORES
@@ -122,7 +123,9 @@ CREATE TABLE IF NOT EXISTS fornecedores (
 -- Índices para performance
 CREATE UNIQUE INDEX IF NOT EXISTS idx_fornecedor_cpf_cnpj ON fornecedores(cpf_cnpj);
 CREATE INDEX IF NOT EXISTS idx_fornecedor_tipo ON fornecedores(tipo);
-CREATE INDEX IF NOT EXISTS idx_fornecedor_status ON fornecedores(status);
+-- Fornecedores só são listados/contados como 'ativo' (literal no SQL)
+CREATE INDEX IF NOT EXISTS idx_fornecedores_ativos_nome ON fornecedores(nome) WHERE status = 'ativo';
+CREATE INDEX IF NOT EXISTS idx_fornecedores_ativos_tipo_nome ON fornecedores(tipo, nome) WHERE status = 'ativo';
 
 -- ============================================
 -- TABELA: LANÇAMENTOS
@@ -151,14 +154,22 @@ CREATE TABLE IF NOT EXISTS lancamentos (
     FOREIGN KEY (funcionario_id) REFERENCES funcionarios(id)
 );
 
--- Índices para performance
-CREATE INDEX IF NOT EXISTS idx_lancamentos_data ON lancamentos(data);
-CREATE INDEX IF NOT EXISTS idx_lancamentos_tipo ON lancamentos(tipo);
-CREATE INDEX IF NOT EXISTS idx_lancamentos_categoria ON lancamentos(categoria_id);
-CREATE INDEX IF NOT EXISTS idx_lancamentos_cliente ON lancamentos(cliente_id);
-CREATE INDEX IF NOT EXISTS idx_lancamentos_fornecedor ON lancamentos(fornecedor_id);
-CREATE INDEX IF NOT EXISTS idx_lancamentos_funcionario ON lancamentos(funcionario_id);
-CREATE INDEX IF NOT EXISTS idx_lancamentos_data_categoria ON lancamentos(data, categoria_id);
+-- Índices para performance (a migração 10 troca data pela coluna gerada dia)
+-- Relatórios filtram tipo e/ou período e somam valor por categoria/subcategoria:
+-- os dois primeiros cobrem essas consultas sem ler a tabela
+CREATE INDEX IF NOT EXISTS idx_lancamentos_tipo_data
+    ON lancamentos(tipo, data, valor, categoria_id, subcategoria_id);
+CREATE INDEX IF NOT EXISTS idx_lancamentos_data_tipo
+    ON lancamentos(data, tipo, valor, categoria_id, subcategoria_id);
+-- Listagens por entidade (ORDER BY data DESC sem ordenação extra); cliente,
+-- fornecedor e funcionário são NULL na maioria das linhas, daí os índices parciais
+CREATE INDEX IF NOT EXISTS idx_lancamentos_categoria_data ON lancamentos(categoria_id, data);
+CREATE INDEX IF NOT EXISTS idx_lancamentos_cliente_tipo_data
+    ON lancamentos(cliente_id, tipo, data) WHERE cliente_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_lancamentos_fornecedor_tipo_data
+    ON lancamentos(fornecedor_id, tipo, data) WHERE fornecedor_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_lancamentos_funcionario_data
+    ON lancamentos(funcionario_id, data) WHERE funcionario_id IS NOT NULL;
 
 -- ============================================
 -- TABELA: RESUMO DE SALDO DIÁRIO (Cache)
@@ -1,4 +1,5 @@
 """Ponto de entrada da aplicacao - Sistema de Fluxo de Caixa Profissional"""
+import multiprocessing
 import sys
 from pathlib import Path
 
@@ -18,12 +19,15 @@ except ImportError:  # fallback when ttkbootstrap is not installed
 from app.config.settings import Settings
 from app.database.database import Database
 from app.services.categoria import ServicoCategoria
+from app.services.exportacoes import obter_gerenciador_exportacoes
 from app.services.cliente import ServicoCliente
 from app.services.funcionario import ServicoFuncionario
 from app.services.fornecedor import ServicoFornecedor
 from app.services.lancamento import ServicoLancamento
 from app.services.relatorios import GeradorRelatorios
 from app.ui.views.clientes import TelaClientes
+from app.ui.views.diagnostico import JanelaDiagnostico
+from app.ui.views.exportacoes import JanelaExportacoes
 from app.ui.views.funcionarios import TelaFuncionarios
 from app.ui.views.fornecedores import TelaFornecedores
 from app.ui.views.lancamentos import TelaLancamentos
@@ -44,7 +48,6 @@ class AplicacaoFluxoCaixa:
         self.servico_cliente = ServicoCliente(self.db)
         self.servico_funcionario = ServicoFuncionario(self.db)
         self.servico_fornecedor = ServicoFornecedor(self.db)
-        self.servico_fornecedor.criar_tabela()  # Garante que a tabela de fornecedores existe
         self.servico_lancamento = ServicoLancamento(self.db)
         self.gerador_relatorios = GeradorRelatorios(self.db)
 
@@ -74,12 +77,14 @@ class AplicacaoFluxoCaixa:
         menu_arquivo = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Arquivo", menu=menu_arquivo)
         menu_arquivo.add_command(label="Backup do Banco", command=self.fazer_backup)
+        menu_arquivo.add_command(label="Exportacoes", command=self.mostrar_exportacoes)
         menu_arquivo.add_separator()
         menu_arquivo.add_command(label="Sair", command=self.root.quit)
 
         # Menu Ajuda
         menu_ajuda = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Ajuda", menu=menu_ajuda)
+        menu_ajuda.add_command(label="Diagnostico de Consultas", command=self.mostrar_diagnostico)
         menu_ajuda.add_command(label="Sobre", command=self.mostrar_sobre)
 
     def fazer_backup(self):
@@ -96,6 +101,14 @@ class AplicacaoFluxoCaixa:
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao fazer backup: {str(e)}")
 
+    def mostrar_exportacoes(self):
+        """Abre painel das exportacoes em segundo plano e arquivos gerados."""
+        JanelaExportacoes(self.root, obter_gerenciador_exportacoes())
+
+    def mostrar_diagnostico(self):
+        """Abre janela com estatisticas das consultas SQL."""
+        JanelaDiagnostico(self.root, self.db.instrumentacao)
+
     def mostrar_sobre(self):
         """Mostra janela sobre."""
         messagebox.showinfo(
@@ -171,6 +184,8 @@ def main():
                 pass
         app = AplicacaoFluxoCaixa(root)
         root.mainloop()
+        obter_gerenciador_exportacoes().fechar()  # Cancela exportacoes em andamento
+        app.db.fechar()  # Grava auditoria pendente antes de sair
     except Exception as e:
         print(f"Erro ao iniciar aplicacao: {e}")
         import traceback
@@ -179,4 +194,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Executavel congelado: processos filhos (PDF em partes) reentram por aqui
+    multiprocessing.freeze_support()
     main()
@@ -7,6 +7,8 @@ from datetime import datetime
 from typing import Optional
 from enum import Enum
 
+from app.utils.documentos import validar_cnpj, validar_cpf
+
 
 class StatusCliente(Enum):
     """Status possíveis de um cliente"""
@@ -113,54 +115,12 @@ class Cliente:
     @staticmethod
     def _validar_cpf(cpf: str) -> bool:
         """Valida CPF utilizando dígitos verificadores"""
-        if len(cpf) != 11:
-            return False
-        
-        # Verifica se todos os dígitos são iguais
-        if cpf == cpf[0] * 11:
-            return False
-        
-        # Primeiro dígito verificador
-        soma = sum(int(cpf[i]) * (10 - i) for i in range(9))
-        digito1 = 11 - (soma % 11)
-        digito1 = 0 if digito1 >= 10 else digito1
-        
-        if int(cpf[9]) != digito1:
-            return False
-        
-        # Segundo dígito verificador
-        soma = sum(int(cpf[i]) * (11 - i) for i in range(10))
-        digito2 = 11 - (soma % 11)
-        digito2 = 0 if digito2 >= 10 else digito2
-        
-        return int(cpf[10]) == digito2
+        return validar_cpf(cpf)[0]
     
     @staticmethod
     def _validar_cnpj(cnpj: str) -> bool:
         """Valida CNPJ utilizando dígitos verificadores"""
-        if len(cnpj) != 14:
-            return False
-        
-        # Verifica se todos os dígitos são iguais
-        if cnpj == cnpj[0] * 14:
-            return False
-        
-        # Primeiro dígito verificador
-        soma = sum(int(cnpj[i]) * (5 - (i % 4)) for i in range(8))
-        soma += sum(int(cnpj[i]) * (9 - (i % 4)) for i in range(8, 12))
-        digito1 = 11 - (soma % 11)
-        digito1 = 0 if digito1 >= 10 else digito1
-        
-        if int(cnpj[12]) != digito1:
-            return False
-        
-        # Segundo dígito verificador
-        soma = sum(int(cnpj[i]) * (6 - (i % 4)) for i in range(9))
-        soma += sum(int(cnpj[i]) * (9 - (i % 4)) for i in range(9, 13))
-        digito2 = 11 - (soma % 11)
-        digito2 = 0 if digito2 >= 10 else digito2
-        
-        return int(cnpj[13]) == digito2
+        return validar_cnpj(cnpj)[0]
     
     def to_dict(self) -> dict:
         """Converte para dicionário"""
@@ -8,6 +8,8 @@ from enum import Enum
 from typing import Optional
 import re
 
+from app.utils.documentos import limpar_documento, validar_cnpj, validar_cpf
+
 
 class TipoPessoa(Enum):
     """Tipo de pessoa do fornecedor"""
@@ -38,7 +40,13 @@ class Fornecedor:
     id: Optional[int] = None
     
     def __post_init__(self):
-        """Validações pós-inicialização"""
+        """Normaliza e valida após inicialização"""
+        # Mesma forma gravada pela importação em lote: só dígitos no documento
+        self.cpf_cnpj = limpar_documento(self.cpf_cnpj)
+        if self.email:
+            self.email = self.email.strip().lower()
+        if self.nome:
+            self.nome = self.nome.strip()
         self.validar()
     
     def validar(self) -> None:
@@ -67,50 +75,12 @@ class Fornecedor:
     @staticmethod
     def _validar_cpf(cpf: str) -> bool:
         """Valida CPF"""
-        cpf_limpo = re.sub(r'\D', '', cpf)
-        
-        if len(cpf_limpo) != 11:
-            return False
-        
-        if cpf_limpo == cpf_limpo[0] * 11:
-            return False
-        
-        # Validar dígitos verificadores
-        soma = sum(int(cpf_limpo[i]) * (10 - i) for i in range(9))
-        resto = soma % 11
-        digito1 = 0 if resto < 2 else 11 - resto
-        
-        soma = sum(int(cpf_limpo[i]) * (11 - i) for i in range(10))
-        resto = soma % 11
-        digito2 = 0 if resto < 2 else 11 - resto
-        
-        return int(cpf_limpo[9]) == digito1 and int(cpf_limpo[10]) == digito2
+        return validar_cpf(cpf)[0]
     
     @staticmethod
     def _validar_cnpj(cnpj: str) -> bool:
         """Valida CNPJ"""
-        cnpj_limpo = re.sub(r'\D', '', cnpj)
-        
-        if len(cnpj_limpo) != 14:
-            return False
-        
-        if cnpj_limpo == cnpj_limpo[0] * 14:
-            return False
-        
-        # Validar primeiro dígito
-        multiplicadores1 = [5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
-        soma = sum(int(cnpj_limpo[i]) * multiplicadores1[i] for i in range(12))
-        resto = soma % 11
-        digito1 = 0 if resto < 2 else 11 - resto
-        
-        # Validar segundo dígito
-        multiplicadores2 = [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3]
-        soma = sum(int(cnpj_limpo[i]) * multiplicadores2[i] for i in range(12))
-        soma += digito1 * 2
-        resto = soma % 11
-        digito2 = 0 if resto < 2 else 11 - resto
-        
-        return int(cnpj_limpo[12]) == digito1 and int(cnpj_limpo[13]) == digito2
+        return validar_cnpj(cnpj)[0]
     
     @staticmethod
     def _validar_email(email: str) -> bool:
@@ -3,7 +3,8 @@ Modelo de Lançamento Financeiro com relacionamentos
 """
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from operator import itemgetter
+from typing import Callable, Optional, Sequence
 from enum import Enum
 
 
@@ -13,9 +14,24 @@ class TipoLancamento(Enum):
     DESPESA = "Despesa"
 
 
-@dataclass
+# Busca do tipo pelo valor gravado, sem o TipoLancamento(valor) por linha
+TIPOS_LANCAMENTO = {tipo.value: tipo for tipo in TipoLancamento}
+
+# Colunas lidas do banco, na ordem dos campos de Lancamento
+CAMPOS_LANCAMENTO = (
+    "data", "tipo", "categoria_id", "subcategoria_id", "valor", "descricao",
+    "cliente_id", "fornecedor_id", "funcionario_id",
+    "banco", "nota_fiscal", "comprovante", "observacao",
+    "id", "criado_em", "atualizado_em",
+)
+
+# Textos distintos compartilhados por consulta no conversor (ex.: ~11 anos de datas)
+LIMITE_UNICOS = 4096
+
+
+@dataclass(slots=True)
 class Lancamento:
-    """Modelo de lançamento financeiro"""
+    """Modelo de lançamento financeiro (slots: sem __dict__ por instância)"""
 
     data: str  # YYYY-MM-DD
     tipo: TipoLancamento
@@ -108,7 +124,7 @@ class Lancamento:
     @staticmethod
     def de_dict(dados: dict) -> 'Lancamento':
         """Cria lançamento a partir de dicionário"""
-        tipo = TipoLancamento(dados['tipo']) if isinstance(dados['tipo'], str) else dados['tipo']
+        tipo = TIPOS_LANCAMENTO[dados['tipo']] if isinstance(dados['tipo'], str) else dados['tipo']
         
         return Lancamento(
             data=dados['data'],
@@ -129,3 +145,32 @@ class Lancamento:
             atualizado_em=dados.get('atualizado_em'),
         )
 
+    @staticmethod
+    def conversor(colunas: Sequence[str]) -> Callable[[tuple], 'Lancamento']:
+        """Conversor de tuplas do cursor em Lancamento (ver app.database.linhas).
+
+        As posições das colunas são resolvidas uma vez por consulta. Data e
+        banco, que se repetem entre linhas, passam a compartilhar um único
+        objeto; o dicionário é limitado a LIMITE_UNICOS textos para a memória
+        de uma consulta em streaming não crescer com o resultado.
+        """
+        campos = itemgetter(*(colunas.index(nome) for nome in CAMPOS_LANCAMENTO))
+        tipos = TIPOS_LANCAMENTO
+        unicos = {}
+        unico = unicos.setdefault
+
+        def converter(linha: tuple) -> 'Lancamento':
+            (data, tipo, categoria_id, subcategoria_id, valor, descricao,
+             cliente_id, fornecedor_id, funcionario_id,
+             banco, nota_fiscal, comprovante, observacao,
+             id, criado_em, atualizado_em) = campos(linha)
+            if len(unicos) > LIMITE_UNICOS:
+                unicos.clear()
+            return Lancamento(
+                unico(data, data), tipos[tipo], categoria_id, subcategoria_id, float(valor), descricao,
+                cliente_id, fornecedor_id, funcionario_id,
+                unico(banco, banco) if banco else '', nota_fiscal or '', comprovante or '', observacao or '',
+                id, criado_em, atualizado_em,
+            )
+
+        return converter
@@ -5,6 +5,13 @@ __all__ = [
     'ServicoFuncionario', 
     'ServicoLancamento',
     'GeradorRelatorios',
+    'ServicoAuditoria',
+    'ResolvedorCEP',
+    'GerenciadorExportacoes',
+    'ImportadorEntidades',
+    'ConciliadorBancario',
+    'DetectorDuplicados',
+    'CuboLancamentos',
     # Serviços utilitários
     'export_excel_profissional',
     'impressao'
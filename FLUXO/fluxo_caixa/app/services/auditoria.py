@@ -0,0 +1,181 @@
+"""
+Serviço de Auditoria
+Retenção da tabela auditoria: arquivamento anual compactado e consulta unificada
+"""
+import json
+import sqlite3
+import zlib
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.database.database import Database
+from app.database.instrumentacao import conectar
+
+CRIAR_ARQUIVO_SQL = """
+    CREATE TABLE IF NOT EXISTS {alias}.auditoria (
+        id INTEGER PRIMARY KEY,
+        tabela TEXT NOT NULL,
+        operacao TEXT NOT NULL,
+        registro_id INTEGER NOT NULL,
+        dados_anteriores BLOB,
+        dados_novos BLOB,
+        usuario TEXT,
+        data_operacao TIMESTAMP NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS {alias}.idx_auditoria_data ON auditoria(data_operacao);
+    CREATE INDEX IF NOT EXISTS {alias}.idx_auditoria_tabela ON auditoria(tabela)
+"""
+
+COLUNAS = "id, tabela, operacao, registro_id, dados_anteriores, dados_novos, usuario, data_operacao"
+
+
+def _comprimir(texto: Optional[str]) -> Optional[bytes]:
+    return zlib.compress(texto.encode("utf-8"), 9) if texto is not None else None
+
+
+def _descomprimir(valor) -> Optional[Dict]:
+    if valor is None:
+        return None
+    if isinstance(valor, bytes):
+        valor = zlib.decompress(valor).decode("utf-8")
+    return json.loads(valor)
+
+
+def _inicio_do_mes(meses_atras: int, hoje: Optional[date] = None) -> str:
+    hoje = hoje or date.today()
+    total = hoje.year * 12 + (hoje.month - 1) - meses_atras
+    return f"{total // 12:04d}-{total % 12 + 1:02d}-01 00:00:00"
+
+
+class ServicoAuditoria:
+    """Arquiva auditoria antiga em bancos anuais e consulta tudo de forma transparente"""
+
+    def __init__(self, db: Database, pasta_arquivo: Optional[Path] = None):
+        self.db = db
+        self.pasta_arquivo = Path(pasta_arquivo or db.db_path.parent / "arquivo_auditoria")
+
+    def caminho_arquivo(self, ano: int) -> Path:
+        """Banco de arquivo do ano (ATTACH-ável)"""
+        return self.pasta_arquivo / f"auditoria_{ano}.db"
+
+    def _conectar(self) -> sqlite3.Connection:
+        conn = conectar(self.db.db_path, self.db.instrumentacao, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def arquivar(self, meses: int = 12, hoje: Optional[date] = None) -> Dict[int, int]:
+        """
+        Move registros com mais de `meses` meses para bancos anuais
+
+        Os JSON são compactados com zlib no arquivo. Cada ano é movido numa
+        transação única entre os dois bancos (INSERT no arquivo + DELETE).
+
+        Returns:
+            {ano: registros movidos}
+        """
+        self.db.auditoria.descarregar()
+        corte = _inicio_do_mes(meses, hoje)
+        self.pasta_arquivo.mkdir(parents=True, exist_ok=True)
+
+        conn = self._conectar()
+        conn.create_function("comprimir", 1, _comprimir, deterministic=True)
+        movidos: Dict[int, int] = {}
+        try:
+            anos = [
+                int(row[0])
+                for row in conn.execute(
+                    "SELECT DISTINCT substr(data_operacao, 1, 4) FROM auditoria "
+                    "WHERE data_operacao < ? ORDER BY 1",
+                    (corte,),
+                )
+            ]
+            for ano in anos:
+                inicio = f"{ano:04d}-01-01 00:00:00"
+                fim = min(corte, f"{ano + 1:04d}-01-01 00:00:00")
+                conn.execute("ATTACH DATABASE ? AS arq", (str(self.caminho_arquivo(ano)),))
+                try:
+                    for instrucao in CRIAR_ARQUIVO_SQL.format(alias="arq").split(";"):
+                        conn.execute(instrucao)
+                    conn.execute("BEGIN IMMEDIATE")
+                    try:
+                        cursor = conn.execute(
+                            f"""
+                            INSERT OR IGNORE INTO arq.auditoria ({COLUNAS})
+                            SELECT id, tabela, operacao, registro_id,
+                                   comprimir(dados_anteriores), comprimir(dados_novos),
+                                   usuario, data_operacao
+                            FROM main.auditoria
+                            WHERE data_operacao >= ? AND data_operacao < ?
+                            """,
+                            (inicio, fim),
+                        )
+                        movidos[ano] = cursor.rowcount
+                        conn.execute(
+                            "DELETE FROM main.auditoria WHERE data_operacao >= ? AND data_operacao < ?",
+                            (inicio, fim),
+                        )
+                        conn.execute("COMMIT")
+                    except Exception:
+                        conn.execute("ROLLBACK")
+                        raise
+                finally:
+                    conn.execute("DETACH DATABASE arq")
+        finally:
+            conn.close()
+        return movidos
+
+    def consultar(
+        self,
+        data_inicio: str,
+        data_fim: str,
+        tabela: Optional[str] = None,
+        registro_id: Optional[int] = None,
+    ) -> List[Dict]:
+        """
+        Consulta auditoria no período, unindo tabela ativa e arquivos anuais
+
+        Args:
+            data_inicio: 'YYYY-MM-DD' (inclusivo)
+            data_fim: 'YYYY-MM-DD' (inclusivo)
+
+        Returns:
+            Registros ordenados por data, com os JSON já decodificados
+        """
+        self.db.auditoria.descarregar()
+        inicio = f"{data_inicio[:10]} 00:00:00"
+        fim = f"{data_fim[:10]} 23:59:59"
+
+        where = " WHERE data_operacao BETWEEN ? AND ?"
+        params: List = [inicio, fim]
+        if tabela:
+            where += " AND tabela = ?"
+            params.append(tabela)
+        if registro_id is not None:
+            where += " AND registro_id = ?"
+            params.append(registro_id)
+
+        conn = self._conectar()
+        linhas: List[sqlite3.Row] = []
+        try:
+            linhas.extend(conn.execute(f"SELECT {COLUNAS} FROM main.auditoria{where}", params))
+            for ano in range(int(inicio[:4]), int(fim[:4]) + 1):
+                caminho = self.caminho_arquivo(ano)
+                if not caminho.exists():
+                    continue
+                conn.execute("ATTACH DATABASE ? AS arq", (str(caminho),))
+                try:
+                    linhas.extend(conn.execute(f"SELECT {COLUNAS} FROM arq.auditoria{where}", params))
+                finally:
+                    conn.execute("DETACH DATABASE arq")
+        finally:
+            conn.close()
+
+        resultados = []
+        for row in linhas:
+            registro = dict(row)
+            registro["dados_anteriores"] = _descomprimir(registro["dados_anteriores"])
+            registro["dados_novos"] = _descomprimir(registro["dados_novos"])
+            resultados.append(registro)
+        resultados.sort(key=lambda r: (r["data_operacao"], r["id"]))
+        return resultados
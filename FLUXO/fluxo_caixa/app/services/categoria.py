@@ -3,7 +3,7 @@ Serviço de Categorias e Subcategorias
 Gerencia operações CRUD e relacionamentos
 """
 from typing import List, Dict, Optional
-from app.models.categoria import Categoria, Subcategoria, TipoCategoria, CATEGORIAS_PADRAO
+from app.models.categoria import Categoria, Subcategoria, TipoCategoria
 from app.database.database import Database
 
 
@@ -11,34 +11,8 @@ class ServicoCategoria:
     """Gerencia operações com categorias"""
 
     def __init__(self, db: Database):
+        # Categorias padrão são criadas pela migração 3 (app/database/migracoes.py)
         self.db = db
-        self._inicializar_categorias_padrao()
-
-    def _inicializar_categorias_padrao(self):
-        """Cria categorias padrão se não existirem"""
-        try:
-            # Verifica se já existe alguma categoria
-            resultado = self.db.obter_um("SELECT COUNT(*) as total FROM categorias")
-            if resultado and resultado['total'] > 0:
-                return  # Já tem categorias
-            
-            # Insere categorias padrão
-            for cat_data in CATEGORIAS_PADRAO:
-                cat_id = self.criar_categoria(
-                    nome=cat_data['nome'],
-                    tipo=cat_data['tipo'],
-                    descricao=cat_data['descricao']
-                )
-                
-                # Insere subcategorias
-                for subcat_data in cat_data['subcategorias']:
-                    self.criar_subcategoria(
-                        nome=subcat_data['nome'],
-                        categoria_id=cat_id,
-                        descricao=subcat_data['descricao']
-                    )
-        except Exception as e:
-            print(f"Aviso ao inicializar categorias: {e}")
 
     def criar_categoria(self, nome: str, tipo: TipoCategoria, descricao: str = "") -> int:
         """Cria nova categoria"""
@@ -73,11 +73,9 @@ class ServicoCliente:
                 datetime.now()
             )
             
-            cliente_id = self.db.inserir(query, params)
-            
-            # Registra auditoria
-            self.db.registrar_auditoria(
-                'clientes', 'INSERT', cliente_id,
+            # Insere e registra auditoria com um único commit
+            cliente_id = self.db.executar_com_auditoria(
+                query, params, 'clientes', 'INSERT',
                 dados_novos=cliente.to_dict()
             )
             
@@ -200,11 +198,9 @@ class ServicoCliente:
                 cliente_id
             )
             
-            self.db.atualizar(query, params)
-            
-            # Registra auditoria
-            self.db.registrar_auditoria(
-                'clientes', 'UPDATE', cliente_id,
+            # Atualiza e registra auditoria com um único commit
+            self.db.executar_com_auditoria(
+                query, params, 'clientes', 'UPDATE', cliente_id,
                 dados_anteriores=cliente_antigo,
                 dados_novos=cliente.to_dict()
             )
@@ -237,10 +233,9 @@ class ServicoCliente:
                 WHERE id = ?
             """
             
-            self.db.atualizar(query, ('inativo', datetime.now(), cliente_id))
-            
-            # Registra auditoria
-            self.db.registrar_auditoria(
+            # Desativa e registra auditoria com um único commit
+            self.db.executar_com_auditoria(
+                query, ('inativo', datetime.now(), cliente_id),
                 'clientes', 'DELETE', cliente_id,
                 dados_anteriores=cliente
             )
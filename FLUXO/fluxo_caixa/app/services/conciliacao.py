@@ -0,0 +1,365 @@
+"""
+Serviço de Conciliação Bancária
+Casa linhas de extrato com lançamentos por (banco, centavos) dentro de uma janela de datas
+"""
+import bisect
+import csv
+import re
+from collections import defaultdict
+from functools import lru_cache
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.database.database import Database
+from app.utils.datas import de_dia
+
+# Valor do lançamento em centavos com sinal: receita entra (+), despesa sai (-)
+CENTAVOS_LANCAMENTO_SQL = (
+    "CAST(ROUND(ABS(valor) * 100) AS INTEGER) * CASE WHEN tipo = 'Receita' THEN 1 ELSE -1 END"
+)
+
+_PALAVRA = re.compile(r"\w+")
+
+
+@dataclass
+class ResultadoConciliacao:
+    """Resumo de uma rodada de conciliação"""
+
+    analisadas: int = 0
+    conciliadas: int = 0
+    # Linhas com mais de um lançamento candidato (resolvidas pela pontuação)
+    ambiguas: int = 0
+    pendentes: int = 0
+
+
+def normalizar_banco(banco: Optional[str]) -> str:
+    """Chave de banco: maiúsculas e espaços simples"""
+    return " ".join((banco or "").upper().split())
+
+
+def converter_data(valor) -> str:
+    """Aceita date, 'AAAA-MM-DD' ou 'DD/MM/AAAA'; retorna 'AAAA-MM-DD'"""
+    if isinstance(valor, (date, datetime)):
+        return valor.strftime("%Y-%m-%d")
+    texto = str(valor).strip()
+    if "/" in texto:
+        dia, mes, ano = texto[:10].split("/")
+        texto = f"{ano}-{int(mes):02d}-{int(dia):02d}"
+    return date.fromisoformat(texto[:10]).isoformat()
+
+
+def converter_centavos(valor) -> int:
+    """Aceita número ou texto ('1.234,56', '-10.5'); retorna centavos com sinal"""
+    if isinstance(valor, str):
+        texto = valor.strip().replace("R$", "").replace(" ", "")
+        if "," in texto:
+            texto = texto.replace(".", "").replace(",", ".")
+        valor = float(texto)
+    return int(round(float(valor) * 100))
+
+
+@lru_cache(maxsize=65536)
+def _palavras(texto: Optional[str]) -> frozenset:
+    return frozenset(p for p in _PALAVRA.findall((texto or "").lower()) if len(p) > 2)
+
+
+class ConciliadorBancario:
+    """Conciliação de extratos bancários com lançamentos.
+
+    Os lançamentos candidatos são carregados uma vez. Linhas com documento
+    igual à nota fiscal/comprovante casam direto por hash. As demais
+    consultam o dict (banco, centavos) e, no grupo, a faixa de datas da
+    janela (bisect). Havendo mais de um candidato, os pares são ordenados
+    por pontuação (proximidade da data, documento e palavras em comum na
+    descrição) e atribuídos de forma gulosa, um lançamento por linha, em
+    rodadas até não restar par possível.
+
+    O estado fica em extrato_linhas.lancamento_id, então cada rodada olha
+    apenas linhas pendentes e lançamentos ainda não conciliados.
+    """
+
+    def __init__(self, db: Database, janela_dias: int = 3, max_candidatos: int = 8):
+        self.db = db
+        self.janela_dias = janela_dias
+        self.max_candidatos = max_candidatos
+
+    def importar_extrato(
+        self, banco: str, linhas: Iterable[Dict], arquivo: Optional[str] = None
+    ) -> int:
+        """
+        Grava um extrato e suas linhas
+
+        Args:
+            banco: nome do banco (mesmo texto usado em lancamentos.banco)
+            linhas: dicionários com data, valor (crédito positivo, débito
+                negativo), descricao e documento (opcional)
+            arquivo: origem do extrato, só para referência
+
+        Returns:
+            ID do extrato
+        """
+        chave = normalizar_banco(banco)
+        registros = [
+            (
+                chave,
+                converter_data(linha["data"]),
+                converter_centavos(linha["valor"]),
+                (linha.get("descricao") or "").strip(),
+                (linha.get("documento") or "").strip() or None,
+            )
+            for linha in linhas
+        ]
+
+        conn = self.db.get_connection()
+        try:
+            cursor = conn.execute(
+                "INSERT INTO extratos_bancarios (banco, arquivo, linhas) VALUES (?, ?, ?)",
+                (chave, arquivo, len(registros)),
+            )
+            extrato_id = cursor.lastrowid
+            conn.executemany(
+                "INSERT INTO extrato_linhas (extrato_id, banco, data, centavos, descricao, documento) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(extrato_id, *registro) for registro in registros],
+            )
+            conn.commit()
+            return extrato_id
+        except Exception as e:
+            conn.rollback()
+            raise Exception(f"Erro ao importar extrato: {e}")
+        finally:
+            conn.close()
+
+    def importar_csv(self, caminho, banco: str) -> int:
+        """Importa extrato CSV com colunas data, valor, descricao[, documento] (',' ou ';')"""
+        with open(caminho, newline="", encoding="utf-8-sig") as arquivo:
+            amostra = arquivo.read(4096)
+            arquivo.seek(0)
+            dialeto = csv.Sniffer().sniff(amostra, delimiters=",;")
+            linhas = [
+                {(k or "").strip().lower(): (v or "").strip() for k, v in row.items()}
+                for row in csv.DictReader(arquivo, dialect=dialeto)
+            ]
+        return self.importar_extrato(banco, linhas, arquivo=Path(caminho).name)
+
+    def conciliar(
+        self, extrato_id: Optional[int] = None, banco: Optional[str] = None
+    ) -> ResultadoConciliacao:
+        """Concilia as linhas pendentes (opcionalmente de um extrato ou banco)"""
+        resultado = ResultadoConciliacao()
+
+        filtros, params = ["lancamento_id IS NULL"], []
+        if extrato_id is not None:
+            filtros.append("extrato_id = ?")
+            params.append(extrato_id)
+        if banco:
+            filtros.append("banco = ?")
+            params.append(normalizar_banco(banco))
+        linhas = self.db.obter_todos(
+            f"SELECT id, banco, data, centavos, descricao, documento FROM extrato_linhas "
+            f"WHERE {' AND '.join(filtros)}",
+            tuple(params),
+        )
+        resultado.analisadas = len(linhas)
+        if not linhas:
+            return resultado
+        for linha in linhas:
+            linha["_dia"] = date.fromisoformat(linha["data"][:10]).toordinal()
+
+        lancamentos = self._candidatos(linhas)
+        linhas_usadas, lancamentos_usados = set(), set()
+        agora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        atualizacoes = []
+
+        def atribuir(pontos: float, linha_id: int, lancamento_id: int) -> None:
+            linhas_usadas.add(linha_id)
+            lancamentos_usados.add(lancamento_id)
+            atualizacoes.append((lancamento_id, round(pontos, 4), agora, linha_id))
+
+        # 1) Documento da linha igual à nota fiscal/comprovante: casamento direto
+        por_documento: Dict[Tuple[str, int, str], List[Dict]] = defaultdict(list)
+        for lancamento in lancamentos:
+            for documento in {lancamento["nota_fiscal"], lancamento["comprovante"]} - {None, ""}:
+                chave = (lancamento["_banco"], lancamento["centavos"], documento)
+                por_documento[chave].append(lancamento)
+        for linha in linhas:
+            if not linha["documento"]:
+                continue
+            chave = (linha["banco"], linha["centavos"], linha["documento"])
+            for lancamento in por_documento.get(chave, ()):
+                dias = abs(lancamento["_dia"] - linha["_dia"])
+                if lancamento["id"] not in lancamentos_usados and dias <= self.janela_dias:
+                    pontos = self._pontuar(linha, dias, lancamento)
+                    atribuir(pontos, linha["id"], lancamento["id"])
+                    break
+
+        # 2) Rodadas gulosas sobre os candidatos mais próximos na data
+        pendentes = [linha for linha in linhas if linha["id"] not in linhas_usadas]
+        grupos = self._agrupar(l for l in lancamentos if l["id"] not in lancamentos_usados)
+        primeira_rodada = True
+        while pendentes:
+            pares: List[Tuple[float, int, int]] = []
+            com_candidatos = []
+            for linha in pendentes:
+                grupo = grupos.get((linha["banco"], linha["centavos"]))
+                if not grupo:
+                    continue
+                ordinais, itens = grupo
+                indices, na_janela = self._mais_proximos(ordinais, linha["_dia"])
+                if not indices:
+                    continue
+                if primeira_rodada and na_janela > 1:
+                    resultado.ambiguas += 1
+                com_candidatos.append(linha)
+                for i in indices:
+                    pontos = self._pontuar(linha, abs(ordinais[i] - linha["_dia"]), itens[i])
+                    pares.append((-pontos, linha["id"], itens[i]["id"]))
+            if not pares:
+                break
+
+            # Maior pontuação primeiro; empate decide pelos menores ids
+            pares.sort()
+            for pontos, linha_id, lancamento_id in pares:
+                if linha_id not in linhas_usadas and lancamento_id not in lancamentos_usados:
+                    atribuir(-pontos, linha_id, lancamento_id)
+            pendentes = [l for l in com_candidatos if l["id"] not in linhas_usadas]
+            primeira_rodada = False
+
+            # Tira dos grupos os lançamentos já usados (a ordem por data se mantém)
+            for chave in {(l["banco"], l["centavos"]) for l in pendentes}:
+                ordinais, itens = grupos[chave]
+                livres = [i for i, item in enumerate(itens) if item["id"] not in lancamentos_usados]
+                grupos[chave] = ([ordinais[i] for i in livres], [itens[i] for i in livres])
+
+        if atualizacoes:
+            conn = self.db.get_connection()
+            try:
+                conn.executemany(
+                    "UPDATE extrato_linhas SET lancamento_id = ?, pontuacao = ?, conciliado_em = ? "
+                    "WHERE id = ? AND lancamento_id IS NULL",
+                    atualizacoes,
+                )
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                raise Exception(f"Erro ao gravar conciliação: {e}")
+            finally:
+                conn.close()
+
+        resultado.conciliadas = len(atualizacoes)
+        resultado.pendentes = resultado.analisadas - resultado.conciliadas
+        return resultado
+
+    def _candidatos(self, linhas: List[Dict]) -> List[Dict]:
+        """Lançamentos ainda não conciliados do período, dos bancos das linhas"""
+        bancos = {linha["banco"] for linha in linhas}
+        dias = [linha["_dia"] for linha in linhas]
+        dia_inicio, dia_fim = min(dias) - self.janela_dias, max(dias) + self.janela_dias
+
+        rows = self.db.particoes.obter_todos(
+            f"""
+            SELECT id, data, dia AS _dia, banco, descricao, nota_fiscal, comprovante,
+                   {CENTAVOS_LANCAMENTO_SQL} AS centavos
+            FROM lancamentos
+            WHERE dia BETWEEN ? AND ?
+              AND banco IS NOT NULL AND banco != ''
+              AND id NOT IN (
+                  SELECT lancamento_id FROM extrato_linhas WHERE lancamento_id IS NOT NULL
+              )
+            """,
+            (dia_inicio, dia_fim),
+            de_dia(dia_inicio).isoformat(),
+            de_dia(dia_fim).isoformat(),
+        )
+
+        candidatos = []
+        for row in rows:
+            row["_banco"] = normalizar_banco(row["banco"])
+            if row["_banco"] in bancos:
+                candidatos.append(row)
+        return candidatos
+
+    @staticmethod
+    def _agrupar(lancamentos: Iterable[Dict]) -> Dict[Tuple[str, int], Tuple[List[int], List[Dict]]]:
+        """Hash por (banco, centavos); cada grupo ordenado por data para o bisect"""
+        grupos: Dict[Tuple[str, int], List[Dict]] = defaultdict(list)
+        for lancamento in lancamentos:
+            grupos[(lancamento["_banco"], lancamento["centavos"])].append(lancamento)
+        ordenados = {}
+        for chave, itens in grupos.items():
+            itens.sort(key=lambda item: (item["_dia"], item["id"]))
+            ordenados[chave] = ([item["_dia"] for item in itens], itens)
+        return ordenados
+
+    def _mais_proximos(self, ordinais: List[int], dia: int) -> Tuple[List[int], int]:
+        """Índices de até max_candidatos lançamentos mais próximos de `dia` na janela.
+
+        Retorna também quantos havia na janela. Valores recorrentes (aluguel,
+        tarifas) formam grupos grandes; limitar os candidatos por rodada
+        mantém o número de pares proporcional ao número de linhas.
+        """
+        inicio = bisect.bisect_left(ordinais, dia - self.janela_dias)
+        fim = bisect.bisect_right(ordinais, dia + self.janela_dias)
+        if fim - inicio <= self.max_candidatos:
+            return list(range(inicio, fim)), fim - inicio
+
+        direita = bisect.bisect_left(ordinais, dia, inicio, fim)
+        esquerda = direita - 1
+        indices = []
+        while len(indices) < self.max_candidatos:
+            if direita < fim and (esquerda < inicio or ordinais[direita] - dia <= dia - ordinais[esquerda]):
+                indices.append(direita)
+                direita += 1
+            else:
+                indices.append(esquerda)
+                esquerda -= 1
+        return indices, fim - inicio
+
+    def _pontuar(self, linha: Dict, dias: int, lancamento: Dict) -> float:
+        """Pontuação do par: data (0 a 1) + documento (1) + descrição (0 a 0,5)"""
+        pontos = 1.0 - dias / (self.janela_dias + 1)
+
+        documento = linha["documento"]
+        if documento and documento in (lancamento["nota_fiscal"], lancamento["comprovante"]):
+            pontos += 1.0
+
+        palavras = _palavras(linha["descricao"])
+        if palavras:
+            outras = _palavras(lancamento["descricao"])
+            comuns = palavras & outras
+            if comuns:
+                pontos += 0.5 * len(comuns) / len(palavras | outras)
+        return pontos
+
+    def conciliar_manual(self, linha_id: int, lancamento_id: int) -> bool:
+        """Concilia uma linha com o lançamento escolhido pelo usuário
+
+        Retorna False se a linha não existe ou se o lançamento já está
+        conciliado com outra linha (desfazer aquela primeiro): a checagem vai
+        no próprio UPDATE, antes do índice único recusar o par.
+        """
+        return self.db.atualizar(
+            "UPDATE extrato_linhas SET lancamento_id = ?, pontuacao = NULL, "
+            "conciliado_em = CURRENT_TIMESTAMP WHERE id = ? "
+            "AND NOT EXISTS (SELECT 1 FROM extrato_linhas WHERE lancamento_id = ? AND id <> ?)",
+            (lancamento_id, linha_id, lancamento_id, linha_id),
+        ) > 0
+
+    def desfazer(self, linha_id: int) -> bool:
+        """Volta a linha para pendente"""
+        return self.db.atualizar(
+            "UPDATE extrato_linhas SET lancamento_id = NULL, pontuacao = NULL, "
+            "conciliado_em = NULL WHERE id = ?",
+            (linha_id,),
+        ) > 0
+
+    def pendentes(self, extrato_id: Optional[int] = None) -> List[Dict]:
+        """Linhas de extrato ainda sem lançamento"""
+        query = "SELECT * FROM extrato_linhas WHERE lancamento_id IS NULL"
+        params: tuple = ()
+        if extrato_id is not None:
+            query += " AND extrato_id = ?"
+            params = (extrato_id,)
+        return self.db.obter_todos(query + " ORDER BY data, id", params)
@@ -0,0 +1,395 @@
+"""
+Serviço de Cubo de Análise
+Fatiamento ad-hoc dos lançamentos por mês, categoria, fornecedor, banco e demais dimensões
+"""
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Hashable, List, Optional, Sequence, Tuple
+
+from app.database.migracoes import COLUNAS_CUBO, SELECIONAR_CUBO_SQL
+from app.services.relatorios import GeradorRelatorios
+
+# Dimensões derivadas: nome -> (dimensão base, conversão do valor)
+DIMENSOES_DERIVADAS = {"ano": ("ano_mes", lambda ano_mes: ano_mes[:4])}
+DIMENSOES_CUBO = COLUNAS_CUBO + tuple(DIMENSOES_DERIVADAS)
+MEDIDAS_CUBO = ("quantidade", "total", "media")
+
+# Dimensão -> (tabela com os nomes, rótulo do valor vazio)
+_ROTULOS = {
+    "categoria_id": ("categorias", "Sem categoria"),
+    "subcategoria_id": ("subcategorias", "Sem subcategoria"),
+    "cliente_id": ("clientes", "Sem cliente"),
+    "fornecedor_id": ("fornecedores", "Sem fornecedor"),
+    "banco": (None, "Sem banco"),
+}
+
+
+@dataclass(frozen=True)
+class _Filtros:
+    """Filtros normalizados (hashable, parte da chave do sub-cubo)"""
+
+    valores: Tuple[Tuple[str, FrozenSet], ...] = ()
+    mes_inicio: Optional[str] = None
+    mes_fim: Optional[str] = None
+
+    def de(self, dimensao: str) -> Optional[FrozenSet]:
+        return dict(self.valores).get(dimensao)
+
+    def contem_periodo(self, outro: "_Filtros") -> bool:
+        """O período destes filtros cobre o período de `outro`"""
+        if self.mes_inicio and (not outro.mes_inicio or outro.mes_inicio < self.mes_inicio):
+            return False
+        if self.mes_fim and (not outro.mes_fim or outro.mes_fim > self.mes_fim):
+            return False
+        return True
+
+    @property
+    def periodo(self) -> Tuple[Optional[str], Optional[str]]:
+        return self.mes_inicio, self.mes_fim
+
+
+@dataclass
+class _SubCubo:
+    """Células (valores das dimensões) -> (quantidade, centavos); somente leitura"""
+
+    dimensoes: Tuple[str, ...]
+    celulas: Dict[tuple, Tuple[int, int]]
+
+    def __len__(self) -> int:
+        return len(self.celulas)
+
+
+@dataclass
+class Pivo:
+    """Tabela dinâmica densa (valores[i][j] = linha i, coluna j) para gráficos e planilhas"""
+
+    linhas: List
+    colunas: List
+    valores: List[List[float]]
+
+
+@dataclass
+class ResultadoCubo:
+    """Resultado de uma consulta ao cubo em arrays colunares.
+
+    `chaves[i]` traz os valores das dimensões da célula i; `quantidades[i]`
+    e `centavos[i]` são as medidas base, das quais saem total e média.
+    """
+
+    dimensoes: Tuple[str, ...]
+    medidas: Tuple[str, ...]
+    chaves: List[tuple] = field(default_factory=list)
+    quantidades: List[int] = field(default_factory=list)
+    centavos: List[int] = field(default_factory=list)
+    # Dimensão -> {valor: nome} para ids, banco vazio etc.
+    rotulos: Dict[str, Dict] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.chaves)
+
+    def rotulo(self, dimensao: str, valor) -> str:
+        return self.rotulos.get(dimensao, {}).get(valor, valor)
+
+    def valores(self, medida: str = "total") -> List[float]:
+        """Array da medida alinhado a `chaves`"""
+        return [_medida(medida, q, c) for q, c in zip(self.quantidades, self.centavos)]
+
+    def linhas(self) -> List[Dict]:
+        """Uma linha por célula com as dimensões (rotuladas) e as medidas pedidas"""
+        resultado = []
+        for chave, quantidade, centavos in zip(self.chaves, self.quantidades, self.centavos):
+            linha = {d: self.rotulo(d, v) for d, v in zip(self.dimensoes, chave)}
+            for medida in self.medidas:
+                linha[medida] = _medida(medida, quantidade, centavos)
+            resultado.append(linha)
+        return resultado
+
+    def pivotar(self, linha: str, coluna: Optional[str] = None, medida: str = "total") -> Pivo:
+        """Tabela dinâmica linha x coluna; as demais dimensões são somadas"""
+        for dimensao in (linha, coluna):
+            if dimensao is not None and dimensao not in self.dimensoes:
+                raise ValueError(f"Dimensao fora do resultado: {dimensao}")
+        if medida not in MEDIDAS_CUBO:
+            raise ValueError(f"Medida invalida: {medida}")
+
+        i = self.dimensoes.index(linha)
+        j = self.dimensoes.index(coluna) if coluna else None
+        somas: Dict[tuple, List[int]] = {}
+        for chave, quantidade, centavos in zip(self.chaves, self.quantidades, self.centavos):
+            soma = somas.setdefault((chave[i], chave[j] if j is not None else None), [0, 0])
+            soma[0] += quantidade
+            soma[1] += centavos
+
+        valores_linha = sorted({a for a, _ in somas})
+        valores_coluna = sorted({b for _, b in somas}, key=lambda b: (b is None, b))
+        posicao_coluna = {b: k for k, b in enumerate(valores_coluna)}
+        matriz = [[0.0] * len(valores_coluna) for _ in valores_linha]
+        posicao_linha = {a: k for k, a in enumerate(valores_linha)}
+        for (a, b), (quantidade, centavos) in somas.items():
+            matriz[posicao_linha[a]][posicao_coluna[b]] = _medida(medida, quantidade, centavos)
+
+        return Pivo(
+            linhas=[self.rotulo(linha, a) for a in valores_linha],
+            colunas=[self.rotulo(coluna, b) for b in valores_coluna] if coluna else [medida],
+            valores=matriz,
+        )
+
+
+def _medida(medida: str, quantidade: int, centavos: int) -> float:
+    if medida == "quantidade":
+        return quantidade
+    if medida == "total":
+        return centavos / 100
+    return centavos / 100 / quantidade if quantidade else 0.0
+
+
+class CuboLancamentos:
+    """Cubo de análise sobre os agregados base de cubo_lancamentos.
+
+    A tabela base (migração 8) guarda quantidade e centavos por mês, tipo,
+    categoria, subcategoria, cliente, fornecedor e banco, mantida por
+    triggers; nenhuma consulta lê lançamentos brutos. Cada sub-cubo
+    calculado fica no cache do GeradorRelatorios (descartado a cada
+    escrita). Como as medidas são aditivas, um pedido coberto por um
+    sub-cubo mais detalhado já em cache (roll-up, ou o caminho de volta de
+    um drill-down) é derivado dele em memória, sem ir ao banco.
+    """
+
+    def __init__(self, gerador: GeradorRelatorios):
+        self.gerador = gerador
+        self.db = gerador.db
+
+    def consultar(
+        self,
+        dimensoes: Sequence[str],
+        medidas: Sequence[str] = ("total",),
+        filtros: Optional[Dict] = None,
+        rotular: bool = True,
+    ) -> ResultadoCubo:
+        """
+        Agrega lançamentos pelas dimensões pedidas
+
+        Args:
+            dimensoes: subconjunto de DIMENSOES_CUBO (ex.: ano_mes, categoria_id,
+                fornecedor_id, banco)
+            medidas: subconjunto de quantidade, total, media
+            filtros: dimensão -> valor ou lista de valores (0/'' = sem vínculo),
+                mes_inicio e mes_fim ('AAAA-MM'; datas são reduzidas ao mês)
+            rotular: traduz ids para nomes em linhas() e pivotar()
+        """
+        dimensoes = tuple(dimensoes)
+        medidas = tuple(medidas)
+        desconhecidas = set(dimensoes) - set(DIMENSOES_CUBO)
+        if desconhecidas:
+            raise ValueError(f"Dimensoes invalidas: {', '.join(sorted(desconhecidas))}")
+        desconhecidas = set(medidas) - set(MEDIDAS_CUBO)
+        if desconhecidas:
+            raise ValueError(f"Medidas invalidas: {', '.join(sorted(desconhecidas))}")
+
+        filtros_norm = self._normalizar_filtros(filtros)
+        necessarias = {DIMENSOES_DERIVADAS.get(d, (d,))[0] for d in dimensoes}
+        base = tuple(d for d in COLUNAS_CUBO if d in necessarias)
+        sub = self._sub_cubo(base, filtros_norm)
+
+        # Projeção nas dimensões pedidas (derivadas, ordem do pedido)
+        conversoes = []
+        for dimensao in dimensoes:
+            origem, converter = DIMENSOES_DERIVADAS.get(dimensao, (dimensao, None))
+            conversoes.append((base.index(origem), converter))
+        celulas: Dict[tuple, List[int]] = {}
+        for chave, (quantidade, centavos) in sub.celulas.items():
+            nova = tuple(conv(chave[i]) if conv else chave[i] for i, conv in conversoes)
+            soma = celulas.setdefault(nova, [0, 0])
+            soma[0] += quantidade
+            soma[1] += centavos
+
+        resultado = ResultadoCubo(dimensoes, medidas)
+        for chave in sorted(celulas):
+            resultado.chaves.append(chave)
+            resultado.quantidades.append(celulas[chave][0])
+            resultado.centavos.append(celulas[chave][1])
+        if rotular:
+            resultado.rotulos = {d: self._rotulos(d) for d in dimensoes if d in _ROTULOS}
+        return resultado
+
+    def pivotar(
+        self,
+        linha: str,
+        coluna: Optional[str] = None,
+        medida: str = "total",
+        filtros: Optional[Dict] = None,
+    ) -> Pivo:
+        """Atalho: consulta as duas dimensões e devolve a tabela dinâmica"""
+        dimensoes = [linha] + ([coluna] if coluna else [])
+        return self.consultar(dimensoes, (medida,), filtros).pivotar(linha, coluna, medida)
+
+    def _normalizar_filtros(self, filtros: Optional[Dict]) -> _Filtros:
+        filtros = {k: v for k, v in (filtros or {}).items() if v not in (None, "")}
+        mes_inicio = filtros.pop("mes_inicio", None)
+        mes_fim = filtros.pop("mes_fim", None)
+        desconhecidos = set(filtros) - set(COLUNAS_CUBO)
+        if desconhecidos:
+            raise ValueError(f"Filtros invalidos: {', '.join(sorted(desconhecidos))}")
+
+        valores = []
+        for dimensao in COLUNAS_CUBO:
+            if dimensao not in filtros:
+                continue
+            valor = filtros[dimensao]
+            if not isinstance(valor, (list, tuple, set, frozenset)):
+                valor = [valor]
+            valor = [getattr(v, "value", v) for v in valor]
+            if dimensao == "banco":
+                valor = [str(v).strip() for v in valor]
+            valores.append((dimensao, frozenset(valor)))
+        return _Filtros(
+            tuple(valores),
+            str(mes_inicio)[:7] if mes_inicio else None,
+            str(mes_fim)[:7] if mes_fim else None,
+        )
+
+    def _sub_cubo(self, base: Tuple[str, ...], filtros: _Filtros) -> _SubCubo:
+        alvo: Hashable = ("cubo", base, filtros)
+
+        def calcular() -> _SubCubo:
+            def cobre(chave: Hashable) -> bool:
+                return (
+                    isinstance(chave, tuple) and len(chave) == 3 and chave[0] == "cubo"
+                    and chave != alvo and _cobre(chave[1], chave[2], base, filtros)
+                )
+
+            encontrado = self.gerador.cache.buscar(cobre)
+            if encontrado:
+                (_, _, filtros_cache), sub = encontrado
+                return _rolar(sub, base, filtros, filtros_cache)
+            return self._consultar_base(base, filtros)
+
+        return self.gerador.cache.obter(alvo, calcular)
+
+    def _consultar_base(self, base: Tuple[str, ...], filtros: _Filtros) -> _SubCubo:
+        where: List[str] = []
+        params: List = []
+        for dimensao, valores in filtros.valores:
+            where.append(f"{dimensao} IN ({', '.join('?' for _ in valores)})")
+            params.extend(valores)
+        if filtros.mes_inicio:
+            where.append("ano_mes >= ?")
+            params.append(filtros.mes_inicio)
+        if filtros.mes_fim:
+            where.append("ano_mes <= ?")
+            params.append(filtros.mes_fim)
+
+        query = f"""
+            SELECT {', '.join(base + ('',))}
+                   SUM(quantidade) AS quantidade, SUM(total_centavos) AS centavos
+            FROM cubo_lancamentos
+            {'WHERE ' + ' AND '.join(where) if where else ''}
+            {'GROUP BY ' + ', '.join(base) if base else ''}
+        """
+        n = len(base)
+        celulas = {}
+        for row in self.db.executar(query, tuple(params)):
+            if row[n]:
+                celulas[tuple(row[i] for i in range(n))] = (row[n], row[n + 1])
+        return _SubCubo(base, celulas)
+
+    def _rotulos(self, dimensao: str) -> Dict:
+        tabela, vazio = _ROTULOS[dimensao]
+
+        def carregar() -> Dict:
+            nomes = {}
+            if tabela:
+                nomes = {row["id"]: row["nome"] for row in self.db.obter_todos(f"SELECT id, nome FROM {tabela}")}
+            nomes[0 if tabela else ""] = vazio
+            return nomes
+
+        return self.gerador.cache.obter(("cubo_rotulos", dimensao), carregar)
+
+    def reconstruir(self) -> int:
+        """
+        Recalcula cubo_lancamentos a partir do banco principal e das partições
+
+        Necessário só para anos fechados antes da migração 8 (carregados dos
+        agregados anuais, sem cliente, fornecedor e banco) ou para reparo.
+
+        Returns:
+            Quantidade de células gravadas
+        """
+        anos = self.db.particoes.anos_fechados()
+        fechados: List[Dict] = []
+        if anos:
+            marcadores = ", ".join("?" for _ in anos)
+            fechados = self.db.particoes.obter_todos(
+                SELECIONAR_CUBO_SQL.format(
+                    where=f"WHERE CAST(substr(data, 1, 4) AS INTEGER) IN ({marcadores})"
+                ),
+                tuple(anos),
+                anexar=anos,
+            )
+
+        colunas = COLUNAS_CUBO + ("quantidade", "total_centavos")
+        inserir = f"INSERT INTO cubo_lancamentos ({', '.join(colunas)}) "
+        conn = self.db.get_connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM cubo_lancamentos")
+            conn.execute(inserir + SELECIONAR_CUBO_SQL.format(where=""))
+            conn.executemany(
+                inserir + f"VALUES ({', '.join('?' for _ in colunas)})",
+                [tuple(row[c] for c in colunas) for row in fechados],
+            )
+            total = conn.execute("SELECT COUNT(*) FROM cubo_lancamentos").fetchone()[0]
+            conn.commit()
+            return total
+        except Exception as e:
+            conn.rollback()
+            raise Exception(f"Erro ao reconstruir cubo: {e}")
+        finally:
+            conn.close()
+
+
+def _cobre(
+    dimensoes_cache: Tuple[str, ...],
+    filtros_cache: _Filtros,
+    base: Tuple[str, ...],
+    filtros: _Filtros,
+) -> bool:
+    """Um sub-cubo em cache responde ao pedido (dimensões e filtros)?"""
+    if not set(base) <= set(dimensoes_cache):
+        return False
+    # Tudo que o cache filtrou o pedido também filtra, com valores contidos
+    for dimensao, permitidos in filtros_cache.valores:
+        pedidos = filtros.de(dimensao)
+        if pedidos is None or not pedidos <= permitidos:
+            return False
+    if not filtros_cache.contem_periodo(filtros):
+        return False
+    # Filtros extras do pedido precisam de dimensão presente no cache
+    for dimensao, pedidos in filtros.valores:
+        if pedidos != filtros_cache.de(dimensao) and dimensao not in dimensoes_cache:
+            return False
+    return filtros.periodo == filtros_cache.periodo or "ano_mes" in dimensoes_cache
+
+
+def _rolar(sub: _SubCubo, base: Tuple[str, ...], filtros: _Filtros, filtros_cache: _Filtros) -> _SubCubo:
+    """Deriva o sub-cubo pedido de um mais detalhado, aplicando os filtros extras"""
+    posicoes = [sub.dimensoes.index(d) for d in base]
+    extras = [
+        (sub.dimensoes.index(dimensao), pedidos)
+        for dimensao, pedidos in filtros.valores
+        if pedidos != filtros_cache.de(dimensao)
+    ]
+    mes = sub.dimensoes.index("ano_mes") if filtros.periodo != filtros_cache.periodo else None
+    inicio, fim = filtros.periodo
+
+    celulas: Dict[tuple, Tuple[int, int]] = {}
+    for chave, (quantidade, centavos) in sub.celulas.items():
+        if any(chave[i] not in pedidos for i, pedidos in extras):
+            continue
+        if mes is not None and ((inicio and chave[mes] < inicio) or (fim and chave[mes] > fim)):
+            continue
+        nova = tuple(chave[i] for i in posicoes)
+        atual = celulas.get(nova)
+        celulas[nova] = (quantidade, centavos) if atual is None else (
+            atual[0] + quantidade, atual[1] + centavos
+        )
+    return _SubCubo(base, celulas)
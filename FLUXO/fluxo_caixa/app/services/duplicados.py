@@ -0,0 +1,132 @@
+"""
+Serviço de Duplicados
+Varre os lançamentos em busca de duplicados exatos e quase duplicados
+"""
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from app.database.database import Database
+from app.utils.assinatura import centavos, normalizar_descricao
+from app.utils.datas import para_dia
+
+
+@dataclass
+class GrupoDuplicados:
+    """Lançamentos que parecem ser o mesmo registro"""
+
+    lancamentos: List[Dict] = field(default_factory=list)
+    # True quando todos têm a mesma assinatura normalizada
+    exato: bool = False
+
+    @property
+    def ids(self) -> List[int]:
+        return [l["id"] for l in self.lancamentos]
+
+
+def _similaridade(a: frozenset, b: frozenset) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class DetectorDuplicados:
+    """Varredura de duplicados no livro de lançamentos.
+
+    A assinatura (app/utils/assinatura.py) barra duplicados exatos na
+    gravação. A varredura encontra o que ela não pega: lançamentos antigos
+    gravados antes da assinatura, gravados com permitir_duplicado e quase
+    duplicados (data alguns dias depois, centavos de diferença, descrição
+    parecida). Os lançamentos são agrupados por (tipo, entidade) e, dentro
+    do grupo, ordenados por centavos e data; cada um só é comparado com os
+    vizinhos dentro das tolerâncias, sem produto cartesiano.
+    """
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    def varrer(
+        self,
+        data_inicio: Optional[str] = None,
+        data_fim: Optional[str] = None,
+        janela_dias: int = 3,
+        tolerancia_centavos: int = 0,
+        similaridade_minima: float = 0.6,
+    ) -> List[GrupoDuplicados]:
+        """
+        Lista grupos de lançamentos possivelmente duplicados
+
+        Args:
+            data_inicio, data_fim: período opcional ('AAAA-MM-DD')
+            janela_dias: distância máxima entre as datas
+            tolerancia_centavos: diferença máxima de valor, em centavos
+            similaridade_minima: fração mínima de palavras em comum na descrição
+        """
+        query = """
+            SELECT id, data, dia, tipo, valor, descricao, cliente_id, fornecedor_id,
+                   funcionario_id, banco, nota_fiscal
+            FROM lancamentos WHERE dia IS NOT NULL
+        """
+        params = []
+        if data_inicio:
+            query += " AND dia >= ?"
+            params.append(para_dia(data_inicio))
+        if data_fim:
+            query += " AND dia <= ?"
+            params.append(para_dia(data_fim))
+        rows = self.db.particoes.obter_todos(query, tuple(params), data_inicio, data_fim)
+
+        blocos: Dict[tuple, List[tuple]] = defaultdict(list)
+        for row in rows:
+            chave = (row["tipo"], row["cliente_id"] or 0, row["fornecedor_id"] or 0,
+                     row["funcionario_id"] or 0)
+            normalizada = normalizar_descricao(row["descricao"])
+            blocos[chave].append((
+                centavos(row["valor"]),
+                row["dia"],
+                normalizada,
+                frozenset(normalizada.split()),
+                row,
+            ))
+
+        # União-busca: pares próximos viram um único grupo
+        pai: Dict[int, int] = {}
+
+        def raiz(i: int) -> int:
+            while pai.setdefault(i, i) != i:
+                pai[i] = pai[pai[i]]
+                i = pai[i]
+            return i
+
+        por_id: Dict[int, tuple] = {}
+        for itens in blocos.values():
+            if len(itens) < 2:
+                continue
+            itens.sort(key=lambda item: (item[0], item[1], item[4]["id"]))
+            for i, (valor, dia, _, palavras, row) in enumerate(itens):
+                por_id[row["id"]] = itens[i]
+                for j in range(i + 1, len(itens)):
+                    outro = itens[j]
+                    if outro[0] - valor > tolerancia_centavos:
+                        break
+                    if abs(outro[1] - dia) > janela_dias:
+                        # Mesmo valor vem ordenado por data: o resto está mais longe
+                        if outro[0] == valor and tolerancia_centavos == 0:
+                            break
+                        continue
+                    if _similaridade(palavras, outro[3]) >= similaridade_minima:
+                        pai[raiz(outro[4]["id"])] = raiz(row["id"])
+
+        grupos: Dict[int, List[tuple]] = defaultdict(list)
+        for lancamento_id in pai:
+            grupos[raiz(lancamento_id)].append(por_id[lancamento_id])
+
+        resultado = []
+        for itens in grupos.values():
+            if len(itens) < 2:
+                continue
+            itens.sort(key=lambda item: (item[1], item[4]["id"]))
+            exato = len({(item[0], item[1], item[2]) for item in itens}) == 1
+            resultado.append(GrupoDuplicados([item[4] for item in itens], exato))
+        resultado.sort(key=lambda g: (str(g.lancamentos[0]["data"]), g.ids[0]))
+        return resultado
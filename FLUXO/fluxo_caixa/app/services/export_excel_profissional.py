@@ -3,20 +3,45 @@
 Cria múltiplas abas, aplica formatação e adiciona gráficos básicos.
 """
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.chart import LineChart, Reference, BarChart, PieChart
 from openpyxl.utils.dataframe import dataframe_to_rows
 from openpyxl.utils import get_column_letter
-from openpyxl.worksheet.table import Table, TableStyleInfo
+from openpyxl.worksheet.filters import AutoFilter
+from openpyxl.worksheet.table import Table, TableColumn, TableStyleInfo
 import pandas as pd
+import warnings
+from itertools import islice
 from pathlib import Path
 from datetime import datetime, date
+from typing import Iterable
 
+from app.database.linhas import TAMANHO_LOTE
+from app.utils.datas import ORDINAL_EPOCA
 
-def gerar_planilha_profissional(lancamentos: list, resumo_mensal: pd.DataFrame, resumo_anual: pd.DataFrame, caminho_saida: Path):
-    """Gera arquivo Excel com múltiplas abas, formatação e gráficos."""
-    wb = Workbook()
 
+def gerar_planilha_profissional(lancamentos: Iterable[dict], resumo_mensal: pd.DataFrame, resumo_anual: pd.DataFrame, caminho_saida: Path, comparativo: list = None, batch_size: int = TAMANHO_LOTE):
+    """Gera arquivo Excel com múltiplas abas, formatação e gráficos.
+
+    `lancamentos` pode ser lista ou gerador (GeradorRelatorios.iterar_lancamentos):
+    as linhas são lidas em lotes de `batch_size` e gravadas com o workbook em
+    modo write-only, então a memória fica limitada ao lote.
+    `comparativo` (GeradorRelatorios.comparativo_mensal) adiciona a aba Comparativo.
+    """
+    wb = Workbook(write_only=True)
+    try:
+        _montar_planilha(wb, lancamentos, resumo_mensal, resumo_anual, comparativo, batch_size)
+    except BaseException:
+        # Exportação interrompida (erro ou cancelamento): sem temporários órfãos
+        _descartar_workbook(wb)
+        raise
+    wb.save(str(caminho_saida))
+    return caminho_saida
+
+
+def _montar_planilha(wb, lancamentos: Iterable[dict], resumo_mensal: pd.DataFrame, resumo_anual: pd.DataFrame, comparativo: list, batch_size: int):
+    """Abas, formatação e gráficos de gerar_planilha_profissional"""
     # Estilos
     header_fill = PatternFill(start_color='1F4E78', end_color='1F4E78', fill_type='solid')
     subheader_fill = PatternFill(start_color='D9E1F2', end_color='D9E1F2', fill_type='solid')
@@ -32,136 +57,104 @@ def gerar_planilha_profissional(lancamentos: list, resumo_mensal: pd.DataFrame,
     date_format = 'yyyy-mm-dd'
 
     # === Dados_Brutos ===
-    ws_raw = wb.active
-    ws_raw.title = 'Dados_Brutos'
-
-    df_raw = pd.DataFrame(lancamentos)
+    # Write-only: larguras e painel congelado antes da primeira linha
+    ws_raw = wb.create_sheet('Dados_Brutos')
     col_order = [
         'data', 'tipo', 'categoria', 'subcategoria', 'descricao',
         'valor', 'banco', 'nota_fiscal', 'empresa'
     ]
-    if df_raw.empty:
-        df_raw = pd.DataFrame(columns=col_order)
-    else:
-        for col in col_order:
-            if col not in df_raw.columns:
-                df_raw[col] = ""
-        df_raw = df_raw[col_order]
+    widths = [12, 12, 18, 18, 40, 14, 12, 16, 24]
+    for idx, width in enumerate(widths, start=1):
+        ws_raw.column_dimensions[get_column_letter(idx)].width = width
+    ws_raw.freeze_panes = "A2"
 
     # Cabeçalho
-    for c_idx, col in enumerate(df_raw.columns, start=1):
-        cell = ws_raw.cell(row=1, column=c_idx, value=col.replace('_', ' ').title())
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = align_center
-        cell.border = border
-
-    # Dados
-    for r_idx, row in enumerate(df_raw.itertuples(index=False), start=2):
-        for c_idx, value in enumerate(row, start=1):
-            cell = ws_raw.cell(row=r_idx, column=c_idx, value=value)
-            cell.border = border
-
-            coluna = df_raw.columns[c_idx - 1]
-            if coluna == 'data':
-                if isinstance(value, str):
-                    try:
-                        value_dt = datetime.strptime(value, "%Y-%m-%d")
-                        cell.value = value_dt
+    cabecalho = [col.replace('_', ' ').title() for col in col_order]
+    ws_raw.append([
+        _celula(ws_raw, titulo, font=header_font, fill=header_fill, alignment=align_center, border=border)
+        for titulo in cabecalho
+    ])
+
+    # Dados, lote a lote
+    r_idx = 1
+    totais_categoria = {}
+    iterador = iter(lancamentos)
+    while True:
+        lote = list(islice(iterador, batch_size))
+        if not lote:
+            break
+        df_lote = _preparar_lote(lote, col_order)
+        for categoria, valor in df_lote.groupby('categoria')['valor'].sum().items():
+            totais_categoria[categoria] = totais_categoria.get(categoria, 0) + valor
+
+        for row in df_lote.itertuples(index=False):
+            r_idx += 1
+            linha = []
+            for coluna, value in zip(col_order, row):
+                cell = _celula(ws_raw, value, border=border)
+                if coluna == 'data':
+                    if isinstance(value, (datetime, date)):
                         cell.number_format = date_format
-                    except ValueError:
+                    cell.alignment = align_center
+                elif coluna == 'valor':
+                    try:
+                        cell.value = float(value)
+                    except Exception:
                         pass
-                elif isinstance(value, (datetime, date)):
-                    cell.number_format = date_format
-                cell.alignment = align_center
-            elif coluna == 'valor':
-                try:
-                    cell.value = float(value)
-                except Exception:
-                    pass
-                cell.number_format = currency_format
-                cell.alignment = align_right
-            else:
-                cell.alignment = align_left
-
-        if r_idx % 2 == 0:
-            for c_idx in range(1, len(df_raw.columns) + 1):
-                ws_raw.cell(row=r_idx, column=c_idx).fill = zebra_fill
+                    cell.number_format = currency_format
+                    cell.alignment = align_right
+                else:
+                    cell.alignment = align_left
+                if r_idx % 2 == 0:
+                    cell.fill = zebra_fill
+                linha.append(cell)
+            ws_raw.append(linha)
 
-    # Larguras
-    widths = [12, 12, 18, 18, 40, 14, 12, 16, 24]
-    for idx, width in enumerate(widths, start=1):
-        ws_raw.column_dimensions[get_column_letter(idx)].width = width
-
-    ws_raw.freeze_panes = "A2"
-    ws_raw.auto_filter.ref = f"A1:{get_column_letter(len(df_raw.columns))}{ws_raw.max_row}"
-    try:
-        tabela = Table(displayName="TabelaLancamentos", ref=ws_raw.auto_filter.ref)
-        tabela.tableStyleInfo = TableStyleInfo(
-            name="TableStyleMedium9",
-            showFirstColumn=False,
-            showLastColumn=False,
-            showRowStripes=True,
-            showColumnStripes=False,
-        )
-        ws_raw.add_table(tabela)
-    except Exception:
-        pass
+    ws_raw.auto_filter.ref = f"A1:{get_column_letter(len(col_order))}{r_idx}"
+    _adicionar_tabela(ws_raw, "TabelaLancamentos", cabecalho, ws_raw.auto_filter.ref)
 
     # === Resumo_Mensal ===
     ws_month = wb.create_sheet('Resumo_Mensal')
     if resumo_mensal.empty:
         resumo_mensal = pd.DataFrame(columns=['ano_mes', 'entradas', 'saidas', 'saldo'])
-    for r_idx, row in enumerate(dataframe_to_rows(resumo_mensal, index=False, header=True), start=1):
-        for c_idx, value in enumerate(row, start=1):
-            cell = ws_month.cell(row=r_idx, column=c_idx, value=value)
-            cell.border = border
-            if r_idx == 1:
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.alignment = align_center
-            else:
-                if c_idx >= 2:
-                    cell.number_format = currency_format
-                    cell.alignment = align_right
-                else:
-                    cell.alignment = align_center
-    for idx, width in enumerate([12, 16, 16, 16], start=1):
-        ws_month.column_dimensions[get_column_letter(idx)].width = width
-    ws_month.freeze_panes = "A2"
+    linhas_mes = _escrever_resumo(ws_month, resumo_mensal, [12, 16, 16, 16], _build_styles())
 
     # === Resumo_Anual ===
     ws_year = wb.create_sheet('Resumo_Anual')
     if resumo_anual.empty:
         resumo_anual = pd.DataFrame(columns=['ano', 'entradas', 'saidas', 'saldo'])
-    for r_idx, row in enumerate(dataframe_to_rows(resumo_anual, index=False, header=True), start=1):
-        for c_idx, value in enumerate(row, start=1):
-            cell = ws_year.cell(row=r_idx, column=c_idx, value=value)
-            cell.border = border
-            if r_idx == 1:
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.alignment = align_center
-            else:
-                if c_idx >= 2:
-                    cell.number_format = currency_format
-                    cell.alignment = align_right
-                else:
-                    cell.alignment = align_center
-    for idx, width in enumerate([10, 16, 16, 16], start=1):
-        ws_year.column_dimensions[get_column_letter(idx)].width = width
-    ws_year.freeze_panes = "A2"
+    linhas_ano = _escrever_resumo(ws_year, resumo_anual, [10, 16, 16, 16], _build_styles())
+
+    # === Comparativo (mês x mês anterior x ano anterior) ===
+    if comparativo is not None:
+        ws_comp = wb.create_sheet('Comparativo')
+        headers = ['Tipo', 'Categoria', 'Subcategoria', 'Mês Atual', 'Mês Anterior', 'Var. Mês',
+                   'Var. Mês %', 'Ano Anterior', 'Var. Ano', 'Var. Ano %']
+        rows = [
+            (
+                linha['tipo'], linha['categoria'], linha['subcategoria'],
+                linha['atual'], linha['mes_anterior'], linha['variacao_mes_anterior'],
+                _fracao(linha['percentual_mes_anterior']),
+                linha['ano_anterior'], linha['variacao_ano_anterior'],
+                _fracao(linha['percentual_ano_anterior']),
+            )
+            for linha in comparativo
+        ]
+        _aplicar_tabela(
+            ws_comp, headers, rows, [10, 20, 22, 15, 15, 15, 11, 15, 15, 11], _build_styles(),
+            currency_cols={'Mês Atual', 'Mês Anterior', 'Var. Mês', 'Ano Anterior', 'Var. Ano'},
+            percent_cols={'Var. Mês %', 'Var. Ano %'},
+            table_name="TabelaComparativo",
+        )
 
     # === Indicadores ===
     ws_ind = wb.create_sheet('Indicadores')
     ws_ind.column_dimensions['A'].width = 26
     ws_ind.column_dimensions['B'].width = 18
 
-    ws_ind['A1'] = 'RESUMO EXECUTIVO'
-    ws_ind['A1'].font = header_font
-    ws_ind['A1'].fill = header_fill
-    ws_ind['A1'].alignment = align_center
-    ws_ind.merge_cells('A1:B1')
+    ws_ind.append([_celula(ws_ind, 'RESUMO EXECUTIVO', font=header_font, fill=header_fill, alignment=align_center)])
+    ws_ind.merged_cells.add('A1:B1')
+    ws_ind.append([])
 
     total_entradas = float(resumo_anual['entradas'].sum()) if 'entradas' in resumo_anual.columns else 0
     total_saidas = float(resumo_anual['saidas'].sum()) if 'saidas' in resumo_anual.columns else 0
@@ -173,20 +166,13 @@ def gerar_planilha_profissional(lancamentos: list, resumo_mensal: pd.DataFrame,
         ("Saldo Total", saldo, "4472C4" if saldo >= 0 else "FF6B6B"),
     ]
 
-    row = 3
     for label, valor, cor in indicadores:
-        ws_ind[f"A{row}"] = label
-        ws_ind[f"A{row}"].font = bold
-        ws_ind[f"A{row}"].fill = subheader_fill
-        ws_ind[f"A{row}"].border = border
-
-        ws_ind[f"B{row}"] = float(valor)
-        ws_ind[f"B{row}"].number_format = currency_format
-        ws_ind[f"B{row}"].font = Font(bold=True, color='FFFFFF')
-        ws_ind[f"B{row}"].fill = PatternFill(start_color=cor, end_color=cor, fill_type='solid')
-        ws_ind[f"B{row}"].alignment = align_right
-        ws_ind[f"B{row}"].border = border
-        row += 1
+        ws_ind.append([
+            _celula(ws_ind, label, font=bold, fill=subheader_fill, border=border),
+            _celula(ws_ind, float(valor), number_format=currency_format, font=Font(bold=True, color='FFFFFF'),
+                    fill=PatternFill(start_color=cor, end_color=cor, fill_type='solid'),
+                    alignment=align_right, border=border),
+        ])
 
     # === Gráficos ===
     ws_chart = wb.create_sheet('Graficos')
@@ -201,8 +187,8 @@ def gerar_planilha_profissional(lancamentos: list, resumo_mensal: pd.DataFrame,
         chart.y_axis.title = 'Valor (R$)'
         chart.x_axis.title = 'Período'
 
-        data = Reference(ws_month, min_col=2, min_row=1, max_row=ws_month.max_row, max_col=4)
-        cats = Reference(ws_month, min_col=1, min_row=2, max_row=ws_month.max_row)
+        data = Reference(ws_month, min_col=2, min_row=1, max_row=linhas_mes, max_col=4)
+        cats = Reference(ws_month, min_col=1, min_row=2, max_row=linhas_mes)
         chart.add_data(data, titles_from_data=True)
         chart.set_categories(cats)
         chart.height = 10
@@ -215,34 +201,30 @@ def gerar_planilha_profissional(lancamentos: list, resumo_mensal: pd.DataFrame,
         bchart.title = 'Entradas vs Saídas (Anual)'
         bchart.y_axis.title = 'Valor (R$)'
         bchart.x_axis.title = 'Ano'
-        vals = Reference(ws_year, min_col=2, min_row=1, max_row=ws_year.max_row)
-        cats = Reference(ws_year, min_col=1, min_row=2, max_row=ws_year.max_row)
+        vals = Reference(ws_year, min_col=2, min_row=1, max_row=linhas_ano)
+        cats = Reference(ws_year, min_col=1, min_row=2, max_row=linhas_ano)
         bchart.add_data(vals, titles_from_data=True)
         bchart.set_categories(cats)
         bchart.height = 10
         bchart.width = 22
         ws_chart.add_chart(bchart, 'A20')
 
-    # Pizza por categoria (top 10)
-    if not df_raw.empty and 'categoria' in df_raw.columns and 'valor' in df_raw.columns:
-        cat_counts = df_raw.groupby('categoria')['valor'].sum().reset_index()
-        cat_counts = cat_counts.sort_values(by='valor', ascending=False).head(10)
+    # Pizza por categoria (top 10), somada lote a lote
+    if totais_categoria:
+        top = sorted(totais_categoria.items(), key=lambda item: item[1], reverse=True)[:10]
         start_row = 40
-        ws_chart[f"A{start_row}"] = "Categoria"
-        ws_chart[f"B{start_row}"] = "Valor"
-        ws_chart[f"A{start_row}"].font = bold
-        ws_chart[f"B{start_row}"].font = bold
-        ws_chart[f"A{start_row}"].fill = subheader_fill
-        ws_chart[f"B{start_row}"].fill = subheader_fill
-
-        for r_idx, row in enumerate(dataframe_to_rows(cat_counts, index=False, header=False), start=start_row + 1):
-            ws_chart.cell(row=r_idx, column=1, value=row[0])
-            cell_val = ws_chart.cell(row=r_idx, column=2, value=float(row[1]))
-            cell_val.number_format = currency_format
+        for _ in range(start_row - 1):
+            ws_chart.append([])
+        ws_chart.append([
+            _celula(ws_chart, "Categoria", font=bold, fill=subheader_fill),
+            _celula(ws_chart, "Valor", font=bold, fill=subheader_fill),
+        ])
+        for categoria, valor in top:
+            ws_chart.append([categoria, _celula(ws_chart, float(valor), number_format=currency_format)])
 
         pchart = PieChart()
-        labels = Reference(ws_chart, min_col=1, min_row=start_row + 1, max_row=start_row + len(cat_counts))
-        data = Reference(ws_chart, min_col=2, min_row=start_row, max_row=start_row + len(cat_counts))
+        labels = Reference(ws_chart, min_col=1, min_row=start_row + 1, max_row=start_row + len(top))
+        data = Reference(ws_chart, min_col=2, min_row=start_row, max_row=start_row + len(top))
         pchart.add_data(data, titles_from_data=True)
         pchart.set_categories(labels)
         pchart.title = 'Distribuição por Categoria (Top 10)'
@@ -250,8 +232,63 @@ def gerar_planilha_profissional(lancamentos: list, resumo_mensal: pd.DataFrame,
         pchart.width = 16
         ws_chart.add_chart(pchart, 'H1')
 
-    wb.save(str(caminho_saida))
-    return caminho_saida
+
+def _descartar_workbook(wb) -> None:
+    """Fecha as abas write-only de uma planilha abandonada e apaga seus arquivos temporários"""
+    for ws in wb.worksheets:
+        try:
+            if not ws.closed:
+                ws.close()
+            ws._writer.cleanup()
+        except Exception:
+            pass
+
+
+def _preparar_lote(lote: list, col_order: list) -> pd.DataFrame:
+    """Lote de lançamentos -> DataFrame nas colunas da aba, com as datas convertidas"""
+    df = pd.DataFrame(lote)
+    for col in col_order:
+        if col not in df.columns:
+            df[col] = ""
+    # Datas convertidas de uma vez (dia ja e o ordinal); invalidas ficam como texto
+    if 'dia' in df.columns:
+        datas = pd.to_datetime(pd.to_numeric(df['dia']) - ORDINAL_EPOCA, unit='D')
+    else:
+        datas = pd.to_datetime(df['data'], format='%Y-%m-%d', errors='coerce')
+    df['data'] = datas.astype(object).where(datas.notna(), df['data'])
+    return df[col_order]
+
+
+def _celula(ws, value, **estilo):
+    """Célula com estilo para ws.append (serve também para workbooks write-only)"""
+    cell = WriteOnlyCell(ws, value=value)
+    for atributo, valor in estilo.items():
+        setattr(cell, atributo, valor)
+    return cell
+
+
+def _escrever_resumo(ws, resumo: pd.DataFrame, column_widths, styles) -> int:
+    """Resumo mensal/anual: cabeçalho + linhas em moeda. Retorna as linhas gravadas"""
+    for idx, width in enumerate(column_widths, start=1):
+        ws.column_dimensions[get_column_letter(idx)].width = width
+    ws.freeze_panes = "A2"
+
+    linhas = 0
+    for r_idx, row in enumerate(dataframe_to_rows(resumo, index=False, header=True), start=1):
+        cells = []
+        for c_idx, value in enumerate(row, start=1):
+            if r_idx == 1:
+                cell = _celula(ws, value, font=styles["header_font"], fill=styles["header_fill"],
+                               alignment=styles["align_center"])
+            elif c_idx >= 2:
+                cell = _celula(ws, value, number_format=styles["currency_format"], alignment=styles["align_right"])
+            else:
+                cell = _celula(ws, value, alignment=styles["align_center"])
+            cell.border = styles["border"]
+            cells.append(cell)
+        ws.append(cells)
+        linhas = r_idx
+    return linhas
 
 
 def _build_styles():
@@ -298,24 +335,34 @@ def _coerce_date(value):
     return value
 
 
-def _aplicar_tabela(ws, headers, rows, column_widths, styles, currency_cols=None, date_cols=None, table_name="TabelaDados"):
+def _fracao(percentual):
+    """Percentual (25.0) -> fração (0.25) para o formato de porcentagem do Excel"""
+    return None if percentual is None else percentual / 100
+
+
+def _aplicar_tabela(ws, headers, rows, column_widths, styles, currency_cols=None, date_cols=None, table_name="TabelaDados", percent_cols=None):
     currency_cols = currency_cols or set()
     date_cols = date_cols or set()
+    percent_cols = percent_cols or set()
+
+    # Widths (antes da primeira linha: ws pode ser write-only)
+    for idx, width in enumerate(column_widths, start=1):
+        ws.column_dimensions[get_column_letter(idx)].width = width
+    ws.freeze_panes = "A2"
 
     # Header
-    for c_idx, header in enumerate(headers, start=1):
-        cell = ws.cell(row=1, column=c_idx, value=header)
-        cell.font = styles["header_font"]
-        cell.fill = styles["header_fill"]
-        cell.alignment = styles["align_center"]
-        cell.border = styles["border"]
+    ws.append([
+        _celula(ws, header, font=styles["header_font"], fill=styles["header_fill"],
+                alignment=styles["align_center"], border=styles["border"])
+        for header in headers
+    ])
 
     # Data
+    r_idx = 1
     for r_idx, row in enumerate(rows, start=2):
-        for c_idx, value in enumerate(row, start=1):
-            header = headers[c_idx - 1]
-            cell = ws.cell(row=r_idx, column=c_idx, value=value)
-            cell.border = styles["border"]
+        linha = []
+        for header, value in zip(headers, row):
+            cell = _celula(ws, value, border=styles["border"])
 
             if header in date_cols:
                 coerced = _coerce_date(value)
@@ -329,21 +376,31 @@ def _aplicar_tabela(ws, headers, rows, column_widths, styles, currency_cols=None
                     pass
                 cell.number_format = styles["currency_format"]
                 cell.alignment = styles["align_right"]
+            elif header in percent_cols:
+                cell.number_format = '0.0%'
+                cell.alignment = styles["align_right"]
             else:
                 cell.alignment = styles["align_left"]
 
-        if r_idx % 2 == 0:
-            for c_idx in range(1, len(headers) + 1):
-                ws.cell(row=r_idx, column=c_idx).fill = styles["zebra_fill"]
+            if r_idx % 2 == 0:
+                cell.fill = styles["zebra_fill"]
+            linha.append(cell)
+        ws.append(linha)
 
-    # Widths
-    for idx, width in enumerate(column_widths, start=1):
-        ws.column_dimensions[get_column_letter(idx)].width = width
+    ws.auto_filter.ref = f"A1:{get_column_letter(len(headers))}{r_idx}"
+    _adicionar_tabela(ws, table_name, headers, ws.auto_filter.ref)
 
-    ws.freeze_panes = "A2"
-    ws.auto_filter.ref = f"A1:{get_column_letter(len(headers))}{ws.max_row}"
+
+def _adicionar_tabela(ws, nome, headers, ref):
+    """Tabela do Excel sobre `ref`, com as colunas nomeadas pelos headers.
+
+    As colunas são preenchidas aqui porque em write-only o openpyxl não lê o
+    cabeçalho de volta da planilha.
+    """
     try:
-        tabela = Table(displayName=table_name, ref=ws.auto_filter.ref)
+        tabela = Table(displayName=nome, ref=ref)
+        tabela.tableColumns = [TableColumn(id=idx, name=str(header)) for idx, header in enumerate(headers, start=1)]
+        tabela.autoFilter = AutoFilter(ref=ref)
         tabela.tableStyleInfo = TableStyleInfo(
             name="TableStyleMedium9",
             showFirstColumn=False,
@@ -351,7 +408,9 @@ def _aplicar_tabela(ws, headers, rows, column_widths, styles, currency_cols=None
             showRowStripes=True,
             showColumnStripes=False,
         )
-        ws.add_table(tabela)
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", message="In write-only mode")
+            ws.add_table(tabela)
     except Exception:
         pass
 
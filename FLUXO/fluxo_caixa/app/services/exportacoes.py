@@ -0,0 +1,317 @@
+"""
+Exportacoes em segundo plano
+Fila de trabalhos (planilhas, PDFs) fora da thread do Tk, com progresso e cancelamento
+"""
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.config.settings import Settings
+from app.database.linhas import TAMANHO_LOTE
+
+AGUARDANDO = "aguardando"
+EXECUTANDO = "executando"
+CONCLUIDO = "concluido"
+ERRO = "erro"
+CANCELADO = "cancelado"
+FINAIS = (CONCLUIDO, ERRO, CANCELADO)
+
+
+class ExportacaoCancelada(Exception):
+    """Levantada dentro do trabalho quando o usuario pede o cancelamento"""
+
+
+class Andamento:
+    """Lado do trabalho (thread do pool): informa o progresso e observa o cancelamento.
+
+    Nada aqui toca no TrabalhoExportacao: os avisos vao pela fila do
+    gerenciador e sao aplicados na thread do Tk.
+    """
+
+    def __init__(self, trabalho_id: int, eventos: "queue.Queue", cancelar: threading.Event):
+        self.trabalho_id = trabalho_id
+        self._eventos = eventos
+        self._cancelar = cancelar
+
+    @property
+    def cancelado(self) -> bool:
+        return self._cancelar.is_set()
+
+    def verificar(self) -> None:
+        """ExportacaoCancelada se o usuario cancelou (chamar entre as etapas)"""
+        if self._cancelar.is_set():
+            raise ExportacaoCancelada()
+
+    def informar(self, processados: int, total: Optional[int] = None, mensagem: str = "") -> None:
+        """Publica o progresso (e verifica o cancelamento)"""
+        self.verificar()
+        self._eventos.put((self.trabalho_id, "progresso", (processados, total, mensagem)))
+
+    def acompanhar(self, itens: Iterable, total: Optional[int] = None, a_cada: int = TAMANHO_LOTE) -> Iterator:
+        """Repassa os itens informando o progresso a cada `a_cada` (o exportador nao muda)"""
+        processados = 0
+        self.informar(processados, total)
+        for item in itens:
+            yield item
+            processados += 1
+            if processados % a_cada == 0:
+                self.informar(processados, total)
+        self.informar(processados, total)
+
+
+@dataclass
+class TrabalhoExportacao:
+    """Estado de uma exportacao como a interface ve (so alterado na thread do Tk)"""
+
+    id: int
+    nome: str
+    destino: Optional[Path] = None
+    estado: str = AGUARDANDO
+    processados: int = 0
+    total: Optional[int] = None
+    mensagem: str = ""
+    criado_em: float = field(default_factory=time.time)
+    concluido_em: Optional[float] = None
+    ao_concluir: Optional[Callable[["TrabalhoExportacao"], None]] = field(default=None, repr=False)
+    _cancelar: threading.Event = field(default_factory=threading.Event, repr=False)
+    _futuro: Optional[Future] = field(default=None, repr=False)
+
+    @property
+    def ativo(self) -> bool:
+        return self.estado not in FINAIS
+
+    @property
+    def progresso(self) -> Optional[float]:
+        """Fracao concluida, ou None se o total nao e conhecido"""
+        if self.estado == CONCLUIDO:
+            return 1.0
+        if not self.total:
+            return None
+        return min(self.processados / self.total, 1.0)
+
+
+Executar = Callable[[Andamento], Any]
+Ouvinte = Callable[[TrabalhoExportacao], None]
+
+
+class GerenciadorExportacoes:
+    """Roda exportacoes num pool de threads e entrega o andamento na thread do Tk.
+
+    - Varios trabalhos correm ao mesmo tempo (ate `max_workers`); os demais
+      esperam na fila do pool.
+    - `executar(andamento)` roda no pool; progresso e fim voltam por uma
+      fila lida em processar_pendentes(), chamado pelo after() do widget.
+    - Cancelar um trabalho na fila o descarta; em execucao, o pedido e
+      atendido na proxima chamada a andamento.informar/verificar/acompanhar.
+    - Se o trabalho falha ou e cancelado, o arquivo de destino e apagado
+      quando nao existia antes (nada de planilha pela metade na pasta).
+    """
+
+    def __init__(self, max_workers: int = 2, intervalo_ms: int = 150, historico: int = 50):
+        self.intervalo_ms = intervalo_ms
+        self.historico = historico
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="exportacao")
+        self._eventos: "queue.Queue" = queue.Queue()
+        self._ids = itertools.count(1)
+
+        # Estado abaixo so e tocado na thread do Tk
+        self._trabalhos: Dict[int, TrabalhoExportacao] = {}
+        self._ouvintes: List[Ouvinte] = []
+        self._widget = None
+        self._bombeando = False
+
+    def enviar(
+        self,
+        nome: str,
+        executar: Executar,
+        destino: Optional[Path] = None,
+        widget=None,
+        ao_concluir: Optional[Ouvinte] = None,
+    ) -> TrabalhoExportacao:
+        """
+        Agenda a exportacao e retorna o trabalho (chamar na thread do Tk)
+
+        Args:
+            nome: descricao exibida no painel
+            executar: recebe o Andamento; roda no pool, sem tocar em widgets
+            destino: arquivo gerado (exibido no painel e apagado se falhar)
+            widget: widget Tk que agenda a leitura da fila
+            ao_concluir: chamado na thread do Tk quando o trabalho termina,
+                qualquer que seja o estado final
+        """
+        trabalho = TrabalhoExportacao(next(self._ids), nome, Path(destino) if destino else None, ao_concluir=ao_concluir)
+        andamento = Andamento(trabalho.id, self._eventos, trabalho._cancelar)
+        existia = trabalho.destino is not None and trabalho.destino.exists()
+
+        self._trabalhos[trabalho.id] = trabalho
+        self._descartar_antigos()
+        trabalho._futuro = self._executor.submit(self._executar, andamento, executar, trabalho.destino, existia)
+        if widget is not None:
+            self._widget = widget
+        self._notificar(trabalho)
+        self._agendar()
+        return trabalho
+
+    def cancelar(self, trabalho_id: int) -> bool:
+        """Pede o cancelamento; False se o trabalho ja terminou"""
+        trabalho = self._trabalhos.get(trabalho_id)
+        if trabalho is None or not trabalho.ativo:
+            return False
+        trabalho._cancelar.set()
+        if trabalho._futuro is not None and trabalho._futuro.cancel():
+            # Ainda na fila do pool: nao vai rodar
+            self._finalizar(trabalho, CANCELADO, "Cancelado")
+        else:
+            trabalho.mensagem = "Cancelando..."
+            self._notificar(trabalho)
+        return True
+
+    def trabalhos(self) -> List[TrabalhoExportacao]:
+        """Trabalhos recentes, do mais novo para o mais antigo"""
+        return sorted(self._trabalhos.values(), key=lambda t: t.id, reverse=True)
+
+    def ativos(self) -> int:
+        return sum(1 for t in self._trabalhos.values() if t.ativo)
+
+    def limpar_concluidos(self) -> None:
+        """Remove do historico os trabalhos que ja terminaram"""
+        for trabalho_id in [t.id for t in self._trabalhos.values() if not t.ativo]:
+            del self._trabalhos[trabalho_id]
+
+    def ouvir(self, ouvinte: Ouvinte) -> None:
+        """ouvinte(trabalho) a cada mudanca de estado ou progresso (thread do Tk)"""
+        self._ouvintes.append(ouvinte)
+
+    def deixar_de_ouvir(self, ouvinte: Ouvinte) -> None:
+        if ouvinte in self._ouvintes:
+            self._ouvintes.remove(ouvinte)
+
+    def processar_pendentes(self) -> int:
+        """Aplica os avisos dos trabalhos (chamar na thread do Tk)"""
+        aplicados = 0
+        while True:
+            try:
+                trabalho_id, tipo, dados = self._eventos.get_nowait()
+            except queue.Empty:
+                return aplicados
+            trabalho = self._trabalhos.get(trabalho_id)
+            if trabalho is None or not trabalho.ativo:
+                continue
+            aplicados += 1
+            if tipo == "inicio":
+                trabalho.estado = EXECUTANDO
+                trabalho.mensagem = "Cancelando..." if trabalho._cancelar.is_set() else ""
+                self._notificar(trabalho)
+            elif tipo == "progresso":
+                trabalho.processados, trabalho.total, mensagem = dados
+                if mensagem:
+                    trabalho.mensagem = mensagem
+                self._notificar(trabalho)
+            else:
+                estado, mensagem, destino = dados
+                if destino is not None:
+                    trabalho.destino = Path(destino)
+                self._finalizar(trabalho, estado, mensagem)
+
+    def fechar(self) -> None:
+        """Cancela o que estiver pendente e encerra o pool (ao sair da aplicacao)"""
+        for trabalho in self._trabalhos.values():
+            trabalho._cancelar.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _executar(self, andamento: Andamento, executar: Executar, destino: Optional[Path], existia: bool) -> None:
+        # Thread do pool: so fala com a interface pela fila
+        eventos = self._eventos
+        eventos.put((andamento.trabalho_id, "inicio", None))
+        try:
+            andamento.verificar()
+            resultado = executar(andamento)
+        except ExportacaoCancelada:
+            self._descartar(destino, existia)
+            eventos.put((andamento.trabalho_id, "fim", (CANCELADO, "Cancelado", None)))
+        except Exception as e:
+            self._descartar(destino, existia)
+            eventos.put((andamento.trabalho_id, "fim", (ERRO, str(e), None)))
+        else:
+            gerado = resultado if isinstance(resultado, (str, Path)) else None
+            eventos.put((andamento.trabalho_id, "fim", (CONCLUIDO, "Concluido", gerado)))
+
+    @staticmethod
+    def _descartar(destino: Optional[Path], existia: bool) -> None:
+        if destino is None or existia:
+            return
+        try:
+            destino.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+    def _finalizar(self, trabalho: TrabalhoExportacao, estado: str, mensagem: str) -> None:
+        trabalho.estado = estado
+        trabalho.mensagem = mensagem
+        trabalho.concluido_em = time.time()
+        self._notificar(trabalho)
+        if trabalho.ao_concluir is not None:
+            trabalho.ao_concluir(trabalho)
+
+    def _notificar(self, trabalho: TrabalhoExportacao) -> None:
+        for ouvinte in list(self._ouvintes):
+            try:
+                ouvinte(trabalho)
+            except Exception:
+                # Painel fechado no meio do caminho: deixa de ouvir
+                self.deixar_de_ouvir(ouvinte)
+
+    def _descartar_antigos(self) -> None:
+        terminados = sorted((t for t in self._trabalhos.values() if not t.ativo), key=lambda t: t.id)
+        for trabalho in terminados[: max(0, len(self._trabalhos) - self.historico)]:
+            del self._trabalhos[trabalho.id]
+
+    def _agendar(self) -> None:
+        if self._widget is None or self._bombeando:
+            return
+        self._bombeando = True
+        self._widget.after(self.intervalo_ms, self._bombear)
+
+    def _bombear(self) -> None:
+        self.processar_pendentes()
+        if self.ativos() == 0:
+            self._bombeando = False
+            return
+        try:
+            self._widget.after(self.intervalo_ms, self._bombear)
+        except Exception:
+            # Widget destruido: o proximo envio volta a agendar
+            self._bombeando = False
+
+
+def listar_saidas(pasta: Optional[Path] = None, limite: int = 50) -> List[Tuple[Path, int, float]]:
+    """Arquivos mais recentes da pasta de saida: (caminho, bytes, modificado em)"""
+    pasta = Path(pasta or Settings.OUTPUT_DIR)
+    if not pasta.exists():
+        return []
+    arquivos = []
+    for caminho in pasta.iterdir():
+        try:
+            info = caminho.stat()
+        except OSError:
+            continue
+        if caminho.is_file():
+            arquivos.append((caminho, info.st_size, info.st_mtime))
+    arquivos.sort(key=lambda item: item[2], reverse=True)
+    return arquivos[:limite]
+
+
+_gerenciador: Optional[GerenciadorExportacoes] = None
+
+
+def obter_gerenciador_exportacoes() -> GerenciadorExportacoes:
+    """Gerenciador compartilhado pelas telas (criado no primeiro uso, na thread do Tk)"""
+    global _gerenciador
+    if _gerenciador is None:
+        _gerenciador = GerenciadorExportacoes()
+    return _gerenciador
@@ -4,6 +4,7 @@ CRUD completo com validações
 """
 from typing import List, Optional
 from app.models.fornecedor import Fornecedor, TipoPessoa
+from app.utils.documentos import limpar_documento
 from app.database.connection import Database
 
 
@@ -95,7 +96,7 @@ class ServicoFornecedor:
     def obter_por_cpf_cnpj(self, cpf_cnpj: str) -> Optional[Fornecedor]:
         """Obtém fornecedor por CPF/CNPJ"""
         sql = "SELECT * FROM fornecedores WHERE cpf_cnpj = ?"
-        resultado = self.db.executar_um(sql, (cpf_cnpj,))
+        resultado = self.db.executar_um(sql, (limpar_documento(cpf_cnpj),))
 
         if resultado:
             return self._mapear_para_fornecedor(resultado)
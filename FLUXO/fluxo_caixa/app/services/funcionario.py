@@ -75,11 +75,9 @@ class ServicoFuncionario:
                 datetime.now()
             )
             
-            funcionario_id = self.db.inserir(query, params)
-            
-            # Registra auditoria
-            self.db.registrar_auditoria(
-                'funcionarios', 'INSERT', funcionario_id,
+            # Insere e registra auditoria com um único commit
+            funcionario_id = self.db.executar_com_auditoria(
+                query, params, 'funcionarios', 'INSERT',
                 dados_novos=funcionario.to_dict()
             )
             
@@ -205,11 +203,9 @@ class ServicoFuncionario:
                 funcionario_id
             )
             
-            self.db.atualizar(query, params)
-            
-            # Registra auditoria
-            self.db.registrar_auditoria(
-                'funcionarios', 'UPDATE', funcionario_id,
+            # Atualiza e registra auditoria com um único commit
+            self.db.executar_com_auditoria(
+                query, params, 'funcionarios', 'UPDATE', funcionario_id,
                 dados_anteriores=funcionario_antigo,
                 dados_novos=funcionario.to_dict()
             )
@@ -242,10 +238,9 @@ class ServicoFuncionario:
                 WHERE id = ?
             """
             
-            self.db.atualizar(query, ('inativo', datetime.now(), funcionario_id))
-            
-            # Registra auditoria
-            self.db.registrar_auditoria(
+            # Desativa e registra auditoria com um único commit
+            self.db.executar_com_auditoria(
+                query, ('inativo', datetime.now(), funcionario_id),
                 'funcionarios', 'DELETE', funcionario_id,
                 dados_anteriores=funcionario
             )
@@ -0,0 +1,291 @@
+"""
+Serviço de Importação em Lote
+Importa clientes, fornecedores e funcionários com deduplicação por conjuntos e inserção em lote
+"""
+from dataclasses import dataclass, field, fields
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.database.auditoria import criar_evento, gravar_eventos
+from app.database.database import Database
+from app.models.cliente import Cliente, StatusCliente, TipoPessoa
+from app.models.fornecedor import Fornecedor, TipoPessoa as TipoFornecedor
+from app.models.funcionario import Funcionario, StatusFuncionario
+from app.utils.documentos import limpar_documento, validar_lote
+
+
+@dataclass
+class ResultadoImportacao:
+    """Resumo de uma importação em lote"""
+
+    inseridos: int = 0
+    duplicados: int = 0
+    invalidos: int = 0
+    # (posição do registro na entrada, motivo)
+    rejeitados: List[Tuple[int, str]] = field(default_factory=list)
+
+    @property
+    def total(self) -> int:
+        return self.inseridos + self.duplicados + self.invalidos
+
+
+@dataclass(frozen=True)
+class _Entidade:
+    tabela: str
+    colunas: Tuple[str, ...]
+    obrigatorias: Tuple[str, ...]
+    documento: str
+    unicas: Tuple[str, ...]
+    tipo_documento: Callable[[Dict], str]
+    # Regras do modelo (email, UF, CEP...): lista de erros
+    validar: Callable[[Dict], List[str]]
+    # Valores aceitos pelos CHECK da tabela
+    valores: Dict[str, Tuple[str, ...]] = field(default_factory=dict)
+    padroes: Dict = field(default_factory=dict)
+
+
+def _campos_modelo(modelo, linha: Dict, **convertidos) -> Dict:
+    """Argumentos do modelo a partir da linha normalizada (sem id e data_cadastro)"""
+    nomes = {f.name for f in fields(modelo)} - {"id", "data_cadastro"}
+    return {**{c: linha[c] for c in nomes if c in linha}, **convertidos}
+
+
+def _erros_modelo(criar: Callable[[], object]) -> List[str]:
+    """Cria o modelo e roda sua validação (que pode levantar ou retornar erros)"""
+    try:
+        resultado = criar().validar()
+    except (ValueError, TypeError, AttributeError) as e:
+        return [str(e)]
+    return [] if resultado is None else resultado[1]
+
+
+def _erros_cliente(linha: Dict) -> List[str]:
+    return _erros_modelo(lambda: Cliente(**_campos_modelo(
+        Cliente, linha,
+        tipo_pessoa=TipoPessoa(linha["tipo_pessoa"]),
+        status=StatusCliente(linha["status"]),
+    )))
+
+
+def _erros_fornecedor(linha: Dict) -> List[str]:
+    return _erros_modelo(lambda: Fornecedor(**_campos_modelo(
+        Fornecedor, linha, tipo=TipoFornecedor(linha["tipo"]),
+    )))
+
+
+def _erros_funcionario(linha: Dict) -> List[str]:
+    try:
+        data_admissao = datetime.fromisoformat(str(linha["data_admissao"]))
+    except ValueError:
+        return ["Data de admissão inválida"]
+    try:
+        salario = float(linha["salario"])
+    except (TypeError, ValueError):
+        return ["Salário inválido"]
+    return _erros_modelo(lambda: Funcionario(**_campos_modelo(
+        Funcionario, linha,
+        data_admissao=data_admissao,
+        salario=salario,
+        status=StatusFuncionario(linha["status"]),
+    )))
+
+
+CLIENTES = _Entidade(
+    tabela="clientes",
+    colunas=("nome", "tipo_pessoa", "documento", "email", "telefone", "cep", "logradouro",
+             "numero", "complemento", "bairro", "cidade", "uf", "status", "observacoes",
+             "data_cadastro"),
+    obrigatorias=("nome", "tipo_pessoa", "documento", "email", "telefone", "cep",
+                  "logradouro", "numero", "bairro", "cidade", "uf"),
+    documento="documento",
+    unicas=("documento", "email"),
+    tipo_documento=lambda r: "cnpj" if r.get("tipo_pessoa") == "juridica" else "cpf",
+    validar=_erros_cliente,
+    valores={"tipo_pessoa": ("fisica", "juridica"), "status": ("ativo", "inativo", "suspenso")},
+    padroes={"complemento": "", "status": "ativo", "observacoes": ""},
+)
+
+FORNECEDORES = _Entidade(
+    tabela="fornecedores",
+    colunas=("tipo", "nome", "cpf_cnpj", "nome_fantasia", "telefone", "email", "cep",
+             "endereco", "numero", "complemento", "bairro", "cidade", "estado",
+             "observacoes", "status", "data_cadastro"),
+    obrigatorias=("tipo", "nome", "cpf_cnpj", "telefone", "email"),
+    documento="cpf_cnpj",
+    unicas=("cpf_cnpj", "nome"),
+    tipo_documento=lambda r: "cnpj" if r.get("tipo") == "juridica" else "cpf",
+    validar=_erros_fornecedor,
+    valores={"tipo": ("fisica", "juridica"), "status": ("ativo", "inativo")},
+    padroes={"status": "ativo"},
+)
+
+FUNCIONARIOS = _Entidade(
+    tabela="funcionarios",
+    colunas=("nome", "cpf", "cargo", "email", "telefone", "cep", "logradouro", "numero",
+             "complemento", "bairro", "cidade", "uf", "salario", "data_admissao", "status",
+             "observacoes", "data_cadastro"),
+    obrigatorias=("nome", "cpf", "cargo", "email", "telefone", "cep", "logradouro",
+                  "numero", "bairro", "cidade", "uf", "salario", "data_admissao"),
+    documento="cpf",
+    unicas=("cpf", "email"),
+    tipo_documento=lambda r: "cpf",
+    validar=_erros_funcionario,
+    # A tabela aceita menos status que o modelo (licenca/desligado ficam de fora)
+    valores={"status": ("ativo", "inativo")},
+    padroes={"complemento": "", "status": "ativo", "observacoes": ""},
+)
+
+
+def _chave(entidade: _Entidade, coluna: str, valor) -> str:
+    """Forma gravada de uma chave única (documento, email ou nome)"""
+    if coluna == entidade.documento:
+        return limpar_documento(str(valor or ""))
+    if coluna == "email":
+        return str(valor).strip().lower()
+    return str(valor).strip()
+
+
+def _normalizar(entidade: _Entidade, registro: Dict, agora: str) -> Dict:
+    linha = {**entidade.padroes, **{k: v for k, v in registro.items() if v is not None}}
+    linha[entidade.documento] = _chave(entidade, entidade.documento, linha.get(entidade.documento))
+    for coluna in ("email", "nome"):
+        if linha.get(coluna):
+            linha[coluna] = _chave(entidade, coluna, linha[coluna])
+    if linha.get("cep"):
+        linha["cep"] = limpar_documento(str(linha["cep"]))
+    linha.setdefault("data_cadastro", agora)
+    return linha
+
+
+class ImportadorEntidades:
+    """Importação em lote de cadastros.
+
+    Em vez de duas consultas de duplicidade por registro, carrega uma vez as
+    chaves únicas já gravadas em conjuntos, valida CPF/CNPJ do lote inteiro
+    de forma vetorizada, descarta duplicados do próprio lote e insere tudo
+    com executemany numa única transação, junto com a auditoria.
+    """
+
+    def __init__(self, db: Database, usuario: Optional[str] = None):
+        self.db = db
+        self.usuario = usuario
+
+    def importar_clientes(self, registros: Iterable[Dict]) -> ResultadoImportacao:
+        """Importa clientes (dicionários com as colunas da tabela clientes)"""
+        return self._importar(CLIENTES, registros)
+
+    def importar_fornecedores(self, registros: Iterable[Dict]) -> ResultadoImportacao:
+        """Importa fornecedores (dicionários com as colunas da tabela fornecedores)"""
+        return self._importar(FORNECEDORES, registros)
+
+    def importar_funcionarios(self, registros: Iterable[Dict]) -> ResultadoImportacao:
+        """Importa funcionários (dicionários com as colunas da tabela funcionarios)"""
+        return self._importar(FUNCIONARIOS, registros)
+
+    def _importar(self, entidade: _Entidade, registros: Iterable[Dict]) -> ResultadoImportacao:
+        resultado = ResultadoImportacao()
+        agora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        linhas = [_normalizar(entidade, r, agora) for r in registros]
+
+        # Validação: campos obrigatórios, dígitos verificadores (lote vetorizado)
+        # e regras do modelo
+        candidatos: List[int] = []
+        for i, linha in enumerate(linhas):
+            faltando = [c for c in entidade.obrigatorias if linha.get(c) in (None, "")]
+            fora = [c for c, aceitos in entidade.valores.items() if linha.get(c) not in aceitos]
+            if faltando:
+                resultado.invalidos += 1
+                resultado.rejeitados.append((i, f"Campos obrigatórios: {', '.join(faltando)}"))
+            elif fora:
+                resultado.invalidos += 1
+                resultado.rejeitados.append((i, "; ".join(
+                    f"{c} inválido ({'/'.join(entidade.valores[c])})" for c in fora
+                )))
+            else:
+                candidatos.append(i)
+
+        por_tipo: Dict[str, List[int]] = {"cpf": [], "cnpj": []}
+        for i in candidatos:
+            por_tipo[entidade.tipo_documento(linhas[i])].append(i)
+        for tipo, indices in por_tipo.items():
+            if not indices:
+                continue
+            validos, motivos = validar_lote([linhas[i][entidade.documento] for i in indices], tipo)
+            for i, ok, motivo in zip(indices, validos.tolist(), motivos):
+                if not ok:
+                    linhas[i] = None
+                    resultado.invalidos += 1
+                    resultado.rejeitados.append((i, motivo))
+        candidatos = [i for i in candidatos if linhas[i] is not None]
+
+        # Regras do modelo: uma linha inválida não pode derrubar o executemany do lote
+        for i in candidatos:
+            erros = entidade.validar(linhas[i])
+            if erros:
+                linhas[i] = None
+                resultado.invalidos += 1
+                resultado.rejeitados.append((i, "; ".join(erros)))
+        candidatos = [i for i in candidatos if linhas[i] is not None]
+
+        conn = self.db.get_connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+
+            # Chaves já cadastradas carregadas uma única vez, na mesma forma
+            # normalizada do lote (cadastros antigos podem ter máscara ou maiúsculas)
+            existentes = {coluna: set() for coluna in entidade.unicas}
+            consulta = f"SELECT {', '.join(entidade.unicas)} FROM {entidade.tabela}"
+            for row in conn.execute(consulta):
+                for coluna in entidade.unicas:
+                    if row[coluna] is not None:
+                        existentes[coluna].add(_chave(entidade, coluna, row[coluna]))
+
+            aceitos: List[Dict] = []
+            for i in candidatos:
+                linha = linhas[i]
+                repetida = next((c for c in entidade.unicas if linha[c] in existentes[c]), None)
+                if repetida:
+                    resultado.duplicados += 1
+                    resultado.rejeitados.append((i, f"Duplicado: {repetida} {linha[repetida]}"))
+                    continue
+                for coluna in entidade.unicas:
+                    existentes[coluna].add(linha[coluna])
+                aceitos.append(linha)
+
+            if aceitos:
+                ultimo_id = conn.execute(
+                    f"SELECT COALESCE(MAX(id), 0) FROM {entidade.tabela}"
+                ).fetchone()[0]
+                marcadores = ", ".join("?" for _ in entidade.colunas)
+                conn.executemany(
+                    f"INSERT INTO {entidade.tabela} ({', '.join(entidade.colunas)}) "
+                    f"VALUES ({marcadores})",
+                    [tuple(linha.get(c) for c in entidade.colunas) for linha in aceitos],
+                )
+
+                # Ids gerados: a transação IMMEDIATE garante que são só os nossos
+                ids = {
+                    row[1]: row[0]
+                    for row in conn.execute(
+                        f"SELECT id, {entidade.documento} FROM {entidade.tabela} WHERE id > ?",
+                        (ultimo_id,),
+                    )
+                }
+                gravar_eventos(conn, [
+                    criar_evento(
+                        entidade.tabela, "INSERT", ids[linha[entidade.documento]],
+                        dados_novos={c: linha.get(c) for c in entidade.colunas},
+                        usuario=self.usuario,
+                    )
+                    for linha in aceitos
+                ])
+            conn.commit()
+            resultado.inseridos = len(aceitos)
+        except Exception as e:
+            conn.rollback()
+            raise Exception(f"Erro ao importar {entidade.tabela}: {e}")
+        finally:
+            conn.close()
+
+        resultado.rejeitados.sort()
+        return resultado
@@ -1,42 +1,158 @@
 """Serviço de impressão de relatórios
 
 Gera PDF com layout corporativo usando reportlab e permite impressão direta no Windows.
+Relatórios grandes saem em partes (documentos de até LINHAS_POR_PARTE linhas,
+renderizados em sequência ou em processos) juntadas no final com pypdf.
 """
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import mm
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from itertools import chain, islice
 from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
 import os
 import tempfile
 
+try:
+    from pypdf import PdfWriter
+except ImportError:  # sem pypdf nao ha como juntar partes: o relatorio sai num documento so
+    PdfWriter = None
 
-def gerar_pdf_relatorio(nome_sistema: str, periodo: str, lancamentos: list, totais: dict, caminho_saida: Path = None) -> Path:
+COLUNAS_LANCAMENTOS = ['Data', 'Tipo', 'Categoria', 'Descrição', 'Valor']
+LARGURAS_LANCAMENTOS = [22*mm, 24*mm, 40*mm, 70*mm, 30*mm]
+
+# Linhas por Table: o reportlab reparte a tabela a cada quebra de página, o que
+# numa tabela com todos os lançamentos custa O(linhas) por página
+LINHAS_POR_TABELA = 200
+
+# Linhas por parte (documento separado): limita a memória do layout e é a
+# unidade de trabalho enviada aos processos
+LINHAS_POR_PARTE = 5_000
+
+ESTILO_LANCAMENTOS = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#34495e')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('ALIGN', (-1, 1), (-1, -1), 'RIGHT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('GRID', (0, 0), (-1, -1), 0.25, colors.HexColor('#bdc3c7')),
+    ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.white, colors.HexColor('#f7f9fa')])
+])
+
+# (nome_sistema, periodo, totais, gerado_em): só a primeira parte traz o cabeçalho
+Cabecalho = Tuple[str, str, dict, str]
+
+
+def gerar_pdf_relatorio(nome_sistema: str, periodo: str, lancamentos: Iterable[dict], totais: dict, caminho_saida: Path = None, processos: int = 1) -> Path:
     """Gera PDF do relatório e retorna o caminho do arquivo gerado.
 
     Args:
         nome_sistema: nome do sistema (cabeçalho)
         periodo: texto do período (ex: 2025-01-01 a 2025-12-31)
-        lancamentos: lista de dicts com chaves: data, tipo, categoria, descricao, valor
+        lancamentos: lista ou gerador de dicts com chaves: data, tipo, categoria, descricao, valor
         totais: dict com chaves 'entradas','saidas','saldo'
         caminho_saida: Path opcional para salvar; se None usa tempdir
+        processos: com mais de 1, as partes de relatórios grandes são
+            renderizadas em paralelo nesse número de processos
     """
     if caminho_saida is None:
         caminho_saida = Path(tempfile.gettempdir()) / f"relatorio_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
 
-    doc = SimpleDocTemplate(str(caminho_saida), pagesize=A4, leftMargin=18*mm, rightMargin=18*mm, topMargin=20*mm, bottomMargin=20*mm)
+    cabecalho = (nome_sistema, periodo, totais, datetime.now().strftime('%d/%m/%Y %H:%M:%S'))
+    linhas = map(_linha_lancamento, lancamentos)
+    primeira = list(islice(linhas, LINHAS_POR_PARTE))
+
+    if PdfWriter is None or len(primeira) < LINHAS_POR_PARTE:
+        # Cabe numa parte (ou não há pypdf para juntar): documento único
+        return _renderizar_parte(caminho_saida, chain(primeira, linhas), cabecalho)
+
+    with tempfile.TemporaryDirectory(prefix="relatorio_") as pasta:
+        partes = _renderizar_partes(Path(pasta), _em_partes(primeira, linhas), cabecalho, processos)
+        _juntar_partes(partes, caminho_saida)
+    return caminho_saida
+
+
+def _linha_lancamento(l: dict) -> tuple:
+    """Lançamento -> células da tabela (tupla de textos, barata de enviar a outro processo)"""
+    return (
+        l.get('data', ''),
+        l.get('tipo', '').title(),
+        l.get('categoria', ''),
+        (l.get('descricao') or '')[:80],
+        f"R$ {l.get('valor', 0):,.2f}"
+    )
+
+
+def _em_partes(primeira: list, linhas: Iterator[tuple]) -> Iterator[list]:
+    yield primeira
+    while True:
+        lote = list(islice(linhas, LINHAS_POR_PARTE))
+        if not lote:
+            return
+        yield lote
+
+
+def _renderizar_partes(pasta: Path, lotes: Iterable[list], cabecalho: Cabecalho, processos: int) -> List[Path]:
+    """Renderiza cada lote num PDF da pasta; devolve os arquivos na ordem dos lotes"""
+    if processos <= 1:
+        return [
+            _renderizar_parte(pasta / f"parte_{indice:05d}.pdf", lote, cabecalho if indice == 0 else None)
+            for indice, lote in enumerate(lotes)
+        ]
+
+    partes = []
+    pendentes = deque()
+    with ProcessPoolExecutor(max_workers=processos) as pool:
+        for indice, lote in enumerate(lotes):
+            destino = pasta / f"parte_{indice:05d}.pdf"
+            pendentes.append(pool.submit(_renderizar_parte, destino, lote, cabecalho if indice == 0 else None))
+            # Até duas partes por processo na fila: a leitura do banco não dispara na frente
+            while len(pendentes) > 2 * processos:
+                partes.append(pendentes.popleft().result())
+        partes.extend(futuro.result() for futuro in pendentes)
+    return partes
+
+
+def _renderizar_parte(caminho: Path, linhas: Iterable[Sequence[str]], cabecalho: Optional[Cabecalho] = None) -> Path:
+    """Monta um PDF com as linhas em tabelas de LINHAS_POR_TABELA (cabeçalho repetido)"""
+    doc = SimpleDocTemplate(str(caminho), pagesize=A4, leftMargin=18*mm, rightMargin=18*mm, topMargin=20*mm, bottomMargin=20*mm)
+    elements = _elementos_cabecalho(*cabecalho) if cabecalho else []
+
+    linhas = iter(linhas)
+    tabelas = 0
+    while True:
+        bloco = list(islice(linhas, LINHAS_POR_TABELA))
+        if not bloco and tabelas:
+            break
+        # repeatRows: o cabeçalho da tabela volta no topo da página quando ela quebra
+        table = Table([COLUNAS_LANCAMENTOS] + bloco, colWidths=LARGURAS_LANCAMENTOS, repeatRows=1)
+        table.setStyle(ESTILO_LANCAMENTOS)
+        elements.append(table)
+        tabelas += 1
+        if len(bloco) < LINHAS_POR_TABELA:
+            break
+
+    doc.build(elements)
+    return caminho
+
+
+def _elementos_cabecalho(nome_sistema: str, periodo: str, totais: dict, gerado_em: str) -> list:
+    """Título, período e quadro de totais do início do relatório"""
     styles = getSampleStyleSheet()
     elements = []
 
-    # Cabeçalho
     titulo_style = ParagraphStyle('Titulo', parent=styles['Heading1'], alignment=1, fontSize=14, leading=16)
     meta_style = ParagraphStyle('Meta', parent=styles['Normal'], alignment=1, fontSize=9)
 
     elements.append(Paragraph(nome_sistema, titulo_style))
     elements.append(Paragraph(f"Período: {periodo}", meta_style))
-    elements.append(Paragraph(f"Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}", meta_style))
+    elements.append(Paragraph(f"Gerado em: {gerado_em}", meta_style))
     elements.append(Spacer(1, 8))
 
     # Totais consolidados
@@ -45,7 +161,6 @@ def gerar_pdf_relatorio(nome_sistema: str, periodo: str, lancamentos: list, tota
         ["Saídas", f"R$ {totais.get('saidas', 0):,.2f}"],
         ["Saldo", f"R$ {totais.get('saldo', 0):,.2f}"]
     ]
-    t = Table([['', ''], ['', '']], colWidths=[100*mm, 60*mm])
     t = Table(tot_items, colWidths=[100*mm, 60*mm])
     t.setStyle(TableStyle([
         ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#27ae60')),
@@ -56,34 +171,15 @@ def gerar_pdf_relatorio(nome_sistema: str, periodo: str, lancamentos: list, tota
     ]))
     elements.append(t)
     elements.append(Spacer(1, 10))
+    return elements
 
-    # Tabela de lançamentos
-    data = [['Data', 'Tipo', 'Categoria', 'Descrição', 'Valor']]
-    for l in lancamentos:
-        data.append([
-            l.get('data', ''),
-            l.get('tipo', '').title(),
-            l.get('categoria', ''),
-            (l.get('descricao') or '')[:80],
-            f"R$ {l.get('valor', 0):,.2f}"
-        ])
-
-    table = Table(data, colWidths=[22*mm, 24*mm, 40*mm, 70*mm, 30*mm])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#34495e')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('ALIGN', (-1, 1), (-1, -1), 'RIGHT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 9),
-        ('GRID', (0, 0), (-1, -1), 0.25, colors.HexColor('#bdc3c7')),
-        ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.white, colors.HexColor('#f7f9fa')])
-    ]))
-
-    elements.append(table)
 
-    doc.build(elements)
-    return caminho_saida
+def _juntar_partes(partes: List[Path], caminho_saida: Path) -> None:
+    writer = PdfWriter()
+    for parte in partes:
+        writer.append(str(parte))
+    with open(caminho_saida, 'wb') as arquivo:
+        writer.write(arquivo)
 
 
 def imprimir_pdf_windows(caminho_pdf: Path) -> None:
@@ -2,10 +2,12 @@
 Serviço de Lançamentos Financeiros
 Gerencia CRUD e operações complexas com lançamentos
 """
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Set, Tuple
 from datetime import datetime, timedelta
 from app.models.lancamento import Lancamento, TipoLancamento
 from app.database.database import Database
+from app.utils.assinatura import assinatura_lancamento
+from app.utils.datas import de_dia, para_dia
 
 
 class ServicoLancamento:
@@ -14,21 +16,57 @@ class ServicoLancamento:
     def __init__(self, db: Database):
         self.db = db
 
-    def criar(self, lancamento: Lancamento) -> Tuple[bool, str]:
-        """Cria novo lançamento usando categoria_id com foreign key"""
-        # Validação básica dos dados obrigatórios
+    @staticmethod
+    def assinatura(lancamento: Lancamento) -> str:
+        """Assinatura usada no índice único contra duplicados"""
+        return assinatura_lancamento(
+            lancamento.data, lancamento.tipo, lancamento.valor, lancamento.descricao,
+            lancamento.cliente_id, lancamento.fornecedor_id, lancamento.funcionario_id,
+        )
+
+    def obter_duplicado(self, lancamento: Lancamento, ignorar_id: Optional[int] = None) -> Optional[int]:
+        """ID do lançamento com a mesma assinatura (busca pelo índice único)"""
+        row = self.db.obter_um(
+            "SELECT id FROM lancamentos WHERE assinatura = ?", (self.assinatura(lancamento),)
+        )
+        if row and row['id'] != ignorar_id:
+            return row['id']
+        return None
+
+    def _validar_basico(self, lancamento: Lancamento, anos_fechados: Optional[Set[int]] = None) -> Optional[str]:
+        """Validação básica dos dados obrigatórios; retorna a mensagem de erro"""
         if not lancamento.data:
-            return False, "Data é obrigatória"
+            return "Data é obrigatória"
         if not lancamento.tipo:
-            return False, "Tipo é obrigatório"
+            return "Tipo é obrigatório"
         if lancamento.valor <= 0:
-            return False, "Valor deve ser maior que zero"
+            return "Valor deve ser maior que zero"
         if not lancamento.descricao:
-            return False, "Descrição é obrigatória"
+            return "Descrição é obrigatória"
         if not lancamento.categoria_id or lancamento.categoria_id <= 0:
-            return False, "Categoria é obrigatória"
+            return "Categoria é obrigatória"
         if not lancamento.subcategoria_id or lancamento.subcategoria_id <= 0:
-            return False, "Subcategoria é obrigatória"
+            return "Subcategoria é obrigatória"
+        if self.db.particoes.ano_fechado(lancamento.data, anos_fechados):
+            return f"O ano de {lancamento.data} está fechado (somente leitura)"
+        return None
+
+    def criar(self, lancamento: Lancamento, permitir_duplicado: bool = False) -> Tuple[bool, str]:
+        """Cria novo lançamento usando categoria_id com foreign key
+
+        Lançamento com a mesma assinatura de outro é recusado; com
+        permitir_duplicado=True é gravado sem assinatura.
+        """
+        erro = self._validar_basico(lancamento)
+        if erro:
+            return False, erro
+
+        assinatura = None
+        if not permitir_duplicado:
+            duplicado = self.obter_duplicado(lancamento)
+            if duplicado:
+                return False, f"Lançamento duplicado: igual ao lançamento {duplicado}"
+            assinatura = self.assinatura(lancamento)
 
         try:
             # Query usando categoria_id e subcategoria_id com foreign keys
@@ -36,8 +74,8 @@ class ServicoLancamento:
                 INSERT INTO lancamentos (
                     data, tipo, categoria_id, subcategoria_id, valor, descricao,
                     cliente_id, fornecedor_id, funcionario_id, banco, nota_fiscal,
-                    comprovante, observacao
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    comprovante, observacao, assinatura
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             '''
 
             params = (
@@ -54,6 +92,7 @@ class ServicoLancamento:
                 lancamento.nota_fiscal or '',
                 lancamento.comprovante or '',
                 lancamento.observacao or '',
+                assinatura,
             )
 
             lancamento_id = self.db.inserir(query, params)
@@ -62,59 +101,105 @@ class ServicoLancamento:
         except Exception as e:
             return False, f"Erro ao criar lançamento: {str(e)}"
 
+    def criar_em_lote(self, lancamentos: List[Lancamento]) -> Tuple[int, int]:
+        """
+        Insere vários lançamentos numa transação, ignorando duplicados
+
+        A checagem é feita pelo próprio índice único da assinatura
+        (INSERT OR IGNORE), inclusive entre lançamentos do mesmo lote.
+        Lançamentos inválidos ou de anos fechados geram exceção antes de gravar.
+
+        Returns:
+            (inseridos, duplicados)
+        """
+        # Anos fechados lidos uma vez para o lote, não uma consulta por linha
+        anos_fechados = set(self.db.particoes.anos_fechados())
+        for lancamento in lancamentos:
+            erro = self._validar_basico(lancamento, anos_fechados)
+            if erro:
+                raise Exception(f"Lançamento inválido ({lancamento.descricao}): {erro}")
+
+        params = [
+            (
+                l.data, getattr(l.tipo, 'value', l.tipo), l.categoria_id, l.subcategoria_id, l.valor, l.descricao,
+                l.cliente_id, l.fornecedor_id, l.funcionario_id, l.banco or '',
+                l.nota_fiscal or '', l.comprovante or '', l.observacao or '', self.assinatura(l),
+            )
+            for l in lancamentos
+        ]
+        conn = self.db.get_connection()
+        try:
+            # rowcount do executemany soma so as linhas do INSERT; total_changes
+            # contaria tambem as gravadas pelos triggers dos resumos
+            cursor = conn.executemany(
+                '''
+                INSERT OR IGNORE INTO lancamentos (
+                    data, tipo, categoria_id, subcategoria_id, valor, descricao,
+                    cliente_id, fornecedor_id, funcionario_id, banco, nota_fiscal,
+                    comprovante, observacao, assinatura
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''',
+                params,
+            )
+            inseridos = cursor.rowcount
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise Exception(f"Erro ao criar lançamentos em lote: {e}")
+        finally:
+            conn.close()
+        return inseridos, len(params) - inseridos
+
     def obter(self, id: int) -> Optional[Lancamento]:
         """Obtém lançamento por ID"""
         query = "SELECT * FROM lancamentos WHERE id = ?"
-        resultado = self.db.obter_um(query, (id,))
-        return self._converter_para_lancamento(resultado) if resultado else None
+        resultados = self.db.particoes.obter_modelos(query, Lancamento.conversor, (id,))
+        return resultados[0] if resultados else None
 
     def obter_todos(self) -> List[Lancamento]:
         """Obtém todos os lançamentos"""
-        query = "SELECT * FROM lancamentos ORDER BY data DESC"
-        resultados = self.db.obter_todos(query)
-        return [self._converter_para_lancamento(row) for row in resultados]
+        query = "SELECT * FROM lancamentos ORDER BY dia DESC"
+        return self.db.particoes.obter_modelos(query, Lancamento.conversor)
 
     def obter_por_periodo(self, data_inicio: str, data_fim: str) -> List[Lancamento]:
         """Obtém lançamentos em período específico"""
         query = '''
             SELECT * FROM lancamentos 
-            WHERE data BETWEEN ? AND ? 
-            ORDER BY data DESC
+            WHERE dia BETWEEN ? AND ? 
+            ORDER BY dia DESC
         '''
-        resultados = self.db.obter_todos(query, (data_inicio, data_fim))
-        return [self._converter_para_lancamento(row) for row in resultados]
+        params = (para_dia(data_inicio), para_dia(data_fim))
+        return self.db.particoes.obter_modelos(query, Lancamento.conversor, params, data_inicio, data_fim)
 
     def obter_por_tipo(self, tipo: TipoLancamento) -> List[Lancamento]:
         """Obtém lançamentos por tipo"""
-        query = "SELECT * FROM lancamentos WHERE tipo = ? ORDER BY data DESC"
-        resultados = self.db.obter_todos(query, (tipo.value,))
-        return [self._converter_para_lancamento(row) for row in resultados]
+        query = "SELECT * FROM lancamentos WHERE tipo = ? ORDER BY dia DESC"
+        return self.db.particoes.obter_modelos(query, Lancamento.conversor, (tipo.value,))
 
     def obter_por_categoria(self, categoria_id: int) -> List[Lancamento]:
         """Obtém lançamentos por categoria"""
-        query = "SELECT * FROM lancamentos WHERE categoria_id = ? ORDER BY data DESC"
-        resultados = self.db.obter_todos(query, (categoria_id,))
-        return [self._converter_para_lancamento(row) for row in resultados]
+        query = "SELECT * FROM lancamentos WHERE categoria_id = ? ORDER BY dia DESC"
+        return self.db.particoes.obter_modelos(query, Lancamento.conversor, (categoria_id,))
 
     def obter_por_cliente(self, cliente_id: int) -> List[Lancamento]:
         """Obtém receitas de um cliente"""
         query = '''
             SELECT * FROM lancamentos 
             WHERE cliente_id = ? AND tipo = ?
-            ORDER BY data DESC
+            ORDER BY dia DESC
         '''
-        resultados = self.db.obter_todos(query, (cliente_id, TipoLancamento.RECEITA.value))
-        return [self._converter_para_lancamento(row) for row in resultados]
+        params = (cliente_id, TipoLancamento.RECEITA.value)
+        return self.db.particoes.obter_modelos(query, Lancamento.conversor, params)
 
     def obter_por_fornecedor(self, fornecedor_id: int) -> List[Lancamento]:
         """Obtém despesas de um fornecedor"""
         query = '''
             SELECT * FROM lancamentos 
             WHERE fornecedor_id = ? AND tipo = ?
-            ORDER BY data DESC
+            ORDER BY dia DESC
         '''
-        resultados = self.db.obter_todos(query, (fornecedor_id, TipoLancamento.DESPESA.value))
-        return [self._converter_para_lancamento(row) for row in resultados]
+        params = (fornecedor_id, TipoLancamento.DESPESA.value)
+        return self.db.particoes.obter_modelos(query, Lancamento.conversor, params)
 
     def buscar(self, filtros: Dict = None) -> List[Lancamento]:
         """Busca lançamentos com múltiplos filtros"""
@@ -123,12 +208,12 @@ class ServicoLancamento:
 
         if filtros:
             if filtros.get('data_inicio'):
-                query += " AND data >= ?"
-                params.append(filtros['data_inicio'])
+                query += " AND dia >= ?"
+                params.append(para_dia(filtros['data_inicio']))
             
             if filtros.get('data_fim'):
-                query += " AND data <= ?"
-                params.append(filtros['data_fim'])
+                query += " AND dia <= ?"
+                params.append(para_dia(filtros['data_fim']))
             
             if filtros.get('tipo'):
                 query += " AND tipo = ?"
@@ -150,15 +235,31 @@ class ServicoLancamento:
                 query += " AND descricao LIKE ?"
                 params.append(f"%{filtros['descricao']}%")
 
-        query += " ORDER BY data DESC"
-        resultados = self.db.obter_todos(query, tuple(params))
-        return [self._converter_para_lancamento(row) for row in resultados]
+        query += " ORDER BY dia DESC"
+        filtros = filtros or {}
+        return self.db.particoes.obter_modelos(
+            query, Lancamento.conversor, tuple(params), filtros.get('data_inicio'), filtros.get('data_fim')
+        )
+
+    def atualizar(self, id: int, lancamento: Lancamento, permitir_duplicado: bool = False) -> Tuple[bool, str]:
+        """Atualiza lançamento existente
 
-    def atualizar(self, id: int, lancamento: Lancamento) -> Tuple[bool, str]:
-        """Atualiza lançamento existente"""
+        Lançamento gravado sem assinatura (criado com permitir_duplicado=True)
+        continua sem ela e fora da checagem de duplicados.
+        """
         valido, erros = lancamento.validar()
         if not valido:
             return False, "\n".join(erros)
+        if self.db.particoes.ano_fechado(lancamento.data):
+            return False, f"O ano de {lancamento.data} está fechado (somente leitura)"
+
+        atual = self.db.obter_um("SELECT assinatura FROM lancamentos WHERE id = ?", (id,))
+        assinatura = None
+        if not permitir_duplicado and not (atual and atual['assinatura'] is None):
+            duplicado = self.obter_duplicado(lancamento, ignorar_id=id)
+            if duplicado:
+                return False, f"Lançamento duplicado: igual ao lançamento {duplicado}"
+            assinatura = self.assinatura(lancamento)
 
         try:
             query = '''
@@ -166,7 +267,7 @@ class ServicoLancamento:
                     data = ?, tipo = ?, categoria_id = ?, subcategoria_id = ?,
                     valor = ?, descricao = ?, cliente_id = ?, fornecedor_id = ?,
                     funcionario_id = ?, banco = ?, nota_fiscal = ?, comprovante = ?,
-                    observacao = ?, atualizado_em = CURRENT_TIMESTAMP
+                    observacao = ?, assinatura = ?, atualizado_em = CURRENT_TIMESTAMP
                 WHERE id = ?
             '''
             params = (
@@ -183,9 +284,11 @@ class ServicoLancamento:
                 lancamento.nota_fiscal,
                 lancamento.comprovante,
                 lancamento.observacao,
+                assinatura,
                 id,
             )
-            self.db.atualizar(query, params)
+            if not self.db.atualizar(query, params):
+                return False, self._erro_nao_alterado(id)
             return True, f"Lançamento {id} atualizado com sucesso"
         except Exception as e:
             return False, f"Erro ao atualizar lançamento: {str(e)}"
@@ -194,11 +297,22 @@ class ServicoLancamento:
         """Deleta lançamento"""
         try:
             query = "DELETE FROM lancamentos WHERE id = ?"
-            self.db.deletar(query, (id,))
+            if not self.db.deletar(query, (id,)):
+                return False, self._erro_nao_alterado(id)
             return True, f"Lançamento {id} deletado com sucesso"
         except Exception as e:
             return False, f"Erro ao deletar lançamento: {str(e)}"
 
+    def _erro_nao_alterado(self, id: int) -> str:
+        """Motivo de um UPDATE/DELETE sem linhas: id de ano fechado ou inexistente"""
+        for ano in self.db.particoes.anos_fechados():
+            row = self.db.particoes.obter_um(
+                "SELECT data FROM lancamentos WHERE id = ?", (id,), anexar=[ano]
+            )
+            if row:
+                return f"O ano de {row['data']} está fechado (somente leitura)"
+        return f"Lançamento {id} não encontrado"
+
     # Operações de relatório e análise
 
     def calcular_total_receitas(self, filtros: Dict = None) -> float:
@@ -212,17 +326,23 @@ class ServicoLancamento:
 
         if filtros:
             if filtros.get('data_inicio'):
-                query += " AND data >= ?"
-                params.append(filtros['data_inicio'])
+                query += " AND dia >= ?"
+                params.append(para_dia(filtros['data_inicio']))
             if filtros.get('data_fim'):
-                query += " AND data <= ?"
-                params.append(filtros['data_fim'])
+                query += " AND dia <= ?"
+                params.append(para_dia(filtros['data_fim']))
             if filtros.get('categoria_id'):
                 query += " AND categoria_id = ?"
                 params.append(filtros['categoria_id'])
 
-        resultado = self.db.obter_um(query, tuple(params))
-        return float(resultado['total']) if resultado else 0.0
+        # Anos fechados inteiros vêm dos agregados; só os parciais são anexados
+        filtros = filtros or {}
+        completos, parciais = self.db.particoes.planejar(filtros.get('data_inicio'), filtros.get('data_fim'))
+        resultado = self.db.particoes.obter_um(query, tuple(params), anexar=parciais)
+        total = float(resultado['total']) if resultado else 0.0
+        return total + self.db.particoes.somar_agregados(
+            completos, TipoLancamento.RECEITA.value, filtros.get('categoria_id')
+        )
 
     def calcular_total_despesas(self, filtros: Dict = None) -> float:
         """Calcula total de despesas"""
@@ -235,17 +355,23 @@ class ServicoLancamento:
 
         if filtros:
             if filtros.get('data_inicio'):
-                query += " AND data >= ?"
-                params.append(filtros['data_inicio'])
+                query += " AND dia >= ?"
+                params.append(para_dia(filtros['data_inicio']))
             if filtros.get('data_fim'):
-                query += " AND data <= ?"
-                params.append(filtros['data_fim'])
+                query += " AND dia <= ?"
+                params.append(para_dia(filtros['data_fim']))
             if filtros.get('categoria_id'):
                 query += " AND categoria_id = ?"
                 params.append(filtros['categoria_id'])
 
-        resultado = self.db.obter_um(query, tuple(params))
-        return float(resultado['total']) if resultado else 0.0
+        # Anos fechados inteiros vêm dos agregados; só os parciais são anexados
+        filtros = filtros or {}
+        completos, parciais = self.db.particoes.planejar(filtros.get('data_inicio'), filtros.get('data_fim'))
+        resultado = self.db.particoes.obter_um(query, tuple(params), anexar=parciais)
+        total = float(resultado['total']) if resultado else 0.0
+        return total + self.db.particoes.somar_agregados(
+            completos, TipoLancamento.DESPESA.value, filtros.get('categoria_id')
+        )
 
     def calcular_saldo(self, filtros: Dict = None) -> float:
         """Calcula saldo (receitas - despesas)"""
@@ -267,15 +393,18 @@ class ServicoLancamento:
 
         if filtros:
             if filtros.get('data_inicio'):
-                query += " AND l.data >= ?"
-                params.append(filtros['data_inicio'])
+                query += " AND l.dia >= ?"
+                params.append(para_dia(filtros['data_inicio']))
             if filtros.get('data_fim'):
-                query += " AND l.data <= ?"
-                params.append(filtros['data_fim'])
+                query += " AND l.dia <= ?"
+                params.append(para_dia(filtros['data_fim']))
 
         query += " GROUP BY c.id ORDER BY total DESC"
 
-        resultados = self.db.obter_todos(query, tuple(params))
+        filtros = filtros or {}
+        resultados = self.db.particoes.obter_todos(
+            query, tuple(params), filtros.get('data_inicio'), filtros.get('data_fim')
+        )
         return {row['categoria']: float(row['total']) for row in resultados}
 
     def obter_totais_por_subcategoria(self, tipo: TipoLancamento, filtros: Dict = None) -> Dict[str, float]:
@@ -292,69 +421,51 @@ class ServicoLancamento:
 
         if filtros:
             if filtros.get('data_inicio'):
-                query += " AND l.data >= ?"
-                params.append(filtros['data_inicio'])
+                query += " AND l.dia >= ?"
+                params.append(para_dia(filtros['data_inicio']))
             if filtros.get('data_fim'):
-                query += " AND l.data <= ?"
-                params.append(filtros['data_fim'])
+                query += " AND l.dia <= ?"
+                params.append(para_dia(filtros['data_fim']))
             if filtros.get('categoria_id'):
                 query += " AND l.categoria_id = ?"
                 params.append(filtros['categoria_id'])
 
         query += " GROUP BY s.id ORDER BY total DESC"
 
-        resultados = self.db.obter_todos(query, tuple(params))
+        filtros = filtros or {}
+        resultados = self.db.particoes.obter_todos(
+            query, tuple(params), filtros.get('data_inicio'), filtros.get('data_fim')
+        )
         return {row['subcategoria']: float(row['total']) for row in resultados}
 
     def obter_movimentacao_diaria(self, data_inicio: str, data_fim: str) -> Dict[str, float]:
         """Retorna movimentação por dia"""
         query = '''
             SELECT 
-                DATE(data) as data,
+                dia,
                 COALESCE(SUM(CASE WHEN tipo = ? THEN valor ELSE 0 END), 0) as receitas,
                 COALESCE(SUM(CASE WHEN tipo = ? THEN valor ELSE 0 END), 0) as despesas
             FROM lancamentos
-            WHERE data BETWEEN ? AND ?
-            GROUP BY DATE(data)
-            ORDER BY data
+            WHERE dia BETWEEN ? AND ?
+            GROUP BY dia
+            ORDER BY dia
         '''
-        params = (TipoLancamento.RECEITA.value, TipoLancamento.DESPESA.value, data_inicio, data_fim)
-        resultados = self.db.obter_todos(query, params)
+        params = (
+            TipoLancamento.RECEITA.value, TipoLancamento.DESPESA.value,
+            para_dia(data_inicio), para_dia(data_fim),
+        )
+        resultados = self.db.particoes.obter_todos(query, params, data_inicio, data_fim)
         
         movimentacao = {}
         for row in resultados:
             saldo = row['receitas'] - row['despesas']
-            movimentacao[row['data']] = {
+            movimentacao[de_dia(row['dia']).isoformat()] = {
                 'receitas': float(row['receitas']),
                 'despesas': float(row['despesas']),
                 'saldo': saldo
             }
         return movimentacao
 
-    def _converter_para_lancamento(self, row: Dict) -> Lancamento:
-        """Converte linha do DB para objeto Lancamento"""
-        if not row:
-            return None
-
-        return Lancamento(
-            id=row['id'],
-            data=row['data'],
-            tipo=TipoLancamento(row['tipo']),
-            categoria_id=row['categoria_id'],
-            subcategoria_id=row['subcategoria_id'],
-            valor=float(row['valor']),
-            descricao=row['descricao'],
-            cliente_id=row['cliente_id'],
-            fornecedor_id=row['fornecedor_id'],
-            funcionario_id=row['funcionario_id'],
-            banco=row['banco'] or '',
-            nota_fiscal=row['nota_fiscal'] or '',
-            comprovante=row['comprovante'] or '',
-            observacao=row['observacao'] or '',
-            criado_em=row['criado_em'],
-            atualizado_em=row['atualizado_em'],
-        )
-
     def _obter_categorias_disponiveis(self) -> List[str]:
         """Retorna lista de categorias disponíveis"""
         # Categorias padrão do sistema
@@ -4,18 +4,119 @@ Mantem um unico ponto de acesso aos dados de relatorio.
 """
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+import functools
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 
 from app.database.database import Database
+from app.database.linhas import TAMANHO_LOTE
+from app.utils.cache_resultados import CacheResultados, normalizar_chave
+from app.utils.datas import DESLOCAMENTO_JULIANO, para_dia
+
+
+# Dimensoes aceitas por agregar(): expressao no resumo mensal e na tabela bruta
+# (na tabela bruta a partir de dia, que esta nos indices de cobertura; data nao)
+DIMENSOES_RESUMO = {
+    "ano_mes": ("ano_mes", f"strftime('%Y-%m', dia + {DESLOCAMENTO_JULIANO})"),
+    "ano": ("substr(ano_mes, 1, 4)", f"strftime('%Y', dia + {DESLOCAMENTO_JULIANO})"),
+    "tipo": ("tipo", "tipo"),
+    "categoria_id": ("categoria_id", "COALESCE(categoria_id, 0)"),
+    "subcategoria_id": ("subcategoria_id", "COALESCE(subcategoria_id, 0)"),
+}
+
+
+def _fim_do_mes(dia: date) -> date:
+    return (dia.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+
+
+def planejar_resumo(
+    data_inicio: Optional[str], data_fim: Optional[str]
+) -> Tuple[Optional[str], Optional[str], List[Tuple[str, Optional[str], bool]]]:
+    """Divide o periodo em meses completos e bordas parciais.
+
+    Returns:
+        (primeiro_mes, ultimo_mes, bordas): meses 'AAAA-MM' inclusivos
+        respondidos pelo resumo mensal (None = sem limite; primeiro > ultimo
+        = nenhum) e bordas (inicio, limite, limite_inclusivo) lidas da
+        tabela bruta
+    """
+    try:
+        inicio = date.fromisoformat(str(data_inicio)[:10]) if data_inicio else None
+        fim = date.fromisoformat(str(data_fim)[:10]) if data_fim else None
+    except ValueError:
+        raise ValueError(f"Data invalida: {data_inicio} a {data_fim}") from None
+
+    primeiro = inicio.strftime("%Y-%m") if inicio else None
+    ultimo = fim.strftime("%Y-%m") if fim else None
+    bordas: List[Tuple[str, Optional[str], bool]] = []
+    mesmo_mes = inicio and fim and (inicio.year, inicio.month) == (fim.year, fim.month)
+
+    if inicio and inicio.day != 1:
+        proximo = _fim_do_mes(inicio) + timedelta(days=1)
+        if mesmo_mes:
+            bordas.append((inicio.isoformat(), data_fim, True))
+        else:
+            bordas.append((inicio.isoformat(), proximo.isoformat(), False))
+        primeiro = proximo.strftime("%Y-%m")
+    if fim and fim != _fim_do_mes(fim):
+        if not (mesmo_mes and inicio.day != 1):
+            bordas.append((fim.replace(day=1).isoformat(), data_fim, True))
+        ultimo = (fim.replace(day=1) - timedelta(days=1)).strftime("%Y-%m")
+    return primeiro, ultimo, bordas
+
+
+# Periodos do comparativo mensal; o primeiro e a base das variacoes
+PERIODOS_COMPARATIVO = ("atual", "mes_anterior", "ano_anterior")
+
+
+def periodos_comparativo(mes_referencia: Optional[str] = None) -> Dict[str, Tuple[str, str]]:
+    """Mes de referencia ('AAAA-MM' ou data; padrao: mes corrente), mes anterior
+    e mesmo mes do ano anterior, como {nome: (inicio, fim)}"""
+    if mes_referencia:
+        inicio = date(int(str(mes_referencia)[:4]), int(str(mes_referencia)[5:7]), 1)
+    else:
+        inicio = date.today().replace(day=1)
+    meses = (
+        inicio,
+        (inicio - timedelta(days=1)).replace(day=1),
+        inicio.replace(year=inicio.year - 1),
+    )
+    return {
+        nome: (mes.isoformat(), _fim_do_mes(mes).isoformat())
+        for nome, mes in zip(PERIODOS_COMPARATIVO, meses)
+    }
+
+
+def _meses_inteiros(inicio: str, fim: str) -> bool:
+    try:
+        return inicio[8:10] == "01" and date.fromisoformat(fim) == _fim_do_mes(date.fromisoformat(fim))
+    except ValueError:
+        return False
+
+
+def _em_cache(metodo):
+    """Guarda o resultado por (metodo, argumentos normalizados) no cache do gerador"""
+
+    @functools.wraps(metodo)
+    def envoltorio(self, *args, **kwargs):
+        chave = (metodo.__name__, normalizar_chave(args), normalizar_chave(kwargs))
+        return self.cache.obter(chave, lambda: metodo(self, *args, **kwargs))
+
+    return envoltorio
 
 
 class GeradorRelatorios:
-    """Gera dados agregados de relatorios a partir do banco."""
+    """Gera dados agregados de relatorios a partir do banco.
+
+    Consultas ficam em cache LRU; qualquer escrita no banco (detectada por
+    Database.versao_dados) descarta o cache, entao voltar a um periodo ja
+    visto nao repete as consultas e nunca devolve dado velho.
+    """
 
-    def __init__(self, db: Database):
+    def __init__(self, db: Database, max_itens_cache: int = 256, max_linhas_cache: int = 200_000):
         self.db = db
         self.data_geracao = datetime.now()
+        self.cache = CacheResultados(db.versao_dados, max_itens_cache, max_linhas_cache)
 
     def _montar_where(self, filtros: Optional[Dict]) -> Tuple[str, List]:
         where = " WHERE 1=1"
@@ -29,11 +130,11 @@ class GeradorRelatorios:
         tipo = filtros.get("tipo")
 
         if data_inicio:
-            where += " AND l.data >= ?"
-            params.append(data_inicio)
+            where += " AND l.dia >= ?"
+            params.append(para_dia(data_inicio))
         if data_fim:
-            where += " AND l.data <= ?"
-            params.append(data_fim)
+            where += " AND l.dia <= ?"
+            params.append(para_dia(data_fim))
         if tipo:
             where += " AND l.tipo = ?"
             params.append(tipo)
@@ -52,13 +153,22 @@ class GeradorRelatorios:
             return "Pessoal"
         return nome
 
-    def obter_lancamentos_filtrados(self, filtros: Optional[Dict] = None) -> List[Dict]:
+    def iterar_lancamentos(
+        self, filtros: Optional[Dict] = None, batch_size: int = TAMANHO_LOTE, em_lotes: bool = False
+    ) -> Iterator:
+        """Lancamentos filtrados lidos aos poucos (Database.iterar), sem cache.
+
+        Para exportacoes: a memoria fica limitada ao lote em vez do periodo
+        inteiro. Gera dicts (ou listas de dicts, com em_lotes) iguais aos de
+        obter_lancamentos_filtrados.
+        """
         where, params = self._montar_where(filtros)
 
         query = f"""
             SELECT
                 l.id,
                 l.data,
+                l.dia,
                 l.tipo,
                 c.nome AS categoria,
                 s.nome AS subcategoria,
@@ -75,50 +185,167 @@ class GeradorRelatorios:
             LEFT JOIN clientes cl ON l.cliente_id = cl.id
             LEFT JOIN fornecedores f ON l.fornecedor_id = f.id
             {where}
-            ORDER BY l.data DESC
+            ORDER BY l.dia DESC
         """
 
-        resultados = self.db.obter_todos(query, tuple(params))
-        for row in resultados:
-            categoria = row.get("categoria") or ""
-            if row.get("tipo") == "Despesa":
-                categoria = self._normalizar_categoria_despesa(categoria)
-            row["categoria"] = categoria
-            row["subcategoria"] = row.get("subcategoria") or ""
-            row["empresa"] = row.get("cliente_nome") or row.get("fornecedor_nome") or ""
-            row["banco"] = row.get("banco") or ""
-            row["nota_fiscal"] = row.get("nota_fiscal") or ""
-            row["observacao"] = row.get("observacao") or ""
-        return resultados
+        filtros = filtros or {}
+        lotes = self.db.particoes.iterar(
+            query, tuple(params), filtros.get("data_inicio"), filtros.get("data_fim"),
+            batch_size=batch_size, em_lotes=True,
+        )
+        for lote in lotes:
+            for row in lote:
+                categoria = row.get("categoria") or ""
+                if row.get("tipo") == "Despesa":
+                    categoria = self._normalizar_categoria_despesa(categoria)
+                row["categoria"] = categoria
+                row["subcategoria"] = row.get("subcategoria") or ""
+                row["empresa"] = row.get("cliente_nome") or row.get("fornecedor_nome") or ""
+                row["banco"] = row.get("banco") or ""
+                row["nota_fiscal"] = row.get("nota_fiscal") or ""
+                row["observacao"] = row.get("observacao") or ""
+            if em_lotes:
+                yield lote
+            else:
+                yield from lote
+
+    @_em_cache
+    def obter_lancamentos_filtrados(self, filtros: Optional[Dict] = None) -> List[Dict]:
+        return list(self.iterar_lancamentos(filtros))
 
-    def obter_lancamentos_por_periodo(self, data_inicio: str, data_fim: str) -> List[Dict]:
+    @staticmethod
+    def _filtros_de_periodo(data_inicio: str, data_fim: str) -> Dict:
         filtros = {}
         if data_inicio:
             filtros["data_inicio"] = data_inicio
         if data_fim:
             filtros["data_fim"] = data_fim
-        return self.obter_lancamentos_filtrados(filtros)
+        return filtros
+
+    def obter_lancamentos_por_periodo(self, data_inicio: str, data_fim: str) -> List[Dict]:
+        return self.obter_lancamentos_filtrados(self._filtros_de_periodo(data_inicio, data_fim))
+
+    def iterar_lancamentos_por_periodo(
+        self, data_inicio: str, data_fim: str, batch_size: int = TAMANHO_LOTE, em_lotes: bool = False
+    ) -> Iterator:
+        """Como obter_lancamentos_por_periodo, lendo aos poucos (ver iterar_lancamentos)"""
+        return self.iterar_lancamentos(self._filtros_de_periodo(data_inicio, data_fim), batch_size, em_lotes)
+
+    @_em_cache
+    def contar_lancamentos(self, filtros: Optional[Dict] = None) -> int:
+        """Quantas linhas iterar_lancamentos gera (total do progresso das exportacoes)"""
+        where, params = self._montar_where(filtros)
+        filtros = filtros or {}
+        resultado = self.db.particoes.obter_um(
+            f"SELECT COUNT(*) AS n FROM lancamentos l{where}",
+            tuple(params), filtros.get("data_inicio"), filtros.get("data_fim"),
+        )
+        return resultado["n"] if resultado else 0
 
     def obter_lancamentos(self, filtros: Optional[Dict] = None) -> List[Dict]:
         return self.obter_lancamentos_filtrados(filtros)
 
+    @_em_cache
+    def agregar(
+        self, filtros: Optional[Dict] = None, dimensoes: Sequence[str] = ()
+    ) -> List[Dict]:
+        """
+        Soma, contagem, minimo e maximo de lancamentos por dimensoes
+
+        Meses inteiros do periodo vem de resumo_mensal_lancamentos (mantido
+        por triggers); so os meses parciais das bordas leem lancamentos.
+
+        Args:
+            filtros: data_inicio, data_fim, tipo, categoria_id, subcategoria_id
+            dimensoes: subconjunto de ano_mes, ano, tipo, categoria_id, subcategoria_id
+
+        Returns:
+            Lista de dicts com as dimensoes + quantidade, total, minimo, maximo
+        """
+        filtros = filtros or {}
+        dimensoes = tuple(dimensoes)
+        desconhecidas = set(dimensoes) - set(DIMENSOES_RESUMO)
+        if desconhecidas:
+            raise ValueError(f"Dimensoes invalidas: {', '.join(sorted(desconhecidas))}")
+
+        condicoes: List[str] = []
+        params_filtro: List = []
+        for campo in ("tipo", "categoria_id", "subcategoria_id"):
+            if filtros.get(campo):
+                condicoes.append(f"{campo} = ?")
+                params_filtro.append(filtros[campo])
+
+        primeiro, ultimo, bordas = planejar_resumo(filtros.get("data_inicio"), filtros.get("data_fim"))
+        acumulado: Dict[tuple, List] = {}
+
+        def acumular(rows: List[Dict]) -> None:
+            for row in rows:
+                chave = tuple(row[d] for d in dimensoes)
+                atual = acumulado.get(chave)
+                if atual is None:
+                    acumulado[chave] = [row["quantidade"], row["centavos"], row["minimo"], row["maximo"]]
+                    continue
+                atual[0] += row["quantidade"]
+                atual[1] += row["centavos"]
+                if row["minimo"] is not None:
+                    atual[2] = row["minimo"] if atual[2] is None else min(atual[2], row["minimo"])
+                if row["maximo"] is not None:
+                    atual[3] = row["maximo"] if atual[3] is None else max(atual[3], row["maximo"])
+
+        if not (primeiro and ultimo and primeiro > ultimo):
+            where, params = list(condicoes), list(params_filtro)
+            if primeiro:
+                where.append("ano_mes >= ?")
+                params.append(primeiro)
+            if ultimo:
+                where.append("ano_mes <= ?")
+                params.append(ultimo)
+            colunas = [f"{DIMENSOES_RESUMO[d][0]} AS {d}" for d in dimensoes]
+            query = f"""
+                SELECT {', '.join(colunas + [''])}
+                       SUM(quantidade) AS quantidade, SUM(total_centavos) AS centavos,
+                       MIN(minimo) AS minimo, MAX(maximo) AS maximo
+                FROM resumo_mensal_lancamentos
+                {'WHERE ' + ' AND '.join(where) if where else ''}
+                {'GROUP BY ' + ', '.join(dimensoes) if dimensoes else ''}
+            """
+            acumular([r for r in self.db.obter_todos(query, tuple(params)) if r["quantidade"]])
+
+        for inicio, limite, inclusivo in bordas:
+            where, params = list(condicoes), list(params_filtro)
+            if inicio:
+                where.append("dia >= ?")
+                params.append(para_dia(inicio))
+            if limite:
+                where.append("dia <= ?" if inclusivo else "dia < ?")
+                params.append(para_dia(limite))
+            colunas = [f"{DIMENSOES_RESUMO[d][1]} AS {d}" for d in dimensoes]
+            query = f"""
+                SELECT {', '.join(colunas + [''])}
+                       COUNT(*) AS quantidade, SUM(CAST(ROUND(valor * 100) AS INTEGER)) AS centavos,
+                       MIN(valor) AS minimo, MAX(valor) AS maximo
+                FROM lancamentos
+                {'WHERE ' + ' AND '.join(where) if where else ''}
+                {'GROUP BY ' + ', '.join(dimensoes) if dimensoes else ''}
+            """
+            rows = self.db.particoes.obter_todos(query, tuple(params), inicio, limite)
+            acumular([r for r in rows if r["quantidade"]])
+
+        resultado = []
+        for chave, (quantidade, centavos, minimo, maximo) in sorted(acumulado.items()):
+            linha = dict(zip(dimensoes, chave))
+            linha.update(quantidade=quantidade, total=centavos / 100, minimo=minimo, maximo=maximo)
+            resultado.append(linha)
+        return resultado
+
+    def _nomes(self, tabela: str) -> Dict[int, str]:
+        return {row["id"]: row["nome"] for row in self.db.obter_todos(f"SELECT id, nome FROM {tabela}")}
+
     def _calcular_total_por_tipo(self, tipo: str, filtros: Optional[Dict] = None) -> float:
-        query = "SELECT COALESCE(SUM(valor), 0) as total FROM lancamentos WHERE tipo = ?"
-        params: List = [tipo]
-
-        if filtros:
-            if filtros.get("data_inicio"):
-                query += " AND data >= ?"
-                params.append(filtros["data_inicio"])
-            if filtros.get("data_fim"):
-                query += " AND data <= ?"
-                params.append(filtros["data_fim"])
-            if filtros.get("categoria_id"):
-                query += " AND categoria_id = ?"
-                params.append(filtros["categoria_id"])
-
-        resultado = self.db.obter_um(query, tuple(params))
-        return float(resultado["total"]) if resultado else 0.0
+        filtros = dict(filtros or {})
+        filtros["tipo"] = tipo
+        linhas = self.agregar(filtros)
+        return linhas[0]["total"] if linhas else 0.0
 
     def calcular_total_receitas(self, filtros: Optional[Dict] = None) -> float:
         return self._calcular_total_por_tipo("Receita", filtros)
@@ -129,66 +356,183 @@ class GeradorRelatorios:
     def calcular_saldo(self, filtros: Optional[Dict] = None) -> float:
         return self.calcular_total_receitas(filtros) - self.calcular_total_despesas(filtros)
 
+    def _filtros_periodo(self, filtros: Optional[Dict]) -> Dict:
+        """Filtros considerados pelos totais agrupados (periodo e tipo)"""
+        filtros = filtros or {}
+        return {k: filtros[k] for k in ("data_inicio", "data_fim", "tipo") if filtros.get(k)}
+
     def totais_por_categoria(self, filtros: Optional[Dict] = None) -> Dict[str, float]:
-        where, params = self._montar_where(filtros)
-        query = f"""
-            SELECT c.nome AS categoria, COALESCE(SUM(l.valor), 0) as total
-            FROM lancamentos l
-            LEFT JOIN categorias c ON l.categoria_id = c.id
-            {where}
-            GROUP BY c.id
-            ORDER BY total DESC
-        """
-        resultados = self.db.obter_todos(query, tuple(params))
+        linhas = self.agregar(self._filtros_periodo(filtros), ("categoria_id",))
+        nomes = self._nomes("categorias")
         totais: Dict[str, float] = {}
-        for row in resultados:
-            nome = row.get("categoria") or "Sem categoria"
+        for row in sorted(linhas, key=lambda r: r["total"], reverse=True):
+            nome = nomes.get(row["categoria_id"]) or "Sem categoria"
             chave = self._normalizar_categoria_despesa(nome) if "despesa" in nome.lower() else nome
-            totais[chave] = totais.get(chave, 0.0) + float(row["total"])
+            totais[chave] = totais.get(chave, 0.0) + row["total"]
         return totais
 
     def totais_por_subcategoria(self, filtros: Optional[Dict] = None) -> Dict[str, float]:
-        where, params = self._montar_where(filtros)
-        query = f"""
-            SELECT s.nome AS subcategoria, COALESCE(SUM(l.valor), 0) as total
-            FROM lancamentos l
-            LEFT JOIN subcategorias s ON l.subcategoria_id = s.id
-            {where}
-            GROUP BY s.id
-            ORDER BY total DESC
-        """
-        resultados = self.db.obter_todos(query, tuple(params))
-        return {row.get("subcategoria") or "Sem subcategoria": float(row["total"]) for row in resultados}
+        linhas = self.agregar(self._filtros_periodo(filtros), ("subcategoria_id",))
+        nomes = self._nomes("subcategorias")
+        totais: Dict[str, float] = {}
+        for row in sorted(linhas, key=lambda r: r["total"], reverse=True):
+            nome = nomes.get(row["subcategoria_id"]) or "Sem subcategoria"
+            totais[nome] = totais.get(nome, 0.0) + row["total"]
+        return totais
 
     def totais_por_tipo(self, filtros: Optional[Dict] = None) -> Dict[str, float]:
-        where, params = self._montar_where(filtros)
-        query = f"""
-            SELECT l.tipo AS tipo, COALESCE(SUM(l.valor), 0) as total
-            FROM lancamentos l
-            {where}
-            GROUP BY l.tipo
-        """
-        resultados = self.db.obter_todos(query, tuple(params))
-        return {row["tipo"]: float(row["total"]) for row in resultados}
+        linhas = self.agregar(self._filtros_periodo(filtros), ("tipo",))
+        return {row["tipo"]: row["total"] for row in linhas}
 
     def despesas_por_tipo_categoria(self, filtros: Optional[Dict] = None) -> Dict[str, float]:
-        filtros = dict(filtros or {})
+        filtros = self._filtros_periodo(filtros)
         filtros["tipo"] = "Despesa"
-        where, params = self._montar_where(filtros)
-        query = f"""
-            SELECT c.nome AS categoria, COALESCE(SUM(l.valor), 0) as total
-            FROM lancamentos l
-            LEFT JOIN categorias c ON l.categoria_id = c.id
-            {where}
-            GROUP BY c.id
-        """
-        resultados = self.db.obter_todos(query, tuple(params))
+        linhas = self.agregar(filtros, ("categoria_id",))
+        nomes = self._nomes("categorias")
         totais: Dict[str, float] = {}
-        for row in resultados:
-            chave = self._normalizar_categoria_despesa(row.get("categoria") or "")
-            totais[chave] = totais.get(chave, 0.0) + float(row["total"])
+        for row in linhas:
+            chave = self._normalizar_categoria_despesa(nomes.get(row["categoria_id"]) or "")
+            totais[chave] = totais.get(chave, 0.0) + row["total"]
         return totais
 
+    def resumo_mensal(self, filtros: Optional[Dict] = None) -> List[Dict]:
+        """Entradas, saidas e saldo por mes (ano_mes), a partir do resumo mensal"""
+        return self._entradas_saidas(filtros, "ano_mes")
+
+    def resumo_anual(self, filtros: Optional[Dict] = None) -> List[Dict]:
+        """Entradas, saidas e saldo por ano, a partir do resumo mensal"""
+        linhas = self._entradas_saidas(filtros, "ano")
+        for linha in linhas:
+            linha["ano"] = int(linha["ano"])
+        return linhas
+
+    def _entradas_saidas(self, filtros: Optional[Dict], dimensao: str) -> List[Dict]:
+        por_periodo: Dict[str, Dict] = {}
+        for row in self.agregar(self._filtros_periodo(filtros), (dimensao, "tipo")):
+            linha = por_periodo.setdefault(
+                row[dimensao], {dimensao: row[dimensao], "entradas": 0.0, "saidas": 0.0}
+            )
+            linha["entradas" if row["tipo"] == "Receita" else "saidas"] += row["total"]
+        resultado = [por_periodo[chave] for chave in sorted(por_periodo)]
+        for linha in resultado:
+            linha["saldo"] = linha["entradas"] - linha["saidas"]
+        return resultado
+
+    @_em_cache
+    def comparar_periodos(
+        self,
+        periodos: Dict[str, Tuple[str, str]],
+        filtros: Optional[Dict] = None,
+        dimensoes: Sequence[str] = ("categoria_id", "subcategoria_id"),
+    ) -> List[Dict]:
+        """
+        Totais de varios periodos alinhados por dimensao, numa unica consulta
+
+        Cada linha lida e associada aos periodos que a contem (join com a
+        lista de periodos), entao os periodos podem se sobrepor. Periodos de
+        meses inteiros leem resumo_mensal_lancamentos; os demais, lancamentos.
+
+        Args:
+            periodos: {nome: (data_inicio, data_fim)}; o primeiro e a base
+            filtros: tipo, categoria_id, subcategoria_id
+            dimensoes: subconjunto de tipo, categoria_id, subcategoria_id
+
+        Returns:
+            Uma linha por combinacao das dimensoes com o total de cada periodo,
+            variacao_<nome> (base - periodo) e percentual_<nome> (None se o
+            periodo for zero)
+        """
+        filtros = filtros or {}
+        dimensoes = tuple(dimensoes)
+        nomes = list(periodos)
+        if not nomes:
+            return []
+        desconhecidas = set(dimensoes) - {"tipo", "categoria_id", "subcategoria_id"}
+        if desconhecidas:
+            raise ValueError(f"Dimensoes invalidas: {', '.join(sorted(desconhecidas))}")
+
+        mensal = all(_meses_inteiros(*periodos[nome]) for nome in nomes)
+        params: List = []
+        for nome in nomes:
+            inicio, fim = periodos[nome]
+            params.extend((nome, inicio[:7], fim[:7]) if mensal else (nome, para_dia(inicio), para_dia(fim)))
+        if mensal:
+            origem = "resumo_mensal_lancamentos r ON r.ano_mes BETWEEN p.inicio AND p.fim"
+            colunas = {d: f"r.{d}" for d in dimensoes}
+            medidas = "SUM(r.total_centavos)"
+        else:
+            origem = "lancamentos r ON r.dia >= p.inicio AND r.dia <= p.fim"
+            colunas = {d: f"r.{d}" if d == "tipo" else f"COALESCE(r.{d}, 0)" for d in dimensoes}
+            medidas = "SUM(CAST(ROUND(r.valor * 100) AS INTEGER))"
+
+        where = []
+        for campo in ("tipo", "categoria_id", "subcategoria_id"):
+            if filtros.get(campo):
+                where.append(f"r.{campo} = ?")
+                params.append(filtros[campo])
+        query = f"""
+            WITH periodos(nome, inicio, fim) AS (VALUES {', '.join('(?, ?, ?)' for _ in nomes)})
+            SELECT p.nome AS periodo, {', '.join([f'{colunas[d]} AS {d}' for d in dimensoes] + [''])}
+                   {medidas} AS centavos
+            FROM periodos p
+            JOIN {origem}
+            {'WHERE ' + ' AND '.join(where) if where else ''}
+            GROUP BY {', '.join(['p.nome'] + list(dimensoes))}
+        """
+        if mensal:
+            rows = self.db.obter_todos(query, tuple(params))
+        else:
+            rows = self.db.particoes.obter_todos(
+                query, tuple(params),
+                min(inicio for inicio, _ in periodos.values()),
+                max(fim for _, fim in periodos.values()),
+            )
+
+        por_chave: Dict[tuple, Dict[str, int]] = {}
+        for row in rows:
+            chave = tuple(row[d] for d in dimensoes)
+            por_chave.setdefault(chave, {})[row["periodo"]] = row["centavos"] or 0
+
+        base = nomes[0]
+        resultado = []
+        for chave in sorted(por_chave):
+            centavos = por_chave[chave]
+            linha = dict(zip(dimensoes, chave))
+            for nome in nomes:
+                linha[nome] = centavos.get(nome, 0) / 100
+            for nome in nomes[1:]:
+                variacao = centavos.get(base, 0) - centavos.get(nome, 0)
+                linha[f"variacao_{nome}"] = variacao / 100
+                linha[f"percentual_{nome}"] = (
+                    variacao / abs(centavos[nome]) * 100 if centavos.get(nome) else None
+                )
+            resultado.append(linha)
+        return resultado
+
+    def comparativo_mensal(
+        self, mes_referencia: Optional[str] = None, filtros: Optional[Dict] = None
+    ) -> List[Dict]:
+        """
+        Mes de referencia x mes anterior x mesmo mes do ano anterior,
+        por categoria/subcategoria (ver comparar_periodos e PERIODOS_COMPARATIVO)
+
+        Returns:
+            Linhas de comparar_periodos com tipo e os nomes de categoria e
+            subcategoria, ordenadas por tipo, categoria e subcategoria
+        """
+        linhas = self.comparar_periodos(
+            periodos_comparativo(mes_referencia),
+            filtros,
+            ("tipo", "categoria_id", "subcategoria_id"),
+        )
+        categorias = self._nomes("categorias")
+        subcategorias = self._nomes("subcategorias")
+        for linha in linhas:
+            linha["categoria"] = categorias.get(linha["categoria_id"]) or "Sem categoria"
+            linha["subcategoria"] = subcategorias.get(linha["subcategoria_id"]) or "Sem subcategoria"
+        linhas.sort(key=lambda l: (l["tipo"] != "Receita", l["categoria"], l["subcategoria"]))
+        return linhas
+
     def gerar_resumo(self, filtros: Optional[Dict] = None) -> Dict:
         receitas = self.calcular_total_receitas(filtros)
         despesas = self.calcular_total_despesas(filtros)
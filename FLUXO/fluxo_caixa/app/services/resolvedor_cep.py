@@ -0,0 +1,182 @@
+"""
+Resolvedor de CEP
+Busca assincrona compartilhada pelas telas: pool limitado, coalescencia e limite de taxa
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+import requests
+
+from app.utils.cep import BaseCEP, limpar_cep, obter_base_cep
+from app.utils.validators import ValidadorCEP
+
+Resultado = Tuple[bool, dict]
+Callback = Callable[[bool, dict], None]
+
+
+class ResolvedorCEP:
+    """Resolve CEPs fora da thread do Tk e entrega o resultado nela.
+
+    - Consultas ao mesmo CEP em andamento sao unidas numa so (coalescencia).
+    - Idas a rede respeitam `requisicoes_por_segundo`; a base local nao.
+    - `timeout` limita a espera total (fila do limite de taxa incluida).
+    - Por widget vale so a ultima busca: digitar outro CEP descarta a
+      entrega da anterior.
+    Os callbacks rodam em processar_pendentes(), chamado pelo after() do
+    widget informado, portanto sempre na thread do Tk.
+    """
+
+    def __init__(
+        self,
+        base: Optional[BaseCEP] = None,
+        max_workers: int = 2,
+        requisicoes_por_segundo: float = 3.0,
+        timeout: float = 8.0,
+        intervalo_ms: int = 30,
+    ):
+        self.base = base or obter_base_cep()
+        self.timeout = timeout
+        self.intervalo_ms = intervalo_ms
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cep")
+        self._lock = threading.Lock()
+        self._em_andamento: Dict[str, Future] = {}
+        self._resultados: "queue.Queue" = queue.Queue()
+
+        self._intervalo_rede = 1.0 / requisicoes_por_segundo
+        self._proxima_rede = 0.0
+        self._lock_taxa = threading.Lock()
+
+        # Estado abaixo so e tocado na thread do Tk
+        self._geracoes: Dict[object, int] = {}
+        self._aguardando = 0
+        self._bombeando = False
+
+    def resolver(self, cep: str, callback: Callback, widget=None) -> Optional[Future]:
+        """
+        Agenda busca do CEP; callback(sucesso, dados) roda na thread do Tk
+
+        Args:
+            cep: CEP com ou sem formatacao
+            callback: recebe (sucesso, dados) como ValidadorCEP.buscar_endereco
+            widget: widget Tk da tela; agenda a entrega e identifica a busca
+                (sem widget, chame processar_pendentes manualmente)
+        """
+        geracao = self._geracoes.get(widget, 0) + 1
+        if widget is not None:
+            self._geracoes[widget] = geracao
+        self._aguardando += 1
+        self._agendar(widget)
+
+        cep_limpo = limpar_cep(cep)
+        valido, msg = ValidadorCEP.validar_cep(cep_limpo)
+        if not valido:
+            self._resultados.put((callback, widget, geracao, (False, {'erro': msg})))
+            return None
+
+        with self._lock:
+            futuro = self._em_andamento.get(cep_limpo)
+            novo = futuro is None
+            if novo:
+                prazo = time.monotonic() + self.timeout
+                futuro = self._executor.submit(self._consultar, cep_limpo, prazo)
+                self._em_andamento[cep_limpo] = futuro
+        if novo:
+            # Fora do lock: se ja terminou, o callback roda aqui mesmo
+            futuro.add_done_callback(lambda _f, c=cep_limpo: self._concluir(c))
+
+        futuro.add_done_callback(
+            lambda f: self._resultados.put((callback, widget, geracao, self._resultado(f)))
+        )
+        return futuro
+
+    def cancelar(self, widget) -> None:
+        """Descarta a entrega da busca pendente do widget"""
+        self._geracoes[widget] = self._geracoes.get(widget, 0) + 1
+
+    def processar_pendentes(self) -> int:
+        """Executa callbacks dos resultados prontos (chamar na thread do Tk)"""
+        entregues = 0
+        while True:
+            try:
+                callback, widget, geracao, (sucesso, dados) = self._resultados.get_nowait()
+            except queue.Empty:
+                return entregues
+            self._aguardando -= 1
+            if widget is not None and self._geracoes.get(widget) != geracao:
+                continue
+            callback(sucesso, dados)
+            entregues += 1
+
+    def _agendar(self, widget) -> None:
+        if widget is None or self._bombeando:
+            return
+        self._bombeando = True
+        widget.after(self.intervalo_ms, self._bombear, widget)
+
+    def _bombear(self, widget) -> None:
+        self.processar_pendentes()
+        if self._aguardando <= 0:
+            self._bombeando = False
+            return
+        try:
+            widget.after(self.intervalo_ms, self._bombear, widget)
+        except Exception:
+            # Widget destruido: a proxima busca volta a agendar
+            self._bombeando = False
+
+    def _concluir(self, cep: str) -> None:
+        with self._lock:
+            self._em_andamento.pop(cep, None)
+
+    @staticmethod
+    def _resultado(futuro: Future) -> Resultado:
+        try:
+            return futuro.result()
+        except Exception as e:
+            return False, {'erro': f'Erro: {str(e)}'}
+
+    def _aguardar_vez(self, prazo: float) -> None:
+        """Limite de taxa das idas a rede; TimeoutError se passar do prazo"""
+        with self._lock_taxa:
+            agora = time.monotonic()
+            inicio = max(agora, self._proxima_rede)
+            if inicio > prazo:
+                raise TimeoutError
+            self._proxima_rede = inicio + self._intervalo_rede
+        if inicio > agora:
+            time.sleep(inicio - agora)
+
+    def _consultar(self, cep: str, prazo: float) -> Resultado:
+        try:
+            endereco = self.base.buscar(cep, usar_rede=False)
+            if endereco is None and self.base.usar_rede and not self.base.ausente(cep):
+                self._aguardar_vez(prazo)
+                endereco = self.base.buscar(cep)
+        except (TimeoutError, requests.exceptions.Timeout):
+            return False, {'erro': 'Tempo esgotado ao buscar CEP'}
+        except requests.exceptions.HTTPError:
+            return False, {'erro': 'Erro ao consultar API de CEP'}
+        except requests.exceptions.RequestException:
+            return False, {'erro': 'Erro de conexao ao buscar CEP'}
+
+        if endereco is None:
+            return False, {'erro': 'CEP nao encontrado'}
+        return True, endereco
+
+    def fechar(self) -> None:
+        """Encerra o pool de threads"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_resolvedor: Optional[ResolvedorCEP] = None
+
+
+def obter_resolvedor_cep() -> ResolvedorCEP:
+    """Resolvedor compartilhado pelas telas (criado no primeiro uso, na thread do Tk)"""
+    global _resolvedor
+    if _resolvedor is None:
+        _resolvedor = ResolvedorCEP()
+    return _resolvedor
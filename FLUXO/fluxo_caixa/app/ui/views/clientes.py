@@ -5,10 +5,11 @@ Interface moderna com busca por CEP automática
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 from datetime import datetime
-import threading
 
+from app.config.settings import Settings
 from app.models.cliente import Cliente, TipoPessoa, StatusCliente
 from app.services.cliente import ServicoCliente
+from app.services.resolvedor_cep import obter_resolvedor_cep
 from app.utils.validators import ValidadorCEP, ValidadorDocumento
 
 
@@ -231,21 +232,18 @@ class TelaClientes:
         scrollable_frame.columnconfigure(1, weight=1)
     
     def buscar_endereco_cep(self):
-        """Busca endereço via CEP em thread separada"""
+        """Busca endereço via CEP sem bloquear a UI"""
         cep = self.entry_cep.get().strip()
         
         if not cep:
             messagebox.showwarning("Aviso", "Digite um CEP")
             return
         
-        # Thread para não bloquear UI
-        thread = threading.Thread(target=self._buscar_cep_thread, args=(cep,))
-        thread.start()
+        # Resolvedor compartilhado: resultado chega na thread do Tk
+        obter_resolvedor_cep().resolver(cep, self._preencher_endereco, self.entry_cep)
     
-    def _buscar_cep_thread(self, cep: str):
-        """Executa busca de CEP em thread"""
-        sucesso, dados = self.servico.buscar_cep(cep)
-        
+    def _preencher_endereco(self, sucesso: bool, dados: dict):
+        """Preenche endereço com o resultado da busca de CEP"""
         if sucesso:
             self.entry_logradouro.delete(0, tk.END)
             self.entry_logradouro.insert(0, dados.get('logradouro', ''))
@@ -456,24 +454,32 @@ class TelaClientes:
         """Exporta clientes para Excel"""
         from tkinter import filedialog
         from app.services.export_excel_profissional import gerar_planilha_clientes
+        from app.services.exportacoes import obter_gerenciador_exportacoes
+        from app.ui.views.exportacoes import avisar_ao_concluir
         from pathlib import Path
         
         try:
             arquivo = filedialog.asksaveasfilename(
                 defaultextension=".xlsx",
                 filetypes=[("Excel Files", "*.xlsx"), ("All Files", "*.*")],
+                initialdir=Settings.OUTPUT_DIR,
                 initialfile=f"Clientes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
             )
             
             if not arquivo:
                 return
-            
-            # Obter dados
-            clientes = self.servico.listar_ativos()
 
-            # Gerar planilha executiva
-            gerar_planilha_clientes(clientes, Path(arquivo))
-            messagebox.showinfo("Sucesso", f"Clientes exportados com sucesso!\n\n{arquivo}")
+            # Leitura e planilha rodam em segundo plano (ver Exportações); o aviso vem ao concluir
+            def exportar(andamento):
+                andamento.informar(0, mensagem="Lendo cadastro")
+                clientes = self.servico.listar_ativos()
+                andamento.informar(0, len(clientes), "Gerando planilha")
+                return gerar_planilha_clientes(andamento.acompanhar(clientes, len(clientes), a_cada=100), Path(arquivo))
+
+            obter_gerenciador_exportacoes().enviar(
+                f"Clientes ({Path(arquivo).name})", exportar, Path(arquivo), widget=self.parent,
+                ao_concluir=avisar_ao_concluir(f"Clientes exportados com sucesso!\n\n{arquivo}"),
+            )
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao exportar: {str(e)}")
 
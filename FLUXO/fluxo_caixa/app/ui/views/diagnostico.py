@@ -0,0 +1,134 @@
+"""
+Janela de Diagnostico
+Estatisticas das consultas SQL do processo e ultimas consultas lentas com o plano
+"""
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+from datetime import datetime
+
+from app.database.instrumentacao import Instrumentacao
+
+
+class JanelaDiagnostico:
+    """Consultas agrupadas (chamadas, tempo total, p50/p95/p99) e consultas lentas"""
+
+    COLUNAS = ("Origem", "Chamadas", "Total (ms)", "p50", "p95", "p99", "Máx", "Linhas", "Lentas", "SQL")
+
+    def __init__(self, parent, instrumentacao: Instrumentacao):
+        self.instrumentacao = instrumentacao
+        self.consultas = []
+
+        self.janela = tk.Toplevel(parent)
+        self.janela.title("Diagnóstico de Consultas")
+        self.janela.geometry("1200x650")
+
+        frame_toolbar = ttk.Frame(self.janela)
+        frame_toolbar.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Button(frame_toolbar, text="Atualizar", command=self.atualizar).pack(side=tk.LEFT, padx=2)
+        ttk.Button(frame_toolbar, text="Exportar JSON", command=self.exportar).pack(side=tk.LEFT, padx=2)
+        ttk.Button(frame_toolbar, text="Limpar", command=self.limpar).pack(side=tk.LEFT, padx=2)
+        self.label_status = ttk.Label(frame_toolbar, text="")
+        self.label_status.pack(side=tk.RIGHT, padx=5)
+
+        painel = ttk.PanedWindow(self.janela, orient=tk.VERTICAL)
+        painel.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        frame_lista = ttk.LabelFrame(painel, text="Consultas", padding=5)
+        self.tree = ttk.Treeview(frame_lista, columns=self.COLUNAS, show="headings")
+        larguras = (260, 70, 90, 60, 60, 60, 60, 80, 60, 500)
+        for col, largura in zip(self.COLUNAS, larguras):
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=largura, anchor=tk.W if col in ("Origem", "SQL") else tk.E)
+        scrollbar = ttk.Scrollbar(frame_lista, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscroll=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.bind("<<TreeviewSelect>>", lambda e: self.mostrar_detalhe())
+        painel.add(frame_lista, weight=3)
+
+        frame_detalhe = ttk.LabelFrame(painel, text="Detalhe / Consultas lentas", padding=5)
+        self.texto = tk.Text(frame_detalhe, height=12, wrap=tk.NONE, font=("Courier New", 9))
+        self.texto.pack(fill=tk.BOTH, expand=True)
+        painel.add(frame_detalhe, weight=2)
+
+        self.atualizar()
+
+    def atualizar(self):
+        """Recarrega as estatisticas"""
+        self.consultas = self.instrumentacao.estatisticas.resumo()
+        self.tree.delete(*self.tree.get_children())
+        for i, consulta in enumerate(self.consultas):
+            origem = next(iter(consulta["origens"]), "")
+            self.tree.insert("", tk.END, iid=str(i), values=(
+                origem.replace("app.services.", "").replace("app.ui.views.", ""),
+                consulta["chamadas"],
+                f"{consulta['total_ms']:.1f}",
+                f"{consulta['p50_ms']:.1f}",
+                f"{consulta['p95_ms']:.1f}",
+                f"{consulta['p99_ms']:.1f}",
+                f"{consulta['max_ms']:.1f}",
+                consulta["linhas"],
+                consulta["lentas"],
+                consulta["sql"][:200],
+            ))
+        chamadas = sum(c["chamadas"] for c in self.consultas)
+        self.label_status.config(
+            text=f"{len(self.consultas)} consultas | {chamadas} execuções | "
+                 f"lenta >= {self.instrumentacao.limite_lenta_ms:.0f} ms"
+        )
+        self._mostrar_lentas()
+
+    def _mostrar_lentas(self):
+        self.texto.delete("1.0", tk.END)
+        lentas = self.instrumentacao.estatisticas.lentas()
+        if not lentas:
+            self.texto.insert(tk.END, "Nenhuma consulta lenta registrada.")
+            return
+        for registro in lentas:
+            momento = datetime.fromtimestamp(registro.momento).strftime("%H:%M:%S")
+            self.texto.insert(
+                tk.END,
+                f"[{momento}] {registro.duracao * 1000:.1f} ms | {registro.linhas} linhas | {registro.origem}\n"
+                f"  {registro.sql}\n",
+            )
+            if registro.plano:
+                self.texto.insert(tk.END, "".join(f"    {l}\n" for l in registro.plano.splitlines()))
+            self.texto.insert(tk.END, "\n")
+
+    def mostrar_detalhe(self):
+        """SQL completo e origens da consulta selecionada"""
+        selecao = self.tree.selection()
+        if not selecao:
+            return
+        consulta = self.consultas[int(selecao[0])]
+        self.texto.delete("1.0", tk.END)
+        self.texto.insert(tk.END, f"{consulta['sql']}\n\n")
+        self.texto.insert(
+            tk.END,
+            f"Chamadas: {consulta['chamadas']} | média {consulta['media_ms']:.2f} ms | "
+            f"p50 {consulta['p50_ms']:.2f} | p95 {consulta['p95_ms']:.2f} | p99 {consulta['p99_ms']:.2f} ms\n\n"
+            "Origens:\n",
+        )
+        for origem, n in consulta["origens"].items():
+            self.texto.insert(tk.END, f"  {n:>6}  {origem}\n")
+
+    def exportar(self):
+        """Grava estatisticas e consultas lentas em JSON"""
+        arquivo = filedialog.asksaveasfilename(
+            parent=self.janela,
+            defaultextension=".json",
+            filetypes=[("JSON", "*.json"), ("All Files", "*.*")],
+            initialfile=f"diagnostico_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+        )
+        if not arquivo:
+            return
+        try:
+            self.instrumentacao.estatisticas.despejar(arquivo)
+            messagebox.showinfo("Sucesso", f"Diagnóstico exportado para:\n{arquivo}", parent=self.janela)
+        except Exception as e:
+            messagebox.showerror("Erro", f"Erro ao exportar diagnóstico: {e}", parent=self.janela)
+
+    def limpar(self):
+        """Zera as estatisticas (para medir uma tela a partir de agora)"""
+        self.instrumentacao.estatisticas.limpar()
+        self.atualizar()
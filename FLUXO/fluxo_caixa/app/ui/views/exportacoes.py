@@ -0,0 +1,188 @@
+"""
+Janela de Exportacoes
+Trabalhos de exportacao em segundo plano (progresso, cancelamento) e arquivos gerados
+"""
+import os
+import subprocess
+import tkinter as tk
+from tkinter import ttk, messagebox
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+from app.config.settings import Settings
+from app.services.exportacoes import (
+    CONCLUIDO, ERRO, GerenciadorExportacoes, TrabalhoExportacao, listar_saidas,
+)
+
+ESTADOS = {
+    "aguardando": "Na fila",
+    "executando": "Executando",
+    "concluido": "Concluído",
+    "erro": "Erro",
+    "cancelado": "Cancelado",
+}
+
+
+def avisar_ao_concluir(mensagem_sucesso: str, mensagem_erro: str = "Erro ao exportar") -> Callable[[TrabalhoExportacao], None]:
+    """ao_concluir para GerenciadorExportacoes.enviar: mesmo aviso que a exportacao direta dava"""
+    def ao_concluir(trabalho: TrabalhoExportacao) -> None:
+        if trabalho.estado == CONCLUIDO:
+            messagebox.showinfo("Sucesso", mensagem_sucesso)
+        elif trabalho.estado == ERRO:
+            messagebox.showerror("Erro", f"{mensagem_erro}: {trabalho.mensagem}")
+    return ao_concluir
+
+
+def abrir_arquivo(caminho: Path) -> None:
+    """Abre o arquivo no programa padrao do sistema"""
+    if hasattr(os, "startfile"):
+        os.startfile(str(caminho))
+    elif os.name == "posix":
+        subprocess.Popen(["xdg-open", str(caminho)])
+
+
+class JanelaExportacoes:
+    """Trabalhos de exportacao (com cancelamento) e arquivos recentes da pasta de saida"""
+
+    COLUNAS_TRABALHOS = ("Nº", "Exportação", "Estado", "Progresso", "Mensagem", "Arquivo")
+    COLUNAS_ARQUIVOS = ("Arquivo", "Tamanho", "Modificado em")
+
+    def __init__(self, parent, gerenciador: GerenciadorExportacoes):
+        self.gerenciador = gerenciador
+        self.arquivos = []
+
+        self.janela = tk.Toplevel(parent)
+        self.janela.title("Exportações")
+        self.janela.geometry("1000x600")
+
+        frame_toolbar = ttk.Frame(self.janela)
+        frame_toolbar.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Button(frame_toolbar, text="Cancelar", command=self.cancelar).pack(side=tk.LEFT, padx=2)
+        ttk.Button(frame_toolbar, text="Limpar Concluídos", command=self.limpar).pack(side=tk.LEFT, padx=2)
+        ttk.Button(frame_toolbar, text="Abrir Arquivo", command=self.abrir).pack(side=tk.LEFT, padx=2)
+        ttk.Button(frame_toolbar, text="Abrir Pasta", command=self.abrir_pasta).pack(side=tk.LEFT, padx=2)
+        ttk.Button(frame_toolbar, text="Atualizar", command=self.atualizar).pack(side=tk.LEFT, padx=2)
+        self.label_status = ttk.Label(frame_toolbar, text="")
+        self.label_status.pack(side=tk.RIGHT, padx=5)
+
+        painel = ttk.PanedWindow(self.janela, orient=tk.VERTICAL)
+        painel.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        frame_trabalhos = ttk.LabelFrame(painel, text="Trabalhos", padding=5)
+        self.tree_trabalhos = ttk.Treeview(frame_trabalhos, columns=self.COLUNAS_TRABALHOS, show="headings")
+        for col, largura in zip(self.COLUNAS_TRABALHOS, (40, 240, 90, 110, 200, 300)):
+            self.tree_trabalhos.heading(col, text=col)
+            self.tree_trabalhos.column(col, width=largura, anchor=tk.E if col in ("Nº", "Progresso") else tk.W)
+        scrollbar = ttk.Scrollbar(frame_trabalhos, orient=tk.VERTICAL, command=self.tree_trabalhos.yview)
+        self.tree_trabalhos.configure(yscroll=scrollbar.set)
+        self.tree_trabalhos.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        painel.add(frame_trabalhos, weight=1)
+
+        frame_arquivos = ttk.LabelFrame(painel, text=f"Arquivos recentes em {Settings.OUTPUT_DIR}", padding=5)
+        self.tree_arquivos = ttk.Treeview(frame_arquivos, columns=self.COLUNAS_ARQUIVOS, show="headings")
+        for col, largura in zip(self.COLUNAS_ARQUIVOS, (500, 100, 150)):
+            self.tree_arquivos.heading(col, text=col)
+            self.tree_arquivos.column(col, width=largura, anchor=tk.E if col == "Tamanho" else tk.W)
+        scrollbar = ttk.Scrollbar(frame_arquivos, orient=tk.VERTICAL, command=self.tree_arquivos.yview)
+        self.tree_arquivos.configure(yscroll=scrollbar.set)
+        self.tree_arquivos.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree_arquivos.bind("<Double-1>", lambda e: self.abrir())
+        painel.add(frame_arquivos, weight=1)
+
+        self.gerenciador.ouvir(self._ao_mudar)
+        self.janela.protocol("WM_DELETE_WINDOW", self.fechar)
+        self.atualizar()
+
+    def atualizar(self):
+        """Recarrega trabalhos e arquivos da pasta de saida"""
+        self.tree_trabalhos.delete(*self.tree_trabalhos.get_children())
+        for trabalho in self.gerenciador.trabalhos():
+            self.tree_trabalhos.insert("", tk.END, iid=str(trabalho.id), values=self._valores(trabalho))
+        self._atualizar_arquivos()
+        self._atualizar_status()
+
+    def _atualizar_arquivos(self):
+        self.arquivos = listar_saidas(Settings.OUTPUT_DIR)
+        self.tree_arquivos.delete(*self.tree_arquivos.get_children())
+        for i, (caminho, tamanho, modificado) in enumerate(self.arquivos):
+            self.tree_arquivos.insert("", tk.END, iid=str(i), values=(
+                caminho.name,
+                f"{tamanho / 1024:,.1f} KB",
+                datetime.fromtimestamp(modificado).strftime("%d/%m/%Y %H:%M:%S"),
+            ))
+
+    def _atualizar_status(self):
+        self.label_status.config(text=f"{self.gerenciador.ativos()} em andamento")
+
+    @staticmethod
+    def _valores(trabalho: TrabalhoExportacao) -> tuple:
+        if trabalho.progresso is not None:
+            progresso = f"{trabalho.progresso:.0%}"
+        elif trabalho.processados:
+            progresso = f"{trabalho.processados:,} itens".replace(",", ".")
+        else:
+            progresso = ""
+        return (
+            trabalho.id,
+            trabalho.nome,
+            ESTADOS.get(trabalho.estado, trabalho.estado),
+            progresso,
+            trabalho.mensagem,
+            str(trabalho.destino or ""),
+        )
+
+    def _ao_mudar(self, trabalho: TrabalhoExportacao):
+        """Ouvinte do gerenciador: atualiza so a linha do trabalho"""
+        iid = str(trabalho.id)
+        if self.tree_trabalhos.exists(iid):
+            self.tree_trabalhos.item(iid, values=self._valores(trabalho))
+        else:
+            self.tree_trabalhos.insert("", 0, iid=iid, values=self._valores(trabalho))
+        if not trabalho.ativo:
+            self._atualizar_arquivos()
+        self._atualizar_status()
+
+    def cancelar(self):
+        """Cancela os trabalhos selecionados"""
+        selecao = self.tree_trabalhos.selection()
+        if not selecao:
+            messagebox.showwarning("Aviso", "Selecione um trabalho", parent=self.janela)
+            return
+        for iid in selecao:
+            self.gerenciador.cancelar(int(iid))
+
+    def limpar(self):
+        self.gerenciador.limpar_concluidos()
+        self.atualizar()
+
+    def abrir(self):
+        """Abre o arquivo selecionado (lista de arquivos ou trabalho concluido)"""
+        caminho = None
+        selecao = self.tree_arquivos.selection()
+        if selecao:
+            caminho = self.arquivos[int(selecao[0])][0]
+        else:
+            for iid in self.tree_trabalhos.selection():
+                destino = self.tree_trabalhos.item(iid, "values")[5]
+                if destino:
+                    caminho = Path(destino)
+        if caminho is None or not caminho.exists():
+            messagebox.showwarning("Aviso", "Selecione um arquivo gerado", parent=self.janela)
+            return
+        try:
+            abrir_arquivo(caminho)
+        except Exception as e:
+            messagebox.showerror("Erro", f"Erro ao abrir arquivo: {e}", parent=self.janela)
+
+    def abrir_pasta(self):
+        try:
+            abrir_arquivo(Settings.OUTPUT_DIR)
+        except Exception as e:
+            messagebox.showerror("Erro", f"Erro ao abrir pasta: {e}", parent=self.janela)
+
+    def fechar(self):
+        self.gerenciador.deixar_de_ouvir(self._ao_mudar)
+        self.janela.destroy()
@@ -5,11 +5,11 @@ Interface idêntica aos cadastros de Clientes e Funcionários
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime
-import threading
-import requests
 
+from app.config.settings import Settings
 from app.models.fornecedor import Fornecedor, TipoPessoa
 from app.services.fornecedor import ServicoFornecedor
+from app.services.resolvedor_cep import obter_resolvedor_cep
 from app.utils.validators import ValidadorDocumento
 
 
@@ -20,7 +20,6 @@ class TelaFornecedores:
         self.parent = parent
         self.servico = servico_fornecedor
         self.fornecedor_selecionado = None
-        self.thread_cep = None
     
     def criar_interface(self, frame_principal):
         """Cria interface do cadastro de fornecedores"""
@@ -276,25 +275,21 @@ class TelaFornecedores:
             messagebox.showwarning("Aviso", "CEP inválido")
             return
         
-        def _buscar():
-            try:
-                response = requests.get(f"https://viacep.com.br/ws/{cep}/json/")
-                if response.status_code == 200:
-                    dados = response.json()
-                    if "erro" not in dados:
-                        self.entry_endereco.delete(0, tk.END)
-                        self.entry_endereco.insert(0, dados.get("logradouro", ""))
-                        self.entry_bairro.delete(0, tk.END)
-                        self.entry_bairro.insert(0, dados.get("bairro", ""))
-                        self.entry_cidade.delete(0, tk.END)
-                        self.entry_cidade.insert(0, dados.get("localidade", ""))
-                        self.entry_estado.delete(0, tk.END)
-                        self.entry_estado.insert(0, dados.get("uf", ""))
-            except:
-                messagebox.showerror("Erro", "Erro ao buscar CEP")
-        
-        self.thread_cep = threading.Thread(target=_buscar, daemon=True)
-        self.thread_cep.start()
+        obter_resolvedor_cep().resolver(cep, self._preencher_endereco, self.entry_cep)
+    
+    def _preencher_endereco(self, sucesso: bool, dados: dict):
+        """Preenche endereço com o resultado da busca de CEP"""
+        if sucesso:
+            self.entry_endereco.delete(0, tk.END)
+            self.entry_endereco.insert(0, dados.get("logradouro", ""))
+            self.entry_bairro.delete(0, tk.END)
+            self.entry_bairro.insert(0, dados.get("bairro", ""))
+            self.entry_cidade.delete(0, tk.END)
+            self.entry_cidade.insert(0, dados.get("cidade", ""))
+            self.entry_estado.delete(0, tk.END)
+            self.entry_estado.insert(0, dados.get("uf", ""))
+        else:
+            messagebox.showerror("Erro", dados.get("erro", "Erro ao buscar CEP"))
     
     def novo_fornecedor(self):
         """Cria novo fornecedor"""
@@ -455,26 +450,36 @@ class TelaFornecedores:
                 f.status
             ))
 
-    def exportar_excel(self):
-        """Exporta fornecedores para Excel"""
-        from tkinter import filedialog
-        from app.services.export_excel_profissional import gerar_planilha_fornecedores
-        from pathlib import Path
+    def exportar_excel(self):
+        """Exporta fornecedores para Excel"""
+        from tkinter import filedialog
+        from app.services.export_excel_profissional import gerar_planilha_fornecedores
+        from app.services.exportacoes import obter_gerenciador_exportacoes
+        from app.ui.views.exportacoes import avisar_ao_concluir
+        from pathlib import Path
         
         try:
             arquivo = filedialog.asksaveasfilename(
                 defaultextension=".xlsx",
                 filetypes=[("Excel Files", "*.xlsx"), ("All Files", "*.*")],
+                initialdir=Settings.OUTPUT_DIR,
                 initialfile=f"Fornecedores_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
             )
             
             if not arquivo:
                 return
-            
-            fornecedores = self.servico.listar_todos(apenas_ativos=True)
-
-            gerar_planilha_fornecedores(fornecedores, Path(arquivo))
-            messagebox.showinfo("Sucesso", f"Fornecedores exportados com sucesso!\n\n{arquivo}")
-        except Exception as e:
+
+            # Leitura e planilha rodam em segundo plano (ver Exportações); o aviso vem ao concluir
+            def exportar(andamento):
+                andamento.informar(0, mensagem="Lendo cadastro")
+                fornecedores = self.servico.listar_todos(apenas_ativos=True)
+                andamento.informar(0, len(fornecedores), "Gerando planilha")
+                return gerar_planilha_fornecedores(andamento.acompanhar(fornecedores, len(fornecedores), a_cada=100), Path(arquivo))
+
+            obter_gerenciador_exportacoes().enviar(
+                f"Fornecedores ({Path(arquivo).name})", exportar, Path(arquivo), widget=self.parent,
+                ao_concluir=avisar_ao_concluir(f"Fornecedores exportados com sucesso!\n\n{arquivo}"),
+            )
+        except Exception as e:
             messagebox.showerror("Erro", f"Erro ao exportar: {str(e)}")
 
@@ -4,10 +4,11 @@ Tela de Cadastro e Gerenciamento de Funcionários
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 from datetime import datetime
-import threading
 
+from app.config.settings import Settings
 from app.models.funcionario import Funcionario, StatusFuncionario
 from app.services.funcionario import ServicoFuncionario
+from app.services.resolvedor_cep import obter_resolvedor_cep
 
 
 class TelaFuncionarios:
@@ -233,13 +234,10 @@ class TelaFuncionarios:
             messagebox.showwarning("Aviso", "Digite um CEP")
             return
         
-        thread = threading.Thread(target=self._buscar_cep_thread, args=(cep,))
-        thread.start()
+        obter_resolvedor_cep().resolver(cep, self._preencher_endereco, self.entry_cep)
     
-    def _buscar_cep_thread(self, cep: str):
-        """Executa busca em thread"""
-        sucesso, dados = self.servico.buscar_cep(cep)
-        
+    def _preencher_endereco(self, sucesso: bool, dados: dict):
+        """Preenche endereço com o resultado da busca de CEP"""
         if sucesso:
             self.entry_logradouro.delete(0, tk.END)
             self.entry_logradouro.insert(0, dados.get('logradouro', ''))
@@ -428,26 +426,36 @@ class TelaFuncionarios:
             self.funcionario_selecionado = func_id
             self.editar_funcionario(func_id)
 
-    def exportar_excel(self):
-        """Exporta funcionários para Excel"""
-        from tkinter import filedialog
-        from app.services.export_excel_profissional import gerar_planilha_funcionarios
-        from pathlib import Path
+    def exportar_excel(self):
+        """Exporta funcionários para Excel"""
+        from tkinter import filedialog
+        from app.services.export_excel_profissional import gerar_planilha_funcionarios
+        from app.services.exportacoes import obter_gerenciador_exportacoes
+        from app.ui.views.exportacoes import avisar_ao_concluir
+        from pathlib import Path
         
         try:
             arquivo = filedialog.asksaveasfilename(
                 defaultextension=".xlsx",
                 filetypes=[("Excel Files", "*.xlsx"), ("All Files", "*.*")],
+                initialdir=Settings.OUTPUT_DIR,
                 initialfile=f"Funcionarios_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
             )
             
-            if not arquivo:
-                return
-            
-            funcionarios = self.servico.listar_ativos()
-
-            gerar_planilha_funcionarios(funcionarios, Path(arquivo))
-            messagebox.showinfo("Sucesso", f"Funcionários exportados com sucesso!\n\n{arquivo}")
-        except Exception as e:
+            if not arquivo:
+                return
+
+            # Leitura e planilha rodam em segundo plano (ver Exportações); o aviso vem ao concluir
+            def exportar(andamento):
+                andamento.informar(0, mensagem="Lendo cadastro")
+                funcionarios = self.servico.listar_ativos()
+                andamento.informar(0, len(funcionarios), "Gerando planilha")
+                return gerar_planilha_funcionarios(andamento.acompanhar(funcionarios, len(funcionarios), a_cada=100), Path(arquivo))
+
+            obter_gerenciador_exportacoes().enviar(
+                f"Funcionários ({Path(arquivo).name})", exportar, Path(arquivo), widget=self.parent,
+                ao_concluir=avisar_ao_concluir(f"Funcionários exportados com sucesso!\n\n{arquivo}"),
+            )
+        except Exception as e:
             messagebox.showerror("Erro", f"Erro ao exportar: {str(e)}")
 
@@ -13,7 +13,10 @@ from matplotlib.ticker import FuncFormatter
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
 
+from app.config.settings import Settings
+from app.services.exportacoes import CONCLUIDO, ERRO, Andamento, obter_gerenciador_exportacoes
 from app.services.relatorios import GeradorRelatorios
+from app.ui.views.exportacoes import avisar_ao_concluir
 
 # Configurar matplotlib para tema claro
 matplotlib.rcParams['figure.facecolor'] = '#ffffff'
@@ -91,6 +94,8 @@ class TelaRelatorios:
               command=self.imprimir_relatorio).pack(side=tk.LEFT, padx=6)
         ttk.Button(frame_filtros, text="📊 Excel", 
               command=self.exportar_relatorio_profissional).pack(side=tk.LEFT, padx=6)
+        ttk.Button(frame_filtros, text="📈 Comparativo", 
+              command=self.mostrar_comparativo).pack(side=tk.LEFT, padx=6)
 
     def _criar_resumo_executivo(self, parent):
         """Cria cards do resumo executivo"""
@@ -477,6 +482,47 @@ class TelaRelatorios:
         except Exception as e:
             print(f"Erro ao carregar tabela: {e}")
 
+    def _formatar_percentual(self, percentual) -> str:
+        if percentual is None:
+            return "—"
+        return f"{percentual:+.1f}%".replace(".", ",")
+
+    def mostrar_comparativo(self):
+        """Mês do filtro 'Até' x mês anterior x mesmo mês do ano anterior"""
+        try:
+            mes = self.obter_filtros().get('data_fim') or datetime.now().strftime("%Y-%m")
+            linhas = self.gerador.comparativo_mensal(mes)
+
+            janela = tk.Toplevel(self.parent)
+            janela.title(f"Comparativo - {mes[:7]}")
+            janela.geometry("900x420")
+
+            colunas = ("Tipo", "Categoria", "Subcategoria", "Atual", "Mês Ant.", "Var. Mês",
+                       "Ano Ant.", "Var. Ano")
+            tree = ttk.Treeview(janela, columns=colunas, show="headings")
+            for col in colunas:
+                tree.heading(col, text=col)
+                tree.column(col, anchor=tk.W if col in colunas[:3] else tk.E, width=100)
+
+            for linha in linhas:
+                tree.insert("", tk.END, values=(
+                    linha['tipo'],
+                    linha['categoria'],
+                    linha['subcategoria'],
+                    self._formatar_moeda(linha['atual']),
+                    self._formatar_moeda(linha['mes_anterior']),
+                    self._formatar_percentual(linha['percentual_mes_anterior']),
+                    self._formatar_moeda(linha['ano_anterior']),
+                    self._formatar_percentual(linha['percentual_ano_anterior']),
+                ))
+
+            scrollbar = ttk.Scrollbar(janela, orient=tk.VERTICAL, command=tree.yview)
+            tree.configure(yscroll=scrollbar.set)
+            tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+            scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        except Exception as e:
+            messagebox.showerror('Erro', f'Erro ao gerar comparativo: {e}')
+
     def limpar_filtros(self):
         """Limpa filtros"""
         self.entry_data_inicio.delete(0, tk.END)
@@ -486,198 +532,185 @@ class TelaRelatorios:
         self.atualizar_relatorios()
 
     def exportar_relatorio(self):
-        """Exporta relatório de resumo para Excel"""
-        from openpyxl import Workbook
-        from openpyxl.styles import Font, PatternFill, Alignment
-        
+        """Exporta relatório de resumo para Excel (em segundo plano, ver Exportações)"""
         try:
             arquivo = filedialog.asksaveasfilename(
                 defaultextension=".xlsx",
                 filetypes=[("Excel Files", "*.xlsx"), ("All Files", "*.*")],
+                initialdir=Settings.OUTPUT_DIR,
                 initialfile=f"Relatorio_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
             )
             
             if not arquivo:
                 return
-            
-            # Obter datas de filtro
-            try:
-                data_inicio = datetime.strptime(self.entry_data_inicio.get(), "%Y-%m-%d")
-                data_fim = datetime.strptime(self.entry_data_fim.get(), "%Y-%m-%d")
-            except ValueError:
-                data_inicio = datetime.now() - timedelta(days=30)
-                data_fim = datetime.now()
-            
-            # Obter dados dos gráficos
-            lancamentos = self.gerador.obter_lancamentos_filtrados({})
-            
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Relatório"
-            
+
+            # Widgets so na thread do Tk: o período vai pronto para o trabalho
+            periodo = f"{self.entry_data_inicio.get()} a {self.entry_data_fim.get()}"
+            obter_gerenciador_exportacoes().enviar(
+                f"Relatório ({Path(arquivo).name})",
+                lambda andamento: self._gerar_relatorio_excel(arquivo, periodo, andamento),
+                Path(arquivo), widget=self.parent,
+                ao_concluir=avisar_ao_concluir(f"Relatório exportado com sucesso!\n\n{arquivo}"),
+            )
+        except Exception as e:
+            messagebox.showerror("Erro", f"Erro ao exportar: {str(e)}")
+
+    def _gerar_relatorio_excel(self, arquivo: str, periodo: str, andamento: Andamento) -> str:
+        """Monta a planilha de exportar_relatorio (roda no pool de exportações, sem widgets)
+
+        Workbook write-only e lançamentos lidos em lotes (iterar_lancamentos),
+        como gerar_planilha_profissional: a memória não cresce com o banco.
+        """
+        from openpyxl import Workbook
+        from openpyxl.styles import Font, PatternFill, Alignment
+        from app.services.export_excel_profissional import _celula, _descartar_workbook
+
+        def preenchimento(cor):
+            return PatternFill(start_color=cor, end_color=cor, fill_type="solid")
+
+        filtros = {}
+        total = self.gerador.contar_lancamentos(filtros)
+        andamento.informar(0, total, "Lendo lançamentos")
+
+        wb = Workbook(write_only=True)
+        try:
+            ws = wb.create_sheet("Relatório")
+            # Write-only: larguras antes da primeira linha
+            for coluna, largura in zip("ABCDE", (12, 15, 18, 30, 15)):
+                ws.column_dimensions[coluna].width = largura
+
             # === SEÇÃO 1: RESUMO ===
-            ws['A1'] = "RELATÓRIO DE FLUXO DE CAIXA"
-            ws['A1'].font = Font(bold=True, size=14, color="FFFFFF")
-            ws['A1'].fill = PatternFill(start_color="1F4E78", end_color="1F4E78", fill_type="solid")
-            ws.merge_cells('A1:D1')
-            
-            ws['A2'] = f"Período: {self.entry_data_inicio.get()} a {self.entry_data_fim.get()}"
-            ws['A2'].font = Font(size=10)
-            ws.merge_cells('A2:D2')
-            
-            row = 4
-            
+            ws.append([_celula(ws, "RELATÓRIO DE FLUXO DE CAIXA", font=Font(bold=True, size=14, color="FFFFFF"),
+                               fill=preenchimento("1F4E78"))])
+            ws.merged_cells.add('A1:D1')
+            ws.append([_celula(ws, f"Período: {periodo}", font=Font(size=10))])
+            ws.merged_cells.add('A2:D2')
+            ws.append([])
+
             # Totais
-            total_receitas = self.gerador.calcular_total_receitas({})
-            total_despesas = self.gerador.calcular_total_despesas({})
+            total_receitas = self.gerador.calcular_total_receitas(filtros)
+            total_despesas = self.gerador.calcular_total_despesas(filtros)
             saldo = total_receitas - total_despesas
-            
-            ws[f'A{row}'] = "RECEITAS"
-            ws[f'B{row}'] = f"R$ {total_receitas:,.2f}"
-            ws[f'A{row}'].font = Font(bold=True, color="FFFFFF")
-            ws[f'A{row}'].fill = PatternFill(start_color="27ae60", end_color="27ae60", fill_type="solid")
-            ws[f'B{row}'].fill = PatternFill(start_color="d4edda", end_color="d4edda", fill_type="solid")
-            row += 1
-            
-            ws[f'A{row}'] = "DESPESAS"
-            ws[f'B{row}'] = f"R$ {total_despesas:,.2f}"
-            ws[f'A{row}'].font = Font(bold=True, color="FFFFFF")
-            ws[f'A{row}'].fill = PatternFill(start_color="e74c3c", end_color="e74c3c", fill_type="solid")
-            ws[f'B{row}'].fill = PatternFill(start_color="f8d7da", end_color="f8d7da", fill_type="solid")
-            row += 1
-            
-            ws[f'A{row}'] = "SALDO"
-            ws[f'B{row}'] = f"R$ {saldo:,.2f}"
-            ws[f'A{row}'].font = Font(bold=True, color="FFFFFF")
             cor_saldo = "1abc9c" if saldo >= 0 else "e74c3c"
-            ws[f'A{row}'].fill = PatternFill(start_color=cor_saldo, end_color=cor_saldo, fill_type="solid")
-            ws[f'B{row}'].fill = PatternFill(start_color="e6f7f5", end_color="e6f7f5", fill_type="solid")
-            row += 3
-            
+            for rotulo, valor, cor, fundo in (
+                ("RECEITAS", total_receitas, "27ae60", "d4edda"),
+                ("DESPESAS", total_despesas, "e74c3c", "f8d7da"),
+                ("SALDO", saldo, cor_saldo, "e6f7f5"),
+            ):
+                ws.append([
+                    _celula(ws, rotulo, font=Font(bold=True, color="FFFFFF"), fill=preenchimento(cor)),
+                    _celula(ws, f"R$ {valor:,.2f}", fill=preenchimento(fundo)),
+                ])
+            ws.append([])
+            ws.append([])
+
             # === SEÇÃO 2: TOTAIS POR CATEGORIA ===
-            ws[f'A{row}'] = "TOTAIS POR CATEGORIA"
-            ws[f'A{row}'].font = Font(bold=True, size=11, color="FFFFFF")
-            ws[f'A{row}'].fill = PatternFill(start_color="1F4E78", end_color="1F4E78", fill_type="solid")
-            row += 1
-            
-            categorias_totais = self.gerador.totais_por_categoria({})
-            
-            ws[f'A{row}'] = "Categoria"
-            ws[f'B{row}'] = "Valor"
-            for col in ['A', 'B']:
-                ws[f'{col}{row}'].font = Font(bold=True)
-                ws[f'{col}{row}'].fill = PatternFill(start_color="bdc3c7", end_color="bdc3c7", fill_type="solid")
-            row += 1
-            
-            for categoria, valor in sorted(categorias_totais.items()):
-                ws[f'A{row}'] = str(categoria).replace('_', ' ').title()
-                ws[f'B{row}'] = f"R$ {abs(valor):,.2f}"
-                ws[f'B{row}'].alignment = Alignment(horizontal="right")
-                row += 1
-            
+            ws.append([_celula(ws, "TOTAIS POR CATEGORIA", font=Font(bold=True, size=11, color="FFFFFF"),
+                               fill=preenchimento("1F4E78"))])
+            ws.append([_celula(ws, titulo, font=Font(bold=True), fill=preenchimento("bdc3c7"))
+                       for titulo in ("Categoria", "Valor")])
+            direita = Alignment(horizontal="right")
+            for categoria, valor in sorted(self.gerador.totais_por_categoria(filtros).items()):
+                ws.append([
+                    str(categoria).replace('_', ' ').title(),
+                    _celula(ws, f"R$ {abs(valor):,.2f}", alignment=direita),
+                ])
+
             # === SEÇÃO 3: DETALHAMENTO ===
-            row += 2
-            ws[f'A{row}'] = "DETALHAMENTO COMPLETO"
-            ws[f'A{row}'].font = Font(bold=True, size=11, color="FFFFFF")
-            ws[f'A{row}'].fill = PatternFill(start_color="1F4E78", end_color="1F4E78", fill_type="solid")
-            row += 1
-            
-            headers_detalhe = ["Data", "Tipo", "Categoria", "Descrição", "Valor"]
-            for col_idx, header in enumerate(headers_detalhe, start=1):
-                cell = ws.cell(row=row, column=col_idx)
-                cell.value = header
-                cell.font = Font(bold=True, color="FFFFFF")
-                cell.fill = PatternFill(start_color="34495e", end_color="34495e", fill_type="solid")
-            row += 1
-            
-            for lanc in lancamentos:
-                tipo = lanc.get('tipo') if isinstance(lanc, dict) else lanc.tipo.value
-                data = lanc.get('data') if isinstance(lanc, dict) else lanc.data
-                categoria = lanc.get('categoria') if isinstance(lanc, dict) else lanc.categoria.value
-                descricao = lanc.get('descricao') if isinstance(lanc, dict) else lanc.descricao
-                valor = lanc.get('valor') if isinstance(lanc, dict) else lanc.valor
-                
-                ws.cell(row=row, column=1).value = data
-                ws.cell(row=row, column=2).value = tipo.title()
-                ws.cell(row=row, column=3).value = categoria.replace('_', ' ').title()
-                ws.cell(row=row, column=4).value = descricao
-                ws.cell(row=row, column=5).value = f"R$ {abs(valor):,.2f}"
-                ws.cell(row=row, column=5).alignment = Alignment(horizontal="right")
-                row += 1
-            
-            # Ajustar largura das colunas
-            ws.column_dimensions['A'].width = 12
-            ws.column_dimensions['B'].width = 15
-            ws.column_dimensions['C'].width = 18
-            ws.column_dimensions['D'].width = 30
-            ws.column_dimensions['E'].width = 15
-            
-            wb.save(arquivo)
-            messagebox.showinfo("Sucesso", f"Relatório exportado com sucesso!\n\n{arquivo}")
-        except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao exportar: {str(e)}")
+            ws.append([])
+            ws.append([])
+            ws.append([_celula(ws, "DETALHAMENTO COMPLETO", font=Font(bold=True, size=11, color="FFFFFF"),
+                               fill=preenchimento("1F4E78"))])
+            ws.append([_celula(ws, titulo, font=Font(bold=True, color="FFFFFF"), fill=preenchimento("34495e"))
+                       for titulo in ("Data", "Tipo", "Categoria", "Descrição", "Valor")])
+
+            for lanc in andamento.acompanhar(self.gerador.iterar_lancamentos(filtros), total):
+                ws.append([
+                    lanc['data'],
+                    (lanc['tipo'] or '').title(),
+                    (lanc['categoria'] or '').replace('_', ' ').title(),
+                    lanc['descricao'],
+                    _celula(ws, f"R$ {abs(lanc['valor']):,.2f}", alignment=direita),
+                ])
+        except BaseException:
+            # Exportação interrompida (erro ou cancelamento): sem temporários órfãos
+            _descartar_workbook(wb)
+            raise
+
+        andamento.informar(total, total, "Gravando arquivo")
+        wb.save(arquivo)
+        return arquivo
 
     def imprimir_relatorio(self):
-        """Gera PDF profissional via serviço e imprime (ou abre)."""
+        """Gera PDF profissional em segundo plano e imprime (ou abre) ao concluir."""
         try:
             from app.services.impressao import gerar_pdf_relatorio, imprimir_pdf_windows
 
             filtros = self.obter_filtros()
             periodo = f"{filtros.get('data_inicio','')} a {filtros.get('data_fim','')}"
-            lancamentos = self.gerador.obter_lancamentos_por_periodo(filtros.get('data_inicio',''), filtros.get('data_fim',''))
-            resumo = self.gerador.gerar_resumo(filtros)
-
-            totais = {
-                'entradas': resumo.get('total_receitas', 0),
-                'saidas': resumo.get('total_despesas', 0),
-                'saldo': resumo.get('saldo', 0)
-            }
-
-            caminho = gerar_pdf_relatorio('Fluxo de Caixa Profissional', periodo, lancamentos, totais)
-            imprimir_pdf_windows(caminho)
-            messagebox.showinfo('Impressão', f'Relatório gerado: {caminho}')
+            caminho = Settings.OUTPUT_DIR / f"relatorio_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+
+            def gerar(andamento):
+                resumo = self.gerador.gerar_resumo(filtros)
+                totais = {
+                    'entradas': resumo.get('total_receitas', 0),
+                    'saidas': resumo.get('total_despesas', 0),
+                    'saldo': resumo.get('saldo', 0)
+                }
+                # Gerador: as linhas sao lidas do banco em lotes enquanto o PDF e montado
+                lancamentos = andamento.acompanhar(
+                    self.gerador.iterar_lancamentos(filtros), self.gerador.contar_lancamentos(filtros)
+                )
+                return gerar_pdf_relatorio('Fluxo de Caixa Profissional', periodo, lancamentos, totais,
+                                           caminho, processos=Settings.PROCESSOS_PDF)
+
+            def ao_concluir(trabalho):
+                if trabalho.estado == CONCLUIDO:
+                    imprimir_pdf_windows(trabalho.destino)
+                    messagebox.showinfo('Impressão', f'Relatório gerado: {trabalho.destino}')
+                elif trabalho.estado == ERRO:
+                    messagebox.showerror('Erro', f'Erro ao imprimir relatório: {trabalho.mensagem}')
+
+            obter_gerenciador_exportacoes().enviar(
+                f"Impressão ({periodo})", gerar, caminho, widget=self.parent, ao_concluir=ao_concluir
+            )
         except Exception as e:
             messagebox.showerror('Erro', f'Erro ao imprimir relatório: {e}')
 
     def exportar_relatorio_profissional(self):
-        """Gera exportação Excel profissional por serviço."""
+        """Gera exportação Excel profissional por serviço (em segundo plano)."""
         try:
             from app.services.export_excel_profissional import gerar_planilha_profissional
-            from tkinter import filedialog
             import pandas as pd
 
             arquivo = filedialog.asksaveasfilename(defaultextension='.xlsx', filetypes=[('Excel Files','*.xlsx')],
+                                                   initialdir=Settings.OUTPUT_DIR,
                                                    initialfile=f"Relatorio_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx")
             if not arquivo:
                 return
 
             filtros = self.obter_filtros()
-            lancamentos = self.gerador.obter_lancamentos_por_periodo(filtros.get('data_inicio',''), filtros.get('data_fim',''))
-
-            df = pd.DataFrame(lancamentos)
-            # Resumo mensal
-            if not df.empty:
-                df['data'] = pd.to_datetime(df['data'])
-                df['ano_mes'] = df['data'].dt.to_period('M').astype(str)
-                entradas = df[df['tipo'] == 'Receita'].groupby('ano_mes')['valor'].sum().rename('entradas')
-                saidas = df[df['tipo'] == 'Despesa'].groupby('ano_mes')['valor'].sum().rename('saidas')
-                resumo_mensal = pd.concat([entradas, saidas], axis=1).fillna(0).reset_index()
-                resumo_mensal['saldo'] = resumo_mensal['entradas'] - resumo_mensal['saidas']
-            else:
-                resumo_mensal = pd.DataFrame(columns=['ano_mes','entradas','saidas','saldo'])
-
-            # Resumo anual
-            if not df.empty:
-                df['ano'] = df['data'].dt.year
-                entradas_a = df[df['tipo'] == 'Receita'].groupby('ano')['valor'].sum().rename('entradas')
-                saidas_a = df[df['tipo'] == 'Despesa'].groupby('ano')['valor'].sum().rename('saidas')
-                resumo_anual = pd.concat([entradas_a, saidas_a], axis=1).fillna(0).reset_index()
-                resumo_anual['saldo'] = resumo_anual['entradas'] - resumo_anual['saidas']
-            else:
-                resumo_anual = pd.DataFrame(columns=['ano','entradas','saidas','saldo'])
-
-            gerar_planilha_profissional(lancamentos, resumo_mensal, resumo_anual, Path(arquivo))
-            messagebox.showinfo('Sucesso', f'Exportação profissional salva em:\n{arquivo}')
+
+            def gerar(andamento):
+                # Resumos mensal e anual vem das tabelas de resumo, sem reagrupar as linhas
+                andamento.informar(0, mensagem="Calculando resumos")
+                resumo_mensal = pd.DataFrame(self.gerador.resumo_mensal(filtros),
+                                             columns=['ano_mes','entradas','saidas','saldo'])
+                resumo_anual = pd.DataFrame(self.gerador.resumo_anual(filtros),
+                                            columns=['ano','entradas','saidas','saldo'])
+
+                comparativo = self.gerador.comparativo_mensal(filtros.get('data_fim'))
+
+                # Gerador: as linhas vao do banco para a planilha em lotes, sem lista em memoria
+                lancamentos = andamento.acompanhar(
+                    self.gerador.iterar_lancamentos(filtros), self.gerador.contar_lancamentos(filtros)
+                )
+                return gerar_planilha_profissional(lancamentos, resumo_mensal, resumo_anual, Path(arquivo), comparativo)
+
+            obter_gerenciador_exportacoes().enviar(
+                f"Excel profissional ({Path(arquivo).name})", gerar, Path(arquivo), widget=self.parent,
+                ao_concluir=avisar_ao_concluir(f'Exportação profissional salva em:\n{arquivo}',
+                                               'Erro ao exportar Excel profissional'),
+            )
         except Exception as e:
             messagebox.showerror('Erro', f'Erro ao exportar Excel profissional: {e}')
-
@@ -0,0 +1,56 @@
+"""
+Assinatura de lançamentos
+Hash dos campos normalizados (data, tipo, centavos, descrição e entidade) para barrar duplicados
+"""
+import hashlib
+import re
+import sqlite3
+import unicodedata
+from typing import Optional
+
+_NAO_ALFANUMERICO = re.compile(r"[^0-9a-z]+")
+
+
+def normalizar_descricao(texto: Optional[str]) -> str:
+    """Minúsculas, sem acentos e com pontuação/espaços reduzidos a um espaço"""
+    texto = texto or ""
+    if texto.isascii():
+        # Sem acentos: pula a decomposição caractere a caractere
+        texto = texto.lower()
+    else:
+        texto = unicodedata.normalize("NFKD", texto)
+        texto = "".join(c for c in texto if not unicodedata.combining(c)).casefold()
+    return _NAO_ALFANUMERICO.sub(" ", texto).strip()
+
+
+def centavos(valor) -> int:
+    """Valor absoluto em centavos (evita diferenças de ponto flutuante)"""
+    return int(round(abs(float(valor or 0)) * 100))
+
+
+def assinatura_lancamento(
+    data,
+    tipo,
+    valor,
+    descricao: Optional[str],
+    cliente_id: Optional[int] = None,
+    fornecedor_id: Optional[int] = None,
+    funcionario_id: Optional[int] = None,
+) -> str:
+    """Assinatura hexadecimal (128 bits) do lançamento"""
+    tipo = getattr(tipo, "value", tipo)
+    partes = (
+        str(data or "")[:10],
+        str(tipo or "").strip().lower(),
+        str(centavos(valor)),
+        normalizar_descricao(descricao),
+        f"c{cliente_id or 0}",
+        f"f{fornecedor_id or 0}",
+        f"u{funcionario_id or 0}",
+    )
+    return hashlib.blake2b("|".join(partes).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def registrar_funcao_sql(conn: sqlite3.Connection) -> None:
+    """Disponibiliza assinatura_lancamento(...) no SQL da conexão (usada no backfill)"""
+    conn.create_function("assinatura_lancamento", 7, assinatura_lancamento, deterministic=True)
@@ -0,0 +1,146 @@
+"""
+Cache de resultados de consultas
+LRU limitado por itens e por linhas, invalidado quando a versão dos dados muda
+"""
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+def normalizar_chave(valor: Any) -> Hashable:
+    """Converte argumentos (dicts de filtros, datas, listas) numa chave estável.
+
+    Filtros vazios (None ou '') são descartados, então {} e
+    {'tipo': None} geram a mesma chave.
+    """
+    if isinstance(valor, dict):
+        return tuple(sorted(
+            (str(k), normalizar_chave(v)) for k, v in valor.items() if v not in (None, "")
+        ))
+    if isinstance(valor, (list, tuple, set, frozenset)):
+        itens = [normalizar_chave(v) for v in valor]
+        return tuple(sorted(itens, key=repr) if isinstance(valor, (set, frozenset)) else itens)
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    if hasattr(valor, "value"):
+        return valor.value
+    return valor
+
+
+def _copiar(resultado: Any) -> Any:
+    """Cópia rasa por linha: relatórios devolvem listas de dicts planos, dicts e números"""
+    if isinstance(resultado, list):
+        return [dict(r) if isinstance(r, dict) else r for r in resultado]
+    if isinstance(resultado, dict):
+        return dict(resultado)
+    if isinstance(resultado, tuple):
+        return tuple(_copiar(r) for r in resultado)
+    return resultado
+
+
+def _tamanho(resultado: Any) -> int:
+    if isinstance(resultado, (str, bytes)) or not hasattr(resultado, "__len__"):
+        return 1
+    return len(resultado)
+
+
+class CacheResultados:
+    """Cache LRU de resultados com invalidação por versão dos dados.
+
+    `versao` é chamada a cada acesso (ex.: Database.versao_dados, que lê
+    PRAGMA data_version); se mudou desde o último acesso, o cache inteiro é
+    descartado, então nenhum resultado sobrevive a uma escrita. Resultados
+    são devolvidos como cópia para que quem chama possa alterá-los.
+    """
+
+    def __init__(
+        self,
+        versao: Callable[[], int],
+        max_itens: int = 256,
+        max_linhas: int = 200_000,
+    ):
+        self.versao = versao
+        self.max_itens = max_itens
+        self.max_linhas = max_linhas
+        self._itens: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._linhas = 0
+        self._versao: Optional[int] = None
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.faltas = 0
+
+    def obter(self, chave: Hashable, calcular: Callable[[], Any]) -> Any:
+        """Resultado em cache para a chave ou calcula e guarda"""
+        versao = self.versao()
+        with self._lock:
+            if versao != self._versao:
+                self._limpar()
+                self._versao = versao
+            item = self._itens.get(chave)
+            if item is not None:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return _copiar(item[0])
+            self.faltas += 1
+
+        resultado = calcular()
+        self._guardar(chave, resultado, versao)
+        return _copiar(resultado)
+
+    def buscar(self, aceita: Callable[[Hashable], bool]) -> Optional[Tuple[Hashable, Any]]:
+        """Menor resultado em cache cuja chave é aceita, ou None.
+
+        Usado para derivar um resultado de outro mais detalhado (ex.: roll-up
+        de sub-cubos). O valor não é copiado: quem chama só pode lê-lo.
+        """
+        versao = self.versao()
+        with self._lock:
+            if versao != self._versao:
+                self._limpar()
+                self._versao = versao
+                return None
+            melhor = None
+            for chave, (_, tamanho) in self._itens.items():
+                if aceita(chave) and (melhor is None or tamanho < self._itens[melhor][1]):
+                    melhor = chave
+            if melhor is None:
+                return None
+            self._itens.move_to_end(melhor)
+            return melhor, self._itens[melhor][0]
+
+    def _guardar(self, chave: Hashable, resultado: Any, versao: int) -> None:
+        tamanho = _tamanho(resultado)
+        if tamanho > self.max_linhas:
+            return
+        with self._lock:
+            # Escrita durante o cálculo: o resultado pode já estar velho
+            if versao != self._versao:
+                return
+            antigo = self._itens.pop(chave, None)
+            if antigo is not None:
+                self._linhas -= antigo[1]
+            self._itens[chave] = (resultado, tamanho)
+            self._linhas += tamanho
+            while len(self._itens) > self.max_itens or self._linhas > self.max_linhas:
+                _, (_, removido) = self._itens.popitem(last=False)
+                self._linhas -= removido
+
+    def _limpar(self) -> None:
+        self._itens.clear()
+        self._linhas = 0
+
+    def limpar(self) -> None:
+        """Descarta todos os resultados"""
+        with self._lock:
+            self._limpar()
+
+    def estatisticas(self) -> Dict[str, int]:
+        """Acertos, faltas, itens e linhas em cache"""
+        with self._lock:
+            return {
+                "acertos": self.acertos,
+                "faltas": self.faltas,
+                "itens": len(self._itens),
+                "linhas": self._linhas,
+            }
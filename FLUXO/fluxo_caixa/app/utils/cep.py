@@ -0,0 +1,298 @@
+"""
+Base local de CEPs
+Cache persistido das consultas ao ViaCEP (ou dump importado), indice de prefixo e cache LRU em memoria
+"""
+import csv
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.config.settings import Settings
+
+CRIAR_CEPS_SQL = """
+    CREATE TABLE IF NOT EXISTS ceps (
+        cep TEXT PRIMARY KEY,
+        logradouro TEXT NOT NULL DEFAULT '',
+        bairro TEXT NOT NULL DEFAULT '',
+        cidade TEXT NOT NULL DEFAULT '',
+        uf TEXT NOT NULL DEFAULT '',
+        origem TEXT NOT NULL DEFAULT 'dump',
+        atualizado_em TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    ) WITHOUT ROWID
+"""
+
+UPSERT_CEP_SQL = """
+    INSERT INTO ceps (cep, logradouro, bairro, cidade, uf, origem)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(cep) DO UPDATE SET
+        logradouro = excluded.logradouro,
+        bairro = excluded.bairro,
+        cidade = excluded.cidade,
+        uf = excluded.uf,
+        origem = excluded.origem,
+        atualizado_em = CURRENT_TIMESTAMP
+"""
+
+# CEPs que o ViaCEP nao encontrou: evitam nova ida a rede enquanto validos
+CRIAR_AUSENTES_SQL = """
+    CREATE TABLE IF NOT EXISTS ceps_ausentes (
+        cep TEXT PRIMARY KEY,
+        consultado_em TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    ) WITHOUT ROWID
+"""
+
+CAMPOS = ("logradouro", "bairro", "cidade", "uf")
+
+VIACEP_URL = "https://viacep.com.br/ws/{cep}/json/"
+# (conexao, leitura): falha rapido em link instavel sem travar o formulario
+VIACEP_TIMEOUT = (2, 3)
+# Segundos em que um CEP nao encontrado deixa de ir a rede (CEP novo aparece depois)
+VALIDADE_AUSENTE = 6 * 3600
+
+
+def limpar_cep(cep: str) -> str:
+    """Mantem apenas os digitos do CEP"""
+    return "".join(filter(str.isdigit, cep or ""))
+
+
+class BaseCEP:
+    """Base SQLite de CEPs com cache LRU na frente.
+
+    Nenhum dump acompanha a aplicacao: sem um importado (Settings.CEP_DUMP_PATH
+    ou scripts/importar_ceps.py) a base e o cache persistido do ViaCEP.
+    A chave primaria (tabela WITHOUT ROWID) serve de indice de prefixo:
+    buscar_prefixo usa a faixa `cep >= prefixo AND cep < prefixo || ':'`.
+    Consultas na rede usam uma requests.Session com pool de conexoes e o
+    resultado e gravado na base, entao cada CEP vai a rede uma unica vez;
+    CEPs nao encontrados ficam em ceps_ausentes por `validade_ausente` segundos.
+    """
+
+    def __init__(
+        self,
+        caminho=None,
+        dump: Optional[Path] = None,
+        usar_rede: bool = True,
+        tamanho_cache: int = 4096,
+        url_api: str = VIACEP_URL,
+        timeout=VIACEP_TIMEOUT,
+        validade_ausente: int = VALIDADE_AUSENTE,
+        carregar_dump: bool = True,
+    ):
+        self.caminho = Path(caminho or Settings.CEP_DB_PATH)
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        self.usar_rede = usar_rede
+        self.tamanho_cache = tamanho_cache
+        # url_api com '{cep}'; permite apontar para um servidor local em testes
+        self.url_api = url_api
+        self.timeout = timeout
+        self.validade_ausente = validade_ausente
+        self._cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._sessao: Optional[requests.Session] = None
+
+        # Conexao unica reaproveitada (protegida pelo lock) para leitura rapida
+        self._conn = sqlite3.connect(self.caminho, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute(CRIAR_CEPS_SQL)
+        self._conn.execute(CRIAR_AUSENTES_SQL)
+        self._conn.commit()
+
+        dump = Path(dump) if dump else Settings.CEP_DUMP_PATH
+        if carregar_dump and dump.exists() and self.total() == 0:
+            self.importar(dump)
+
+    def total(self) -> int:
+        """Quantidade de CEPs na base local"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM ceps").fetchone()[0]
+
+    def importar(self, caminho) -> int:
+        """Carrega dump .csv ou .db/.sqlite na base local"""
+        caminho = Path(caminho)
+        if caminho.suffix.lower() == ".csv":
+            return self.importar_csv(caminho)
+        return self.importar_sqlite(caminho)
+
+    def importar_csv(self, caminho) -> int:
+        """Importa CSV com colunas cep, logradouro, bairro, cidade, uf (',' ou ';')"""
+        with open(caminho, newline="", encoding="utf-8-sig") as arquivo:
+            amostra = arquivo.read(4096)
+            arquivo.seek(0)
+            dialeto = csv.Sniffer().sniff(amostra, delimiters=",;")
+            leitor = csv.DictReader(arquivo, dialect=dialeto)
+            linhas = []
+            for row in leitor:
+                row = {(k or "").strip().lower(): (v or "").strip() for k, v in row.items()}
+                cep = limpar_cep(row.get("cep", ""))
+                if len(cep) != 8:
+                    continue
+                cidade = row.get("cidade") or row.get("localidade", "")
+                linhas.append((cep, row.get("logradouro", ""), row.get("bairro", ""), cidade,
+                               row.get("uf", "").upper(), "dump"))
+
+        with self._lock:
+            try:
+                self._conn.executemany(UPSERT_CEP_SQL, linhas)
+                self._conn.commit()
+            except sqlite3.Error as e:
+                self._conn.rollback()
+                raise Exception(f"Erro ao importar CEPs: {e}")
+            self._cache.clear()
+        return len(linhas)
+
+    def importar_sqlite(self, caminho, tabela: str = "ceps") -> int:
+        """Importa tabela de outro banco SQLite com as mesmas colunas de endereco"""
+        with self._lock:
+            try:
+                self._conn.execute("ATTACH DATABASE ? AS dump", (str(caminho),))
+                try:
+                    cursor = self._conn.execute(
+                        f"""
+                        INSERT OR REPLACE INTO ceps (cep, logradouro, bairro, cidade, uf, origem)
+                        SELECT cep, COALESCE(logradouro, ''), COALESCE(bairro, ''),
+                               COALESCE(cidade, ''), UPPER(COALESCE(uf, '')), 'dump'
+                        FROM dump.{tabela}
+                        WHERE length(cep) = 8
+                        """
+                    )
+                    self._conn.commit()
+                finally:
+                    self._conn.execute("DETACH DATABASE dump")
+            except sqlite3.Error as e:
+                self._conn.rollback()
+                raise Exception(f"Erro ao importar CEPs: {e}")
+            self._cache.clear()
+            return cursor.rowcount
+
+    def _do_cache(self, cep: str) -> Optional[Dict]:
+        with self._lock:
+            endereco = self._cache.get(cep)
+            if endereco is not None:
+                self._cache.move_to_end(cep)
+            return endereco
+
+    def _guardar_cache(self, cep: str, endereco: Dict) -> None:
+        with self._lock:
+            self._cache[cep] = endereco
+            self._cache.move_to_end(cep)
+            if len(self._cache) > self.tamanho_cache:
+                self._cache.popitem(last=False)
+
+    def _consultar_local(self, cep: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT cep, logradouro, bairro, cidade, uf FROM ceps WHERE cep = ?", (cep,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def ausente(self, cep: str) -> bool:
+        """Indica se o ViaCEP respondeu 'nao encontrado' para o CEP ha pouco"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM ceps_ausentes WHERE cep = ? AND consultado_em > datetime('now', ?)",
+                (limpar_cep(cep), f"-{int(self.validade_ausente)} seconds"),
+            ).fetchone()
+        return row is not None
+
+    def _sessao_http(self) -> requests.Session:
+        with self._lock:
+            if self._sessao is None:
+                sessao = requests.Session()
+                adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=1)
+                sessao.mount("https://", adaptador)
+                sessao.mount("http://", adaptador)
+                sessao.headers["Accept"] = "application/json"
+                self._sessao = sessao
+            return self._sessao
+
+    def _consultar_rede(self, cep: str) -> Optional[Dict]:
+        """Consulta ViaCEP e persiste o resultado. None se nao encontrado"""
+        response = self._sessao_http().get(self.url_api.format(cep=cep), timeout=self.timeout)
+        response.raise_for_status()
+        dados = response.json()
+        if "erro" in dados:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO ceps_ausentes (cep, consultado_em) VALUES (?, CURRENT_TIMESTAMP)",
+                    (cep,),
+                )
+                self._conn.commit()
+            return None
+        endereco = {
+            "cep": cep,
+            "logradouro": dados.get("logradouro", ""),
+            "bairro": dados.get("bairro", ""),
+            "cidade": dados.get("localidade", ""),
+            "uf": dados.get("uf", ""),
+        }
+        with self._lock:
+            self._conn.execute(UPSERT_CEP_SQL, (cep, *(endereco[c] for c in CAMPOS), "viacep"))
+            self._conn.execute("DELETE FROM ceps_ausentes WHERE cep = ?", (cep,))
+            self._conn.commit()
+        return endereco
+
+    def buscar(self, cep: str, usar_rede: Optional[bool] = None) -> Optional[Dict]:
+        """
+        Busca endereco: cache LRU, depois base local, depois ViaCEP (opcional)
+
+        CEP sem 8 digitos ou nao encontrado ha pouco (ver ausente) nao vai a rede.
+
+        Returns:
+            Dicionario com cep, logradouro, bairro, cidade e uf, ou None
+
+        Raises:
+            requests.exceptions.RequestException: falha na consulta em rede
+        """
+        cep = limpar_cep(cep)
+        endereco = self._do_cache(cep) or self._consultar_local(cep)
+        if (
+            endereco is None
+            and len(cep) == 8
+            and (self.usar_rede if usar_rede is None else usar_rede)
+            and not self.ausente(cep)
+        ):
+            endereco = self._consultar_rede(cep)
+        if endereco is not None:
+            self._guardar_cache(cep, endereco)
+        return dict(endereco) if endereco else None
+
+    def buscar_prefixo(self, prefixo: str, limite: int = 50) -> List[Dict]:
+        """Lista CEPs que comecam com o prefixo (ex.: '01310')"""
+        prefixo = limpar_cep(prefixo)[:8]
+        if not prefixo:
+            return []
+        # ':' vem logo depois de '9' na ordenacao: faixa cobre todo o prefixo
+        fim = prefixo + ":"
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT cep, logradouro, bairro, cidade, uf FROM ceps "
+                "WHERE cep >= ? AND cep < ? ORDER BY cep LIMIT ?",
+                (prefixo, fim, limite),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def fechar(self) -> None:
+        """Fecha conexao e sessao HTTP"""
+        with self._lock:
+            self._conn.close()
+            if self._sessao is not None:
+                self._sessao.close()
+
+
+_base: Optional[BaseCEP] = None
+_base_lock = threading.Lock()
+
+
+def obter_base_cep() -> BaseCEP:
+    """Instancia compartilhada da base de CEPs (criada no primeiro uso)"""
+    global _base
+    if _base is None:
+        with _base_lock:
+            if _base is None:
+                _base = BaseCEP()
+    return _base
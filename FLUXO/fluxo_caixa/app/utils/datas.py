@@ -0,0 +1,29 @@
+"""Datas como ordinal do dia (date.toordinal), a chave indexada de lancamentos.dia"""
+from datetime import date, datetime
+from typing import Union
+
+# julianday(data) - DESLOCAMENTO_JULIANO == date.fromisoformat(data).toordinal()
+DESLOCAMENTO_JULIANO = 1721424.5
+
+# Expressao da coluna gerada lancamentos.dia (horario, se houver, e descartado)
+DIA_SQL = f"CAST(julianday(data) - {DESLOCAMENTO_JULIANO} AS INTEGER)"
+
+# Ordinal de 1970-01-01: dia - ORDINAL_EPOCA = dias desde a epoca (datetime64[D])
+ORDINAL_EPOCA = 719163
+
+
+def para_dia(valor: Union[str, date, datetime]) -> int:
+    """Converte 'AAAA-MM-DD[ HH:MM:SS]', date ou datetime no ordinal do dia"""
+    if isinstance(valor, datetime):
+        return valor.date().toordinal()
+    if isinstance(valor, date):
+        return valor.toordinal()
+    try:
+        return date.fromisoformat(str(valor)[:10]).toordinal()
+    except ValueError:
+        raise ValueError(f"Data invalida: {valor}") from None
+
+
+def de_dia(dia: int) -> date:
+    """Ordinal do dia -> date"""
+    return date.fromordinal(dia)
@@ -0,0 +1,138 @@
+"""
+Validacao de CPF/CNPJ
+Implementacao unica dos digitos verificadores: escalar para formularios e vetorizada (NumPy) para importacoes
+"""
+import re
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+PESOS_CPF_1 = (10, 9, 8, 7, 6, 5, 4, 3, 2)
+PESOS_CPF_2 = (11, 10, 9, 8, 7, 6, 5, 4, 3, 2)
+PESOS_CNPJ_1 = (5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)
+PESOS_CNPJ_2 = (6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)
+
+# Codigos de motivo do lote; MENSAGENS[tipo][codigo] tem o texto de cada um
+VALIDO, TAMANHO, REPETIDOS, DIGITO = 0, 1, 2, 3
+
+MENSAGENS = {
+    "cpf": ("CPF valido", "CPF deve ter 11 digitos",
+            "CPF com digitos repetidos e invalido", "CPF com digito verificador invalido"),
+    "cnpj": ("CNPJ valido", "CNPJ deve ter 14 digitos",
+             "CNPJ com digitos repetidos e invalido", "CNPJ com digito verificador invalido"),
+}
+
+TAMANHOS = {"cpf": 11, "cnpj": 14}
+_PESOS = {"cpf": (PESOS_CPF_1, PESOS_CPF_2), "cnpj": (PESOS_CNPJ_1, PESOS_CNPJ_2)}
+_PESOS_NP = {tipo: tuple(np.array(p, dtype=np.int64) for p in pesos) for tipo, pesos in _PESOS.items()}
+_NAO_DIGITO = re.compile(r"[^0-9]")
+
+
+def limpar_documento(documento: Optional[str]) -> str:
+    """Mantem apenas os digitos ASCII do documento"""
+    documento = documento or ""
+    if documento.isascii() and documento.isdigit():
+        return documento
+    return _NAO_DIGITO.sub("", documento)
+
+
+def _digito(soma: int) -> int:
+    resto = soma % 11
+    return 0 if resto < 2 else 11 - resto
+
+
+def _validar(documento: str, tipo: str) -> Tuple[bool, str]:
+    mensagens = MENSAGENS[tipo]
+    limpo = limpar_documento(documento)
+    tamanho = TAMANHOS[tipo]
+    if len(limpo) != tamanho:
+        return False, mensagens[TAMANHO]
+    if limpo == limpo[0] * tamanho:
+        return False, mensagens[REPETIDOS]
+
+    digitos = [int(c) for c in limpo]
+    pesos1, pesos2 = _PESOS[tipo]
+    d1 = _digito(sum(d * p for d, p in zip(digitos, pesos1)))
+    d2 = _digito(sum(d * p for d, p in zip(digitos, pesos2)))
+    if digitos[-2] != d1 or digitos[-1] != d2:
+        return False, mensagens[DIGITO]
+    return True, mensagens[VALIDO]
+
+
+def validar_cpf(cpf: str) -> Tuple[bool, str]:
+    """Valida um CPF (com ou sem formatacao). Retorna (valido, mensagem)"""
+    return _validar(cpf, "cpf")
+
+
+def validar_cnpj(cnpj: str) -> Tuple[bool, str]:
+    """Valida um CNPJ (com ou sem formatacao). Retorna (valido, mensagem)"""
+    return _validar(cnpj, "cnpj")
+
+
+def _codigos_lote(limpos: List[str], tipo: str) -> np.ndarray:
+    """Codigos de motivo para documentos ja limpos, vetorizado por matriz de digitos"""
+    tamanho = TAMANHOS[tipo]
+    codigos = np.full(len(limpos), TAMANHO, dtype=np.int8)
+    indices = np.fromiter((i for i, d in enumerate(limpos) if len(d) == tamanho), dtype=np.intp)
+    if indices.size == 0:
+        return codigos
+
+    texto = "".join(limpos[i] for i in indices).encode("ascii")
+    matriz = (np.frombuffer(texto, dtype=np.uint8).reshape(-1, tamanho) - ord("0")).astype(np.int64)
+
+    pesos1, pesos2 = _PESOS_NP[tipo]
+    resto1 = (matriz[:, :-2] @ pesos1) % 11
+    resto2 = (matriz[:, :-1] @ pesos2) % 11
+    d1 = np.where(resto1 < 2, 0, 11 - resto1)
+    d2 = np.where(resto2 < 2, 0, 11 - resto2)
+
+    repetidos = (matriz == matriz[:, :1]).all(axis=1)
+    digito_ok = (matriz[:, -2] == d1) & (matriz[:, -1] == d2)
+    codigos[indices] = np.select([repetidos, ~digito_ok], [REPETIDOS, DIGITO], VALIDO)
+    return codigos
+
+
+def validar_lote(
+    documentos: Sequence[str], tipo: Optional[str] = None
+) -> Tuple[np.ndarray, List[str]]:
+    """
+    Valida muitos CPFs/CNPJs de uma vez
+
+    Os digitos viram uma matriz (n x 11 ou n x 14) e os verificadores sao
+    calculados com produto matricial, sem laco Python por documento.
+
+    Args:
+        documentos: sequencia de documentos (com ou sem formatacao)
+        tipo: 'cpf', 'cnpj' ou None para decidir pelo numero de digitos
+            (14 = CNPJ, demais = CPF)
+
+    Returns:
+        (mascara booleana de validos, lista de motivos com as mesmas
+        mensagens de validar_cpf/validar_cnpj)
+    """
+    limpos = [limpar_documento(d) for d in documentos]
+    if tipo is not None:
+        codigos = _codigos_lote(limpos, tipo)
+        mensagens = MENSAGENS[tipo]
+        return codigos == VALIDO, [mensagens[c] for c in codigos.tolist()]
+
+    e_cnpj = np.fromiter((len(d) == 14 for d in limpos), dtype=bool, count=len(limpos))
+    validos = np.zeros(len(limpos), dtype=bool)
+    motivos: List[str] = [""] * len(limpos)
+    for tipo_grupo, mascara in (("cpf", ~e_cnpj), ("cnpj", e_cnpj)):
+        indices = np.flatnonzero(mascara)
+        if indices.size == 0:
+            continue
+        codigos = _codigos_lote([limpos[i] for i in indices], tipo_grupo)
+        validos[indices] = codigos == VALIDO
+        mensagens = MENSAGENS[tipo_grupo]
+        for i, c in zip(indices.tolist(), codigos.tolist()):
+            motivos[i] = mensagens[c]
+    return validos, motivos
+
+
+def filtrar_validos(documentos: Iterable[str], tipo: Optional[str] = None) -> List[str]:
+    """Retorna apenas os documentos validos, na ordem original"""
+    documentos = list(documentos)
+    validos, _ = validar_lote(documentos, tipo)
+    return [d for d, ok in zip(documentos, validos.tolist()) if ok]
@@ -3,10 +3,14 @@ Validadores reutilizaveis
 Responsavel por validacoes de CPF, CNPJ, CEP, Email, etc.
 """
 import re
-from typing import Tuple
+from typing import List, Optional, Sequence, Tuple
 from datetime import datetime
+import numpy as np
 import requests
 
+from app.utils.cep import obter_base_cep
+from app.utils.documentos import validar_cnpj, validar_cpf, validar_lote
+
 
 def validar_data(data_str: str, formato: str = "%Y-%m-%d") -> bool:
     """Valida formato de data"""
@@ -41,29 +45,7 @@ class ValidadorDocumento:
         Returns:
             (valido, mensagem)
         """
-        cpf_limpo = ''.join(filter(str.isdigit, cpf))
-
-        if len(cpf_limpo) != 11:
-            return False, "CPF deve ter 11 digitos"
-
-        if cpf_limpo == cpf_limpo[0] * 11:
-            return False, "CPF com digitos repetidos e invalido"
-
-        soma = sum(int(cpf_limpo[i]) * (10 - i) for i in range(9))
-        digito1 = 11 - (soma % 11)
-        digito1 = 0 if digito1 >= 10 else digito1
-
-        if int(cpf_limpo[9]) != digito1:
-            return False, "CPF com digito verificador invalido"
-
-        soma = sum(int(cpf_limpo[i]) * (11 - i) for i in range(10))
-        digito2 = 11 - (soma % 11)
-        digito2 = 0 if digito2 >= 10 else digito2
-
-        if int(cpf_limpo[10]) != digito2:
-            return False, "CPF com digito verificador invalido"
-
-        return True, "CPF valido"
+        return validar_cpf(cpf)
 
     @staticmethod
     def validar_cnpj(cnpj: str) -> Tuple[bool, str]:
@@ -76,32 +58,21 @@ class ValidadorDocumento:
         Returns:
             (valido, mensagem)
         """
-        cnpj_limpo = ''.join(filter(str.isdigit, cnpj))
-
-        if len(cnpj_limpo) != 14:
-            return False, "CNPJ deve ter 14 digitos"
-
-        if cnpj_limpo == cnpj_limpo[0] * 14:
-            return False, "CNPJ com digitos repetidos e invalido"
+        return validar_cnpj(cnpj)
 
-        multiplicadores1 = [5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
-        soma = sum(int(cnpj_limpo[i]) * multiplicadores1[i] for i in range(12))
-        digito1 = 11 - (soma % 11)
-        digito1 = 0 if digito1 >= 10 else digito1
-
-        if int(cnpj_limpo[12]) != digito1:
-            return False, "CNPJ com digito verificador invalido"
-
-        multiplicadores2 = [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3]
-        soma = sum(int(cnpj_limpo[i]) * multiplicadores2[i] for i in range(12))
-        soma += int(cnpj_limpo[12]) * 2
-        digito2 = 11 - (soma % 11)
-        digito2 = 0 if digito2 >= 10 else digito2
+    @staticmethod
+    def validar_lote(documentos: Sequence[str], tipo: Optional[str] = None) -> Tuple[np.ndarray, List[str]]:
+        """
+        Valida lote de CPFs/CNPJs de uma vez (importacoes)
 
-        if int(cnpj_limpo[13]) != digito2:
-            return False, "CNPJ com digito verificador invalido"
+        Args:
+            documentos: Sequencia de documentos
+            tipo: 'cpf', 'cnpj' ou None (decide pelo numero de digitos)
 
-        return True, "CNPJ valido"
+        Returns:
+            (mascara booleana de validos, lista de motivos)
+        """
+        return validar_lote(documentos, tipo)
 
 
 class ValidadorCEP:
@@ -128,7 +99,7 @@ class ValidadorCEP:
     @staticmethod
     def buscar_endereco(cep: str) -> Tuple[bool, dict]:
         """
-        Busca endereco via API ViaCEP
+        Busca endereco na base local de CEPs (ViaCEP apenas como fallback)
 
         Args:
             cep: String com CEP
@@ -143,24 +114,13 @@ class ValidadorCEP:
             return False, {'erro': msg}
 
         try:
-            url = f"https://viacep.com.br/ws/{cep_limpo}/json/"
-            response = requests.get(url, timeout=5)
-
-            if response.status_code == 200:
-                dados = response.json()
-
-                if 'erro' in dados:
-                    return False, {'erro': 'CEP nao encontrado'}
-
-                return True, {
-                    'logradouro': dados.get('logradouro', ''),
-                    'bairro': dados.get('bairro', ''),
-                    'cidade': dados.get('localidade', ''),
-                    'uf': dados.get('uf', ''),
-                    'cep': cep_limpo
-                }
-            return False, {'erro': 'Erro ao consultar API de CEP'}
+            endereco = obter_base_cep().buscar(cep_limpo)
+            if endereco is None:
+                return False, {'erro': 'CEP nao encontrado'}
+            return True, endereco
 
+        except requests.exceptions.HTTPError:
+            return False, {'erro': 'Erro ao consultar API de CEP'}
         except requests.exceptions.RequestException:
             return False, {'erro': 'Erro de conexao ao buscar CEP'}
         except Exception as e:
@@ -0,0 +1,367 @@
+"""Benchmark dos caminhos criticos: servicos, relatorios, cadastros e exportacao.
+
+Roda sobre bancos gerados por gerar_dados.py (10k, 1M e 10M lancamentos por
+padrao). Cada banco e gerado uma vez na pasta de trabalho e reaproveitado nas
+execucoes seguintes, entao os numeros de execucoes diferentes sao comparaveis.
+Os tempos vao para um JSON; com --comparar, o script compara com uma execucao
+anterior e sai com codigo 1 se algum caso ficou mais lento que a tolerancia.
+
+Uso: python scripts/benchmark.py [--tamanhos 10k,1m,10m] [--dir pasta] [--saida arquivo.json]
+         [--repeticoes 5] [--casos trecho] [--comparar referencia.json] [--tolerancia 0.25]
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import pandas as pd
+
+# Garantir imports do projeto
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.database.database import Database
+from app.models.lancamento import Lancamento, TipoLancamento
+from app.services.cliente import ServicoCliente
+from app.services.fornecedor import ServicoFornecedor
+from app.services.funcionario import ServicoFuncionario
+from app.services.lancamento import ServicoLancamento
+from app.services.relatorios import GeradorRelatorios
+from gerar_dados import ParametrosGeracao, gerar
+
+TAMANHOS = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+
+# Periodos fixos dentro dos 60 meses gerados (2021-01 a 2025-12)
+SEMANA = ("2025-11-03", "2025-11-09")
+MES = ("2025-11-01", "2025-11-30")
+TRIMESTRE = ("2025-07-01", "2025-09-30")
+ANO = ("2025-01-01", "2025-12-31")
+# Comeca e termina no meio do mes: exercita as bordas fora do resumo mensal
+PARCIAL = ("2025-03-15", "2025-08-20")
+
+TAMANHO_LOTE_INSERCAO = 1_000
+# Exportacoes sao lentas demais para repetir tanto quanto as consultas
+REPETICOES_EXPORTACAO = 3
+# Relatorio PDF grande: primeiros lancamentos do banco, em serie e em processos
+LINHAS_PDF_GRANDE = 100_000
+PROCESSOS_PDF_GRANDE = os.cpu_count() or 1
+# Diferencas abaixo disso (segundos) sao ruido, mesmo se passarem da tolerancia
+PISO_REGRESSAO = 0.005
+
+
+def _filtros(periodo: Sequence[str], **extras) -> Dict:
+    return {"data_inicio": periodo[0], "data_fim": periodo[1], **extras}
+
+
+@dataclass
+class Contexto:
+    """Banco e servicos de um tamanho, compartilhados pelos casos"""
+
+    db: Database
+    pasta_saida: Path
+    lancamentos: ServicoLancamento = field(init=False)
+    clientes: ServicoCliente = field(init=False)
+    fornecedores: ServicoFornecedor = field(init=False)
+    funcionarios: ServicoFuncionario = field(init=False)
+    lote: List[Lancamento] = field(default_factory=list)
+    ultimo_id: int = 0
+    # Cliente e fornecedor com mais lancamentos (pior caso das listagens por entidade)
+    cliente_id: int = 0
+    fornecedor_id: int = 0
+
+    def __post_init__(self) -> None:
+        self.lancamentos = ServicoLancamento(self.db)
+        self.clientes = ServicoCliente(self.db)
+        self.fornecedores = ServicoFornecedor(self.db)
+        self.funcionarios = ServicoFuncionario(self.db)
+        self.ultimo_id = self.db.obter_um("SELECT COALESCE(MAX(id), 0) AS id FROM lancamentos")["id"]
+        self.cliente_id = self._mais_frequente("cliente_id")
+        self.fornecedor_id = self._mais_frequente("fornecedor_id")
+        categoria = self.db.obter_um(
+            "SELECT categoria_id, id FROM subcategorias ORDER BY id LIMIT 1"
+        )
+        self.lote = [
+            Lancamento(
+                data=f"2025-12-{1 + i % 28:02d}", tipo=TipoLancamento.DESPESA,
+                categoria_id=categoria["categoria_id"], subcategoria_id=categoria["id"],
+                valor=round(10 + i * 0.37, 2), descricao=f"Benchmark insercao {i:06d}",
+                banco="Itau",
+            )
+            for i in range(TAMANHO_LOTE_INSERCAO)
+        ]
+
+    def _mais_frequente(self, coluna: str) -> int:
+        linha = self.db.obter_um(
+            f"SELECT {coluna} AS id FROM lancamentos WHERE {coluna} IS NOT NULL "
+            f"GROUP BY {coluna} ORDER BY COUNT(*) DESC LIMIT 1"
+        )
+        return linha["id"] if linha else 0
+
+    def relatorios(self) -> GeradorRelatorios:
+        """Gerador novo a cada execucao: mede a consulta, nao o cache"""
+        return GeradorRelatorios(self.db)
+
+
+@dataclass
+class Caso:
+    """Operacao medida; executar devolve quantos itens processou"""
+
+    nome: str
+    executar: Callable[[Contexto], int]
+    repeticoes: Optional[int] = None
+    # Chamado fora da medicao depois de cada execucao (ex.: apagar o que foi inserido)
+    desfazer: Optional[Callable[[Contexto], None]] = None
+
+
+class _Contagem:
+    """Repassa as linhas de um gerador contando quantas foram consumidas"""
+
+    def __init__(self, linhas: Iterable):
+        self.linhas = linhas
+        self.total = 0
+
+    def __iter__(self):
+        for linha in self.linhas:
+            self.total += 1
+            yield linha
+
+
+def _exportar_excel(ctx: Contexto) -> int:
+    from app.services.export_excel_profissional import gerar_planilha_profissional
+
+    gerador = ctx.relatorios()
+    lancamentos = _Contagem(gerador.iterar_lancamentos_por_periodo(*MES))
+    resumo_mensal = pd.DataFrame(
+        gerador.resumo_mensal(_filtros(ANO)), columns=["ano_mes", "entradas", "saidas", "saldo"]
+    )
+    resumo_anual = pd.DataFrame(
+        gerador.resumo_anual(_filtros(ANO)), columns=["ano", "entradas", "saidas", "saldo"]
+    )
+    comparativo = gerador.comparativo_mensal(MES[0])
+    gerar_planilha_profissional(
+        lancamentos, resumo_mensal, resumo_anual, ctx.pasta_saida / "benchmark.xlsx", comparativo
+    )
+    return lancamentos.total
+
+
+def _exportar_pdf(ctx: Contexto) -> int:
+    from app.services.impressao import gerar_pdf_relatorio
+
+    gerador = ctx.relatorios()
+    filtros = _filtros(SEMANA)
+    lancamentos = _Contagem(gerador.iterar_lancamentos_por_periodo(*SEMANA))
+    resumo = gerador.gerar_resumo(filtros)
+    totais = {
+        "entradas": resumo["total_receitas"],
+        "saidas": resumo["total_despesas"],
+        "saldo": resumo["saldo"],
+    }
+    gerar_pdf_relatorio(
+        "Fluxo de Caixa", f"{SEMANA[0]} a {SEMANA[1]}", lancamentos, totais,
+        ctx.pasta_saida / "benchmark.pdf",
+    )
+    return lancamentos.total
+
+
+def _exportar_pdf_grande(processos: int) -> Callable[[Contexto], int]:
+    def executar(ctx: Contexto) -> int:
+        from app.services.impressao import gerar_pdf_relatorio
+
+        lancamentos = _Contagem(islice(ctx.relatorios().iterar_lancamentos(), LINHAS_PDF_GRANDE))
+        totais = {"entradas": 0, "saidas": 0, "saldo": 0}
+        gerar_pdf_relatorio(
+            "Fluxo de Caixa", f"{LINHAS_PDF_GRANDE:,} lancamentos", lancamentos, totais,
+            ctx.pasta_saida / f"benchmark_{processos}p.pdf", processos,
+        )
+        return lancamentos.total
+
+    return executar
+
+
+def _inserir_lote(ctx: Contexto) -> int:
+    inseridos, _ = ctx.lancamentos.criar_em_lote(ctx.lote)
+    return inseridos
+
+
+def _apagar_lote(ctx: Contexto) -> None:
+    # Apagar pelo banco mantem resumos e cubo coerentes via triggers
+    ctx.db.deletar("DELETE FROM lancamentos WHERE id > ?", (ctx.ultimo_id,))
+
+
+CASOS = (
+    Caso("lancamentos.obter_por_periodo_mes", lambda c: len(c.lancamentos.obter_por_periodo(*MES))),
+    Caso("lancamentos.buscar_trimestre_receitas",
+         lambda c: len(c.lancamentos.buscar(_filtros(TRIMESTRE, tipo="Receita")))),
+    Caso("lancamentos.buscar_descricao_ano",
+         lambda c: len(c.lancamentos.buscar(_filtros(ANO, descricao="0001")))),
+    Caso("lancamentos.obter_por_cliente", lambda c: len(c.lancamentos.obter_por_cliente(c.cliente_id))),
+    Caso("lancamentos.obter_por_fornecedor",
+         lambda c: len(c.lancamentos.obter_por_fornecedor(c.fornecedor_id))),
+    Caso("lancamentos.total_receitas_parcial",
+         lambda c: round(c.lancamentos.calcular_total_receitas(_filtros(PARCIAL)))),
+    Caso("lancamentos.totais_por_categoria_parcial",
+         lambda c: len(c.lancamentos.obter_totais_por_categoria(TipoLancamento.DESPESA, _filtros(PARCIAL)))),
+    Caso("lancamentos.movimentacao_diaria_trimestre",
+         lambda c: len(c.lancamentos.obter_movimentacao_diaria(*TRIMESTRE))),
+    Caso("relatorios.gerar_resumo_ano", lambda c: len(c.relatorios().gerar_resumo(_filtros(ANO)))),
+    Caso("relatorios.gerar_resumo_parcial", lambda c: len(c.relatorios().gerar_resumo(_filtros(PARCIAL)))),
+    Caso("relatorios.gerar_resumo_tudo", lambda c: len(c.relatorios().gerar_resumo())),
+    Caso("relatorios.obter_lancamentos_filtrados_mes",
+         lambda c: len(c.relatorios().obter_lancamentos_filtrados(_filtros(MES)))),
+    Caso("clientes.listar", lambda c: len(c.clientes.listar(limite=100))),
+    Caso("clientes.listar_ativos_pagina", lambda c: len(c.clientes.listar_ativos(limite=100, offset=1000))),
+    Caso("fornecedores.listar_todos", lambda c: len(c.fornecedores.listar_todos())),
+    Caso("fornecedores.buscar_por_nome", lambda c: len(c.fornecedores.buscar_por_nome("Tecnologia"))),
+    Caso("funcionarios.listar", lambda c: len(c.funcionarios.listar(limite=100))),
+    Caso("funcionarios.listar_ativos", lambda c: len(c.funcionarios.listar_ativos(limite=100))),
+    Caso("lancamentos.criar_em_lote", _inserir_lote, desfazer=_apagar_lote),
+    Caso("exportacao.excel_mes", _exportar_excel, repeticoes=REPETICOES_EXPORTACAO),
+    Caso("exportacao.pdf_semana", _exportar_pdf, repeticoes=REPETICOES_EXPORTACAO),
+    Caso("exportacao.pdf_100k", _exportar_pdf_grande(1), repeticoes=1),
+    Caso("exportacao.pdf_100k_processos", _exportar_pdf_grande(PROCESSOS_PDF_GRANDE), repeticoes=1),
+)
+
+
+def _tamanho(rotulo: str) -> int:
+    rotulo = rotulo.strip().lower()
+    if rotulo in TAMANHOS:
+        return TAMANHOS[rotulo]
+    try:
+        return int(rotulo.replace("_", ""))
+    except ValueError:
+        raise ValueError(f"Tamanho invalido: {rotulo} (use {', '.join(TAMANHOS)} ou um numero)")
+
+
+def preparar_banco(pasta: Path, rotulo: str, lancamentos: int) -> Database:
+    """Abre o banco do tamanho pedido, gerando-o na primeira vez"""
+    caminho = pasta / f"benchmark_{rotulo}.db"
+    db = Database(caminho)
+    existentes = db.obter_um("SELECT COUNT(*) AS n FROM lancamentos")["n"]
+    if existentes < lancamentos:
+        print(f"Gerando {caminho.name} ({lancamentos:,} lancamentos)...")
+        inicio = time.perf_counter()
+        gerar(db, ParametrosGeracao(lancamentos))
+        print(f"   pronto em {time.perf_counter() - inicio:.1f}s")
+    return db
+
+
+def medir(caso: Caso, ctx: Contexto, repeticoes: int) -> Dict:
+    """Executa o caso algumas vezes e resume os tempos (segundos)"""
+    tempos = []
+    itens = 0
+    for _ in range(min(repeticoes, caso.repeticoes or repeticoes)):
+        gc.collect()
+        inicio = time.perf_counter()
+        itens = caso.executar(ctx)
+        tempos.append(time.perf_counter() - inicio)
+        if caso.desfazer:
+            caso.desfazer(ctx)
+    return {
+        "repeticoes": len(tempos),
+        "itens": itens,
+        "minimo": round(min(tempos), 6),
+        "mediana": round(statistics.median(tempos), 6),
+        "media": round(statistics.fmean(tempos), 6),
+    }
+
+
+def executar(
+    tamanhos: Sequence[str], pasta: Path, repeticoes: int = 5, filtro: Optional[str] = None
+) -> Dict:
+    """Roda os casos em cada tamanho e devolve o resultado no formato do JSON"""
+    resultado = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "ambiente": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "plataforma": platform.platform(),
+        },
+        "repeticoes": repeticoes,
+        "resultados": {},
+    }
+    casos = [c for c in CASOS if not filtro or filtro in c.nome]
+    pasta.mkdir(parents=True, exist_ok=True)
+    for rotulo in tamanhos:
+        lancamentos = _tamanho(rotulo)
+        db = preparar_banco(pasta, rotulo, lancamentos)
+        with tempfile.TemporaryDirectory() as saida:
+            ctx = Contexto(db, Path(saida))
+            print(f"\n== {rotulo} ({lancamentos:,} lancamentos) ==")
+            medidos = {}
+            for caso in casos:
+                medidos[caso.nome] = medir(caso, ctx, repeticoes)
+                m = medidos[caso.nome]
+                print(f"  {caso.nome:<42} {m['mediana'] * 1000:>10.1f} ms"
+                      f"  (min {m['minimo'] * 1000:.1f})  {m['itens']:>9,} itens")
+        db.fechar()
+        resultado["resultados"][rotulo] = {"lancamentos": lancamentos, "casos": medidos}
+    return resultado
+
+
+def comparar(atual: Dict, referencia: Dict, tolerancia: float) -> List[str]:
+    """Casos cuja mediana piorou mais que a tolerancia em relacao a referencia"""
+    regressoes = []
+    for rotulo, dados in atual["resultados"].items():
+        base = referencia.get("resultados", {}).get(rotulo, {}).get("casos", {})
+        for nome, medido in dados["casos"].items():
+            anterior = base.get(nome)
+            if not anterior:
+                continue
+            antes, agora = anterior["mediana"], medido["mediana"]
+            if agora > antes * (1 + tolerancia) and agora - antes > PISO_REGRESSAO:
+                regressoes.append(
+                    f"{rotulo} {nome}: {antes * 1000:.1f} ms -> {agora * 1000:.1f} ms "
+                    f"(+{(agora / antes - 1) * 100:.0f}%)"
+                )
+    return regressoes
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark dos servicos do fluxo de caixa")
+    parser.add_argument("--tamanhos", default="10k,1m,10m",
+                        help="lista separada por virgula: 10k, 1m, 10m ou numero de lancamentos")
+    parser.add_argument("--dir", type=Path, default=PROJECT_ROOT / "output" / "benchmark",
+                        help="pasta dos bancos gerados (reaproveitados entre execucoes)")
+    parser.add_argument("--saida", type=Path, help="arquivo JSON do resultado")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--casos", help="roda so os casos cujo nome contem este trecho")
+    parser.add_argument("--comparar", type=Path, help="JSON de referencia para detectar regressoes")
+    parser.add_argument("--tolerancia", type=float, default=0.25,
+                        help="piora aceita sobre a mediana da referencia (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    tamanhos = [t.strip() for t in args.tamanhos.split(",") if t.strip()]
+    resultado = executar(tamanhos, args.dir, args.repeticoes, args.casos)
+
+    saida = args.saida or args.dir / f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    saida.write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\nResultado: {saida}")
+
+    if args.comparar:
+        referencia = json.loads(args.comparar.read_text(encoding="utf-8"))
+        regressoes = comparar(resultado, referencia, args.tolerancia)
+        if regressoes:
+            print(f"\n[ERRO] {len(regressoes)} regressao(oes) acima de {args.tolerancia:.0%}:")
+            for linha in regressoes:
+                print(f"  {linha}")
+            return 1
+        print(f"\n[OK] Nenhuma regressao acima de {args.tolerancia:.0%} em relacao a {args.comparar.name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""Benchmark da validacao de CPF/CNPJ: caminho escalar x lote vetorizado (NumPy).
+
+Uso: python scripts/benchmark_documentos.py [quantidade]
+"""
+from __future__ import annotations
+
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+# Garantir imports do projeto
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.utils.documentos import validar_cnpj, validar_cpf, validar_lote
+
+
+def _gerar_documentos(quantidade: int, semente: int = 42) -> List[str]:
+    """Mistura CPFs e CNPJs aleatorios, formatados ou nao (maioria invalida)"""
+    aleatorio = random.Random(semente)
+    documentos = []
+    for _ in range(quantidade):
+        if aleatorio.random() < 0.6:
+            doc = "".join(aleatorio.choice("0123456789") for _ in range(11))
+            if aleatorio.random() < 0.5:
+                doc = f"{doc[:3]}.{doc[3:6]}.{doc[6:9]}-{doc[9:]}"
+        else:
+            doc = "".join(aleatorio.choice("0123456789") for _ in range(14))
+            if aleatorio.random() < 0.5:
+                doc = f"{doc[:2]}.{doc[2:5]}.{doc[5:8]}/{doc[8:12]}-{doc[12:]}"
+        documentos.append(doc)
+    return documentos
+
+
+def _escalar(documentos: List[str]) -> List[bool]:
+    resultado = []
+    for doc in documentos:
+        digitos = sum(c.isdigit() for c in doc)
+        validar = validar_cnpj if digitos == 14 else validar_cpf
+        resultado.append(validar(doc)[0])
+    return resultado
+
+
+def benchmark(quantidade: int = 200_000) -> None:
+    documentos = _gerar_documentos(quantidade)
+
+    inicio = time.perf_counter()
+    esperado = _escalar(documentos)
+    tempo_escalar = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    validos, _ = validar_lote(documentos)
+    tempo_lote = time.perf_counter() - inicio
+
+    if validos.tolist() != esperado:
+        raise SystemExit("[ERRO] Lote e escalar divergem")
+
+    print(f"Documentos: {quantidade:,} | validos: {int(validos.sum()):,}")
+    print(f"Escalar: {tempo_escalar:.3f}s ({quantidade / tempo_escalar:,.0f}/s)")
+    print(f"Lote:    {tempo_lote:.3f}s ({quantidade / tempo_lote:,.0f}/s)")
+    print(f"Ganho:   {tempo_escalar / tempo_lote:.1f}x")
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
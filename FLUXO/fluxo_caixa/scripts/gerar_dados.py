@@ -0,0 +1,374 @@
+"""Gerador deterministico de dados sinteticos em escala de producao.
+
+Mesma semente e mesmos parametros geram o mesmo banco, para que todos os
+testes de desempenho usem um conjunto compartilhado e reproduzivel.
+Cadastros passam pelo ImportadorEntidades (CPF/CNPJ validos); lancamentos
+sao gerados mes a mes, em ordem de data, com sazonalidade, tendencia de
+crescimento e mix de categorias, e gravados com executemany em lotes.
+Durante a carga os triggers de INSERT dos resumos ficam desligados; resumo
+mensal e cubo sao recalculados uma unica vez no fim.
+
+Uso: python scripts/gerar_dados.py LANCAMENTOS [--banco caminho.db] [--semente 42]
+         [--clientes N] [--fornecedores N] [--funcionarios N] [--inicio AAAA-MM] [--meses N]
+"""
+from __future__ import annotations
+
+import argparse
+import calendar
+import math
+import random
+import sys
+import time
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Garantir imports do projeto
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.database.database import Database
+from app.database.migracoes import TRIGGERS_INSERT_RESUMOS, recalcular_resumos
+from app.models.categoria import TipoCategoria
+from app.services.importacao import ImportadorEntidades
+from app.utils.assinatura import assinatura_lancamento
+from seed import _gerar_cnpj, _gerar_cpf
+
+# Peso de cada mes (jan..dez): fevereiro fraco, fim de ano forte
+SAZONALIDADE = (0.88, 0.80, 0.96, 0.97, 1.00, 0.98, 1.01, 1.00, 0.99, 1.04, 1.10, 1.27)
+CRESCIMENTO_ANUAL = 0.08
+# Peso do dia da semana (seg..dom)
+PESO_DIA_SEMANA = (1.0, 1.0, 1.0, 1.0, 1.1, 0.3, 0.08)
+
+# Mix de lancamentos: tipo da categoria -> (fracao, tipo do lancamento, mediana, dispersao)
+MIX_CATEGORIAS = {
+    TipoCategoria.RECEITA: (0.42, "Receita", 1800.0, 0.9),
+    TipoCategoria.DESPESA_VARIAVEL: (0.30, "Despesa", 600.0, 1.0),
+    TipoCategoria.DESPESA_FIXA: (0.10, "Despesa", 900.0, 0.6),
+    TipoCategoria.DESPESA_PESSOAL: (0.18, "Despesa", 350.0, 0.8),
+}
+# Despesas fixas concentram no inicio do mes (aluguel, contas)
+DIAS_DESPESA_FIXA = (5, 6, 7, 8, 9, 10, 15, 20)
+
+BANCOS = ("Itau", "Bradesco", "Banco do Brasil", "Caixa", "Santander", "Nubank")
+PESO_BANCOS = (0.30, 0.22, 0.18, 0.12, 0.10, 0.08)
+
+CIDADES = (
+    ("Sao Paulo", "SP", "01001000"), ("Rio de Janeiro", "RJ", "20040002"),
+    ("Belo Horizonte", "MG", "30140071"), ("Curitiba", "PR", "80010000"),
+    ("Porto Alegre", "RS", "90010000"), ("Salvador", "BA", "40140000"),
+    ("Recife", "PE", "50010000"), ("Goiania", "GO", "74003010"),
+)
+NOMES = ("Ana", "Bruno", "Carla", "Diego", "Elisa", "Fabio", "Gabriela", "Hugo",
+         "Isabel", "Joao", "Larissa", "Marcos", "Natalia", "Otavio", "Paula", "Rafael")
+SOBRENOMES = ("Silva", "Souza", "Oliveira", "Santos", "Lima", "Costa", "Pereira",
+              "Almeida", "Ferreira", "Rodrigues", "Gomes", "Martins")
+RAMOS = ("Comercio", "Servicos", "Industria", "Logistica", "Tecnologia", "Distribuidora")
+CARGOS = ("Assistente", "Analista", "Vendedor", "Gerente", "Tecnico", "Coordenador")
+
+# Faixas de indice dos documentos, longe dos usados pelo seed.py
+BASE_CPF_CLIENTES = 300_000_000
+BASE_CNPJ_CLIENTES = 300_000_000_000
+BASE_CNPJ_FORNECEDORES = 400_000_000_000
+BASE_CPF_FORNECEDORES = 400_000_000
+BASE_CPF_FUNCIONARIOS = 500_000_000
+
+TAMANHO_LOTE = 50_000
+
+INSERIR_LANCAMENTO_SQL = """
+    INSERT OR IGNORE INTO lancamentos (
+        data, tipo, categoria_id, subcategoria_id, valor, descricao,
+        cliente_id, fornecedor_id, funcionario_id, banco, nota_fiscal,
+        comprovante, observacao, assinatura
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+@dataclass
+class ParametrosGeracao:
+    """Tamanho e formato do conjunto gerado"""
+
+    lancamentos: int
+    clientes: int = 2000
+    fornecedores: int = 500
+    funcionarios: int = 200
+    semente: int = 42
+    # Primeiro mes ('AAAA-MM') e quantidade de meses; fixos para nao depender da data atual
+    inicio: str = "2021-01"
+    meses: int = 60
+
+
+def _nome_pessoa(aleatorio: random.Random) -> str:
+    return f"{aleatorio.choice(NOMES)} {aleatorio.choice(SOBRENOMES)} {aleatorio.choice(SOBRENOMES)}"
+
+
+def gerar_clientes(quantidade: int, aleatorio: random.Random) -> List[Dict]:
+    """Clientes (70% pessoa fisica) com documento e email unicos"""
+    clientes = []
+    for i in range(quantidade):
+        cidade, uf, cep = aleatorio.choice(CIDADES)
+        fisica = aleatorio.random() < 0.7
+        clientes.append({
+            "nome": _nome_pessoa(aleatorio) if fisica else f"{aleatorio.choice(SOBRENOMES)} {aleatorio.choice(RAMOS)} LTDA",
+            "tipo_pessoa": "fisica" if fisica else "juridica",
+            "documento": _gerar_cpf(BASE_CPF_CLIENTES + i) if fisica else _gerar_cnpj(BASE_CNPJ_CLIENTES + i),
+            "email": f"cliente{i:07d}@exemplo.com.br",
+            "telefone": f"11{9_0000_0000 + i:09d}"[:11],
+            "cep": cep,
+            "logradouro": f"Rua {aleatorio.choice(SOBRENOMES)}",
+            "numero": str(aleatorio.randint(1, 3000)),
+            "bairro": "Centro",
+            "cidade": cidade,
+            "uf": uf,
+        })
+    return clientes
+
+
+def gerar_fornecedores(quantidade: int, aleatorio: random.Random) -> List[Dict]:
+    """Fornecedores (90% pessoa juridica) com nome e CPF/CNPJ unicos"""
+    fornecedores = []
+    for i in range(quantidade):
+        cidade, uf, cep = aleatorio.choice(CIDADES)
+        juridica = aleatorio.random() < 0.9
+        fornecedores.append({
+            "tipo": "juridica" if juridica else "fisica",
+            "nome": f"Fornecedor {i:06d} {aleatorio.choice(RAMOS)}",
+            "cpf_cnpj": _gerar_cnpj(BASE_CNPJ_FORNECEDORES + i) if juridica else _gerar_cpf(BASE_CPF_FORNECEDORES + i),
+            "nome_fantasia": f"{aleatorio.choice(SOBRENOMES)} {aleatorio.choice(RAMOS)}",
+            "telefone": f"11{3_0000_0000 + i:09d}"[:11],
+            "email": f"fornecedor{i:06d}@exemplo.com.br",
+            "cep": cep,
+            "endereco": f"Av {aleatorio.choice(SOBRENOMES)}",
+            "numero": str(aleatorio.randint(1, 3000)),
+            "cidade": cidade,
+            "estado": uf,
+        })
+    return fornecedores
+
+
+def gerar_funcionarios(quantidade: int, aleatorio: random.Random, inicio: date) -> List[Dict]:
+    """Funcionarios com CPF e email unicos"""
+    funcionarios = []
+    for i in range(quantidade):
+        cidade, uf, cep = aleatorio.choice(CIDADES)
+        admissao = date(inicio.year - aleatorio.randint(0, 8), aleatorio.randint(1, 12), aleatorio.randint(1, 28))
+        funcionarios.append({
+            "nome": _nome_pessoa(aleatorio),
+            "cpf": _gerar_cpf(BASE_CPF_FUNCIONARIOS + i),
+            "cargo": aleatorio.choice(CARGOS),
+            "email": f"funcionario{i:06d}@exemplo.com.br",
+            "telefone": f"11{8_0000_0000 + i:09d}"[:11],
+            "cep": cep,
+            "logradouro": f"Rua {aleatorio.choice(SOBRENOMES)}",
+            "numero": str(aleatorio.randint(1, 3000)),
+            "bairro": "Centro",
+            "cidade": cidade,
+            "uf": uf,
+            "salario": round(aleatorio.lognormvariate(math.log(3500), 0.5), 2),
+            "data_admissao": admissao.isoformat(),
+        })
+    return funcionarios
+
+
+def _distribuir(total: int, pesos: Sequence[float]) -> List[int]:
+    """Divide total proporcionalmente aos pesos (maiores restos), somando exatamente total"""
+    soma = sum(pesos)
+    cotas = [total * p / soma for p in pesos]
+    partes = [int(c) for c in cotas]
+    restos = sorted(range(len(pesos)), key=lambda i: (partes[i] - cotas[i], i))
+    for i in restos[: total - sum(partes)]:
+        partes[i] += 1
+    return partes
+
+
+def _meses(inicio: str, quantidade: int) -> List[Tuple[int, int]]:
+    ano, mes = int(inicio[:4]), int(inicio[5:7])
+    meses = []
+    for _ in range(quantidade):
+        meses.append((ano, mes))
+        ano, mes = (ano + 1, 1) if mes == 12 else (ano, mes + 1)
+    return meses
+
+
+def _escolher_enviesado(aleatorio: random.Random, ids: Sequence[int]) -> Optional[int]:
+    """Poucos clientes/fornecedores concentram a maior parte do volume"""
+    if not ids:
+        return None
+    return ids[int(len(ids) * aleatorio.random() ** 2.5)]
+
+
+def gerar_lancamentos(
+    params: ParametrosGeracao,
+    categorias: Dict[TipoCategoria, Tuple[int, List[int]]],
+    clientes: Sequence[int],
+    fornecedores: Sequence[int],
+    funcionarios: Sequence[int],
+    aleatorio: random.Random,
+) -> Iterator[tuple]:
+    """Linhas de lancamentos (parametros de INSERIR_LANCAMENTO_SQL) em ordem de data"""
+    meses = _meses(params.inicio, params.meses)
+    pesos_mes = [
+        SAZONALIDADE[mes - 1] * (1 + CRESCIMENTO_ANUAL) ** (k / 12)
+        for k, (_, mes) in enumerate(meses)
+    ]
+    tipos = list(MIX_CATEGORIAS)
+    fracoes = [MIX_CATEGORIAS[t][0] for t in tipos]
+    sequencia = 0
+
+    for k, ((ano, mes), quantidade) in enumerate(zip(meses, _distribuir(params.lancamentos, pesos_mes))):
+        dias = calendar.monthrange(ano, mes)[1]
+        datas = [date(ano, mes, d) for d in range(1, dias + 1)]
+        pesos_dia = [PESO_DIA_SEMANA[d.weekday()] for d in datas]
+        inflacao = (1 + CRESCIMENTO_ANUAL / 2) ** (k / 12)
+
+        linhas = []
+        for dia, tipo_categoria in zip(
+            aleatorio.choices(datas, pesos_dia, k=quantidade),
+            aleatorio.choices(tipos, fracoes, k=quantidade),
+        ):
+            _, tipo, mediana, dispersao = MIX_CATEGORIAS[tipo_categoria]
+            categoria_id, subcategorias = categorias[tipo_categoria]
+            # Subcategorias com peso decrescente: a primeira domina
+            subcategoria_id = subcategorias[min(int(aleatorio.expovariate(0.8)), len(subcategorias) - 1)]
+            if tipo_categoria == TipoCategoria.DESPESA_FIXA:
+                dia = dia.replace(day=aleatorio.choice(DIAS_DESPESA_FIXA))
+
+            cliente_id = fornecedor_id = funcionario_id = None
+            if tipo == "Receita":
+                cliente_id = _escolher_enviesado(aleatorio, clientes)
+            elif tipo_categoria == TipoCategoria.DESPESA_PESSOAL and funcionarios:
+                funcionario_id = aleatorio.choice(funcionarios)
+            else:
+                fornecedor_id = _escolher_enviesado(aleatorio, fornecedores)
+
+            sequencia += 1
+            valor = max(1.0, round(aleatorio.lognormvariate(math.log(mediana * inflacao), dispersao), 2))
+            data = dia.isoformat()
+            descricao = f"{'Recebimento' if tipo == 'Receita' else 'Pagamento'} {sequencia:09d}"
+            nota_fiscal = f"NF{sequencia:09d}" if aleatorio.random() < 0.6 else ""
+            linhas.append((
+                data, tipo, categoria_id, subcategoria_id, valor, descricao,
+                cliente_id, fornecedor_id, funcionario_id,
+                aleatorio.choices(BANCOS, PESO_BANCOS)[0], nota_fiscal, "", "",
+                assinatura_lancamento(data, tipo, valor, descricao, cliente_id, fornecedor_id, funcionario_id),
+            ))
+        linhas.sort(key=lambda linha: linha[0])
+        yield from linhas
+
+
+def _categorias(db: Database) -> Dict[TipoCategoria, Tuple[int, List[int]]]:
+    categorias = {}
+    for tipo in MIX_CATEGORIAS:
+        categoria = db.obter_um("SELECT id FROM categorias WHERE tipo = ? ORDER BY id LIMIT 1", (tipo.value,))
+        if not categoria:
+            raise Exception(f"Erro: categoria padrao '{tipo.value}' nao encontrada")
+        subcategorias = db.obter_todos(
+            "SELECT id FROM subcategorias WHERE categoria_id = ? ORDER BY id", (categoria["id"],)
+        )
+        if not subcategorias:
+            raise Exception(f"Erro: categoria '{tipo.value}' sem subcategorias")
+        categorias[tipo] = (categoria["id"], [row["id"] for row in subcategorias])
+    return categorias
+
+
+def _ids(db: Database, tabela: str, coluna: str, prefixo: str) -> List[int]:
+    rows = db.obter_todos(f"SELECT id FROM {tabela} WHERE {coluna} LIKE ? ORDER BY id", (f"{prefixo}%",))
+    return [row["id"] for row in rows]
+
+
+def gerar(db: Database, params: ParametrosGeracao, progresso: bool = True) -> Dict[str, int]:
+    """
+    Gera cadastros e lancamentos no banco
+
+    Cadastros ja existentes (mesmos documentos) sao reaproveitados e
+    lancamentos repetidos sao ignorados pela assinatura, entao rodar de
+    novo com os mesmos parametros nao duplica dados.
+
+    Returns:
+        Quantidade gravada por tabela
+    """
+    aleatorio = random.Random(params.semente)
+    inicio = date(int(params.inicio[:4]), int(params.inicio[5:7]), 1)
+    importador = ImportadorEntidades(db, usuario="gerar_dados")
+    gravados = {
+        "clientes": importador.importar_clientes(gerar_clientes(params.clientes, aleatorio)).inseridos,
+        "fornecedores": importador.importar_fornecedores(gerar_fornecedores(params.fornecedores, aleatorio)).inseridos,
+        "funcionarios": importador.importar_funcionarios(
+            gerar_funcionarios(params.funcionarios, aleatorio, inicio)
+        ).inseridos,
+    }
+    clientes = _ids(db, "clientes", "email", "cliente")
+    fornecedores = _ids(db, "fornecedores", "nome", "Fornecedor ")
+    funcionarios = _ids(db, "funcionarios", "email", "funcionario")
+
+    conn = db.get_connection()
+    try:
+        # Banco de benchmark: durabilidade de cada lote nao importa
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("PRAGMA cache_size = -262144")
+        # Sem UPSERT nos resumos a cada linha; recalculados uma vez no fim
+        for trigger in TRIGGERS_INSERT_RESUMOS:
+            conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        linhas = gerar_lancamentos(
+            params, _categorias(db), clientes, fornecedores, funcionarios, aleatorio
+        )
+        gravados["lancamentos"] = 0
+        inicio_gravacao = time.perf_counter()
+        lote: List[tuple] = []
+        for linha in linhas:
+            lote.append(linha)
+            if len(lote) >= TAMANHO_LOTE:
+                # rowcount ignora as linhas gravadas pelos triggers dos resumos
+                gravados["lancamentos"] += conn.executemany(INSERIR_LANCAMENTO_SQL, lote).rowcount
+                conn.commit()
+                lote.clear()
+                if progresso:
+                    feitos = gravados["lancamentos"]
+                    print(f"\r   lancamentos: {feitos:,} ({feitos / (time.perf_counter() - inicio_gravacao):,.0f}/s)",
+                          end="", flush=True)
+        if lote:
+            gravados["lancamentos"] += conn.executemany(INSERIR_LANCAMENTO_SQL, lote).rowcount
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        raise Exception(f"Erro ao gerar lancamentos: {e}")
+    finally:
+        # Mesmo com erro ou Ctrl+C: triggers de volta e resumos coerentes
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            recalcular_resumos(conn)
+            conn.commit()
+        finally:
+            conn.close()
+    if progresso:
+        print()
+    return gravados
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Gera dados sinteticos deterministicos")
+    parser.add_argument("lancamentos", type=int, help="quantidade de lancamentos")
+    parser.add_argument("--banco", help="arquivo SQLite (padrao: banco do sistema)")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--clientes", type=int, default=2000)
+    parser.add_argument("--fornecedores", type=int, default=500)
+    parser.add_argument("--funcionarios", type=int, default=200)
+    parser.add_argument("--inicio", default="2021-01", help="primeiro mes (AAAA-MM)")
+    parser.add_argument("--meses", type=int, default=60)
+    args = parser.parse_args(argv)
+
+    params = ParametrosGeracao(
+        args.lancamentos, args.clientes, args.fornecedores, args.funcionarios,
+        args.semente, args.inicio, args.meses,
+    )
+    db = Database(args.banco) if args.banco else Database()
+    inicio = time.perf_counter()
+    gravados = gerar(db, params)
+    db.fechar()
+    print(" | ".join(f"{tabela}: {n:,}" for tabela, n in gravados.items()))
+    print(f"Tempo: {time.perf_counter() - inicio:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
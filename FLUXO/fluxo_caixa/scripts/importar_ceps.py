@@ -0,0 +1,56 @@
+"""Importa um dump de CEPs para a base local (data/ceps.db).
+
+A aplicacao nao distribui dump de CEPs: sem um, a base local so guarda o que
+ja foi consultado no ViaCEP. O carregamento automatico de
+Settings.CEP_DUMP_PATH so acontece com a base vazia; este script importa (ou
+atualiza) a qualquer momento, sem apagar os CEPs ja em cache.
+
+Aceita CSV com colunas cep, logradouro, bairro, cidade (ou localidade) e uf,
+separado por ',' ou ';', ou um banco SQLite com tabela de mesmas colunas.
+
+Uso: python scripts/importar_ceps.py dump.csv [--base data/ceps.db] [--tabela ceps]
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Optional, Sequence
+
+# Garantir imports do projeto
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.config.settings import Settings
+from app.utils.cep import BaseCEP
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Importa dump de CEPs para a base local")
+    parser.add_argument("dump", type=Path, help="arquivo .csv ou banco .db/.sqlite")
+    parser.add_argument("--base", type=Path, default=Settings.CEP_DB_PATH)
+    parser.add_argument("--tabela", default="ceps", help="tabela do dump SQLite")
+    args = parser.parse_args(argv)
+
+    if not args.dump.exists():
+        print(f"[ERRO] Arquivo nao encontrado: {args.dump}")
+        return 1
+
+    base = BaseCEP(args.base, usar_rede=False, carregar_dump=False)
+    try:
+        antes = base.total()
+        inicio = time.perf_counter()
+        if args.dump.suffix.lower() == ".csv":
+            importados = base.importar_csv(args.dump)
+        else:
+            importados = base.importar_sqlite(args.dump, args.tabela)
+        print(f"[OK] {importados} CEPs importados em {time.perf_counter() - inicio:.1f}s "
+              f"({antes} -> {base.total()} na base {args.base})")
+    finally:
+        base.fechar()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -15,6 +15,7 @@ from app.database.database import Database
 from app.models.categoria import TipoCategoria
 from app.models.lancamento import TipoLancamento
 from app.services.categoria import ServicoCategoria
+from app.utils.assinatura import assinatura_lancamento
 
 
 def _calcular_dv_cpf(numeros: List[int]) -> int:
@@ -255,36 +256,26 @@ def _pick(items: List[int], index: int) -> int:
     return items[index % len(items)]
 
 
-def _lancamento_existe(db: Database, data: Dict) -> bool:
-    row = db.obter_um(
-        """
-        SELECT id FROM lancamentos
-        WHERE data = ? AND tipo = ? AND valor = ? AND descricao = ?
-          AND COALESCE(cliente_id, 0) = ?
-          AND COALESCE(fornecedor_id, 0) = ?
-        LIMIT 1
-        """,
-        (
-            data["data"],
-            data["tipo"],
-            data["valor"],
-            data["descricao"],
-            data.get("cliente_id") or 0,
-            data.get("fornecedor_id") or 0,
-        ),
+def _assinatura(data: Dict) -> str:
+    return assinatura_lancamento(
+        data["data"],
+        data["tipo"],
+        data["valor"],
+        data["descricao"],
+        data.get("cliente_id"),
+        data.get("fornecedor_id"),
+        data.get("funcionario_id"),
     )
-    return row is not None
 
 
 def _inserir_lancamento(db: Database, data: Dict) -> bool:
-    if _lancamento_existe(db, data):
-        return False
+    # Duplicado pela assinatura: o indice unico ignora a linha (INSERT OR IGNORE)
     query = """
-        INSERT INTO lancamentos (
+        INSERT OR IGNORE INTO lancamentos (
             data, tipo, categoria_id, subcategoria_id, valor, descricao,
             cliente_id, fornecedor_id, funcionario_id, banco, nota_fiscal,
-            comprovante, observacao
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            comprovante, observacao, assinatura
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     """
     params = (
         data["data"],
@@ -300,14 +291,14 @@ def _inserir_lancamento(db: Database, data: Dict) -> bool:
         data.get("nota_fiscal", ""),
         data.get("comprovante", ""),
         data.get("observacao", ""),
+        _assinatura(data),
     )
-    db.inserir(query, params)
-    return True
+    return db.atualizar(query, params) > 0
 
 
 def seed():
     db = Database()
-    ServicoCategoria(db)  # Garante categorias/subcategorias padrao
+    ServicoCategoria(db)  # Categorias/subcategorias padrao vem da migracao do schema
 
     # Mapear categorias e subcategorias por tipo
     cat_receita = _get_categoria_id(db, TipoCategoria.RECEITA)
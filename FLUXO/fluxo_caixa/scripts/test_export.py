@@ -42,36 +42,24 @@ def testar_exportacao() -> bool:
 
         # 4. Coletar dados
         print("\n4) Coletando dados...")
-        lancamentos = gerador.obter_lancamentos_por_periodo(data_inicio, data_fim)
-        df = pd.DataFrame(lancamentos)
-
-        # Resumo mensal
-        if not df.empty:
-            df['data'] = pd.to_datetime(df['data'])
-            df['ano_mes'] = df['data'].dt.to_period('M').astype(str)
-            entradas = df[df['tipo'] == 'Receita'].groupby('ano_mes')['valor'].sum().rename('entradas')
-            saidas = df[df['tipo'] == 'Despesa'].groupby('ano_mes')['valor'].sum().rename('saidas')
-            resumo_mensal = pd.concat([entradas, saidas], axis=1).fillna(0).reset_index()
-            resumo_mensal['saldo'] = resumo_mensal['entradas'] - resumo_mensal['saidas']
-        else:
-            resumo_mensal = pd.DataFrame(columns=['ano_mes', 'entradas', 'saidas', 'saldo'])
-
-        # Resumo anual
-        if not df.empty:
-            df['ano'] = df['data'].dt.year
-            entradas_a = df[df['tipo'] == 'Receita'].groupby('ano')['valor'].sum().rename('entradas')
-            saidas_a = df[df['tipo'] == 'Despesa'].groupby('ano')['valor'].sum().rename('saidas')
-            resumo_anual = pd.concat([entradas_a, saidas_a], axis=1).fillna(0).reset_index()
-            resumo_anual['saldo'] = resumo_anual['entradas'] - resumo_anual['saidas']
-        else:
-            resumo_anual = pd.DataFrame(columns=['ano', 'entradas', 'saidas', 'saldo'])
+        lancamentos = gerador.iterar_lancamentos_por_periodo(data_inicio, data_fim)
+        filtros = {'data_inicio': data_inicio, 'data_fim': data_fim}
+
+        # Resumos mensal e anual (tabela de resumo mensal + bordas parciais)
+        resumo_mensal = pd.DataFrame(
+            gerador.resumo_mensal(filtros), columns=['ano_mes', 'entradas', 'saidas', 'saldo']
+        )
+        resumo_anual = pd.DataFrame(
+            gerador.resumo_anual(filtros), columns=['ano', 'entradas', 'saidas', 'saldo']
+        )
 
         # 5. Exportar
         print("\n5) Exportando arquivo...")
         output_dir = PROJECT_ROOT / 'output'
         output_dir.mkdir(exist_ok=True)
         arquivo_saida = output_dir / f"Relatorio_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        gerar_planilha_profissional(lancamentos, resumo_mensal, resumo_anual, arquivo_saida)
+        comparativo = gerador.comparativo_mensal(data_fim)
+        gerar_planilha_profissional(lancamentos, resumo_mensal, resumo_anual, arquivo_saida, comparativo)
         print(f"   OK: {arquivo_saida}")
 
         # 6. Validar arquivo
@@ -0,0 +1,485 @@
+"""Verificacao dos planos de consulta (EXPLAIN QUERY PLAN) de todo SQL dos servicos.
+
+Percorre os metodos de leitura dos servicos sobre um banco gerado por
+gerar_dados.py, captura cada instrucao pela instrumentacao do Database (com
+o plano obtido na propria conexao, com os parametros reais) e aponta:
+
+- varreduras completas de tabela (SCAN sem indice) e varreduras de indice;
+- ordenacoes/agrupamentos em B-tree temporaria;
+- regressoes em relacao a referencia: consulta que fazia busca por indice e
+  passou a varrer a tabela (ou um indice inteiro) faz o script sair com codigo 1;
+- sugestoes de indice (de cobertura quando possivel), testadas num
+  CREATE INDEX desfeito em seguida: so aparecem as que o SQLite de fato usa.
+
+Uso: python scripts/verificar_planos.py [--lancamentos 50000] [--dir pasta]
+         [--referencia scripts/planos_referencia.json] [--atualizar] [--saida relatorio.json]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sqlite3
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+# Garantir imports do projeto
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.database.database import Database
+from app.database.instrumentacao import Instrumentacao, RegistroConsulta
+from app.models.categoria import TipoCategoria
+from app.models.fornecedor import TipoPessoa
+from app.models.lancamento import TipoLancamento
+from app.services.auditoria import ServicoAuditoria
+from app.services.categoria import ServicoCategoria
+from app.services.cliente import ServicoCliente
+from app.services.conciliacao import ConciliadorBancario
+from app.services.cubo import CuboLancamentos
+from app.services.duplicados import DetectorDuplicados
+from app.services.fornecedor import ServicoFornecedor
+from app.services.funcionario import ServicoFuncionario
+from app.services.lancamento import ServicoLancamento
+from app.services.relatorios import GeradorRelatorios
+from benchmark import ANO, MES, PARCIAL, TRIMESTRE, preparar_banco
+
+REFERENCIA_PADRAO = Path(__file__).resolve().parent / "planos_referencia.json"
+
+# Tabelas menores que isso podem ser varridas sem problema (categorias, controle)
+LIMITE_TABELA_PEQUENA = 100
+# Gravidade crescente: regressao e passar de um status para outro pior
+STATUS = ("busca", "varredura_indice", "varredura")
+MAX_COLUNAS_COBERTURA = 6
+# Nome do indice criado (e desfeito) para testar cada sugestao
+INDICE_TESTE = "idx_verificacao_plano"
+
+_SCAN = re.compile(r"^SCAN (\w+)(?: USING (COVERING )?INDEX (\w+))?")
+_TEMP = re.compile(r"USE TEMP B-TREE FOR (.+)$")
+_TABELA_ALIAS = re.compile(r"\b(?:FROM|JOIN)\s+(?:main\.)?(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+_PALAVRAS = {
+    "WHERE", "LEFT", "RIGHT", "INNER", "OUTER", "CROSS", "JOIN", "ON", "GROUP", "ORDER",
+    "LIMIT", "USING", "UNION", "NATURAL", "INDEXED", "NOT", "AS", "SELECT", "HAVING",
+}
+_COMPARACAO = re.compile(
+    r"(?:\b(\w+)\.)?\b(\w+)\s*(==|=|>=|<=|<>|!=|>|<|\s+BETWEEN\b|\s+IN\b|\s+IS\b|\s+LIKE\b)",
+    re.IGNORECASE,
+)
+_FUNCAO_COLUNA = re.compile(
+    r"\b(DATE|DATETIME|STRFTIME|SUBSTR|LOWER|UPPER|TRIM|JULIANDAY)\s*\(([^()]*)\)\s*"
+    r"(?:==|=|>=|<=|<>|!=|>|<|BETWEEN\b)",
+    re.IGNORECASE,
+)
+_CLAUSULA = r"\b{}\s+BY\s+(.+?)(?:\bORDER\s+BY\b|\bLIMIT\b|\bHAVING\b|\)|$)"
+
+
+@dataclass
+class Consulta:
+    """Consulta normalizada capturada no roteiro, com o plano e a analise"""
+
+    sql: str
+    plano: str
+    origens: Set[str] = field(default_factory=set)
+    status: str = "busca"
+    varreduras: List[str] = field(default_factory=list)
+    temp_btree: List[str] = field(default_factory=list)
+    notas: List[str] = field(default_factory=list)
+    sugestoes: List[str] = field(default_factory=list)
+
+
+def _roteiro(db: Database) -> List[Tuple[str, Callable[[], object]]]:
+    """Chamadas de leitura de todos os servicos, com ids reais do banco gerado"""
+    lancamentos = ServicoLancamento(db)
+    clientes = ServicoCliente(db)
+    fornecedores = ServicoFornecedor(db)
+    funcionarios = ServicoFuncionario(db)
+    categorias = ServicoCategoria(db)
+    gerador = GeradorRelatorios(db)
+    cubo = CuboLancamentos(gerador)
+
+    def primeiro(sql: str) -> Dict:
+        return db.obter_um(sql) or {}
+
+    lanc = primeiro("SELECT id, categoria_id FROM lancamentos ORDER BY id LIMIT 1")
+    cliente = primeiro("SELECT id, documento FROM clientes WHERE id IN "
+                       "(SELECT cliente_id FROM lancamentos WHERE cliente_id IS NOT NULL LIMIT 1)")
+    fornecedor = primeiro("SELECT id, cpf_cnpj FROM fornecedores WHERE id IN "
+                          "(SELECT fornecedor_id FROM lancamentos WHERE fornecedor_id IS NOT NULL LIMIT 1)")
+    funcionario = primeiro("SELECT id, cpf FROM funcionarios ORDER BY id LIMIT 1")
+    exemplo = lancamentos.obter(lanc.get("id", 0))
+    mes, ano = int(MES[0][5:7]), int(MES[0][:4])
+
+    def f(periodo: Sequence[str], **extras) -> Dict:
+        return {"data_inicio": periodo[0], "data_fim": periodo[1], **extras}
+
+    return [
+        # Lancamentos
+        ("lancamentos.obter", lambda: lancamentos.obter(lanc.get("id", 0))),
+        ("lancamentos.obter_duplicado", lambda: exemplo and lancamentos.obter_duplicado(exemplo)),
+        ("lancamentos.obter_por_periodo", lambda: lancamentos.obter_por_periodo(*MES)),
+        ("lancamentos.obter_por_tipo", lambda: lancamentos.obter_por_tipo(TipoLancamento.RECEITA)),
+        ("lancamentos.obter_por_categoria", lambda: lancamentos.obter_por_categoria(lanc.get("categoria_id", 0))),
+        ("lancamentos.obter_por_cliente", lambda: lancamentos.obter_por_cliente(cliente.get("id", 0))),
+        ("lancamentos.obter_por_fornecedor", lambda: lancamentos.obter_por_fornecedor(fornecedor.get("id", 0))),
+        ("lancamentos.buscar_periodo_tipo", lambda: lancamentos.buscar(f(TRIMESTRE, tipo="Receita"))),
+        ("lancamentos.buscar_descricao", lambda: lancamentos.buscar(f(ANO, descricao="0001"))),
+        ("lancamentos.buscar_cliente", lambda: lancamentos.buscar({"cliente_id": cliente.get("id", 0)})),
+        ("lancamentos.calcular_saldo", lambda: lancamentos.calcular_saldo(f(ANO))),
+        ("lancamentos.obter_totais_por_categoria",
+         lambda: lancamentos.obter_totais_por_categoria(TipoLancamento.DESPESA, f(ANO))),
+        ("lancamentos.obter_totais_por_subcategoria",
+         lambda: lancamentos.obter_totais_por_subcategoria(TipoLancamento.DESPESA, f(ANO))),
+        ("lancamentos.obter_movimentacao_diaria", lambda: lancamentos.obter_movimentacao_diaria(*MES)),
+        # Cadastros
+        ("clientes.listar", lambda: clientes.listar()),
+        ("clientes.listar_status", lambda: clientes.listar(status="ativo")),
+        ("clientes.obter", lambda: clientes.obter(cliente.get("id", 0))),
+        ("clientes.obter_por_documento", lambda: clientes.obter_por_documento(cliente.get("documento", ""))),
+        ("clientes.contar_por_status", lambda: clientes.contar_por_status("ativo")),
+        ("fornecedores.listar_todos", lambda: fornecedores.listar_todos()),
+        ("fornecedores.listar_por_tipo", lambda: fornecedores.listar_por_tipo(TipoPessoa.JURIDICA)),
+        ("fornecedores.buscar_por_nome", lambda: fornecedores.buscar_por_nome("Tecnologia")),
+        ("fornecedores.obter_por_cpf_cnpj", lambda: fornecedores.obter_por_cpf_cnpj(fornecedor.get("cpf_cnpj", ""))),
+        ("fornecedores.contar_ativos", lambda: fornecedores.contar_ativos()),
+        ("funcionarios.listar", lambda: funcionarios.listar()),
+        ("funcionarios.obter_por_cpf", lambda: funcionarios.obter_por_cpf(funcionario.get("cpf", ""))),
+        ("funcionarios.contar_por_status", lambda: funcionarios.contar_por_status("ativo")),
+        ("funcionarios.calcular_folha_mensal", lambda: funcionarios.calcular_folha_mensal(mes, ano)),
+        ("categorias.obter_todas_categorias", lambda: categorias.obter_todas_categorias()),
+        ("categorias.obter_categorias_por_tipo", lambda: categorias.obter_categorias_por_tipo(TipoCategoria.RECEITA)),
+        ("categorias.obter_todas_subcategorias", lambda: categorias.obter_todas_subcategorias()),
+        # Relatorios
+        ("relatorios.obter_lancamentos_filtrados", lambda: gerador.obter_lancamentos_filtrados(f(MES))),
+        ("relatorios.gerar_resumo_ano", lambda: gerador.gerar_resumo(f(ANO))),
+        ("relatorios.gerar_resumo_parcial", lambda: gerador.gerar_resumo(f(PARCIAL))),
+        ("relatorios.gerar_resumo_tudo", lambda: gerador.gerar_resumo()),
+        ("relatorios.resumo_mensal", lambda: gerador.resumo_mensal(f(ANO))),
+        ("relatorios.resumo_anual", lambda: gerador.resumo_anual()),
+        ("relatorios.totais_por_subcategoria", lambda: gerador.totais_por_subcategoria(f(PARCIAL))),
+        ("relatorios.comparativo_mensal", lambda: gerador.comparativo_mensal(MES[0])),
+        ("relatorios.comparar_periodos_parcial",
+         lambda: gerador.comparar_periodos({"a": PARCIAL, "b": TRIMESTRE})),
+        ("cubo.consultar", lambda: cubo.consultar(
+            ("ano_mes", "categoria_id"), filtros={"mes_inicio": ANO[0], "mes_fim": ANO[1]})),
+        ("cubo.consultar_fornecedor",
+         lambda: cubo.consultar(("banco",), filtros={"fornecedor_id": fornecedor.get("id", 0)})),
+        # Outros
+        ("conciliacao.pendentes", lambda: ConciliadorBancario(db).pendentes()),
+        ("duplicados.varrer", lambda: DetectorDuplicados(db).varrer(*MES)),
+        ("auditoria.consultar", lambda: ServicoAuditoria(db).consultar(*ANO)),
+    ]
+
+
+def capturar(db: Database) -> Tuple[Dict[str, Consulta], List[str]]:
+    """Executa o roteiro e agrupa as instrucoes por SQL normalizado"""
+    consultas: Dict[str, Consulta] = {}
+    erros: List[str] = []
+
+    def ouvir(registro: RegistroConsulta) -> None:
+        if not registro.plano:
+            return
+        consulta = consultas.get(registro.sql)
+        if consulta is None:
+            consulta = consultas[registro.sql] = Consulta(registro.sql, registro.plano)
+        consulta.origens.add(registro.origem)
+
+    roteiro = _roteiro(db)
+    db.instrumentacao.adicionar_ouvinte(ouvir)
+    try:
+        for nome, chamada in roteiro:
+            try:
+                chamada()
+            except Exception as e:
+                erros.append(f"{nome}: {e}")
+    finally:
+        db.instrumentacao.remover_ouvinte(ouvir)
+    return consultas, erros
+
+
+def _aliases(sql: str) -> Dict[str, str]:
+    """alias (ou o proprio nome) -> tabela, a partir de FROM/JOIN"""
+    aliases = {}
+    for tabela, alias in _TABELA_ALIAS.findall(sql):
+        aliases[tabela] = tabela
+        if alias and alias.upper() not in _PALAVRAS:
+            aliases[alias] = tabela
+    return aliases
+
+
+def analisar(consulta: Consulta, tamanhos: Dict[str, int], parciais: Set[str] = frozenset()) -> None:
+    """Classifica o plano: varreduras de tabelas nao pequenas e B-trees temporarias
+
+    Percorrer um indice parcial nao e varredura: o WHERE do indice ja filtrou.
+    """
+    aliases = _aliases(consulta.sql)
+    status = 0
+    for linha in consulta.plano.splitlines():
+        linha = linha.strip()
+        temp = _TEMP.search(linha)
+        if temp:
+            consulta.temp_btree.append(temp.group(1))
+            continue
+        scan = _SCAN.match(linha)
+        if not scan:
+            continue
+        tabela = aliases.get(scan.group(1), scan.group(1))
+        if tamanhos.get(tabela, 0) < LIMITE_TABELA_PEQUENA:
+            # CTE, subconsulta ou tabela pequena
+            continue
+        if scan.group(3) in parciais:
+            continue
+        if scan.group(3):
+            status = max(status, 1)
+            consulta.varreduras.append(f"{tabela} (indice {scan.group(3)})")
+        else:
+            status = max(status, 2)
+            consulta.varreduras.append(tabela)
+    consulta.status = STATUS[status]
+
+
+def _colunas_da_tabela(sql: str, tabela: str, colunas: Set[str], aliases: Dict[str, str],
+                       texto: Optional[str] = None) -> List[str]:
+    """Colunas da tabela citadas no trecho, na ordem em que aparecem"""
+    texto = sql if texto is None else texto
+    unica = len(set(aliases.values())) == 1
+    achadas: List[str] = []
+    for qualificador, nome in re.findall(r"(?:\b(\w+)\.)?\b(\w+)\b", texto):
+        if nome not in colunas or nome in achadas:
+            continue
+        if qualificador and aliases.get(qualificador) != tabela:
+            continue
+        if not qualificador and not unica:
+            continue
+        achadas.append(nome)
+    return achadas
+
+
+def _candidatos(sql: str, tabela: str, colunas: Set[str], aliases: Dict[str, str]) -> Tuple[List[List[str]], List[str]]:
+    """Indices candidatos (do mais completo ao mais simples) e notas sobre o SQL"""
+    notas = []
+    unica = len(set(aliases.values())) == 1
+    igualdade: List[str] = []
+    intervalo: List[str] = []
+    for qualificador, nome, operador in _COMPARACAO.findall(sql):
+        if nome not in colunas or (qualificador and aliases.get(qualificador) != tabela):
+            continue
+        if not qualificador and not unica:
+            continue
+        operador = operador.strip().upper()
+        if operador == "LIKE":
+            notas.append(f"LIKE em {nome}: com curinga no inicio ('%x%') nenhum indice ajuda; "
+                         "considere FTS5 ou busca por prefixo")
+        elif operador in ("=", "==", "IN", "IS"):
+            if nome not in igualdade:
+                igualdade.append(nome)
+        elif nome not in intervalo and nome not in igualdade:
+            intervalo.append(nome)
+    for funcao, argumentos in _FUNCAO_COLUNA.findall(sql):
+        for nome in _colunas_da_tabela(sql, tabela, colunas, aliases, argumentos):
+            notas.append(f"{funcao.upper()}({nome}) na comparacao impede o indice de {nome}; "
+                         "compare a coluna crua com um intervalo (ex.: dia >= ? AND dia < ?)")
+
+    agrupar = re.search(_CLAUSULA.format("GROUP"), sql, re.IGNORECASE)
+    ordenar = re.search(_CLAUSULA.format("ORDER"), sql, re.IGNORECASE)
+    agrupamento = _colunas_da_tabela(sql, tabela, colunas, aliases, agrupar.group(1)) if agrupar else []
+    ordenacao = _colunas_da_tabela(sql, tabela, colunas, aliases, ordenar.group(1)) if ordenar else []
+
+    chave = igualdade + intervalo[:1]
+    for extra in agrupamento or ordenacao:
+        if extra not in chave and not intervalo:
+            chave.append(extra)
+    if not chave:
+        return [], notas
+
+    candidatos = [chave]
+    seleciona_tudo = re.search(r"SELECT\s+(?:DISTINCT\s+)?(?:\w+\.)?\*", sql, re.IGNORECASE)
+    if not seleciona_tudo:
+        usadas = _colunas_da_tabela(sql, tabela, colunas, aliases)
+        cobertura = chave + [c for c in usadas if c not in chave]
+        if len(cobertura) > len(chave) and len(cobertura) <= MAX_COLUNAS_COBERTURA:
+            candidatos.insert(0, cobertura)
+    return candidatos, notas
+
+
+def _plano_sem_parametros(conn: sqlite3.Connection, sql: str) -> Optional[str]:
+    """EXPLAIN do SQL normalizado (literais viraram '?'; o valor nao muda o plano)"""
+    sql = sql.replace("IN (...)", "IN (?)")
+    try:
+        rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", [None] * sql.count("?")).fetchall()
+    except sqlite3.Error:
+        return None
+    return "\n".join(r[3] for r in rows)
+
+
+def sugerir(consulta: Consulta, caminho: Path, tamanhos: Dict[str, int]) -> None:
+    """Testa indices candidatos para as tabelas varridas e guarda os que melhoram o plano"""
+    aliases = _aliases(consulta.sql)
+    tabelas = {v.split(" ")[0] for v in consulta.varreduras}
+    if not tabelas and consulta.temp_btree:
+        tabelas = {t for t in aliases.values() if tamanhos.get(t, 0) >= LIMITE_TABELA_PEQUENA}
+    conn = sqlite3.connect(caminho, isolation_level=None)
+    try:
+        base = _plano_sem_parametros(conn, consulta.sql)
+        if base is None:
+            return
+        for tabela in sorted(tabelas):
+            colunas = {r[1] for r in conn.execute(f"PRAGMA table_info({tabela})")}
+            candidatos, notas = _candidatos(consulta.sql, tabela, colunas, aliases)
+            consulta.notas.extend(n for n in notas if n not in consulta.notas)
+            existentes = {r[1] for r in conn.execute(f"PRAGMA index_list({tabela})")}
+            for indice in candidatos:
+                colunas_sql = ", ".join(indice)
+                conn.execute("BEGIN")
+                try:
+                    conn.execute(f"CREATE INDEX {INDICE_TESTE} ON {tabela}({colunas_sql})")
+                    plano = _plano_sem_parametros(conn, consulta.sql)
+                finally:
+                    conn.execute("ROLLBACK")
+                if plano and INDICE_TESTE in plano and _melhor(plano, base, tabela, aliases):
+                    nome = f"idx_{tabela}_{'_'.join(indice[:3])}"
+                    if nome in existentes:
+                        nome += "_cobertura"
+                    consulta.sugestoes.append(f"CREATE INDEX {nome} ON {tabela}({colunas_sql})")
+                    break
+    finally:
+        conn.close()
+
+
+def _custo(plano: str, tabela: str, aliases: Dict[str, str]) -> Tuple[int, int]:
+    """(varreduras completas da tabela, B-trees temporarias) de um plano"""
+    varreduras = 0
+    for linha in plano.splitlines():
+        scan = _SCAN.match(linha.strip())
+        if scan and aliases.get(scan.group(1), scan.group(1)) == tabela and not scan.group(3):
+            varreduras += 1
+    return varreduras, plano.count("USE TEMP B-TREE")
+
+
+def _melhor(plano: str, base: str, tabela: str, aliases: Dict[str, str]) -> bool:
+    return _custo(plano, tabela, aliases) < _custo(base, tabela, aliases)
+
+
+def comparar(consultas: Dict[str, Consulta], referencia: Dict) -> Tuple[List[str], List[str]]:
+    """(regressoes, avisos) em relacao a referencia gravada"""
+    anteriores = referencia.get("consultas", {})
+    regressoes, avisos = [], []
+    for sql, consulta in consultas.items():
+        anterior = anteriores.get(sql)
+        origem = ", ".join(sorted(consulta.origens))
+        if anterior is None:
+            if consulta.status == "varredura":
+                avisos.append(f"nova consulta com varredura ({origem}): {sql[:120]}")
+            continue
+        if STATUS.index(consulta.status) > STATUS.index(anterior["status"]):
+            # varrer um indice inteiro no lugar de uma busca custa o mesmo que varrer a tabela
+            regressoes.append(f"{anterior['status']} -> {consulta.status} ({origem}): {sql[:120]}")
+        if consulta.temp_btree and not anterior.get("temp_btree"):
+            avisos.append(f"nova B-tree temporaria ({origem}): {sql[:120]}")
+    return regressoes, avisos
+
+
+def _como_json(consultas: Dict[str, Consulta]) -> Dict:
+    return {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "sqlite": sqlite3.sqlite_version,
+        "consultas": {
+            sql: {
+                "status": c.status,
+                "temp_btree": c.temp_btree,
+                "origens": sorted(c.origens),
+                "plano": c.plano,
+                "notas": c.notas,
+                "sugestoes": c.sugestoes,
+            }
+            for sql, c in sorted(consultas.items())
+        },
+    }
+
+
+def imprimir(consultas: Dict[str, Consulta]) -> None:
+    problemas = [c for c in consultas.values() if c.status != "busca" or c.temp_btree]
+    problemas.sort(key=lambda c: (-STATUS.index(c.status), -len(c.temp_btree), c.sql))
+    for c in problemas:
+        marcas = [c.status.upper()] if c.status != "busca" else []
+        if c.temp_btree:
+            marcas.append(f"TEMP B-TREE ({', '.join(c.temp_btree)})")
+        tabelas = c.varreduras or sorted(set(_aliases(c.sql).values()))
+        print(f"\n[{' | '.join(marcas)}] {', '.join(tabelas)}")
+        for origem in sorted(c.origens):
+            print(f"  origem: {origem}")
+        print(f"  sql: {c.sql[:300]}")
+        print("  plano:")
+        for linha in c.plano.splitlines():
+            print(f"    {linha}")
+        for nota in c.notas:
+            print(f"  nota: {nota}")
+        for sugestao in c.sugestoes:
+            print(f"  sugestao: {sugestao};")
+    total = len(consultas)
+    contagem = {s: sum(1 for c in consultas.values() if c.status == s) for s in STATUS}
+    temp = sum(1 for c in consultas.values() if c.temp_btree)
+    print(f"\n{total} consultas | busca: {contagem['busca']} | varredura de indice: "
+          f"{contagem['varredura_indice']} | varredura: {contagem['varredura']} | B-tree temporaria: {temp}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Verifica os planos de consulta dos servicos")
+    parser.add_argument("--lancamentos", type=int, default=50_000)
+    parser.add_argument("--dir", type=Path, default=PROJECT_ROOT / "output" / "benchmark",
+                        help="pasta do banco gerado (reaproveitado entre execucoes)")
+    parser.add_argument("--referencia", type=Path, default=REFERENCIA_PADRAO)
+    parser.add_argument("--atualizar", action="store_true", help="grava os planos atuais como referencia")
+    parser.add_argument("--saida", type=Path, help="relatorio completo em JSON")
+    args = parser.parse_args(argv)
+
+    args.dir.mkdir(parents=True, exist_ok=True)
+    rotulo = f"planos_{args.lancamentos}"
+    preparar_banco(args.dir, rotulo, args.lancamentos).fechar()
+    caminho = args.dir / f"benchmark_{rotulo}.db"
+    # Instrumentacao propria: plano de toda instrucao, sem log de lentas
+    db = Database(caminho, instrumentacao=Instrumentacao(float("inf"), explicar_sempre=True))
+    consultas, erros = capturar(db)
+    db.fechar()
+
+    with sqlite3.connect(caminho) as conn:
+        tabelas = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        tamanhos = {t: conn.execute(f'SELECT COUNT(*) FROM "{t}"').fetchone()[0] for t in tabelas}
+        parciais = {
+            r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND sql LIKE '% WHERE %'")
+        }
+    for consulta in consultas.values():
+        analisar(consulta, tamanhos, parciais)
+        if consulta.status != "busca" or consulta.temp_btree:
+            sugerir(consulta, caminho, tamanhos)
+
+    imprimir(consultas)
+    for erro in erros:
+        print(f"[AVISO] chamada falhou: {erro}")
+    resultado = _como_json(consultas)
+    if args.saida:
+        args.saida.write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    if args.atualizar:
+        args.referencia.write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\nReferencia atualizada: {args.referencia}")
+        return 0
+    if not args.referencia.exists():
+        print(f"\n[AVISO] Sem referencia em {args.referencia}; rode com --atualizar para criar")
+        return 0
+    regressoes, avisos = comparar(consultas, json.loads(args.referencia.read_text(encoding="utf-8")))
+    for aviso in avisos:
+        print(f"[AVISO] {aviso}")
+    if regressoes:
+        print(f"\n[ERRO] {len(regressoes)} consulta(s) que faziam busca por indice passaram a varrer:")
+        for regressao in regressoes:
+            print(f"  {regressao}")
+        return 1
+    print("\n[OK] Nenhuma consulta indexada regrediu para varredura")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())